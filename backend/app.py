@@ -1,15 +1,10 @@
 from flask import Flask
 from flask_cors import CORS
 from extensions import db, migrate, db_failover
-from sqlalchemy.exc import OperationalError
-from sqlalchemy import text, create_engine
 import os
 import sys
-import sys
 from pathlib import Path
 
-FAILOVER_STATE_FILE = "/tmp/failover_state.txt"
-
 def create_app(config_object=None):
     app = Flask(__name__)
     
@@ -31,77 +26,33 @@ def create_app(config_object=None):
             app.config.from_object(config_object)
 
     # =========================================================
-    # 3️⃣ Restaurar failover persistente
+    # 3️⃣ Estado de failover compartido entre workers
     # =========================================================
-    if os.path.exists(FAILOVER_STATE_FILE):
-        try:
-            with open(FAILOVER_STATE_FILE, "r") as f:
-                if f.read().strip() == "mirror":
-                    mirror_url = app.config.get("MIRROR_DATABASE_URL")
-                    if mirror_url:
-                        app.config["SQLALCHEMY_DATABASE_URI"] = mirror_url
-                        app.logger.warning("🔄 Arranque en MIRROR por estado persistente")
-        except Exception:
-            pass
+    # El coordinador (utils/failover.py) guarda en FAILOVER_STATE_FILE si
+    # se usa primary o mirror; todos los workers arrancan en el mismo.
+    app.config.setdefault("PRIMARY_DATABASE_URI", app.config["SQLALCHEMY_DATABASE_URI"])
+    db_failover.init_app(app)
+    app.config["SQLALCHEMY_DATABASE_URI"] = db_failover.initial_url()
+    if db_failover.using_mirror:
+        app.logger.warning("🔄 Arranque en MIRROR por estado compartido")
 
     # =========================================================
-    # 4️⃣ Verificar conexión ANTES de inicializar SQLAlchemy
+    # 4️⃣ Sin verificación de conexión al arrancar: el engine se conecta
+    #    en el primer uso (db_failover.connect) y, si el primary no
+    #    responde, cae al mirror sin bloquear el arranque del worker.
     # =========================================================
-    def test_connection(db_url, label):
-        c_args = {"connect_timeout": 5} if "postgresql" in db_url else {}
-        engine = create_engine(db_url, connect_args=c_args)
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        engine.dispose()
-        app.logger.info(f"✅ Conexión exitosa a {label}")
-
-    try:
-        test_connection(app.config["SQLALCHEMY_DATABASE_URI"], "PRIMARY")
-    except OperationalError as e:
-        app.logger.warning(f"⚠️ Primary no disponible: {str(e)[:120]}")
-        mirror_url = app.config.get("MIRROR_DATABASE_URL")
-        if not mirror_url:
-            app.logger.critical("❌ No hay Mirror configurado")
-            raise
-        app.logger.warning("🔄 Cambiando a MIRROR automáticamente")
-        app.config["SQLALCHEMY_DATABASE_URI"] = mirror_url
-        test_connection(mirror_url, "MIRROR")
-        try:
-            with open(FAILOVER_STATE_FILE, "w") as f:
-                f.write("mirror")
-        except Exception:
-            pass
 
     # =========================================================
     # 5️⃣ Inicialización de extensiones
     # =========================================================
-    db_failover.init_app(app)
     db.init_app(app)
     migrate.init_app(app, db)
 
     # =========================================================
-    # 6️⃣ Health check por cada request
-    # =========================================================
-    @app.before_request
-    def check_database_connection():
-        if db_failover.using_mirror:
-            return
-        try:
-            with db.engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
-        except OperationalError:
-            app.logger.error("💥 Primary caído durante ejecución")
-            if db_failover.mirror_url:
-                app.logger.warning("🔄 Activando failover automático")
-                db_failover._switch_to_mirror()
-                try:
-                    with open(FAILOVER_STATE_FILE, "w") as f:
-                        f.write("mirror")
-                except Exception:
-                    pass
-            else:
-                db.session.rollback()
-                raise
+    # 6️⃣ Failover: ya no se hace SELECT 1 en cada request. Un solo
+    #    worker sondea y los demás aplican el estado compartido
+    #    (before_request registrado en db_failover.init_app).
+    # =========================================================
 
     # =========================================================
     # 7️⃣ Registro de Blueprints
@@ -110,15 +61,38 @@ def create_app(config_object=None):
     for bp in all_blueprints:
         app.register_blueprint(bp)
 
+    # =========================================================
+    # 7️⃣.1 Compresión de respuestas (br / gzip)
+    # =========================================================
+    from utils.compression import init_compression
+    init_compression(app)
+
+    # =========================================================
+    # 7️⃣.2 Cola de subidas de archivos (hojas de vida)
+    # =========================================================
+    from utils.upload_pipeline import init_upload_pipeline
+    init_upload_pipeline(app)
+
+    # =========================================================
+    # 7️⃣.3 Cola de borrado de archivos (lotes + huérfanos)
+    # =========================================================
+    from utils.file_cleanup import init_file_cleanup
+    init_file_cleanup(app)
+
     # =========================================================
     # 8️⃣ Setup mirror automático
     # =========================================================
     with app.app_context():
-        _setup_mirror_auto(app)
+        schema_setup = _setup_mirror_auto(app)
+
+    # 8️⃣.1 Trabajos del mirror: setup + copia inicial en segundo plano y cola (MIRROR_TRIGGER_LEVEL=queue)
+    from utils.mirror_jobs import init_mirror_jobs
+    init_mirror_jobs(app, schema_setup=schema_setup)
 
     return app
 
 def _setup_mirror_auto(app):
+    """Configura el mirror; True si el schema mirror de PostgreSQL se prepara en segundo plano."""
     try:
         mirror_url = app.config.get("MIRROR_DATABASE_URL")
         mirror_schema = app.config.get("MIRROR_SCHEMA", "mirror")
@@ -126,14 +100,37 @@ def _setup_mirror_auto(app):
 
         if dialect.startswith("postgres") and mirror_url:
             print("[Mirror] Mirror externo detectado. Replicación gestionada externamente.")
-            return
+            return False
 
         if dialect.startswith("postgres"):
-            from utils.mirror_db import auto_setup_postgres_schema_mirror
-            auto_setup_postgres_schema_mirror(db.engine, mirror_schema)
-            print(f"[Mirror] PostgreSQL schema '{mirror_schema}' listo")
+            # Sin conexiones en create_app: schema, triggers y copia pendiente
+            # se preparan en un hilo (utils/mirror_jobs.start_schema_setup_job)
+            return True
+
+        if dialect == "sqlite" and app.config.get("MIRROR_DB_ENABLED"):
+            _setup_sqlite_mirror(app, mirror_schema)
     except Exception as e:
         print(f"[Mirror] Error en auto-setup: {e}")
+    return False
+
+def _setup_sqlite_mirror(app, mirror_schema):
+    """WAL + ATTACH + triggers TEMP en cada conexión; la primera vez crea el mirror."""
+    from utils.mirror_db import (
+        SQLITE_WRITE_VIEW_PREFIX, configure_sqlite_mirror, setup_mirror_schema_and_triggers,
+    )
+    mirror_path = app.config.get("MIRROR_DB_PATH")
+    configure_sqlite_mirror(
+        db.engine, mirror_path, schema_name=mirror_schema,
+        synchronous=app.config.get("MIRROR_SQLITE_SYNCHRONOUS", "NORMAL"),
+    )
+    with db.engine.begin() as conn:
+        vistas = conn.exec_driver_sql(
+            f"SELECT COUNT(*) FROM {mirror_schema}.sqlite_master WHERE type = 'view' AND name LIKE ?",
+            (f"{SQLITE_WRITE_VIEW_PREFIX}%",),
+        ).scalar()
+        if not vistas:
+            setup_mirror_schema_and_triggers(conn, mirror_path=mirror_path, schema_name=mirror_schema)
+    print(f"[Mirror] SQLite mirror listo en {mirror_path}")
 
 # =========================================================
 # 9️⃣ Inicialización de DB y Seeders (RUN_DB_INIT=1)
@@ -23,11 +23,23 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "devkey")
 
     # Mirror DB config:
-    # - SQLite: uses ATTACH DATABASE to a file path and triggers write into schema 'mirror'.
+    # - SQLite: uses ATTACH DATABASE to a file path; per-connection TEMP triggers write into
+    #   schema 'mirror' through its write views (utils/mirror_db.configure_sqlite_mirror).
     # - PostgreSQL: supports two modes:
     #   - schema mode: mirrors into another schema within the same DB (MIRROR_SCHEMA)
     #   - external mode: mirror is another DB (e.g., another container) used for read-only inspection
     MIRROR_SCHEMA = os.getenv("MIRROR_SCHEMA", "mirror")
+    # Postgres schema mode: "statement" (transition tables, one upsert per statement), "row"
+    # or "queue" (triggers only enqueue keys; utils/mirror_jobs.py applies them async)
+    MIRROR_TRIGGER_LEVEL = os.getenv("MIRROR_TRIGGER_LEVEL", "statement")
+    # Copia inicial del schema mirror por lotes de PK (fuera del arranque)
+    MIRROR_COPY_MODE = os.getenv("MIRROR_COPY_MODE", "background")  # background | cli
+    MIRROR_COPY_CHUNK_SIZE = int(os.getenv("MIRROR_COPY_CHUNK_SIZE", "5000"))
+    MIRROR_QUEUE_APPLIER = os.getenv("MIRROR_QUEUE_APPLIER", "app")  # app | cli
+    MIRROR_QUEUE_INTERVAL = float(os.getenv("MIRROR_QUEUE_INTERVAL", "2"))
+    MIRROR_QUEUE_BATCH_SIZE = int(os.getenv("MIRROR_QUEUE_BATCH_SIZE", "1000"))
+    # Filas por lote de los cursores del diff primary vs mirror (/api/mirror/diff/<tabla>)
+    MIRROR_DIFF_BATCH_SIZE = int(os.getenv("MIRROR_DIFF_BATCH_SIZE", "1000"))
     MIRROR_DB_PATH = os.getenv("MIRROR_DB_PATH", str(BASE_DIR / "database_mirror.db"))
     # Mirror DB:
     # - Si MIRROR_DATABASE_URL está definido => modo externo (Docker/otra instancia)
@@ -36,6 +48,61 @@ class Config:
 
     # SQLite only: if enabled (or mirror file exists), the app will ATTACH the mirror DB for each connection.
     MIRROR_DB_ENABLED = os.getenv("MIRROR_DB_ENABLED", "0") == "1"
+    # SQLite only: PRAGMA synchronous for both files (journal_mode is always WAL when mirroring)
+    MIRROR_SQLITE_SYNCHRONOUS = os.getenv("MIRROR_SQLITE_SYNCHRONOUS", "NORMAL")
+
+    # Failover coordinado entre workers (utils/failover.py)
+    FAILOVER_STATE_FILE = os.getenv("FAILOVER_STATE_FILE", "/tmp/chrispar_failover.json")
+    FAILOVER_PROBE_INTERVAL = float(os.getenv("FAILOVER_PROBE_INTERVAL", "5"))
+    FAILOVER_FAILURE_THRESHOLD = int(os.getenv("FAILOVER_FAILURE_THRESHOLD", "3"))
+    FAILOVER_RECOVERY_THRESHOLD = int(os.getenv("FAILOVER_RECOVERY_THRESHOLD", "5"))
+    FAILOVER_MAX_BACKOFF = float(os.getenv("FAILOVER_MAX_BACKOFF", "60"))
+    # Timeout de cada conexión nueva (el engine conecta en el primer uso)
+    FAILOVER_CONNECT_TIMEOUT = int(os.getenv("FAILOVER_CONNECT_TIMEOUT", "2"))
+    # Deshabilitar la suscripción y ajustar secuencias del mirror al pasar a él
+    FAILOVER_PREPARE_MIRROR = os.getenv("FAILOVER_PREPARE_MIRROR", "0") == "1"
+    MIRROR_SUBSCRIPTION = os.getenv("MIRROR_SUBSCRIPTION", "chrispar_sub")
+    # Esquemas cuyas secuencias se ajustan al promover el mirror
+    MIRROR_PROMOTE_SCHEMAS = tuple(os.getenv("MIRROR_PROMOTE_SCHEMAS", "public").split(","))
 
     #Server de archivos
     FILE_SERVER_URL = os.getenv('FILE_SERVER_URL')
+    # Cliente HTTP del server de archivos (utils/file_service.py)
+    FILE_SERVER_POOL_SIZE = int(os.getenv("FILE_SERVER_POOL_SIZE", "10"))
+    FILE_SERVER_RETRIES = int(os.getenv("FILE_SERVER_RETRIES", "3"))
+    FILE_SERVER_BREAKER_THRESHOLD = int(os.getenv("FILE_SERVER_BREAKER_THRESHOLD", "5"))
+    FILE_SERVER_BREAKER_RESET = float(os.getenv("FILE_SERVER_BREAKER_RESET", "30"))
+
+    # Subida directa navegador -> server de archivos con token firmado
+    # (mismo FILE_UPLOAD_SECRET en file_server_docker). URL pública de /upload
+    # para el navegador; por defecto la misma que usa el backend.
+    FILE_UPLOAD_SECRET = os.getenv("FILE_UPLOAD_SECRET")
+    FILE_SERVER_PUBLIC_URL = os.getenv("FILE_SERVER_PUBLIC_URL") or FILE_SERVER_URL
+    UPLOAD_TOKEN_TTL = int(os.getenv("UPLOAD_TOKEN_TTL", "300"))
+    UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+    # Plazo para registrar la URL de una subida directa tras expirar su token
+    UPLOAD_CLAIM_MAX_AGE = int(os.getenv("UPLOAD_CLAIM_MAX_AGE", "86400"))
+
+    # Cola local de subidas al server de archivos (utils/upload_pipeline.py)
+    UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", str(BASE_DIR / "upload_spool"))
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+    UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "5"))
+    UPLOAD_RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", "2"))
+    UPLOAD_INLINE = os.getenv("UPLOAD_INLINE", "0") == "1"
+
+    # Cola de borrado de archivos (utils/file_cleanup.py)
+    FILE_DELETE_BATCH_SIZE = int(os.getenv("FILE_DELETE_BATCH_SIZE", "100"))
+    FILE_DELETE_MAX_RETRIES = int(os.getenv("FILE_DELETE_MAX_RETRIES", "10"))
+    FILE_ORPHAN_GRACE_SECONDS = int(os.getenv("FILE_ORPHAN_GRACE_SECONDS", "3600"))
+
+    # Carga masiva PUT /api/<cargos|empleados|horarios>/bulk (utils/bulk_upsert.py)
+    BULK_UPSERT_MAX_ITEMS = int(os.getenv("BULK_UPSERT_MAX_ITEMS", "1000"))
+
+    # Exportación CSV/XLSX en streaming GET /api/export/<recurso>.<formato> (utils/export.py)
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Compresión de respuestas (utils/compression.py)
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", "5"))
+    COMPRESS_CACHE_SIZE = int(os.getenv("COMPRESS_CACHE_SIZE", "64"))
@@ -14,4 +14,4 @@ echo "Running database migrations..."
 #flask db upgrade
 
 echo "Starting application with Gunicorn..."
-exec gunicorn -w 4 -b 0.0.0.0:5000 "app:create_app()"
+exec gunicorn -w 4 --threads 4 -b 0.0.0.0:5000 "app:create_app()"
@@ -3,6 +3,7 @@ from flask_migrate import Migrate
 from sqlalchemy.exc import OperationalError
 import logging
 import os
+import time
 
 db = SQLAlchemy()
 migrate = Migrate()
@@ -10,22 +11,48 @@ migrate = Migrate()
 logger = logging.getLogger(__name__)
 
 class DatabaseFailover:
-    """Maneja failover automático al mirror cuando el primary falla."""
+    """Failover al mirror coordinado entre workers (ver utils/failover.py).
+
+    El estado (primary/degraded/mirror/failing_back) es compartido; este
+    objeto solo aplica en el proceso la base que indica el coordinador.
+
+    Con mirror configurado el engine es perezoso: no se conecta al arrancar.
+    Su `creator` (`connect`) abre cada conexión contra la base que indica el
+    coordinador en ese momento, y si el primary no responde cuenta el fallo
+    y usa el mirror en cuanto el estado compartido lo indique. Cambiar de
+    base es solo vaciar el pool; el engine no se recrea.
+    """
     
     def __init__(self):
         self.using_mirror = False
         self.primary_url = None
         self.mirror_url = None
         self.app = None
-        # NO persistir estado - siempre iniciar con Primary
+        self.coordinator = None
+        self._generation = None
+        self._prober_pid = None
+        self._connect_args = {}
+        self.connect_timeout = 2
+        self._error_listener = False
     
     def init_app(self, app):
         """Inicializa el sistema de failover con la aplicación Flask."""
+        from utils.failover import FailoverCoordinator
         self.app = app
         
         # Guardar URLs originales
-        self.primary_url = app.config['SQLALCHEMY_DATABASE_URI']
+        self.primary_url = app.config.get('PRIMARY_DATABASE_URI', app.config['SQLALCHEMY_DATABASE_URI'])
         self.mirror_url = app.config.get('MIRROR_DATABASE_URL')
+        self.coordinator = FailoverCoordinator(
+            app.config.get('FAILOVER_STATE_FILE', '/tmp/chrispar_failover.json'),
+            self.primary_url,
+            self.mirror_url,
+            probe_interval=app.config.get('FAILOVER_PROBE_INTERVAL', 5),
+            failure_threshold=app.config.get('FAILOVER_FAILURE_THRESHOLD', 3),
+            recovery_threshold=app.config.get('FAILOVER_RECOVERY_THRESHOLD', 5),
+            max_backoff=app.config.get('FAILOVER_MAX_BACKOFF', 60),
+            on_failover=self._prepare_mirror if app.config.get('FAILOVER_PREPARE_MIRROR') else None,
+        )
         
         logger.info("Sistema de failover inicializado")
         logger.info(f"Primary: {self.primary_url[:60]}...")
@@ -33,154 +60,127 @@ class DatabaseFailover:
             logger.info(f"Mirror: {self.mirror_url[:60]}...")
         else:
             logger.warning("MIRROR_DATABASE_URL no configurado - failover deshabilitado")
-    
-    def _switch_to_mirror(self):
-        """Cambia la conexión al mirror EN MEMORIA (no persiste)."""
-        if self.using_mirror or not self.mirror_url:
+
+        if self.mirror_url:
+            self.connect_timeout = app.config.get('FAILOVER_CONNECT_TIMEOUT', 2)
+            options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+            options['creator'] = self.connect
+            # Las conexiones del pool que murieron con el primary se descartan al usarse
+            options.setdefault('pool_pre_ping', True)
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+            @app.before_request
+            def _sync_failover():
+                self.sync()
+
+            # Cualquier error de conexión adelanta el próximo sondeo. El listener
+            # es global (clase Engine): se registra una sola vez por instancia
+            # aunque init_app se llame con varias apps.
+            if not self._error_listener:
+                from sqlalchemy import event
+                from sqlalchemy.engine import Engine
+
+                event.listen(Engine, 'handle_error', self._report_connection_error)
+                self._error_listener = True
+
+    def _report_connection_error(self, context):
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+            try:
+                self.coordinator.report_failure()
+            except OSError:
+                pass
+
+    def initial_url(self):
+        """URL con la que arrancar según el estado compartido (sin sondear)."""
+        target = self.coordinator.target()
+        self.using_mirror = target == 'mirror'
+        return self.coordinator.url_for(target)
+
+    def sync(self):
+        """Aplica en este worker la base que decidió el coordinador (un stat por request)."""
+        self._ensure_prober()
+        state = self.coordinator.state()
+        if state['generation'] != self._generation:
+            target = self.coordinator.target(state)
+            if target != self.get_current_database():
+                self._use(target)
+            self._generation = state['generation']
+
+    def _ensure_prober(self):
+        """Hilo de sondeo por worker; el lock del coordinador deja sondear a uno solo."""
+        if self._prober_pid == os.getpid():
             return
-        
+        self._prober_pid = os.getpid()
+        import threading
+
+        def loop():
+            while True:
+                try:
+                    self.coordinator.probe_once()
+                except Exception as e:
+                    logger.error(f"Error en el sondeo de failover: {e}")
+                time.sleep(1)
+
+        threading.Thread(target=loop, name='failover-prober', daemon=True).start()
+
+    def connect(self):
+        """`creator` del engine: conexión DBAPI a la base vigente."""
+        target = self.coordinator.target()
         try:
-            logger.warning("=" * 70)
-            logger.warning("EJECUTANDO FAILOVER AUTOMÁTICO AL MIRROR")
-            logger.warning("=" * 70)
-            
-            # Cambiar la configuración de SQLAlchemy al mirror
-            self.app.config['SQLALCHEMY_DATABASE_URI'] = self.mirror_url
-            
-            # CRÍTICO: Recrear el engine para que use la nueva URL
-            with self.app.app_context():
-                # Cerrar todas las conexiones existentes
-                db.session.remove()
-                db.engine.dispose()
-                
-                # Forzar recreación del engine con la nueva URL
-                db.get_engine()
-            
-            # Marcar que usamos mirror
-            self.using_mirror = True
-            
-            logger.warning("=" * 70)
-            logger.warning("✅ FAILOVER COMPLETADO - AHORA USANDO MIRROR")
-            logger.warning("=" * 70)
-            logger.info(f"Nueva conexión: {self.mirror_url[:60]}...")
-            logger.info("NOTA: Al reiniciar el backend, volverá al Primary automáticamente")
-            
-        except Exception as e:
-            logger.error(f"❌ Error en failover: {e}", exc_info=True)
-            raise
+            return self._connect_to(target)
+        except Exception:
+            if target != 'primary':
+                raise
+            state = self.coordinator.record_failure()
+            if self.coordinator.target(state) != 'mirror':
+                raise
+            logger.warning("Primary no responde: conexión abierta contra el MIRROR")
+            return self._connect_to('mirror')
+
+    def _connect_to(self, target):
+        args = self._connect_args.get(target)
+        if args is None:
+            from sqlalchemy.engine import make_url
+            url = make_url(self.coordinator.url_for(target))
+            dialect_cls = url.get_dialect()
+            dialect = dialect_cls(dbapi=dialect_cls.import_dbapi())
+            cargs, cparams = dialect.create_connect_args(url)
+            if url.get_backend_name().startswith('postgres'):
+                # Un primary caído no debe colgar el request más de unos segundos
+                cparams.setdefault('connect_timeout', self.connect_timeout)
+            args = self._connect_args[target] = (dialect, cargs, cparams)
+        dialect, cargs, cparams = args
+        return dialect.connect(*cargs, **cparams)
+
+    def _use(self, target):
+        """Vacía el pool: las próximas conexiones se abren contra `target`."""
+        logger.warning("=" * 70)
+        logger.warning(f"FAILOVER: este worker pasa a usar {target.upper()}")
+        logger.warning("=" * 70)
+
+        # Solo informativo (health/mirror); el engine ya no se recrea
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = self.coordinator.url_for(target)
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        self.using_mirror = target == 'mirror'
     
     def _prepare_mirror(self):
-        """Prepara el mirror para aceptar escrituras."""
+        """Prepara el mirror para aceptar escrituras (utils/failover.promote_mirror)."""
+        from utils.failover import promote_mirror
         try:
-            # Usar una conexión temporal directa al mirror con autocommit
-            from sqlalchemy import create_engine
-            temp_engine = create_engine(self.mirror_url, isolation_level="AUTOCOMMIT")
-            
-            # Deshabilitar la suscripción
-            logger.info("Deshabilitando suscripción en mirror...")
-            try:
-                with temp_engine.connect() as conn:
-                    conn.execute(db.text("ALTER SUBSCRIPTION chrispar_sub DISABLE;"))
-                logger.info("✓ Suscripción deshabilitada")
-            except Exception as sub_error:
-                logger.warning(f"Deshabilitar - ya deshabilitada o no existe")
-            
-            try:
-                with temp_engine.connect() as conn:
-                    conn.execute(db.text("ALTER SUBSCRIPTION chrispar_sub SET (slot_name = NONE);"))
-                logger.info("✓ Slot desasociado")
-            except Exception as slot_error:
-                logger.warning(f"Slot - ya desasociado")
-            
-            try:
-                with temp_engine.connect() as conn:
-                    conn.execute(db.text("DROP SUBSCRIPTION IF EXISTS chrispar_sub;"))
-                logger.info("✓ Suscripción eliminada")
-            except Exception as drop_error:
-                logger.warning(f"Drop - suscripción ya no existe")
-            
-            # Resetear secuencias
-            logger.info("Reseteando secuencias...")
-            sequences = [
-                ("usuarios", "id"),
-                ("empleados", "id"),
-                ("cargos", "id_cargo"),
-                ("horario", "id_horario"),
-                ("asistencias", "id_asistencia"),
-                ("permisos", "id_permiso"),
-                ("nominas", "id_nomina"),
-                ("rubros", "id_rubro"),
-                ("hoja_vida", "id_hoja_vida"),
-                ("log_transaccional", "id"),
-            ]
-            
-            for table, column in sequences:
-                try:
-                    with temp_engine.connect() as conn:
-                        query = db.text(f"""
-                            SELECT setval(
-                                pg_get_serial_sequence('{table}', '{column}'), 
-                                COALESCE(MAX({column}), 1)
-                            ) FROM {table};
-                        """)
-                        result = conn.execute(query)
-                        new_val = result.scalar()
-                        logger.info(f"  ✓ {table}.{column} → {new_val}")
-                except Exception as seq_error:
-                    logger.warning(f"  ✗ {table}.{column}: {str(seq_error)[:50]}")
-            
+            pasos = promote_mirror(
+                self.mirror_url,
+                subscription=self.app.config.get('MIRROR_SUBSCRIPTION', 'chrispar_sub'),
+                schemas=self.app.config.get('MIRROR_PROMOTE_SCHEMAS', ('public',)),
+            )
+            for paso, detalle, ms in pasos:
+                logger.info(f"  ✓ {paso}: {detalle} ({ms} ms)")
             logger.info("✅ Mirror preparado para operación")
-            
-            # Cerrar engine temporal
-            temp_engine.dispose()
-                
         except Exception as e:
             logger.error(f"Error preparando mirror: {e}")
             logger.error("Traceback:", exc_info=True)
     
-    def try_reconnect_primary(self):
-        """Intenta reconectar al primary (para failback)."""
-        if not self.using_mirror:
-            return True
-        
-        try:
-            # Intentar conectar al primary
-            from sqlalchemy import create_engine
-            test_engine = create_engine(self.primary_url)
-            with test_engine.connect() as conn:
-                conn.execute(db.text("SELECT 1"))
-            test_engine.dispose()
-            
-            # Si llegamos aquí, el primary está disponible
-            logger.info("Primary disponible - ejecutando failback...")
-            self._switch_to_primary()
-            return True
-            
-        except Exception:
-            return False
-    
-    def _switch_to_primary(self):
-        """Cambia de vuelta al primary."""
-        try:
-            logger.warning("=" * 70)
-            logger.warning("EJECUTANDO FAILBACK AL PRIMARY")
-            logger.warning("=" * 70)
-            
-            self.app.config['SQLALCHEMY_DATABASE_URI'] = self.primary_url
-            
-            # Recrear el engine para usar Primary
-            with self.app.app_context():
-                db.session.remove()
-                db.engine.dispose()
-                db.get_engine()
-            
-            self.using_mirror = False
-            
-            logger.info(f"✓ Failback completado - Usando primary: {self.primary_url}")
-            
-        except Exception as e:
-            logger.error(f"Error durante failback: {e}")
-    
     def get_current_database(self):
         """Retorna 'primary' o 'mirror' según la BD activa."""
         return "mirror" if self.using_mirror else "primary"
@@ -90,6 +90,17 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # Upgrades actually applied in this run (not stamps): the mirror is only
+    # synced after `flask db upgrade`, never on migrate/current/stamp/downgrade
+    upgrades = []
+
+    def record_upgrade(ctx, step, heads, run_args):
+        if step.is_upgrade and not step.is_stamp:
+            upgrades.append(step.up_revision_id)
+
+    conf_args = dict(current_app.extensions['migrate'].configure_args)
+    conf_args['on_version_apply'] = (*conf_args.get('on_version_apply', ()), record_upgrade)
+
     connectable = get_engine()
 
     with connectable.connect() as connection:
@@ -97,12 +108,44 @@ def run_migrations_online():
             connection=connection,
             target_metadata=get_metadata(),
             process_revision_directives=process_revision_directives,
-            **current_app.extensions['migrate'].configure_args
+            **conf_args
         )
 
         with context.begin_transaction():
             context.run_migrations()
 
+        if upgrades:
+            sync_mirror_schema(connection)
+
+
+def sync_mirror_schema(connection):
+    """Post-upgrade: apply the migration's column changes to the schema mirror.
+
+    Only for the Postgres schema mirror (an external mirror gets its schema
+    through its own migrations). Failures are logged, not raised: the
+    migration itself is already committed.
+    """
+    if connection.dialect.name != 'postgresql' or current_app.config.get('MIRROR_DATABASE_URL'):
+        return
+    from utils.mirror_db import sync_mirror_drift
+
+    try:
+        with connection.begin():
+            result = sync_mirror_drift(
+                connection,
+                schema_name=current_app.config.get('MIRROR_SCHEMA', 'mirror'),
+                trigger_level=current_app.config.get('MIRROR_TRIGGER_LEVEL', 'statement'),
+            )
+    except Exception as e:
+        logger.error(f'Mirror schema sync failed: {e}')
+        return
+    for stmt in result.statements:
+        logger.info(f'Mirror: {stmt}')
+    if result.triggers_regenerated:
+        logger.info(f'Mirror triggers regenerated: {", ".join(result.triggers_regenerated)}')
+    if result.copies_pending:
+        logger.info(f'Mirror copy pending for new tables: {", ".join(result.copies_pending)}')
+
 
 if context.is_offline_mode():
     run_migrations_offline()
@@ -0,0 +1,29 @@
+"""hoja_vida estado_archivo (subida asíncrona)
+
+Revision ID: c7e2a9d41f3b
+Revises: b5911eac7f0a
+Create Date: 2026-10-19 10:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a9d41f3b'
+down_revision = 'b5911eac7f0a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('hoja_vida', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('estado_archivo', sa.String(length=20), nullable=True))
+
+    # Los registros existentes con archivo ya están subidos
+    op.execute("UPDATE hoja_vida SET estado_archivo = 'subido' WHERE ruta_archivo_url IS NOT NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('hoja_vida', schema=None) as batch_op:
+        batch_op.drop_column('estado_archivo')
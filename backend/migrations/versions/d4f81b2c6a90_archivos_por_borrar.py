@@ -0,0 +1,31 @@
+"""archivos_por_borrar (cola de borrado del servidor de archivos)
+
+Revision ID: d4f81b2c6a90
+Revises: c7e2a9d41f3b
+Create Date: 2026-10-19 17:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f81b2c6a90'
+down_revision = 'c7e2a9d41f3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archivos_por_borrar',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url', sa.String(length=500), nullable=False),
+    sa.Column('intentos', sa.Integer(), nullable=False),
+    sa.Column('ultimo_error', sa.String(length=255), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('archivos_por_borrar')
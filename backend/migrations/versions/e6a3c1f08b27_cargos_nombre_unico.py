@@ -0,0 +1,32 @@
+"""cargos.nombre_cargo único (clave de PUT /api/cargos/bulk)
+
+Revision ID: e6a3c1f08b27
+Revises: d4f81b2c6a90
+Create Date: 2026-10-19 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a3c1f08b27'
+down_revision = 'd4f81b2c6a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ON CONFLICT (nombre_cargo) necesita un índice único; falla si ya hay duplicados
+    duplicados = op.get_bind().execute(sa.text(
+        "SELECT nombre_cargo FROM cargos GROUP BY nombre_cargo HAVING COUNT(*) > 1"
+    )).scalars().all()
+    if duplicados:
+        raise RuntimeError(f"Cargos con nombre repetido, unifícalos antes de migrar: {', '.join(duplicados)}")
+    with op.batch_alter_table('cargos', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_cargos_nombre_cargo', ['nombre_cargo'])
+
+
+def downgrade():
+    with op.batch_alter_table('cargos', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_cargos_nombre_cargo', type_='unique')
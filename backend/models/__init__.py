@@ -9,4 +9,5 @@ from .hoja_vida import Hoja_Vida
 from .nomina import Nomina
 from .rubro import Rubro
 from .log_transaccional import LogTransaccional
+from .archivo_por_borrar import ArchivoPorBorrar
 
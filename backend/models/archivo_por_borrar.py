@@ -0,0 +1,20 @@
+from extensions import db
+from datetime import datetime, timezone
+
+class ArchivoPorBorrar(db.Model):
+    """Archivo del servidor de archivos pendiente de borrar (ver utils/file_cleanup.py).
+
+    La fila se inserta en la misma transacción que elimina o reemplaza la
+    hoja de vida: si esa transacción se revierte, el archivo no se borra.
+    """
+    __tablename__ = "archivos_por_borrar"
+
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(500), nullable=False)
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    ultimo_error = db.Column(db.String(255))
+    fecha_creacion = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __init__(self, url):
+        self.url = url
+        self.intentos = 0
@@ -1,5 +1,7 @@
 from extensions import db
 from datetime import datetime, timezone
+from models.usuario import Usuario
+from utils.serializers import Field, Serializer, iso, str_or_none
 
 class Asistencia(db.Model):
     __tablename__ = "asistencias"
@@ -22,3 +24,31 @@ class Asistencia(db.Model):
     
     def __repr__(self):
         return f"<Asistencia {self.id_asistencia} - Empleado {self.id_empleado} - {self.fecha}>"
+
+
+# Alias de la tabla usuarios para resolver ambos usernames en la misma consulta
+# (alias de tabla y no `aliased()`: este configura los mappers al importar)
+_creador = Usuario.__table__.alias("creador")
+_modificador = Usuario.__table__.alias("modificador")
+
+# Formato de salida (lista completa; el detalle usa un subconjunto)
+asistencia_serializer = Serializer(
+    Field("id_asistencia", Asistencia.id_asistencia),
+    Field("id_empleado", Asistencia.id_empleado),
+    Field("fecha", Asistencia.fecha, iso),
+    Field("hora_entrada", Asistencia.hora_entrada, str),
+    Field("hora_salida", Asistencia.hora_salida, str_or_none),
+    Field("horas_extra", Asistencia.horas_extra),
+    Field("creado_por", Asistencia.creado_por),
+    Field("creado_por_username", _creador.c.username,
+          join=(_creador, _creador.c.id == Asistencia.__table__.c.creado_por)),
+    Field("modificado_por", Asistencia.modificado_por),
+    Field("modificado_por_username", _modificador.c.username,
+          join=(_modificador, _modificador.c.id == Asistencia.__table__.c.modificado_por)),
+    Field("fecha_creacion", Asistencia.fecha_creacion, iso),
+    Field("fecha_actualizacion", Asistencia.fecha_actualizacion, iso),
+)
+asistencia_detalle_serializer = asistencia_serializer.only(
+    "id_asistencia", "id_empleado", "fecha", "hora_entrada", "hora_salida",
+    "horas_extra", "fecha_creacion", "fecha_actualizacion",
+)
@@ -1,8 +1,11 @@
 from extensions import db
 from datetime import datetime, timezone
+from utils.serializers import Field, Serializer, iso, json_list, money
 
 class Cargo(db.Model):
     __tablename__ = "cargos"
+    # Clave natural de PUT /api/cargos/bulk (ON CONFLICT)
+    __table_args__ = (db.UniqueConstraint("nombre_cargo", name="uq_cargos_nombre_cargo"),)
     id_cargo = db.Column(db.Integer, primary_key=True)
     nombre_cargo = db.Column(db.String(100), nullable=False)
     sueldo_base = db.Column(db.Float, nullable=False, default=0.0)
@@ -14,3 +17,19 @@ class Cargo(db.Model):
     modificado_por = db.Column(db.Integer)
     
     empleados = db.relationship("Empleado", back_populates="cargo")
+
+
+# Formato de salida (detalle completo; la lista usa un subconjunto)
+cargo_detalle_serializer = Serializer(
+    Field("id", Cargo.id_cargo),
+    Field("nombre_cargo", Cargo.nombre_cargo),
+    Field("sueldo_base", Cargo.sueldo_base, money),
+    Field("permisos", Cargo.permisos, json_list),
+    Field("fecha_creacion", Cargo.fecha_creacion, iso),
+    Field("fecha_actualizacion", Cargo.fecha_actualizacion, iso),
+    Field("creado_por", Cargo.creado_por),
+    Field("modificado_por", Cargo.modificado_por),
+)
+cargo_serializer = cargo_detalle_serializer.only(
+    "id", "nombre_cargo", "sueldo_base", "permisos", "fecha_creacion",
+)
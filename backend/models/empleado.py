@@ -1,5 +1,6 @@
 from extensions import db
 from datetime import datetime, timezone
+from utils.serializers import Field, Serializer, iso
 
 class Empleado(db.Model):
     __tablename__ = "empleados"
@@ -32,3 +33,28 @@ class Empleado(db.Model):
     horarios = db.relationship("Horario", back_populates="empleado", cascade="all, delete-orphan")
     hojas_vida = db.relationship("Hoja_Vida", back_populates="empleado", cascade="all, delete-orphan")
     nominas = db.relationship("Nomina", back_populates="empleado", cascade="all, delete-orphan")
+
+
+# Formato de salida de la lista
+empleado_serializer = Serializer(
+    Field("id", Empleado.id),
+    Field("id_usuario", Empleado.id_usuario),
+    Field("cargo_id", Empleado.id_cargo),
+    Field("nombres", Empleado.nombres),
+    Field("apellidos", Empleado.apellidos),
+    Field("fecha_nacimiento", Empleado.fecha_nacimiento, iso),
+    Field("cedula", Empleado.cedula),
+    Field("estado", Empleado.estado),
+    Field("fecha_ingreso", Empleado.fecha_ingreso, iso),
+    Field("fecha_egreso", Empleado.fecha_egreso, iso),
+    Field("tipo_cuenta_bancaria", Empleado.tipo_cuenta_bancaria),
+    Field("numero_cuenta_bancaria", Empleado.numero_cuenta_bancaria),
+    Field("modalidad_fondo_reserva", Empleado.modalidad_fondo_reserva),
+    Field("modalidad_decimos", Empleado.modalidad_decimos),
+)
+# El detalle expone el usuario como `usuario_id` y omite fecha_egreso
+empleado_detalle_serializer = empleado_serializer.only(
+    "id", "nombres", "apellidos", "cedula", "estado", "fecha_ingreso",
+    "fecha_nacimiento", "cargo_id", "tipo_cuenta_bancaria",
+    "numero_cuenta_bancaria", "modalidad_fondo_reserva", "modalidad_decimos",
+).extend(Field("usuario_id", Empleado.id_usuario))
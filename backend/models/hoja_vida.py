@@ -1,6 +1,9 @@
 from extensions import db
 from datetime import datetime, timezone
+from flask import has_app_context
 from sqlalchemy.types import Date
+from utils.file_service import is_file_server_url
+from utils.serializers import Field, Serializer, iso
 
 class Hoja_Vida(db.Model):
     __tablename__ = "hoja_vida"
@@ -15,6 +18,9 @@ class Hoja_Vida(db.Model):
     fecha_inicio = db.Column(Date)
     fecha_finalizacion = db.Column(Date)
     ruta_archivo_url = db.Column(db.String(500)) # Saneado de "ruta_archivo(urlpath)"
+    # Subida asíncrona del archivo: None (sin archivo), pendiente, subido, error,
+    # externo (enlace fuera del servidor de archivos)
+    estado_archivo = db.Column(db.String(20))
 
     # Campos de auditoría (según ERD)
     fecha_creacion = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -41,17 +47,41 @@ class Hoja_Vida(db.Model):
 
     # Método para serializar
     def to_dict(self):
-        return {
-            "id_hoja_vida": self.id_hoja_vida,
-            "id_empleado": self.id_empleado,
-            "tipo": self.tipo,
-            "nombre_documento": self.nombre_documento,
-            "institucion": self.institucion,
-            "fecha_inicio": self.fecha_inicio.isoformat() if self.fecha_inicio else None,
-            "fecha_finalizacion": self.fecha_finalizacion.isoformat() if self.fecha_finalizacion else None,
-            "ruta_archivo_url": self.ruta_archivo_url,
-            "fecha_creacion": self.fecha_creacion.isoformat() if self.fecha_creacion else None,
-            "fecha_actualizacion": self.fecha_actualizacion.isoformat() if self.fecha_actualizacion else None,
-            "creado_por": self.creado_por,
-            "modificado_por": self.modificado_por
-        }
\ No newline at end of file
+        return hoja_vida_serializer.dump(self)
+
+
+# Formatos para los que el servidor de archivos genera miniatura (thumbnails.py)
+THUMBNAIL_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "pdf"}
+
+
+def thumbnail_url(url):
+    """URL de la miniatura que genera el servidor de archivos (/files/x -> /thumbnails/x).
+
+    None para enlaces externos y formatos sin miniatura (.doc, .docx): su
+    /thumbnails/ siempre respondería 404.
+    """
+    if not url or not has_app_context() or not is_file_server_url(url):
+        return None
+    base, name = url.rsplit("/files/", 1)
+    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if extension not in THUMBNAIL_EXTENSIONS:
+        return None
+    return f"{base}/thumbnails/{name}"
+
+
+hoja_vida_serializer = Serializer(
+    Field("id_hoja_vida", Hoja_Vida.id_hoja_vida),
+    Field("id_empleado", Hoja_Vida.id_empleado),
+    Field("tipo", Hoja_Vida.tipo),
+    Field("nombre_documento", Hoja_Vida.nombre_documento),
+    Field("institucion", Hoja_Vida.institucion),
+    Field("fecha_inicio", Hoja_Vida.fecha_inicio, iso),
+    Field("fecha_finalizacion", Hoja_Vida.fecha_finalizacion, iso),
+    Field("ruta_archivo_url", Hoja_Vida.ruta_archivo_url),
+    Field("thumbnail_url", Hoja_Vida.ruta_archivo_url, thumbnail_url),
+    Field("estado_archivo", Hoja_Vida.estado_archivo),
+    Field("fecha_creacion", Hoja_Vida.fecha_creacion, iso),
+    Field("fecha_actualizacion", Hoja_Vida.fecha_actualizacion, iso),
+    Field("creado_por", Hoja_Vida.creado_por),
+    Field("modificado_por", Hoja_Vida.modificado_por),
+)
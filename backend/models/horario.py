@@ -1,6 +1,7 @@
 from extensions import db
 from datetime import datetime, timezone
 from sqlalchemy.types import Time, Date
+from utils.serializers import Field, Serializer, iso
 
 class Horario(db.Model):
     __tablename__ = "horario"
@@ -43,19 +44,22 @@ class Horario(db.Model):
 
     # Método para serializar el objeto (útil para el GET)
     def to_dict(self):
-        return {
-            "id_horario": self.id_horario,
-            "id_empleado": self.id_empleado,
-            "dia_laborables": self.dia_laborables,
-            "fecha_inicio": self.fecha_inicio.isoformat() if self.fecha_inicio else None,
-            "hora_entrada": self.hora_entrada.isoformat() if self.hora_entrada else None,
-            "hora_salida": self.hora_salida.isoformat() if self.hora_salida else None,
-            "descanso_minutos": self.descanso_minutos,
-            "turno": self.turno,
-            "inicio_vigencia": self.inicio_vigencia.isoformat() if self.inicio_vigencia else None,
-            "fin_vigencia": self.fin_vigencia.isoformat() if self.fin_vigencia else None,
-            "fecha_creacion": self.fecha_creacion.isoformat() if self.fecha_creacion else None,
-            "fecha_actualizacion": self.fecha_actualizacion.isoformat() if self.fecha_actualizacion else None,
-            "creado_por": self.creado_por,
-            "modificado_por": self.modificado_por
-        }
\ No newline at end of file
+        return horario_serializer.dump(self)
+
+
+horario_serializer = Serializer(
+    Field("id_horario", Horario.id_horario),
+    Field("id_empleado", Horario.id_empleado),
+    Field("dia_laborables", Horario.dia_laborables),
+    Field("fecha_inicio", Horario.fecha_inicio, iso),
+    Field("hora_entrada", Horario.hora_entrada, iso),
+    Field("hora_salida", Horario.hora_salida, iso),
+    Field("descanso_minutos", Horario.descanso_minutos),
+    Field("turno", Horario.turno),
+    Field("inicio_vigencia", Horario.inicio_vigencia, iso),
+    Field("fin_vigencia", Horario.fin_vigencia, iso),
+    Field("fecha_creacion", Horario.fecha_creacion, iso),
+    Field("fecha_actualizacion", Horario.fecha_actualizacion, iso),
+    Field("creado_por", Horario.creado_por),
+    Field("modificado_por", Horario.modificado_por),
+)
@@ -1,5 +1,6 @@
 from extensions import db
 from datetime import datetime, timezone
+from utils.serializers import Field, Serializer, iso
 
 class LogTransaccional(db.Model):
     __tablename__ = 'log_transaccional'
@@ -14,13 +15,16 @@ class LogTransaccional(db.Model):
     datos_nuevos = db.Column(db.Text, nullable=True)
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'tabla_afectada': self.tabla_afectada,
-            'operacion': self.operacion,
-            'id_registro': self.id_registro,
-            'usuario': self.usuario,
-            'fecha_hora': self.fecha_hora.isoformat() if self.fecha_hora else None,
-            'datos_anteriores': self.datos_anteriores,
-            'datos_nuevos': self.datos_nuevos
-        }
\ No newline at end of file
+        return log_serializer.dump(self)
+
+
+log_serializer = Serializer(
+    Field('id', LogTransaccional.id),
+    Field('tabla_afectada', LogTransaccional.tabla_afectada),
+    Field('operacion', LogTransaccional.operacion),
+    Field('id_registro', LogTransaccional.id_registro),
+    Field('usuario', LogTransaccional.usuario),
+    Field('fecha_hora', LogTransaccional.fecha_hora, iso),
+    Field('datos_anteriores', LogTransaccional.datos_anteriores),
+    Field('datos_nuevos', LogTransaccional.datos_nuevos),
+)
@@ -1,5 +1,6 @@
 from extensions import db
 from datetime import datetime
+from utils.serializers import Field, Serializer, iso, zero_if_empty
 
 
 class Nomina(db.Model):
@@ -25,3 +26,15 @@ class Nomina(db.Model):
     def __repr__(self):
         fecha = self.mes if self.mes else (self.fecha_generacion.isoformat() if self.fecha_generacion else None)
         return f"<Nomina {self.id_nomina} - Empleado {self.id_empleado} - {fecha}>"
+
+
+# Formato de salida (igual en lista y detalle)
+nomina_serializer = Serializer(
+    Field("id_nomina", Nomina.id_nomina),
+    Field("id_empleado", Nomina.id_empleado),
+    Field("mes", Nomina.mes),
+    Field("fecha_generacion", Nomina.fecha_generacion, iso),
+    Field("sueldo_base", Nomina.sueldo_base),
+    Field("horas_extra", Nomina.horas_extra),
+    Field("total_desembolsar", Nomina.total_desembolsar, zero_if_empty),
+)
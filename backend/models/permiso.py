@@ -1,5 +1,6 @@
 from extensions import db
 from datetime import datetime, timezone
+from utils.serializers import Field, Serializer, iso
 
 class Permiso(db.Model):
     __tablename__ = "permisos"
@@ -24,3 +25,24 @@ class Permiso(db.Model):
     
     def __repr__(self):
         return f"<Permiso {self.id_permiso} - Empleado {self.id_empleado} - {self.tipo}>"
+
+
+# Formato de salida (lista completa; el detalle omite la auditoría de usuario)
+permiso_serializer = Serializer(
+    Field("id_permiso", Permiso.id_permiso),
+    Field("id_empleado", Permiso.id_empleado),
+    Field("tipo", Permiso.tipo),
+    Field("descripcion", Permiso.descripcion),
+    Field("fecha_inicio", Permiso.fecha_inicio, iso),
+    Field("fecha_fin", Permiso.fecha_fin, iso),
+    Field("estado", Permiso.estado),
+    Field("autorizado_por", Permiso.autorizado_por),
+    Field("fecha_creacion", Permiso.fecha_creacion, iso),
+    Field("fecha_actualizacion", Permiso.fecha_actualizacion, iso),
+    Field("creado_por", Permiso.creado_por),
+    Field("modificado_por", Permiso.modificado_por),
+)
+permiso_detalle_serializer = permiso_serializer.only(
+    "id_permiso", "id_empleado", "tipo", "descripcion", "fecha_inicio",
+    "fecha_fin", "estado", "autorizado_por", "fecha_creacion", "fecha_actualizacion",
+)
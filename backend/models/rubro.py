@@ -1,5 +1,6 @@
 from extensions import db
 from datetime import datetime, timezone
+from utils.serializers import Field, Serializer, iso
 
 
 class Rubro(db.Model):
@@ -27,3 +28,22 @@ class Rubro(db.Model):
 
     def __repr__(self):
         return f"<Rubro {self.id_rubro} - Nomina {self.id_nomina} - {self.tipo} : {self.monto}>"
+
+
+# Formato de salida (detalle completo; la lista omite la auditoría)
+rubro_detalle_serializer = Serializer(
+    Field("id_rubro", Rubro.id_rubro),
+    Field("id_nomina", Rubro.id_nomina),
+    Field("tipo", Rubro.tipo),
+    Field("monto", Rubro.monto),
+    Field("fecha", Rubro.fecha, iso),
+    Field("autorizado_por", Rubro.autorizado_por),
+    Field("motivo", Rubro.motivo),
+    Field("operacion", Rubro.operacion),
+    Field("fecha_creacion", Rubro.fecha_creacion, iso),
+    Field("fecha_actualizacion", Rubro.fecha_actualizacion, iso),
+)
+rubro_serializer = rubro_detalle_serializer.only(
+    "id_rubro", "id_nomina", "tipo", "monto", "fecha", "autorizado_por",
+    "motivo", "operacion",
+)
@@ -1,5 +1,6 @@
 from extensions import db
 from datetime import datetime, timezone
+from utils.serializers import Field, Serializer, iso
 
 class Usuario(db.Model):
     __tablename__ = "usuarios"
@@ -14,3 +15,13 @@ class Usuario(db.Model):
     empleado = db.relationship("Empleado", back_populates="usuario", uselist=False)
     # Descomentar cuando se cree el modelo LogTransaccional:
     # logs = db.relationship("LogTransaccional", back_populates="usuario")
+
+
+# Formato de salida (sin contraseña)
+usuario_serializer = Serializer(
+    Field("id", Usuario.id),
+    Field("username", Usuario.username),
+    Field("rol", Usuario.rol),
+    Field("fecha_creacion", Usuario.fecha_creacion, iso),
+    Field("fecha_actualizacion", Usuario.fecha_actualizacion, iso),
+)
@@ -10,6 +10,7 @@ from .rubro_routes import rubro_bp
 from .log_transaccional_routes import log_bp
 from .mirror_routes import mirror_bp
 from .health_routes import health_bp
+from .export_routes import export_bp
 
 # Lista con todos los blueprints ya configurados con su propio url_prefix
 all_blueprints = [
@@ -25,4 +26,5 @@ all_blueprints = [
     log_bp,
     mirror_bp,
     health_bp,
+    export_bp,
 ]
\ No newline at end of file
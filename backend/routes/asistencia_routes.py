@@ -1,16 +1,28 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models.asistencia import Asistencia
+from models.asistencia import Asistencia, asistencia_serializer, asistencia_detalle_serializer
 from models.log_transaccional import LogTransaccional
-from models.usuario import Usuario
 from utils.auth import token_required, admin_required
 from utils.parsers import parse_date, parse_time
+from utils.http_cache import collection_validators, row_validators_or_404
+from utils.serializers import json_response, requested_fields
 import json
 from datetime import datetime, time as dt_time, timedelta
 from models.horario import Horario
 
 asistencia_bp = Blueprint("asistencia", __name__, url_prefix="/api/asistencias")
 
+
+def query_asistencias(args):
+    """Asistencias con los filtros de la lista (los comparte /api/export/asistencias)."""
+    query = Asistencia.query
+    # Filtrar por id_empleado si se proporciona
+    id_empleado = args.get("id_empleado")
+    if id_empleado:
+        query = query.filter_by(id_empleado=int(id_empleado))
+    return query
+
+
 @asistencia_bp.route("/", methods=["POST"])
 @admin_required
 def crear_asistencia(current_user):
@@ -200,45 +212,19 @@ def crear_asistencia(current_user):
 @asistencia_bp.route("/", methods=["GET"])
 @token_required
 def listar_asistencias(current_user):
+    serializer = requested_fields(asistencia_serializer)
     try:
-        # Filtrar por id_empleado si se proporciona
-        id_empleado = request.args.get("id_empleado")
-        
-        if id_empleado:
-            asistencias = Asistencia.query.filter_by(id_empleado=int(id_empleado)).all()
-        else:
-            asistencias = Asistencia.query.all()
-        
-        result = []
-        for a in asistencias:
-            creado_usuario = None
-            mod_usuario = None
-            try:
-                if a.creado_por:
-                    u = Usuario.query.get(a.creado_por)
-                    creado_usuario = u.username if u else None
-                if a.modificado_por:
-                    m = Usuario.query.get(a.modificado_por)
-                    mod_usuario = m.username if m else None
-            except Exception:
-                creado_usuario = None
-                mod_usuario = None
-
-            result.append({
-                "id_asistencia": a.id_asistencia,
-                "id_empleado": a.id_empleado,
-                "fecha": a.fecha.isoformat(),
-                "hora_entrada": str(a.hora_entrada),
-                "hora_salida": str(a.hora_salida) if a.hora_salida else None,
-                "horas_extra": a.horas_extra,
-                "creado_por": a.creado_por,
-                "creado_por_username": creado_usuario,
-                "modificado_por": a.modificado_por,
-                "modificado_por_username": mod_usuario,
-                "fecha_creacion": a.fecha_creacion.isoformat() if a.fecha_creacion else None,
-                "fecha_actualizacion": a.fecha_actualizacion.isoformat() if a.fecha_actualizacion else None
-            })
-        return jsonify(result), 200
+        query = query_asistencias(request.args)
+
+        # GET condicional: si el cliente ya tiene esta versión, no se serializa nada
+        validators = collection_validators(query, Asistencia.id_asistencia, Asistencia.fecha_actualizacion)
+        if validators.is_fresh():
+            return validators.not_modified()
+
+        # Una sola consulta (con los usernames por OUTER JOIN) en lugar de
+        # dos consultas extra por cada asistencia
+        result = serializer.all(query)
+        return validators.apply(json_response(result)), 200
     except Exception as error:
         return jsonify({"error": f"Error al listar asistencias: {str(error)}"}), 500
 
@@ -246,18 +232,14 @@ def listar_asistencias(current_user):
 @asistencia_bp.route("/<int:id>", methods=["GET"])
 @token_required
 def obtener_asistencia(current_user, id):
+    serializer = requested_fields(asistencia_detalle_serializer)
     try:
-        a = Asistencia.query.get_or_404(id)
-        return jsonify({
-            "id_asistencia": a.id_asistencia,
-            "id_empleado": a.id_empleado,
-            "fecha": a.fecha.isoformat(),
-            "hora_entrada": str(a.hora_entrada),
-            "hora_salida": str(a.hora_salida) if a.hora_salida else None,
-            "horas_extra": a.horas_extra,
-            "fecha_creacion": a.fecha_creacion.isoformat() if a.fecha_creacion else None,
-            "fecha_actualizacion": a.fecha_actualizacion.isoformat() if a.fecha_actualizacion else None
-        }), 200
+        validators = row_validators_or_404(Asistencia.id_asistencia, Asistencia.fecha_actualizacion, id)
+        if validators.is_fresh():
+            return validators.not_modified()
+
+        data = serializer.first_or_404(Asistencia.query.filter_by(id_asistencia=id))
+        return validators.apply(json_response(data)), 200
     except Exception as error:
         return jsonify({"error": f"Error al obtener asistencia: {str(error)}"}), 500
 
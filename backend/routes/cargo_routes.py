@@ -1,20 +1,39 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models.cargo import Cargo
+from models.cargo import Cargo, cargo_serializer, cargo_detalle_serializer
 from models.log_transaccional import LogTransaccional
 from utils.auth import token_required, admin_required
+from utils.bulk_upsert import BulkSpec, bulk_upsert_response
+from utils.serializers import json_response, requested_fields, money
 import json
-from decimal import Decimal
 
 
-def _to_money_2(value):
-    try:
-        return float(Decimal(str(value)).quantize(Decimal('0.01')))
-    except Exception:
-        raise ValueError('sueldo_base inválido')
+_to_money_2 = money
 
 cargo_bp = Blueprint('cargo', __name__, url_prefix='/api/cargos')
 
+
+def _parse_cargo_bulk(data):
+    nombre = data.get('nombre_cargo') or data.get('nombre')
+    if not nombre:
+        raise ValueError("El nombre del cargo es requerido")
+    fila = {'nombre_cargo': nombre}
+    # Solo los campos enviados: en un cargo existente el resto no cambia
+    if 'sueldo_base' in data:
+        fila['sueldo_base'] = _to_money_2(data['sueldo_base'])
+    if 'permisos' in data:
+        fila['permisos'] = json.dumps(data['permisos'])
+    return fila
+
+
+CARGOS_BULK = BulkSpec(
+    model=Cargo,
+    tabla='cargos',
+    key='nombre_cargo',
+    parse=_parse_cargo_bulk,
+    audit_fields=('id_cargo', 'nombre_cargo', 'sueldo_base', 'permisos'),
+)
+
 # CREATE - Crear un nuevo cargo
 @cargo_bp.route('/', methods=['POST'])
 @admin_required
@@ -83,24 +102,21 @@ def crear_cargo(current_user):
             return jsonify({"error": "Error al crear el cargo. Verifica los datos ingresados"}), 500
 
 
+# BULK - Crear o actualizar cargos por nombre en una transacción
+@cargo_bp.route('/bulk', methods=['PUT'])
+@admin_required
+def upsert_cargos(current_user):
+    return bulk_upsert_response(CARGOS_BULK, current_user)
+
+
 # READ - Obtener todos los cargos
 @cargo_bp.route('/', methods=['GET'])
 @token_required
 def listar_cargos(current_user):
+    serializer = requested_fields(cargo_serializer)
     try:
-        cargos = Cargo.query.order_by(Cargo.id_cargo.asc()).all()
-        
-        resultado = []
-        for cargo in cargos:
-            resultado.append({
-                "id": cargo.id_cargo,
-                "nombre_cargo": cargo.nombre_cargo,
-                "sueldo_base": _to_money_2(cargo.sueldo_base),
-                "permisos": json.loads(cargo.permisos) if cargo.permisos else [],
-                "fecha_creacion": cargo.fecha_creacion.isoformat() if cargo.fecha_creacion else None
-            })
-        
-        return jsonify(resultado), 200
+        resultado = serializer.all(Cargo.query.order_by(Cargo.id_cargo.asc()))
+        return json_response(resultado), 200
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener cargos: {str(e)}"}), 500
@@ -110,22 +126,14 @@ def listar_cargos(current_user):
 @cargo_bp.route('/<int:id>', methods=['GET'])
 @token_required
 def obtener_cargo(current_user, id):
+    serializer = requested_fields(cargo_detalle_serializer)
     try:
-        cargo = Cargo.query.get(id)
+        row = serializer.apply(Cargo.query.filter_by(id_cargo=id)).first()
         
-        if not cargo:
+        if not row:
             return jsonify({"error": "Cargo no encontrado"}), 404
         
-        return jsonify({
-            "id": cargo.id_cargo,
-            "nombre_cargo": cargo.nombre_cargo,
-            "sueldo_base": _to_money_2(cargo.sueldo_base),
-            "permisos": json.loads(cargo.permisos) if cargo.permisos else [],
-            "fecha_creacion": cargo.fecha_creacion.isoformat() if cargo.fecha_creacion else None,
-            "fecha_actualizacion": cargo.fecha_actualizacion.isoformat() if cargo.fecha_actualizacion else None,
-            "creado_por": cargo.creado_por,
-            "modificado_por": cargo.modificado_por
-        }), 200
+        return json_response(serializer.render(row)), 200
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener cargo: {str(e)}"}), 500
@@ -202,6 +210,8 @@ def actualizar_cargo(current_user, id):
         return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
+        if 'unique constraint' in str(e).lower():
+            return jsonify({"error": "Ya existe un cargo con este nombre"}), 400
         return jsonify({"error": f"Error al actualizar cargo: {str(e)}"}), 500
 
 
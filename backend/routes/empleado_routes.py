@@ -1,13 +1,60 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models.empleado import Empleado
+from models.cargo import Cargo
+from models.empleado import Empleado, empleado_serializer, empleado_detalle_serializer
 from models.log_transaccional import LogTransaccional
+from models.usuario import Usuario
 from utils.auth import token_required, admin_required, module_permission_required
+from utils.bulk_upsert import BulkSpec, bulk_upsert_response
 from utils.parsers import parse_date
+from utils.serializers import json_response, requested_fields
 import json
 
 empleado_bp = Blueprint("empleado", __name__, url_prefix="/api/empleados")
 
+
+def _entero(data, campo):
+    try:
+        return int(data[campo])
+    except (TypeError, ValueError):
+        raise ValueError(f"{campo} debe ser un entero")
+
+
+def _parse_empleado_bulk(data):
+    cedula = str(data.get("cedula") or "").strip()
+    if not cedula:
+        raise ValueError("La cédula es requerida")
+    fila = {"cedula": cedula, "id_cargo": _entero(data, "id_cargo")}
+    # Solo los campos enviados: en un empleado existente el resto no cambia
+    for campo in (
+        "nombres", "apellidos", "estado", "tipo_cuenta_bancaria", "numero_cuenta_bancaria",
+        "modalidad_fondo_reserva", "modalidad_decimos",
+    ):
+        if campo in data:
+            fila[campo] = data[campo]
+    if "id_usuario" in data:
+        fila["id_usuario"] = None if data["id_usuario"] is None else _entero(data, "id_usuario")
+    for campo in ("fecha_nacimiento", "fecha_ingreso", "fecha_egreso"):
+        if campo in data:
+            fila[campo] = parse_date(data[campo])
+            if fila[campo] is None and data[campo] not in (None, ""):
+                raise ValueError(f"{campo} inválida. Use YYYY-MM-DD")
+    return fila
+
+
+EMPLEADOS_BULK = BulkSpec(
+    model=Empleado,
+    tabla="empleados",
+    key="cedula",
+    parse=_parse_empleado_bulk,
+    fks={"id_cargo": Cargo.id_cargo, "id_usuario": Usuario.id},
+    audit_fields=(
+        "id", "nombres", "apellidos", "cedula", "estado", "id_cargo", "id_usuario",
+        "fecha_nacimiento", "fecha_ingreso", "tipo_cuenta_bancaria", "numero_cuenta_bancaria",
+    ),
+    insert_defaults={"estado": "activo"},
+)
+
 @empleado_bp.route("/", methods=["POST"])
 @admin_required
 def crear_empleado(current_user):
@@ -86,31 +133,22 @@ def crear_empleado(current_user):
             return jsonify({"error": "Error al crear el empleado. Verifica los datos ingresados"}), 500
 
 
+@empleado_bp.route("/bulk", methods=["PUT"])
+@admin_required
+@module_permission_required('empleados')
+def upsert_empleados(current_user):
+    """Altas y cambios masivos por cédula en una transacción."""
+    return bulk_upsert_response(EMPLEADOS_BULK, current_user)
+
+
 @empleado_bp.route("/", methods=["GET"])
 @token_required
 @module_permission_required('empleados')
 def listar_empleados(current_user):
+    serializer = requested_fields(empleado_serializer)
     try:
-        empleados = Empleado.query.order_by(Empleado.id.asc()).all()
-        result = []
-        for e in empleados:
-            result.append({
-                "id": e.id,
-                "id_usuario": e.id_usuario,
-                "cargo_id": e.id_cargo,
-                "nombres": e.nombres,
-                "apellidos": e.apellidos,
-                "fecha_nacimiento": e.fecha_nacimiento.isoformat() if e.fecha_nacimiento else None,
-                "cedula": e.cedula,
-                "estado": e.estado,
-                "fecha_ingreso": e.fecha_ingreso.isoformat() if e.fecha_ingreso else None,
-                "fecha_egreso": e.fecha_egreso.isoformat() if e.fecha_egreso else None,
-                "tipo_cuenta_bancaria": e.tipo_cuenta_bancaria,
-                "numero_cuenta_bancaria": e.numero_cuenta_bancaria,
-                "modalidad_fondo_reserva": e.modalidad_fondo_reserva,
-                "modalidad_decimos": e.modalidad_decimos
-            })
-        return jsonify(result), 200
+        result = serializer.all(Empleado.query.order_by(Empleado.id.asc()))
+        return json_response(result), 200
     except Exception as error:
         return jsonify({"error": f"Error al listar empleados: {str(error)}"}), 500
 
@@ -119,23 +157,10 @@ def listar_empleados(current_user):
 @token_required
 @module_permission_required('empleados')
 def obtener_empleado(current_user, id):
+    serializer = requested_fields(empleado_detalle_serializer)
     try:
-        e = Empleado.query.get_or_404(id)
-        return jsonify({
-            "id": e.id,
-            "nombres": e.nombres,
-            "apellidos": e.apellidos,
-            "cedula": e.cedula,
-            "estado": e.estado,
-            "fecha_ingreso": e.fecha_ingreso.isoformat() if e.fecha_ingreso else None,
-            "fecha_nacimiento": e.fecha_nacimiento.isoformat() if e.fecha_nacimiento else None,
-            "cargo_id": e.id_cargo,
-            "usuario_id": e.id_usuario,
-            "tipo_cuenta_bancaria": e.tipo_cuenta_bancaria,
-            "numero_cuenta_bancaria": e.numero_cuenta_bancaria,
-            "modalidad_fondo_reserva": e.modalidad_fondo_reserva,
-            "modalidad_decimos": e.modalidad_decimos
-        }), 200
+        data = serializer.first_or_404(Empleado.query.filter_by(id=id))
+        return json_response(data), 200
     except Exception as error:
         return jsonify({"error": f"Error al obtener empleado: {str(error)}"}), 500
 
@@ -0,0 +1,61 @@
+"""
+Exportación de nóminas y asistencias: GET /api/export/<recurso>.<csv|xlsx>
+
+Mismos filtros (?id_empleado=) y selección de columnas (?fields=) que las
+listas. Las filas se leen con un cursor del lado del servidor y se envían
+en streaming (utils/export.py), sin armar la lista completa en memoria.
+"""
+from datetime import date
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from models.asistencia import Asistencia, asistencia_serializer
+from models.nomina import Nomina, nomina_serializer
+from routes.asistencia_routes import query_asistencias
+from routes.nomina_routes import query_nominas
+from utils.auth import token_required
+from utils.export import CSV_MIMETYPE, XLSX_MIMETYPE, stream_csv, stream_xlsx
+from utils.serializers import requested_fields
+
+export_bp = Blueprint('export', __name__, url_prefix='/api/export')
+
+# recurso -> (serializador de la lista, consulta con sus filtros, orden estable)
+EXPORTABLES = {
+    'nominas': (nomina_serializer, query_nominas, Nomina.id_nomina),
+    'asistencias': (asistencia_serializer, query_asistencias, Asistencia.id_asistencia),
+}
+
+
+@export_bp.route('/<recurso>.<any(csv, xlsx):formato>', methods=['GET'])
+@token_required
+def exportar(current_user, recurso, formato):
+    if recurso not in EXPORTABLES:
+        return jsonify({"error": f"Recurso no exportable: {recurso}", "recursos": sorted(EXPORTABLES)}), 404
+
+    base, consulta, orden = EXPORTABLES[recurso]
+    serializer = requested_fields(base)
+    try:
+        query = serializer.apply(consulta(request.args)).order_by(orden)
+    except ValueError as e:
+        return jsonify({"error": f"Filtro inválido: {str(e)}"}), 400
+
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    keys = serializer.keys
+
+    def filas():
+        # yield_per: cursor con nombre en PostgreSQL, lotes de batch_size filas
+        for row in query.yield_per(batch_size):
+            data = serializer.render(row)
+            yield [data[k] for k in keys]
+
+    if formato == 'csv':
+        cuerpo, mimetype = stream_csv(keys, filas(), batch_size=batch_size), CSV_MIMETYPE
+    else:
+        cuerpo, mimetype = stream_xlsx(keys, filas(), sheet_name=recurso, batch_size=batch_size), XLSX_MIMETYPE
+
+    nombre = f"{recurso}_{date.today().isoformat()}.{formato}"
+    return Response(
+        stream_with_context(cuerpo),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
@@ -56,6 +56,7 @@ def database_status():
             "primary_url": db_failover.primary_url,
             "mirror_url": db_failover.mirror_url,
             "using_mirror": db_failover.using_mirror,
+            "failover_state": db_failover.coordinator.state() if db_failover.coordinator else None,
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
         
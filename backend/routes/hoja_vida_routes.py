@@ -1,18 +1,54 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from extensions import db
-from models.hoja_vida import Hoja_Vida
+from models.hoja_vida import Hoja_Vida, hoja_vida_serializer, thumbnail_url
 from models.log_transaccional import LogTransaccional
 from utils.auth import token_required, admin_required
 from utils.parsers import parse_date
-from utils.file_service import upload_file_to_vm, delete_file_from_vm # Funciones del server de archivos
+from utils.http_cache import collection_validators, row_validators_or_404
+from utils.serializers import json_response, requested_fields
+from utils.file_service import files_base, is_file_server_url
+from utils.upload_tokens import InvalidUploadToken, issue_upload_token, verify_uploaded_url
+import utils.file_cleanup  # noqa: F401  (registra los hooks de la cola de borrado)
+from utils.upload_pipeline import (
+    ESTADO_EXTERNO, ESTADO_PENDIENTE, ESTADO_SUBIDO, spool_file, discard_spooled, enqueue_upload, retry_failed,
+)
 import json
 
 hoja_vida_bp = Blueprint('hoja_vida', __name__, url_prefix='/api/hojas-vida')
 
+
+def _url_archivo(data, current_user):
+    """`ruta_archivo_url` del request, validada igual al crear y al modificar.
+
+    Una URL del servidor de archivos debe ser de un archivo subido con el token
+    (`upload_token`) que se emitió a este usuario; si no, cualquiera podría
+    apuntar el registro al archivo de otro (y el hook de borrado lo eliminaría
+    al reemplazarlo). Los enlaces externos se aceptan tal cual y quedan
+    marcados como externos. Devuelve (url, estado_archivo); ValueError con
+    el motivo.
+    """
+    url = data.get('ruta_archivo_url') or None
+    if not url:
+        return None, None
+    if not is_file_server_url(url):
+        return url, ESTADO_EXTERNO
+    secret = current_app.config.get('FILE_UPLOAD_SECRET')
+    if not secret:
+        raise ValueError("La subida directa no está configurada")
+    try:
+        verify_uploaded_url(
+            secret, url, data.get('upload_token') or '', files_base(),
+            subject=current_user.id, max_age=current_app.config.get('UPLOAD_CLAIM_MAX_AGE', 86400),
+        )
+    except InvalidUploadToken as e:
+        raise ValueError(f"ruta_archivo_url rechazada: {e}")
+    return url, ESTADO_SUBIDO
+
 # CREATE - Crear
 @hoja_vida_bp.route("/", methods=["POST"])
 @admin_required
 def crear_hoja_vida(current_user):
+    job_id = None
     try:
         if request.is_json:
             data = request.get_json()
@@ -28,18 +64,22 @@ def crear_hoja_vida(current_user):
         if not tipo:
             return jsonify({"error": "El tipo de documento es requerido"}), 400
 
-        # 2. Manejo del archivo
+        # 2. Manejo del archivo: se guarda en la cola local y se sube en segundo plano
         archivo_url = None
-        if 'archivo' in request.files:
-            file = request.files['archivo']
-            if file.filename != '':
-                archivo_url = upload_file_to_vm(file)
-                if not archivo_url:
-                    return jsonify({"error": "Error al procesar el archivo en el servidor de almacenamiento"}), 500
+        file = request.files.get('archivo')
+        if file and file.filename != '':
+            try:
+                job_id = spool_file(file)
+            except OSError:
+                return jsonify({"error": "Error al procesar el archivo en el servidor de almacenamiento"}), 500
 
         # Si la URL del archivo viene en el JSON/form pero no como archivo
-        if not archivo_url and 'ruta_archivo_url' in data:
-            archivo_url = data.get('ruta_archivo_url')
+        estado_url = None
+        if not job_id:
+            try:
+                archivo_url, estado_url = _url_archivo(data, current_user)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
 
         nueva_hoja_vida = Hoja_Vida(
             id_empleado=int(id_empleado),
@@ -51,10 +91,18 @@ def crear_hoja_vida(current_user):
             ruta_archivo_url=archivo_url,
             creado_por=current_user.id
         )
+        if job_id:
+            nueva_hoja_vida.estado_archivo = ESTADO_PENDIENTE
+        else:
+            nueva_hoja_vida.estado_archivo = estado_url
         
         db.session.add(nueva_hoja_vida)
         db.session.commit()
 
+        if job_id:
+            enqueue_upload(job_id, nueva_hoja_vida.id_hoja_vida, file.filename, file.content_type)
+            job_id = None
+
         # REGISTRAR LOG
         try:
             log = LogTransaccional(
@@ -76,12 +124,18 @@ def crear_hoja_vida(current_user):
         
     except KeyError as e:
         db.session.rollback()
+        if job_id:
+            discard_spooled(job_id)
         return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
     except ValueError as e:
         db.session.rollback()
+        if job_id:
+            discard_spooled(job_id)
         return jsonify({"error": f"Valor inválido: {str(e)}"}), 400
     except Exception as e:
         db.session.rollback()
+        if job_id:
+            discard_spooled(job_id)
         error_msg = str(e)
         if 'foreign key constraint' in error_msg.lower():
             return jsonify({"error": "El empleado especificado no existe"}), 400
@@ -94,21 +148,73 @@ def crear_hoja_vida(current_user):
 @hoja_vida_bp.route("/", methods=["GET"])
 @token_required
 def listar_hojas_vida(current_user):
+    serializer = requested_fields(hoja_vida_serializer)
     # Opcional: filtrar por empleado
     id_empleado_query = request.args.get('id_empleado')
+    query = Hoja_Vida.query
     if id_empleado_query:
-        registros = Hoja_Vida.query.filter_by(id_empleado=id_empleado_query).all()
-    else:
-        registros = Hoja_Vida.query.all()
-    
-    return jsonify([r.to_dict() for r in registros])
+        query = query.filter_by(id_empleado=id_empleado_query)
+
+    validators = collection_validators(query, Hoja_Vida.id_hoja_vida, Hoja_Vida.fecha_actualizacion)
+    if validators.is_fresh():
+        return validators.not_modified()
+
+    return validators.apply(json_response(serializer.all(query)))
 
 # READ - Obtener uno
 @hoja_vida_bp.route("/<int:id_hoja_vida>", methods=["GET"])
 @token_required
 def obtener_hoja_vida(current_user, id_hoja_vida):
+    serializer = requested_fields(hoja_vida_serializer)
+    validators = row_validators_or_404(Hoja_Vida.id_hoja_vida, Hoja_Vida.fecha_actualizacion, id_hoja_vida)
+    if validators.is_fresh():
+        return validators.not_modified()
+
+    data = serializer.first_or_404(Hoja_Vida.query.filter_by(id_hoja_vida=id_hoja_vida))
+    return validators.apply(json_response(data))
+
+# TOKEN - Subida directa del navegador al server de archivos
+@hoja_vida_bp.route("/upload-token", methods=["POST"])
+@admin_required
+def emitir_token_subida(current_user):
+    secret = current_app.config.get('FILE_UPLOAD_SECRET')
+    upload_url = current_app.config.get('FILE_SERVER_PUBLIC_URL') or current_app.config.get('FILE_SERVER_URL')
+    if not secret or not upload_url:
+        return jsonify({"error": "La subida directa no está configurada"}), 503
+
+    token, payload = issue_upload_token(
+        secret,
+        ttl=current_app.config.get('UPLOAD_TOKEN_TTL', 300),
+        max_size=current_app.config.get('UPLOAD_MAX_BYTES'),
+        subject=current_user.id,
+    )
+    return jsonify({
+        "token": token,
+        "upload_url": upload_url,
+        "expira": payload['exp'],
+        "max_bytes": payload.get('max')
+    }), 201
+
+# ESTADO - Estado de la subida del archivo
+@hoja_vida_bp.route("/<int:id_hoja_vida>/archivo", methods=["GET"])
+@token_required
+def estado_archivo_hoja_vida(current_user, id_hoja_vida):
     registro = Hoja_Vida.query.get_or_404(id_hoja_vida)
-    return jsonify(registro.to_dict())
+    return jsonify({
+        "id_hoja_vida": registro.id_hoja_vida,
+        "estado_archivo": registro.estado_archivo,
+        "ruta_archivo_url": registro.ruta_archivo_url,
+        "thumbnail_url": thumbnail_url(registro.ruta_archivo_url)
+    })
+
+# REINTENTAR - Volver a encolar una subida fallida
+@hoja_vida_bp.route("/<int:id_hoja_vida>/archivo/reintentar", methods=["POST"])
+@admin_required
+def reintentar_archivo_hoja_vida(current_user, id_hoja_vida):
+    Hoja_Vida.query.get_or_404(id_hoja_vida)
+    if not retry_failed(id_hoja_vida):
+        return jsonify({"error": "No hay subidas fallidas para este registro"}), 404
+    return jsonify({"mensaje": "Subida reencolada"}), 202
 
 # # UPDATE - Actualizar
 @hoja_vida_bp.route("/<int:id_hoja_vida>", methods=["PUT"])
@@ -121,6 +227,16 @@ def actualizar_hoja_vida(current_user, id_hoja_vida):
     else:
         data = request.form
 
+    # URL nueva (subida directa o enlace externo): se valida antes de tocar nada
+    file = request.files.get('archivo')
+    url_nueva = estado_url = None
+    if not (file and file.filename != '') and data.get('ruta_archivo_url') \
+            and data.get('ruta_archivo_url') != registro.ruta_archivo_url:
+        try:
+            url_nueva, estado_url = _url_archivo(data, current_user)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
     # Guardar datos anteriores para el log
     datos_anteriores = {
         'tipo': registro.tipo,
@@ -147,25 +263,30 @@ def actualizar_hoja_vida(current_user, id_hoja_vida):
 
     registro.modificado_por = current_user.id
 
-    # 2. Lógica de Archivos (La parte nueva)
-    # Si viene un archivo nuevo en la petición...
-    if 'archivo' in request.files:
-        file = request.files['archivo']
-        if file.filename != '':
-            # A. Si ya existía un archivo antes, lo borramos de la VM
-            if registro.ruta_archivo_url:
-                delete_file_from_vm(registro.ruta_archivo_url)
-            
-            # B. Subimos el nuevo archivo
-            nueva_url = upload_file_to_vm(file)
-            
-            if nueva_url:
-                registro.ruta_archivo_url = nueva_url
-            else:
-                return jsonify({"error": "Error al subir el nuevo archivo al servidor"}), 500
+    # 2. Lógica de Archivos
+    # Si viene un archivo nuevo, se encola; el anterior se borra de la VM
+    # recién cuando el nuevo quedó subido.
+    job_id = None
+    if file and file.filename != '':
+        try:
+            job_id = spool_file(file)
+        except OSError:
+            db.session.rollback()
+            return jsonify({"error": "Error al subir el nuevo archivo al servidor"}), 500
+        anterior_url = registro.ruta_archivo_url
+        registro.estado_archivo = ESTADO_PENDIENTE
 
+    # Subida directa o enlace externo (validado arriba)
+    if url_nueva:
+        registro.ruta_archivo_url = url_nueva
+        registro.estado_archivo = estado_url
+
+    # La URL reemplazada la encola el hook de utils/file_cleanup.py en este commit
     db.session.commit()
 
+    if job_id:
+        enqueue_upload(job_id, registro.id_hoja_vida, file.filename, file.content_type, anterior_url)
+
     # REGISTRAR LOG
     try:
         datos_nuevos = {
@@ -210,11 +331,8 @@ def eliminar_hoja_vida(current_user, id_hoja_vida):
     }
     hoja_vida_id = registro.id_hoja_vida
     
-    # 1. Eliminar el archivo físico de la VM si existe
-    if registro.ruta_archivo_url:
-        delete_file_from_vm(registro.ruta_archivo_url)
-
-    # 2. Eliminar el registro de la base de datos
+    # Eliminar el registro; el archivo se encola para borrarse después del
+    # commit (hook de utils/file_cleanup.py)
     db.session.delete(registro)
     db.session.commit()
 
@@ -1,13 +1,79 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models.horario import Horario
+from models.empleado import Empleado
+from models.horario import Horario, horario_serializer
 from models.log_transaccional import LogTransaccional
 from utils.auth import token_required, admin_required
+from utils.bulk_upsert import BulkSpec, bulk_upsert_response
 from utils.parsers import parse_date, parse_time
+from utils.http_cache import collection_validators, row_validators_or_404
+from utils.serializers import json_response, requested_fields
 import json
 
 horario_bp = Blueprint('horario', __name__, url_prefix='/api/horarios')
 
+
+def _parse_horas(data):
+    """Horas de entrada/salida validadas; ValueError con el mensaje para el cliente."""
+    if not data.get("hora_entrada") or not data.get("hora_salida"):
+        raise ValueError("Las horas de entrada y salida son requeridas")
+
+    hora_entrada = parse_time(data.get("hora_entrada"))
+    hora_salida = parse_time(data.get("hora_salida"))
+    if hora_entrada is None or hora_salida is None:
+        raise ValueError("Formato de hora inválido. Use HH:MM")
+    if hora_entrada == hora_salida:
+        raise ValueError("La hora de entrada y la hora de salida no pueden ser iguales")
+
+    turno = (data.get("turno") or "").strip().lower()
+    if turno != "nocturno" and hora_salida < hora_entrada:
+        raise ValueError("La hora de salida no puede ser anterior a la hora de entrada")
+    return hora_entrada, hora_salida
+
+
+def _parse_fecha(data, campo):
+    fecha = parse_date(data.get(campo))
+    if fecha is None and data.get(campo) not in (None, ""):
+        raise ValueError(f"{campo} inválida. Use YYYY-MM-DD")
+    return fecha
+
+
+def _parse_horario_bulk(data):
+    if not data.get('id_empleado'):
+        raise ValueError("El id_empleado es requerido")
+    hora_entrada, hora_salida = _parse_horas(data)
+    fila = {
+        'id_empleado': int(data['id_empleado']),
+        'hora_entrada': hora_entrada,
+        'hora_salida': hora_salida,
+    }
+    # Solo los campos enviados: en un horario existente el resto no cambia
+    for campo in ("dia_laborables", "descanso_minutos", "turno"):
+        if campo in data:
+            fila[campo] = data[campo]
+    for campo in ("fecha_inicio", "inicio_vigencia", "fin_vigencia"):
+        if campo in data:
+            fila[campo] = _parse_fecha(data, campo)
+    if data.get('id_horario') is not None:
+        fila['id_horario'] = int(data['id_horario'])
+    return fila
+
+
+# Sin clave natural: con id_horario se actualiza ese horario, sin él es un alta
+HORARIOS_BULK = BulkSpec(
+    model=Horario,
+    tabla='horarios',
+    key='id_horario',
+    parse=_parse_horario_bulk,
+    fks={'id_empleado': Empleado.id},
+    audit_fields=(
+        'id_horario', 'id_empleado', 'dia_laborables', 'turno', 'hora_entrada', 'hora_salida',
+        'descanso_minutos', 'inicio_vigencia', 'fin_vigencia',
+    ),
+    key_must_exist=True,
+)
+
+
 # CREATE - Crear
 @horario_bp.route("/", methods=["POST"])
 @admin_required
@@ -19,19 +85,10 @@ def crear_horario(current_user):
         if not data.get('id_empleado'):
             return jsonify({"error": "El id_empleado es requerido"}), 400
         
-        if not data.get("hora_entrada") or not data.get("hora_salida"):
-            return jsonify({"error": "Las horas de entrada y salida son requeridas"}), 400
-
-        hora_entrada = parse_time(data.get("hora_entrada"))
-        hora_salida = parse_time(data.get("hora_salida"))
-        if hora_entrada is None or hora_salida is None:
-            return jsonify({"error": "Formato de hora inválido. Use HH:MM"}), 400
-        if hora_entrada == hora_salida:
-            return jsonify({"error": "La hora de entrada y la hora de salida no pueden ser iguales"}), 400
-
-        turno = (data.get("turno") or "").strip().lower()
-        if turno != "nocturno" and hora_salida < hora_entrada:
-            return jsonify({"error": "La hora de salida no puede ser anterior a la hora de entrada"}), 400
+        try:
+            hora_entrada, hora_salida = _parse_horas(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         nuevo_horario = Horario(
             id_empleado=data["id_empleado"],
@@ -94,19 +151,35 @@ def crear_horario(current_user):
         else:
             return jsonify({"error": "Error al crear el horario. Verifica los datos ingresados"}), 500
 
+# BULK - Altas y cambios masivos en una transacción
+@horario_bp.route("/bulk", methods=["PUT"])
+@admin_required
+def upsert_horarios(current_user):
+    return bulk_upsert_response(HORARIOS_BULK, current_user)
+
 # READ - Listar todos 
 @horario_bp.route("/", methods=["GET"])
 @token_required
 def listar_horarios(current_user):
-    horarios = Horario.query.all()
-    return jsonify([h.to_dict() for h in horarios])
+    serializer = requested_fields(horario_serializer)
+    query = Horario.query
+    validators = collection_validators(query, Horario.id_horario, Horario.fecha_actualizacion)
+    if validators.is_fresh():
+        return validators.not_modified()
+
+    return validators.apply(json_response(serializer.all(query)))
 
 # READ - Obtener uno 
 @horario_bp.route("/<int:id_horario>", methods=["GET"])
 @token_required
 def obtener_horario(current_user, id_horario):
-    horario = Horario.query.get_or_404(id_horario)
-    return jsonify(horario.to_dict())
+    serializer = requested_fields(horario_serializer)
+    validators = row_validators_or_404(Horario.id_horario, Horario.fecha_actualizacion, id_horario)
+    if validators.is_fresh():
+        return validators.not_modified()
+
+    data = serializer.first_or_404(Horario.query.filter_by(id_horario=id_horario))
+    return validators.apply(json_response(data))
 
 # UPDATE - Actualizar 
 @horario_bp.route("/<int:id_horario>", methods=["PUT"])
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from models.log_transaccional import LogTransaccional
+from models.log_transaccional import LogTransaccional, log_serializer
 from utils.auth import token_required
+from utils.serializers import json_response, requested_fields
 from datetime import datetime
 from sqlalchemy import and_
 
@@ -10,6 +11,7 @@ log_bp = Blueprint('log', __name__, url_prefix='/api/logs')
 @log_bp.route('/', methods=['GET'])
 @token_required
 def get_logs(current_user):
+    serializer = requested_fields(log_serializer)
     try:
         # Obtener parámetros de paginación
         page = request.args.get('page', 1, type=int)
@@ -57,13 +59,13 @@ def get_logs(current_user):
         # Ordenar por fecha descendente (más reciente primero)
         query = query.order_by(LogTransaccional.fecha_hora.desc())
         
-        # Paginar resultados
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Paginar resultados (solo las columnas del serializador, sin objetos ORM)
+        pagination = serializer.apply(query).paginate(page=page, per_page=per_page, error_out=False)
         
         # Formatear respuesta
-        logs = [log.to_dict() for log in pagination.items]
+        logs = serializer.render_all(pagination.items)
         
-        return jsonify({
+        return json_response({
             'logs': logs,
             'total': pagination.total,
             'page': pagination.page,
@@ -81,11 +83,12 @@ def get_logs(current_user):
 @log_bp.route('/<int:id>', methods=['GET'])
 @token_required
 def get_log(current_user, id):
+    serializer = requested_fields(log_serializer)
     try:
-        log = LogTransaccional.query.get(id)
-        if not log:
+        row = serializer.apply(LogTransaccional.query.filter_by(id=id)).first()
+        if not row:
             return jsonify({'error': 'Log no encontrado'}), 404
-        return jsonify(log.to_dict()), 200
+        return json_response(serializer.render(row)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -94,8 +97,9 @@ def get_log(current_user, id):
 @log_bp.route('/tabla/<string:tabla>', methods=['GET'])
 @token_required
 def get_logs_by_tabla(current_user, tabla):
+    serializer = requested_fields(log_serializer)
     try:
-        logs = LogTransaccional.query.filter_by(tabla_afectada=tabla).order_by(LogTransaccional.fecha_hora.desc()).all()
-        return jsonify([log.to_dict() for log in logs]), 200
+        query = LogTransaccional.query.filter_by(tabla_afectada=tabla).order_by(LogTransaccional.fecha_hora.desc())
+        return json_response(serializer.all(query)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
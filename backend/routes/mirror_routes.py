@@ -1,6 +1,8 @@
+import json
 import os
+from contextlib import ExitStack
 
-from flask import Blueprint, current_app, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine.url import make_url
 from sqlalchemy.pool import NullPool
@@ -9,8 +11,12 @@ from extensions import db
 from utils.auth import admin_required
 from utils.mirror_db import (
 	attach_mirror_if_needed,
+	configure_sqlite_mirror,
 	fetch_mirror_table_preview,
 	list_mirror_tables,
+	mirror_table_diff,
+	mirror_queue_depth,
+	pending_mirror_copies,
 	setup_mirror_schema_and_triggers,
 )
 
@@ -97,7 +103,7 @@ def mirror_status(current_user):
 			trigger_count = 0
 			if dialect == "sqlite" and attached:
 				trigger_count = conn.exec_driver_sql(
-					"SELECT COUNT(*) FROM sqlite_master WHERE type='trigger' AND name LIKE 'trg_mirror_%';"
+					"SELECT COUNT(*) FROM sqlite_temp_master WHERE type='trigger' AND name LIKE 'trg_mirror_%';"
 				).scalar() or 0
 			elif mirror_mode == "schema" and dialect.startswith("postgres"):
 				# Only counts triggers created by schema-mirror mode (not logical replication)
@@ -118,6 +124,8 @@ def mirror_status(current_user):
 					or 0
 				)
 
+			queue = None
+			copies = []
 			if mirror_mode == "external":
 				mirror_engine = _get_external_mirror_engine(mirror_database_url)
 				with mirror_engine.connect() as mirror_conn:
@@ -126,6 +134,10 @@ def mirror_status(current_user):
 				tables = list_mirror_tables(conn, schema_name=mirror_schema) if attached else []
 			elif mirror_mode == "schema" and dialect.startswith("postgres"):
 				tables = list_mirror_tables(conn, schema_name=mirror_schema)
+				# Queue mode: pending changes not yet applied to the mirror
+				queue = mirror_queue_depth(conn, schema_name=mirror_schema)
+				# Chunked initial copy still running (or interrupted)
+				copies = pending_mirror_copies(conn, schema_name=mirror_schema)
 			else:
 				tables = []
 
@@ -172,6 +184,17 @@ def mirror_status(current_user):
 			"tables": tables,
 			"mirror_tables_count": len(tables),
 			"mirror_triggers_count": int(trigger_count),
+			"mirror_trigger_level": current_app.config.get("MIRROR_TRIGGER_LEVEL", "statement") if mirror_mode == "schema" else None,
+			"mirror_queue_depth": queue["depth"] if queue else None,
+			"mirror_queue_lag_seconds": queue["lag_seconds"] if queue else None,
+			"mirror_copies_pending": [
+				{
+					"table": c["table_name"],
+					"rows_copied": int(c["rows_copied"]),
+					"rows_estimate": int(c["rows_estimate"]) if c["rows_estimate"] is not None else None,
+				}
+				for c in copies
+			],
 		}
 	), 200
 
@@ -217,6 +240,15 @@ def mirror_setup(current_user):
 				mirror_path=mirror_path if dialect == "sqlite" else None,
 				schema_name=mirror_schema,
 				copy_data=copy_data,
+				trigger_level=current_app.config.get("MIRROR_TRIGGER_LEVEL", "statement"),
+			)
+		if dialect == "sqlite":
+			# The triggers are TEMP: every pooled connection must install its own
+			configure_sqlite_mirror(
+				db.engine,
+				mirror_path,
+				schema_name=mirror_schema,
+				synchronous=current_app.config.get("MIRROR_SQLITE_SYNCHRONOUS", "NORMAL"),
 			)
 
 		return jsonify(
@@ -248,7 +280,7 @@ def mirror_tables(current_user):
 		if mirror_mode == "external":
 			mirror_engine = _get_external_mirror_engine(mirror_database_url)
 			with mirror_engine.connect() as mirror_conn:
-				tables = list_mirror_tables(mirror_conn, schema_name="public")
+				tables = list_mirror_tables(mirror_conn, schema_name="public", cache=True)
 				return jsonify({"tables": tables}), 200
 
 		with db.engine.connect() as conn:
@@ -258,12 +290,44 @@ def mirror_tables(current_user):
 				if not attached:
 					return jsonify({"error": "No se pudo adjuntar la BD espejo"}), 500
 
-			tables = list_mirror_tables(conn, schema_name=mirror_schema)
+			tables = list_mirror_tables(conn, schema_name=mirror_schema, cache=True)
 			return jsonify({"tables": tables}), 200
 	except Exception as e:
 		return jsonify({"error": str(e)}), 500
 
 
+def _pk_arg(name: str) -> list | None:
+	"""PK value from the query string: JSON list (composite keys) or a plain value."""
+	value = request.args.get(name)
+	if value is None:
+		return None
+	try:
+		value = json.loads(value)
+	except ValueError:
+		pass
+	return value if isinstance(value, list) else [value]
+
+
+def _preview_args() -> dict:
+	"""Query string of the table browser.
+
+	?limit=50&order=desc&columns=id,nombre&after_pk=[120]&filter.estado=activo
+	`after_pk` is the `next_after_pk` of the previous page (JSON list, or a
+	plain value for single-column keys).
+	"""
+	args = request.args
+	columns = [c.strip() for c in args.get("columns", "").split(",") if c.strip()] or None
+	after_pk = _pk_arg("after_pk")
+	filters = {k[len("filter."):]: v for k, v in args.items() if k.startswith("filter.")} or None
+	return {
+		"limit": args.get("limit", 50),
+		"order": args.get("order", "desc"),
+		"columns": columns,
+		"after_pk": after_pk,
+		"filters": filters,
+	}
+
+
 @mirror_bp.route("/table/<string:table_name>", methods=["GET"])
 @admin_required
 def mirror_table_preview(current_user, table_name: str):
@@ -272,17 +336,17 @@ def mirror_table_preview(current_user, table_name: str):
 	mirror_database_url = _get_mirror_database_url()
 	dialect = db.engine.dialect.name
 	mirror_mode = _get_mirror_mode(dialect)
-	limit = request.args.get("limit", 50)
 
 	try:
+		page_args = _preview_args()
 		if mirror_mode == "external":
 			mirror_engine = _get_external_mirror_engine(mirror_database_url)
 			with mirror_engine.connect() as mirror_conn:
 				preview = fetch_mirror_table_preview(
 					mirror_conn,
 					table_name=table_name,
-					limit=int(limit),
 					schema_name="public",
+					**page_args,
 				)
 				return jsonify(preview), 200
 
@@ -296,11 +360,61 @@ def mirror_table_preview(current_user, table_name: str):
 			preview = fetch_mirror_table_preview(
 				conn,
 				table_name=table_name,
-				limit=int(limit),
 				schema_name=mirror_schema,
+				**page_args,
 			)
 			return jsonify(preview), 200
 	except ValueError as e:
 		return jsonify({"error": str(e)}), 400
 	except Exception as e:
 		return jsonify({"error": str(e)}), 500
+
+@mirror_bp.route("/diff/<string:table_name>", methods=["GET"])
+@admin_required
+def mirror_table_diff_route(current_user, table_name: str):
+	"""Missing, extra and changed rows of the mirror in [from_pk, to_pk], as NDJSON.
+
+	One line per differing row and a final `{"op": "summary", ...}` line.
+	"""
+	mirror_path = _get_mirror_path()
+	mirror_schema = _get_mirror_schema()
+	mirror_database_url = _get_mirror_database_url()
+	dialect = db.engine.dialect.name
+	mirror_mode = _get_mirror_mode(dialect)
+
+	stack = ExitStack()
+	try:
+		source = stack.enter_context(db.engine.connect())
+		if mirror_mode == "external":
+			target = stack.enter_context(_get_external_mirror_engine(mirror_database_url).connect())
+			source_schema, target_schema = None, None
+		else:
+			if dialect == "sqlite" and not attach_mirror_if_needed(source, mirror_path, schema_name=mirror_schema):
+				stack.close()
+				return jsonify({"error": "No se pudo adjuntar la BD espejo"}), 500
+			target = source
+			source_schema, target_schema = None, mirror_schema
+		events = mirror_table_diff(
+			source,
+			target,
+			table_name=table_name,
+			source_schema=source_schema,
+			target_schema=target_schema,
+			from_pk=_pk_arg("from_pk"),
+			to_pk=_pk_arg("to_pk"),
+			batch_size=current_app.config.get("MIRROR_DIFF_BATCH_SIZE", 1000),
+		)
+	except ValueError as e:
+		stack.close()
+		return jsonify({"error": str(e)}), 400
+	except Exception as e:
+		stack.close()
+		return jsonify({"error": str(e)}), 500
+
+	def generate():
+		# The connections stay open while the response streams
+		with stack:
+			for event in events:
+				yield json.dumps(event, ensure_ascii=False) + "\n"
+
+	return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
@@ -1,24 +1,26 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models.nomina import Nomina
+from models.nomina import Nomina, nomina_serializer
 from models.empleado import Empleado
 from models.log_transaccional import LogTransaccional
 from utils.auth import token_required, admin_required
 from utils.parsers import parse_date
+from utils.serializers import json_response, requested_fields
 import json
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timezone
 
 
-def _fecha_generacion_val(n):
-	return getattr(n, 'fecha_generacion', None)
-
+nomina_bp = Blueprint('nomina', __name__, url_prefix='/api/nominas')
 
-def _total_val(n):
-	return getattr(n, 'total', None) or getattr(n, 'total_desembolsar', None) or 0.0
 
-
-nomina_bp = Blueprint('nomina', __name__, url_prefix='/api/nominas')
+def query_nominas(args):
+	"""Nóminas con los filtros de la lista (los comparte /api/export/nominas)."""
+	query = Nomina.query
+	id_empleado = args.get('id_empleado')
+	if id_empleado:
+		query = query.filter_by(id_empleado=int(id_empleado))
+	return query
 
 
 @nomina_bp.route('/', methods=['POST'])
@@ -139,25 +141,9 @@ def crear_nomina(current_user):
 @nomina_bp.route('/', methods=['GET'])
 @token_required
 def listar_nominas(current_user):
+	serializer = requested_fields(nomina_serializer)
 	try:
-		id_empleado = request.args.get('id_empleado')
-		query = Nomina.query
-		if id_empleado:
-			query = query.filter_by(id_empleado=int(id_empleado))
-		nominas = query.all()
-		result = []
-		for n in nominas:
-			fi = _fecha_generacion_val(n)
-			result.append({
-				'id_nomina': n.id_nomina,
-				'id_empleado': n.id_empleado,
-				'mes': n.mes,
-				'fecha_generacion': fi.isoformat() if fi else None,
-				'sueldo_base': n.sueldo_base,
-				'horas_extra': n.horas_extra,
-				'total_desembolsar': _total_val(n)
-			})
-		return jsonify(result), 200
+		return json_response(serializer.all(query_nominas(request.args))), 200
 	except Exception as error:
 		import traceback
 		with open("error_log.txt", "a") as f:
@@ -172,18 +158,10 @@ def listar_nominas(current_user):
 @nomina_bp.route('/<int:id>', methods=['GET'])
 @token_required
 def obtener_nomina(current_user, id):
+	serializer = requested_fields(nomina_serializer)
 	try:
-		n = Nomina.query.get_or_404(id)
-		fi = _fecha_generacion_val(n)
-		return jsonify({
-			'id_nomina': n.id_nomina,
-			'id_empleado': n.id_empleado,
-			'mes': n.mes,
-			'fecha_generacion': fi.isoformat() if fi else None,
-			'sueldo_base': n.sueldo_base,
-			'horas_extra': n.horas_extra,
-			'total_desembolsar': _total_val(n)
-		}), 200
+		data = serializer.first_or_404(Nomina.query.filter_by(id_nomina=id))
+		return json_response(data), 200
 	except Exception as error:
 		return jsonify({'error': f'Error al obtener nómina: {str(error)}'}), 500
 
@@ -198,7 +176,7 @@ def actualizar_nomina(current_user, id):
 		datos_anteriores = {
 			'sueldo_base': n.sueldo_base,
 			'horas_extra': n.horas_extra,
-			'total_desembolsar': _total_val(n)
+			'total_desembolsar': (n.total_desembolsar or 0.0)
 		}
 
 		# Map updates to existing DB columns when required
@@ -229,7 +207,7 @@ def actualizar_nomina(current_user, id):
 
 		# Registrar log
 		try:
-			datos_nuevos = {'sueldo_base': n.sueldo_base, 'horas_extra': n.horas_extra, 'total_desembolsar': _total_val(n)}
+			datos_nuevos = {'sueldo_base': n.sueldo_base, 'horas_extra': n.horas_extra, 'total_desembolsar': (n.total_desembolsar or 0.0)}
 			log = LogTransaccional(
 				tabla_afectada='nominas',
 				operacion='UPDATE',
@@ -266,8 +244,8 @@ def eliminar_nomina(current_user, id):
 		datos_anteriores = {
 			'id_empleado': n.id_empleado,
 			'mes': n.mes,
-			'fecha_generacion': (_fecha_generacion_val(n).isoformat() if _fecha_generacion_val(n) else None),
-			'total_desembolsar': _total_val(n)
+			'fecha_generacion': (n.fecha_generacion.isoformat() if n.fecha_generacion else None),
+			'total_desembolsar': (n.total_desembolsar or 0.0)
 		}
 		nomina_id = n.id_nomina
 
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models.permiso import Permiso
+from models.permiso import Permiso, permiso_serializer, permiso_detalle_serializer
 from models.log_transaccional import LogTransaccional
 from utils.auth import token_required, admin_required
 from utils.parsers import parse_date
+from utils.http_cache import collection_validators, row_validators_or_404
+from utils.serializers import json_response, requested_fields
 import json
 
 permiso_bp = Blueprint("permiso", __name__, url_prefix="/api/permisos")
@@ -94,6 +96,7 @@ def crear_permiso(current_user):
 @permiso_bp.route("/", methods=["GET"])
 @token_required
 def listar_permisos(current_user):
+    serializer = requested_fields(permiso_serializer)
     try:
         # Filtrar por id_empleado si se proporciona
         id_empleado = request.args.get("id_empleado")
@@ -106,26 +109,14 @@ def listar_permisos(current_user):
         
         if estado:
             query = query.filter_by(estado=estado)
+
+        # GET condicional: si el cliente ya tiene esta versión, no se serializa nada
+        validators = collection_validators(query, Permiso.id_permiso, Permiso.fecha_actualizacion)
+        if validators.is_fresh():
+            return validators.not_modified()
         
-        permisos = query.all()
-        
-        result = []
-        for p in permisos:
-            result.append({
-                "id_permiso": p.id_permiso,
-                "id_empleado": p.id_empleado,
-                "tipo": p.tipo,
-                "descripcion": p.descripcion,
-                "fecha_inicio": p.fecha_inicio.isoformat(),
-                "fecha_fin": p.fecha_fin.isoformat(),
-                "estado": p.estado,
-                "autorizado_por": p.autorizado_por,
-                "fecha_creacion": p.fecha_creacion.isoformat() if p.fecha_creacion else None,
-                "fecha_actualizacion": p.fecha_actualizacion.isoformat() if p.fecha_actualizacion else None,
-                "creado_por": p.creado_por,
-                "modificado_por": p.modificado_por
-            })
-        return jsonify(result), 200
+        result = serializer.all(query)
+        return validators.apply(json_response(result)), 200
     except Exception as error:
         return jsonify({"error": f"Error al listar permisos: {str(error)}"}), 500
 
@@ -133,20 +124,14 @@ def listar_permisos(current_user):
 @permiso_bp.route("/<int:id>", methods=["GET"])
 @token_required
 def obtener_permiso(current_user, id):
+    serializer = requested_fields(permiso_detalle_serializer)
     try:
-        p = Permiso.query.get_or_404(id)
-        return jsonify({
-            "id_permiso": p.id_permiso,
-            "id_empleado": p.id_empleado,
-            "tipo": p.tipo,
-            "descripcion": p.descripcion,
-            "fecha_inicio": p.fecha_inicio.isoformat(),
-            "fecha_fin": p.fecha_fin.isoformat(),
-            "estado": p.estado,
-            "autorizado_por": p.autorizado_por,
-            "fecha_creacion": p.fecha_creacion.isoformat() if p.fecha_creacion else None,
-            "fecha_actualizacion": p.fecha_actualizacion.isoformat() if p.fecha_actualizacion else None
-        }), 200
+        validators = row_validators_or_404(Permiso.id_permiso, Permiso.fecha_actualizacion, id)
+        if validators.is_fresh():
+            return validators.not_modified()
+
+        data = serializer.first_or_404(Permiso.query.filter_by(id_permiso=id))
+        return validators.apply(json_response(data)), 200
     except Exception as error:
         return jsonify({"error": f"Error al obtener permiso: {str(error)}"}), 500
 
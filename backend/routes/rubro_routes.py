@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models.rubro import Rubro
+from models.rubro import Rubro, rubro_serializer, rubro_detalle_serializer
 from models.log_transaccional import LogTransaccional
 from utils.auth import token_required, admin_required
 from utils.parsers import parse_date
+from utils.http_cache import collection_validators, row_validators_or_404
+from utils.serializers import json_response, requested_fields
 import json
 from datetime import datetime, timezone
 
@@ -99,25 +101,20 @@ def crear_rubro(current_user):
 @rubro_bp.route('/', methods=['GET'])
 @token_required
 def listar_rubros(current_user):
+	serializer = requested_fields(rubro_serializer)
 	try:
 		id_nomina = request.args.get('id_nomina')
 		query = Rubro.query
 		if id_nomina:
 			query = query.filter_by(id_nomina=int(id_nomina))
-		rubros = query.all()
-		result = []
-		for r in rubros:
-			result.append({
-				'id_rubro': r.id_rubro,
-				'id_nomina': r.id_nomina,
-				'tipo': r.tipo,
-				'monto': r.monto,
-				'fecha': r.fecha.isoformat() if r.fecha else None,
-				'autorizado_por': r.autorizado_por,
-				'motivo': r.motivo,
-				'operacion': r.operacion
-			})
-		return jsonify(result), 200
+
+		# GET condicional: si el cliente ya tiene esta versión, no se serializa nada
+		validators = collection_validators(query, Rubro.id_rubro, Rubro.fecha_actualizacion)
+		if validators.is_fresh():
+			return validators.not_modified()
+
+		result = serializer.all(query)
+		return validators.apply(json_response(result)), 200
 	except Exception as error:
 		import traceback
 		traceback.print_exc()
@@ -128,20 +125,14 @@ def listar_rubros(current_user):
 @rubro_bp.route('/<int:id>', methods=['GET'])
 @token_required
 def obtener_rubro(current_user, id):
+	serializer = requested_fields(rubro_detalle_serializer)
 	try:
-		r = Rubro.query.get_or_404(id)
-		return jsonify({
-			'id_rubro': r.id_rubro,
-			'id_nomina': r.id_nomina,
-			'tipo': r.tipo,
-			'monto': r.monto,
-			'fecha': r.fecha.isoformat() if r.fecha else None,
-			'autorizado_por': r.autorizado_por,
-			'motivo': r.motivo,
-			'operacion': r.operacion,
-			'fecha_creacion': r.fecha_creacion.isoformat() if r.fecha_creacion else None,
-			'fecha_actualizacion': r.fecha_actualizacion.isoformat() if r.fecha_actualizacion else None
-		}), 200
+		validators = row_validators_or_404(Rubro.id_rubro, Rubro.fecha_actualizacion, id)
+		if validators.is_fresh():
+			return validators.not_modified()
+
+		data = serializer.first_or_404(Rubro.query.filter_by(id_rubro=id))
+		return validators.apply(json_response(data)), 200
 	except Exception as error:
 		return jsonify({'error': f'Error al obtener rubro: {str(error)}'}), 500
 
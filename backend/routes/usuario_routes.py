@@ -1,11 +1,12 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models.usuario import Usuario
+from models.usuario import Usuario, usuario_serializer
 from models.log_transaccional import LogTransaccional
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timezone
 import json
 from utils.auth import generate_token, admin_required, token_required
+from utils.serializers import json_response, requested_fields
 
 usuario_bp = Blueprint('usuario', __name__, url_prefix='/api/usuarios')
 
@@ -87,20 +88,10 @@ def crear_usuario(current_user):
 @usuario_bp.route('/', methods=['GET'])
 @admin_required
 def obtener_usuarios(current_user):
+    serializer = requested_fields(usuario_serializer)
     try:
-        usuarios = Usuario.query.order_by(Usuario.id.asc()).all()
-        
-        resultado = []
-        for usuario in usuarios:
-            resultado.append({
-                "id": usuario.id,
-                "username": usuario.username,
-                "rol": usuario.rol,
-                "fecha_creacion": usuario.fecha_creacion.isoformat() if usuario.fecha_creacion else None,
-                "fecha_actualizacion": usuario.fecha_actualizacion.isoformat() if usuario.fecha_actualizacion else None
-            })
-        
-        return jsonify(resultado), 200
+        resultado = serializer.all(Usuario.query.order_by(Usuario.id.asc()))
+        return json_response(resultado), 200
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener usuarios: {str(e)}"}), 500
@@ -110,19 +101,14 @@ def obtener_usuarios(current_user):
 @usuario_bp.route('/<int:id>', methods=['GET'])
 @admin_required
 def obtener_usuario(current_user, id):
+    serializer = requested_fields(usuario_serializer)
     try:
-        usuario = Usuario.query.get(id)
+        row = serializer.apply(Usuario.query.filter_by(id=id)).first()
         
-        if not usuario:
+        if not row:
             return jsonify({"error": "Usuario no encontrado"}), 404
         
-        return jsonify({
-            "id": usuario.id,
-            "username": usuario.username,
-            "rol": usuario.rol,
-            "fecha_creacion": usuario.fecha_creacion.isoformat() if usuario.fecha_creacion else None,
-            "fecha_actualizacion": usuario.fecha_actualizacion.isoformat() if usuario.fecha_actualizacion else None
-        }), 200
+        return json_response(serializer.render(row)), 200
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener usuario: {str(e)}"}), 500
@@ -308,22 +294,16 @@ def login():
 
 
 # Buscar usuarios por rol
+_usuario_rol_serializer = usuario_serializer.only("id", "username", "rol", "fecha_creacion")
+
+
 @usuario_bp.route('/rol/<string:rol>', methods=['GET'])
 @admin_required
 def obtener_usuarios_por_rol(current_user, rol):
+    serializer = requested_fields(_usuario_rol_serializer)
     try:
-        usuarios = Usuario.query.filter_by(rol=rol).all()
-        
-        resultado = []
-        for usuario in usuarios:
-            resultado.append({
-                "id": usuario.id,
-                "username": usuario.username,
-                "rol": usuario.rol,
-                "fecha_creacion": usuario.fecha_creacion.isoformat() if usuario.fecha_creacion else None
-            })
-        
-        return jsonify(resultado), 200
+        resultado = serializer.all(Usuario.query.filter_by(rol=rol))
+        return json_response(resultado), 200
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener usuarios: {str(e)}"}), 500
@@ -333,13 +313,8 @@ def obtener_usuarios_por_rol(current_user, rol):
 @usuario_bp.route('/me', methods=['GET'])
 @token_required
 def obtener_mi_perfil(current_user):
-    return jsonify({
-        "id": current_user.id,
-        "username": current_user.username,
-        "rol": current_user.rol,
-        "fecha_creacion": current_user.fecha_creacion.isoformat() if current_user.fecha_creacion else None,
-        "fecha_actualizacion": current_user.fecha_actualizacion.isoformat() if current_user.fecha_actualizacion else None
-    }), 200
+    # current_user ya está cargado por token_required: no hace falta otra consulta
+    return json_response(usuario_serializer.dump(current_user)), 200
 
 
 # PERFIL - Actualizar mi perfil (solo username)
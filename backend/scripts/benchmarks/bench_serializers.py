@@ -0,0 +1,122 @@
+"""
+Microbenchmark: serialización de la lista de asistencias.
+
+Compara el enfoque anterior (objetos ORM + dict armado a mano + dos consultas
+de Usuario por fila) con el serializador precompilado (una consulta que solo
+trae las columnas necesarias, con los usernames por OUTER JOIN).
+
+Uso (desde backend/):
+    python scripts/benchmarks/bench_serializers.py --filas 2000 --repeticiones 5
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, time as dtime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from flask import Flask, jsonify
+
+from extensions import db
+from models.asistencia import Asistencia, asistencia_serializer
+from models.cargo import Cargo
+from models.empleado import Empleado
+from models.usuario import Usuario
+from utils.serializers import json_response
+
+
+def crear_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///:memory:')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def poblar(filas):
+    db.create_all()
+    usuario = Usuario(username='bench', password='x', rol='Administrador')
+    cargo = Cargo(nombre_cargo='Bench', sueldo_base=500)
+    db.session.add_all([usuario, cargo])
+    db.session.flush()
+    empleado = Empleado(id_cargo=cargo.id_cargo, nombres='Bench', apellidos='Test', cedula='0000000000')
+    db.session.add(empleado)
+    db.session.flush()
+    inicio = date(2024, 1, 1)
+    db.session.add_all([
+        Asistencia(
+            id_empleado=empleado.id,
+            fecha=inicio + timedelta(days=i),
+            hora_entrada=dtime(8, 0),
+            hora_salida=dtime(17, 0),
+            horas_extra=0,
+            creado_por=usuario.id,
+            modificado_por=usuario.id,
+        )
+        for i in range(filas)
+    ])
+    db.session.commit()
+
+
+def serializar_anterior():
+    """Réplica del handler previo a los serializadores."""
+    result = []
+    for a in Asistencia.query.order_by(Asistencia.fecha.desc()).all():
+        creador = Usuario.query.get(a.creado_por) if a.creado_por else None
+        modificador = Usuario.query.get(a.modificado_por) if a.modificado_por else None
+        result.append({
+            "id_asistencia": a.id_asistencia,
+            "id_empleado": a.id_empleado,
+            "fecha": a.fecha.isoformat(),
+            "hora_entrada": str(a.hora_entrada),
+            "hora_salida": str(a.hora_salida) if a.hora_salida else None,
+            "horas_extra": a.horas_extra,
+            "creado_por": a.creado_por,
+            "creado_por_username": creador.username if creador else None,
+            "modificado_por": a.modificado_por,
+            "modificado_por_username": modificador.username if modificador else None,
+            "fecha_creacion": a.fecha_creacion.isoformat() if a.fecha_creacion else None,
+            "fecha_actualizacion": a.fecha_actualizacion.isoformat() if a.fecha_actualizacion else None
+        })
+    return jsonify(result)
+
+
+def serializar_nuevo():
+    query = Asistencia.query.order_by(Asistencia.fecha.desc())
+    return json_response(asistencia_serializer.all(query))
+
+
+def medir(fn, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        # Sesión limpia: el identity map no debe favorecer a ninguno
+        db.session.expire_all()
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, default=2000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    app = crear_app()
+    with app.test_request_context():
+        poblar(args.filas)
+        assert serializar_anterior().get_json() == serializar_nuevo().get_json()
+
+        anterior = medir(serializar_anterior, args.repeticiones)
+        nuevo = medir(serializar_nuevo, args.repeticiones)
+
+    print(f"Filas: {args.filas}")
+    print(f"ORM + dict a mano : {anterior * 1000:8.1f} ms")
+    print(f"Serializador      : {nuevo * 1000:8.1f} ms")
+    print(f"Aceleración       : {anterior / nuevo:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Microbenchmark: escrituras en SQLite (dev/test) con y sin el mirror adjunto.
+
+Inserta N filas con un commit por fila (como la API) y luego hace un UPDATE y
+un DELETE masivos en una transacción, sobre una tabla con la forma de
+`asistencias`: sin mirror, con el mirror en journal por defecto
+(DELETE + synchronous FULL) y con el mirror en WAL + synchronous NORMAL.
+Verifica que el mirror quede igual al origen tras cada paso.
+
+Usa archivos temporales; no toca la base de la aplicación.
+
+Uso (desde backend/):
+    python scripts/benchmarks/bench_sqlite_mirror.py --filas 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from sqlalchemy import create_engine, event
+
+from utils.mirror_db import configure_sqlite_mirror, setup_mirror_schema_and_triggers
+
+TABLA = 'bench_asistencias'
+
+
+def crear_engine(directorio, modo):
+    engine = create_engine(f"sqlite:///{os.path.join(directorio, 'main.db')}")
+    mirror_path = os.path.join(directorio, 'mirror.db')
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"""
+            CREATE TABLE {TABLA} (
+                id_asistencia INTEGER PRIMARY KEY,
+                id_empleado INTEGER NOT NULL,
+                fecha TEXT NOT NULL,
+                horas_extra REAL NOT NULL,
+                observacion TEXT
+            )
+        """)
+        if modo is not None:
+            setup_mirror_schema_and_triggers(conn, mirror_path=mirror_path)
+    if modo == 'wal':
+        configure_sqlite_mirror(engine, mirror_path, synchronous='NORMAL')
+    elif modo == 'defecto':
+        # Mismo hook (ATTACH + triggers TEMP) pero devolviendo el journal por defecto
+        configure_sqlite_mirror(engine, mirror_path, synchronous='FULL')
+
+        @event.listens_for(engine, 'connect')
+        def _journal_por_defecto(dbapi_conn, _record):
+            dbapi_conn.execute("PRAGMA journal_mode=DELETE")
+            dbapi_conn.execute("PRAGMA mirror.journal_mode=DELETE")
+    return engine
+
+
+def verificar(conn, modo):
+    if modo is None:
+        return
+    diferencias = conn.exec_driver_sql(f"""
+        SELECT COUNT(*) FROM (
+            SELECT * FROM (SELECT * FROM main.{TABLA} EXCEPT SELECT * FROM mirror.{TABLA})
+            UNION ALL
+            SELECT * FROM (SELECT * FROM mirror.{TABLA} EXCEPT SELECT * FROM main.{TABLA})
+        )
+    """).scalar()
+    assert diferencias == 0, f"mirror desincronizado ({modo}): {diferencias} filas"
+
+
+def medir(modo, filas):
+    tiempos = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = crear_engine(directorio, modo)
+        try:
+            t0 = time.perf_counter()
+            for i in range(1, filas + 1):
+                with engine.begin() as conn:
+                    conn.exec_driver_sql(
+                        f"INSERT INTO {TABLA} VALUES (?, ?, '2024-01-01', 0, 'alta')", (i, i % 500)
+                    )
+            tiempos['insert x1'] = time.perf_counter() - t0
+
+            for paso, sql in (
+                ('update', f"UPDATE {TABLA} SET horas_extra = horas_extra + 1"),
+                ('delete', f"DELETE FROM {TABLA}"),
+            ):
+                with engine.begin() as conn:
+                    t0 = time.perf_counter()
+                    conn.exec_driver_sql(sql)
+                    tiempos[paso] = time.perf_counter() - t0
+                    verificar(conn, modo)
+        finally:
+            engine.dispose()
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, default=2000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    resultados = {}
+    for etiqueta, modo in (('sin mirror', None), ('mirror journal', 'defecto'), ('mirror WAL', 'wal')):
+        corridas = [medir(modo, args.filas) for _ in range(args.repeticiones)]
+        resultados[etiqueta] = {paso: min(c[paso] for c in corridas) for paso in corridas[0]}
+
+    pasos = list(resultados['sin mirror'])
+    print(f"Filas: {args.filas}")
+    print(f"{'':16}" + ''.join(f"{paso:>12}" for paso in pasos) + f"{'commits/s':>12}")
+    for etiqueta, tiempos in resultados.items():
+        print(
+            f"{etiqueta:16}" + ''.join(f"{tiempos[p] * 1000:10.0f}ms" for p in pasos)
+            + f"{args.filas / tiempos['insert x1']:12.0f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Tests de Integración para la carga masiva (PUT /api/<recurso>/bulk)
+Un lote = una transacción: validación previa, ON CONFLICT por clave natural y log por lotes
+"""
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models.cargo import Cargo
+from models.empleado import Empleado
+from models.horario import Horario
+from models.log_transaccional import LogTransaccional
+
+
+@pytest.mark.integration
+class TestBulkUpsert:
+    """Tests para los endpoints de carga masiva"""
+
+    def test_cargos_inserta_y_actualiza_por_nombre(self, client, auth_headers, app, cargo_fixture):
+        """Test: Un nombre existente se actualiza (solo los campos enviados) y uno nuevo se inserta"""
+        response = client.put('/api/cargos/bulk', json=[
+            {'nombre_cargo': 'Desarrollador Test', 'sueldo_base': 1234.567},
+            {'nombre_cargo': 'Bodeguero', 'sueldo_base': 600},
+        ], headers=auth_headers)
+
+        assert response.status_code == 200
+        assert (response.json['insertados'], response.json['actualizados']) == (1, 1)
+        assert response.json['resultados'][0] == {'indice': 0, 'id': cargo_fixture, 'operacion': 'UPDATE'}
+        with app.app_context():
+            cargo = db.session.get(Cargo, cargo_fixture)
+            assert cargo.sueldo_base == 1234.57
+            assert cargo.permisos is not None  # no enviado: no cambia
+            logs = LogTransaccional.query.filter_by(tabla_afectada='cargos').order_by(LogTransaccional.id).all()
+            assert [l.operacion for l in logs] == ['UPDATE', 'INSERT']
+            assert logs[0].datos_anteriores is not None
+
+    def test_empleados_un_solo_commit_y_consultas_en_lote(self, client, auth_headers, app, cargo_fixture):
+        """Test: 50 empleados -> consultas constantes (IN para FKs, ON CONFLICT, log) y un commit"""
+        sentencias = []
+        with app.app_context():
+            engine = db.engine
+
+        def contar(conn, cursor, statement, *args):
+            sentencias.append(statement.split()[0].upper())
+
+        event.listen(engine, 'before_cursor_execute', contar)
+        try:
+            response = client.put('/api/empleados/bulk', json={'items': [
+                {'cedula': f'09{i:08d}', 'id_cargo': cargo_fixture, 'nombres': f'Empleado {i}',
+                 'fecha_ingreso': '2024-01-15'}
+                for i in range(50)
+            ]}, headers=auth_headers)
+        finally:
+            event.remove(engine, 'before_cursor_execute', contar)
+
+        assert response.status_code == 200
+        assert response.json['insertados'] == 50
+        # auth + FK cargos + claves existentes + upsert + log, sin depender del tamaño del lote
+        assert len(sentencias) < 10
+        with app.app_context():
+            assert Empleado.query.count() == 50
+            assert Empleado.query.filter_by(cedula='0900000007').one().estado == 'activo'
+            assert LogTransaccional.query.filter_by(tabla_afectada='empleados').count() == 50
+
+    def test_lote_invalido_no_escribe_nada(self, client, auth_headers, app, cargo_fixture):
+        """Test: Errores de todo el lote por índice (FK inexistente, clave repetida, fecha) y sin escrituras"""
+        response = client.put('/api/empleados/bulk', json=[
+            {'cedula': '0911111111', 'id_cargo': cargo_fixture},
+            {'cedula': '0922222222', 'id_cargo': 9999},
+            {'cedula': '0911111111', 'id_cargo': cargo_fixture},
+            {'cedula': '0933333333', 'id_cargo': cargo_fixture, 'fecha_ingreso': '15/01/2024'},
+        ], headers=auth_headers)
+
+        assert response.status_code == 400
+        assert [e['indice'] for e in response.json['errores']] == [1, 2, 3]
+        with app.app_context():
+            assert Empleado.query.count() == 0
+            assert LogTransaccional.query.count() == 0
+
+    def test_horarios_alta_y_cambio_por_id(self, client, auth_headers, app, empleado_fixture):
+        """Test: Sin id_horario es alta, con id_horario actualiza; un id inexistente se rechaza"""
+        base = {'id_empleado': empleado_fixture, 'hora_entrada': '08:00', 'hora_salida': '17:00'}
+        creado = client.put('/api/horarios/bulk', json=[base, {**base, 'turno': 'vespertino'}], headers=auth_headers)
+        assert creado.status_code == 200
+        id_horario = creado.json['resultados'][1]['id']
+
+        response = client.put('/api/horarios/bulk', json=[
+            {**base, 'id_horario': id_horario, 'hora_salida': '18:00'},
+        ], headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json['actualizados'] == 1
+        with app.app_context():
+            horario = db.session.get(Horario, id_horario)
+            assert str(horario.hora_salida) == '18:00:00'
+            assert horario.turno == 'vespertino'  # no enviado: no cambia
+
+        response = client.put('/api/horarios/bulk', json=[{**base, 'id_horario': 999}], headers=auth_headers)
+        assert response.status_code == 400
@@ -0,0 +1,81 @@
+"""
+Tests de compresión de respuestas
+Verifica la negociación con Accept-Encoding, el umbral de tamaño y la caché de cuerpos comprimidos
+"""
+import gzip
+import json
+import pytest
+
+from utils.compression import init_compression
+
+
+@pytest.fixture
+def compressed_app(app):
+    app.config["COMPRESS_MIN_SIZE"] = 200
+    init_compression(app)
+    return app
+
+
+@pytest.fixture
+def compressed_client(compressed_app):
+    return compressed_app.test_client()
+
+
+def _crear_cargos(client, auth_headers, cantidad):
+    for i in range(cantidad):
+        client.post("/api/cargos/", json={
+            "nombre_cargo": f"Cargo de prueba {i}",
+            "sueldo_base": 500 + i
+        }, headers=auth_headers)
+
+
+@pytest.mark.integration
+class TestCompression:
+    """Tests del after_request de compresión"""
+
+    def test_gzip_si_el_cliente_lo_acepta(self, compressed_client, auth_headers):
+        """Test: Una lista grande se devuelve con gzip y se descomprime igual"""
+        _crear_cargos(compressed_client, auth_headers, 10)
+
+        plano = compressed_client.get("/api/cargos/", headers=auth_headers)
+        comprimido = compressed_client.get("/api/cargos/", headers={**auth_headers, "Accept-Encoding": "gzip"})
+
+        assert comprimido.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in comprimido.headers["Vary"]
+        assert int(comprimido.headers["Content-Length"]) < len(plano.data)
+        assert json.loads(gzip.decompress(comprimido.data)) == plano.json
+
+    def test_sin_accept_encoding_no_comprime(self, compressed_client, auth_headers):
+        """Test: Sin Accept-Encoding la respuesta va sin comprimir pero con Vary"""
+        _crear_cargos(compressed_client, auth_headers, 10)
+
+        response = compressed_client.get("/api/cargos/", headers=auth_headers)
+
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+    def test_q_cero_excluye_gzip(self, compressed_client, auth_headers):
+        """Test: gzip;q=0 desactiva la compresión"""
+        _crear_cargos(compressed_client, auth_headers, 10)
+
+        response = compressed_client.get("/api/cargos/", headers={**auth_headers, "Accept-Encoding": "gzip;q=0"})
+
+        assert "Content-Encoding" not in response.headers
+
+    def test_respuesta_pequena_no_se_comprime(self, compressed_client, auth_headers):
+        """Test: Por debajo de COMPRESS_MIN_SIZE no se comprime"""
+        response = compressed_client.get("/api/cargos/", headers={**auth_headers, "Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
+
+    def test_cuerpo_repetido_usa_cache(self, compressed_app, compressed_client, auth_headers):
+        """Test: La misma respuesta no se recomprime en cada petición"""
+        _crear_cargos(compressed_client, auth_headers, 10)
+        cache = compressed_app.extensions["compression_cache"]
+        headers = {**auth_headers, "Accept-Encoding": "gzip"}
+
+        primera = compressed_client.get("/api/cargos/", headers=headers)
+        segunda = compressed_client.get("/api/cargos/", headers=headers)
+
+        assert primera.data == segunda.data
+        assert cache.hits >= 1
@@ -0,0 +1,100 @@
+"""
+Tests de Integración para la exportación en streaming (GET /api/export/<recurso>.<csv|xlsx>)
+Mismos filtros que las listas; CSV con BOM y XLSX armado por bloques
+"""
+import csv
+from datetime import date, time
+import io
+import zipfile
+
+import pytest
+
+from extensions import db
+from models.asistencia import Asistencia
+from models.empleado import Empleado
+from models.nomina import Nomina
+
+
+@pytest.fixture
+def nominas_fixture(app, cargo_fixture, empleado_fixture):
+    """Dos empleados: 3 nóminas del fixture y 2 de otro empleado"""
+    with app.app_context():
+        otro = Empleado(id_cargo=cargo_fixture, nombres='Ana', apellidos='Mora', cedula='0911111111',
+                        estado='activo', fecha_ingreso=date(2021, 3, 1))
+        db.session.add(otro)
+        db.session.flush()
+        for i in range(3):
+            db.session.add(Nomina(id_empleado=empleado_fixture, mes=f'2024-0{i + 1}',
+                                  sueldo_base=1000, horas_extra=50, total_desembolsar=1050))
+        for i in range(2):
+            db.session.add(Nomina(id_empleado=otro.id, mes=f'Ñ & <{i}>', sueldo_base=900,
+                                  horas_extra=0, total_desembolsar=900))
+        db.session.commit()
+        yield empleado_fixture, otro.id
+
+
+@pytest.mark.integration
+class TestExportRoutes:
+    """Tests para /api/export"""
+
+    def test_csv_con_bom_cabecera_y_filtro(self, client, auth_headers, app, nominas_fixture):
+        """Test: CSV UTF-8 con BOM, cabecera del serializador y filtro id_empleado"""
+        id_empleado, _ = nominas_fixture
+        response = client.get(f'/api/export/nominas.csv?id_empleado={id_empleado}', headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        assert 'attachment; filename="nominas_' in response.headers['Content-Disposition']
+        texto = response.get_data().decode('utf-8')
+        assert texto.startswith('\ufeff')
+        filas = list(csv.DictReader(io.StringIO(texto[1:])))
+        assert len(filas) == 3
+        assert {f['id_empleado'] for f in filas} == {str(id_empleado)}
+        assert [f['mes'] for f in filas] == ['2024-01', '2024-02', '2024-03']
+
+    def test_csv_fields_y_lotes(self, client, auth_headers, app, nominas_fixture):
+        """Test: ?fields= limita columnas y el lote pequeño no cambia el resultado"""
+        app.config['EXPORT_BATCH_SIZE'] = 2
+        try:
+            response = client.get('/api/export/nominas.csv?fields=id_nomina,mes', headers=auth_headers)
+        finally:
+            app.config['EXPORT_BATCH_SIZE'] = 1000
+
+        lineas = response.get_data().decode('utf-8').lstrip('\ufeff').splitlines()
+        assert lineas[0] == 'id_nomina,mes'
+        assert len(lineas) == 6
+
+    def test_xlsx_valido_y_en_streaming(self, client, auth_headers, app, nominas_fixture):
+        """Test: El .xlsx abre como zip, tiene la hoja con cabecera + filas y textos escapados"""
+        response = client.get('/api/export/nominas.xlsx', headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype.endswith('spreadsheetml.sheet')
+        with zipfile.ZipFile(io.BytesIO(response.get_data())) as zf:
+            assert zf.testzip() is None
+            assert '[Content_Types].xml' in zf.namelist()
+            hoja = zf.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        assert hoja.count('<row ') == 6
+        assert 'Ñ &amp; &lt;0&gt;' in hoja
+        assert '<v>1050.0</v>' in hoja
+
+    def test_asistencias_csv(self, client, auth_headers, app, empleado_fixture):
+        """Test: Exporta asistencias con fecha y horas en texto"""
+        with app.app_context():
+            db.session.add(Asistencia(id_empleado=empleado_fixture, fecha=date(2024, 5, 2),
+                                      hora_entrada=time(8, 0), hora_salida=time(17, 0)))
+            db.session.commit()
+
+        response = client.get('/api/export/asistencias.csv', headers=auth_headers)
+        filas = list(csv.DictReader(io.StringIO(response.get_data().decode('utf-8').lstrip('\ufeff'))))
+        assert len(filas) == 1
+        assert filas[0]['fecha'] == '2024-05-02'
+
+    def test_errores(self, client, auth_headers):
+        """Test: Recurso desconocido -> 404, filtro inválido -> 400, sin token -> 401"""
+        assert client.get('/api/export/usuarios.csv', headers=auth_headers).status_code == 404
+        assert client.get('/api/export/nominas.pdf', headers=auth_headers).status_code == 404
+        assert client.get('/api/export/nominas.csv?id_empleado=abc', headers=auth_headers).status_code == 400
+        assert client.get('/api/export/nominas.csv').status_code == 401
@@ -0,0 +1,295 @@
+"""
+Tests del coordinador de failover
+Verifica la máquina de estados compartida: histéresis, un solo sondeo a la vez y generación común
+"""
+import fcntl
+import os
+
+import pytest
+
+from utils import failover as failover_module
+from utils.failover import (
+    DEGRADED, FAILING_BACK, MIRROR, PRIMARY, FailoverCoordinator, initial_state, next_state,
+    promote_mirror,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sondeos():
+    """Resultado de cada sondeo por base; `llamadas` registra quién sondeó."""
+    return {"primary": True, "mirror": True, "llamadas": []}
+
+
+@pytest.fixture
+def coordinador(tmp_path, sondeos):
+    def probe(url):
+        nombre = "mirror" if "mirror" in url else "primary"
+        sondeos["llamadas"].append(nombre)
+        return sondeos[nombre]
+
+    def crear(**kwargs):
+        kwargs.setdefault("probe_interval", 5)
+        kwargs.setdefault("failure_threshold", 3)
+        kwargs.setdefault("recovery_threshold", 2)
+        return FailoverCoordinator(
+            str(tmp_path / "failover.json"), "postgresql://primary/db", "postgresql://mirror/db",
+            probe=probe, clock=clock, **kwargs
+        )
+
+    clock = _Clock()
+    return crear
+
+
+def _sondear(coord, veces=1):
+    estado = None
+    for _ in range(veces):
+        coord.clock.now += 60
+        estado = coord.probe_once()
+    return estado
+
+
+@pytest.mark.unit
+class TestNextState:
+    """Tests unitarios de las transiciones"""
+
+    def test_un_fallo_solo_degrada(self):
+        """Test: Un fallo aislado no cambia de base (histéresis)"""
+        estado = next_state(initial_state(0, 5), False, lambda: True, 0)
+
+        assert estado["state"] == DEGRADED
+        assert estado["generation"] == 0
+
+    def test_fallos_seguidos_pasan_al_mirror(self):
+        """Test: Tras N fallos seguidos pasa al mirror e incrementa la generación"""
+        estado = initial_state(0, 5)
+        for _ in range(3):
+            estado = next_state(estado, False, lambda: True, 0, failure_threshold=3)
+
+        assert estado["state"] == MIRROR
+        assert estado["generation"] == 1
+
+    def test_sin_mirror_disponible_aplica_backoff(self):
+        """Test: Si el mirror tampoco responde se queda en primary con backoff creciente"""
+        estado = initial_state(0, 5)
+        for _ in range(5):
+            estado = next_state(estado, False, lambda: False, 0, failure_threshold=3, max_backoff=30)
+
+        assert estado["state"] == DEGRADED
+        assert estado["backoff"] == 30
+        assert estado["next_probe_at"] == 30
+
+
+@pytest.mark.unit
+class TestFailoverCoordinator:
+    """Tests del estado compartido entre workers"""
+
+    def test_ciclo_completo_con_failback(self, coordinador, sondeos):
+        """Test: primary -> degraded -> mirror -> failing_back -> primary"""
+        coord = coordinador()
+        sondeos["primary"] = False
+
+        assert _sondear(coord)["state"] == DEGRADED
+        assert _sondear(coord, 2)["state"] == MIRROR
+        assert coord.target() == "mirror"
+
+        sondeos["primary"] = True
+        assert _sondear(coord, 2)["state"] == FAILING_BACK
+        assert coord.target() == "mirror"
+
+        estado = _sondear(coord)
+        assert estado["state"] == PRIMARY
+        assert estado["generation"] == 2
+        assert coord.target() == "primary"
+
+    def test_workers_comparten_el_estado(self, coordinador, sondeos):
+        """Test: Lo que decide el worker que sondea lo ve otro proceso con el mismo archivo"""
+        sondeador, otro_worker = coordinador(), coordinador()
+        sondeos["primary"] = False
+
+        _sondear(sondeador, 3)
+
+        assert otro_worker.state()["state"] == MIRROR
+        assert otro_worker.target() == "mirror"
+
+    def test_un_solo_sondeo_a_la_vez(self, coordinador, sondeos):
+        """Test: Si otro worker tiene el lock de sondeo, este no sondea"""
+        coord = coordinador()
+        fd = os.open(coord.probe_lock_path, os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            assert _sondear(coord) is None
+        finally:
+            os.close(fd)
+
+        assert sondeos["llamadas"] == []
+        assert _sondear(coord)["state"] == PRIMARY
+
+    def test_no_sondea_antes_de_tiempo(self, coordinador, sondeos):
+        """Test: Entre sondeos se respeta el intervalo; report_failure lo adelanta"""
+        coord = coordinador()
+        _sondear(coord)
+        coord.clock.now += 1
+
+        assert coord.probe_once() is None
+        coord.report_failure()
+        assert coord.probe_once() is not None
+        assert sondeos["llamadas"] == ["primary", "primary"]
+
+    def test_fallos_de_conexion_de_varios_workers_se_suman(self, coordinador, sondeos):
+        """Test: Los fallos de conexión de distintos workers cuentan juntos y el mirror se prepara una vez"""
+        preparados = []
+        workers = [coordinador(on_failover=lambda: preparados.append(1)) for _ in range(4)]
+
+        estados = []
+        for w in workers[:3]:
+            estados.append(w.record_failure()["state"])
+            w.clock.now += 5
+
+        assert estados == [DEGRADED, DEGRADED, MIRROR]
+        assert workers[3].record_failure()["state"] == MIRROR
+        assert workers[0].state()["generation"] == 1
+        assert preparados == [1]
+        # Solo se sondeó el mirror antes de cambiar; el primary no se sondea
+        assert sondeos["llamadas"] == ["mirror"]
+
+    def test_rafaga_de_fallos_cuenta_una_vez(self, coordinador, sondeos):
+        """Test: Un corte breve (16 conexiones fallidas a la vez) suma un solo fallo por probe_interval"""
+        workers = [coordinador() for _ in range(16)]
+
+        estados = [w.record_failure() for w in workers]
+
+        assert {e["state"] for e in estados} == {DEGRADED}
+        assert workers[0].state()["failures"] == 1
+        assert sondeos["llamadas"] == []
+
+    def test_mirror_se_sondea_sin_el_lock_del_estado(self, tmp_path, sondeos):
+        """Test: El sondeo del mirror ocurre antes de tomar el lock del estado"""
+        coord = None
+        lock_libre = []
+
+        def probe(url):
+            fd = os.open(coord.lock_path, os.O_RDWR | os.O_CREAT)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                lock_libre.append(url)
+            except BlockingIOError:
+                pass
+            finally:
+                os.close(fd)
+            return "mirror" in url
+
+        coord = FailoverCoordinator(
+            str(tmp_path / "failover.json"), "postgresql://primary/db", "postgresql://mirror/db",
+            probe=probe, clock=_Clock(), failure_threshold=1,
+        )
+
+        assert coord.record_failure()["state"] == MIRROR
+        assert lock_libre == ["postgresql://mirror/db"]
+
+
+@pytest.mark.unit
+class TestLazyConnect:
+    """Tests del creator perezoso del engine"""
+
+    def test_primary_caido_conecta_al_mirror_sin_bloquear(self, tmp_path):
+        """Test: Si el primary no abre, los fallos se cuentan y la conexión sale contra el mirror"""
+        from extensions import DatabaseFailover
+
+        mirror_url = f"sqlite:///{tmp_path / 'mirror.db'}"
+        failover = DatabaseFailover()
+        failover.mirror_url = mirror_url
+        failover.coordinator = FailoverCoordinator(
+            str(tmp_path / "failover.json"), "sqlite:////no/existe/primary.db", mirror_url,
+            failure_threshold=1,
+        )
+
+        conexion = failover.connect()
+        try:
+            assert conexion.execute("SELECT 1").fetchone() == (1,)
+        finally:
+            conexion.close()
+        assert failover.coordinator.state()["state"] == MIRROR
+
+    def test_listener_de_errores_se_registra_una_vez(self, tmp_path):
+        """Test: Varias apps con el mismo DatabaseFailover reportan cada error de conexión una sola vez"""
+        from flask import Flask
+        from sqlalchemy import create_engine, event, text
+        from sqlalchemy.engine import Engine
+        from extensions import DatabaseFailover
+
+        failover = DatabaseFailover()
+        for _ in range(3):
+            app = Flask(__name__)
+            app.config.update(
+                SQLALCHEMY_DATABASE_URI="sqlite://", MIRROR_DATABASE_URL=f"sqlite:///{tmp_path / 'm.db'}",
+                FAILOVER_STATE_FILE=str(tmp_path / "failover.json"),
+            )
+            failover.init_app(app)
+        reportes = []
+        failover.coordinator.report_failure = lambda: reportes.append(1)
+
+        engine = create_engine("sqlite:////no/existe/x.db")
+        try:
+            with pytest.raises(Exception):
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+        finally:
+            engine.dispose()
+            event.remove(Engine, "handle_error", failover._report_connection_error)
+
+        assert reportes == [1]
+
+
+@pytest.mark.unit
+class TestPromoteMirror:
+    """Tests de la promoción del mirror en un solo viaje"""
+
+    def test_un_solo_execute_en_una_transaccion(self, monkeypatch):
+        """Test: Suscripción y secuencias van en un execute, con las secuencias salidas del catálogo"""
+        ejecutados = []
+
+        class _Conn:
+            def exec_driver_sql(self, sql, *args):
+                ejecutados.append((sql, args))
+                return [("suscripcion", "no existe", 0.1), ("secuencia", "empleados.id -> 8", 0.2)]
+
+        class _Engine:
+            transacciones = 0
+            disposed = False
+
+            def begin(self):
+                _Engine.transacciones += 1
+                conn = _Conn()
+
+                class _Ctx:
+                    def __enter__(self):
+                        return conn
+
+                    def __exit__(self, *exc):
+                        return False
+                return _Ctx()
+
+            def dispose(self):
+                _Engine.disposed = True
+
+        monkeypatch.setattr(failover_module, "create_engine", lambda url, **kw: _Engine())
+
+        pasos = promote_mirror("postgresql://mirror/db", subscription="sub'x", schemas=("public", "rrhh"))
+
+        assert _Engine.transacciones == 1 and _Engine.disposed
+        assert len(ejecutados) == 1
+        sql, args = ejecutados[0]
+        assert args == ()
+        assert "pg_depend" in sql and "setval" in sql
+        assert "'sub''x'" in sql
+        assert "ARRAY['public', 'rrhh']" in sql
+        assert [p[0] for p in pasos] == ["suscripcion", "secuencia", "total"]
@@ -0,0 +1,148 @@
+"""
+Tests de la cola de borrado de archivos
+Verifica que los archivos de hojas de vida eliminadas (también en cascada) se borren en lote
+"""
+import time
+
+import pytest
+
+import utils.file_service as file_service
+from extensions import db
+from models.archivo_por_borrar import ArchivoPorBorrar
+from models.hoja_vida import Hoja_Vida
+from utils import file_cleanup
+
+
+@pytest.fixture
+def file_server(app, monkeypatch):
+    """Simula el servidor de archivos; `errores` fuerza fallos por URL."""
+    app.config["FILE_SERVER_URL"] = "http://files.local/upload"
+    estado = {"lotes": [], "errores": {}, "caido": False, "almacenados": []}
+
+    def fake_delete_many(urls):
+        if estado["caido"]:
+            return None
+        estado["lotes"].append(list(urls))
+        return {url: estado["errores"].get(url) for url in urls}
+
+    monkeypatch.setattr(file_service, "delete_files_from_vm", fake_delete_many)
+    monkeypatch.setattr(file_service, "list_files_in_vm", lambda: estado["almacenados"])
+    return estado
+
+
+def _crear_hoja(app, empleado_id, url):
+    """Registro ya existente con esa URL (la API exige el token de subida)."""
+    with app.app_context():
+        hoja = Hoja_Vida(id_empleado=empleado_id, tipo="Curso", ruta_archivo_url=url)
+        db.session.add(hoja)
+        db.session.commit()
+        return hoja.to_dict()
+
+
+def _en_cola(app):
+    with app.app_context():
+        return [f.url for f in ArchivoPorBorrar.query.order_by(ArchivoPorBorrar.id)]
+
+
+@pytest.mark.integration
+class TestFileCleanup:
+    """Tests de la cola de borrado y el barrido de huérfanos"""
+
+    def test_eliminar_hoja_vida_encola_y_drena_en_lote(self, app, client, auth_headers, empleado_fixture, file_server):
+        """Test: Eliminar no llama al servidor; el drenado borra todo en una sola llamada"""
+        for nombre in ("a.pdf", "b.pdf"):
+            hoja = _crear_hoja(app, empleado_fixture, f"http://files.local/files/{nombre}")
+            response = client.delete(f"/api/hojas-vida/{hoja['id_hoja_vida']}", headers=auth_headers)
+            assert response.status_code == 200
+
+        assert file_server["lotes"] == []
+        assert _en_cola(app) == ["http://files.local/files/a.pdf", "http://files.local/files/b.pdf"]
+
+        assert file_cleanup.drain_deletions(app) == (2, 0)
+        assert file_server["lotes"] == [["http://files.local/files/a.pdf", "http://files.local/files/b.pdf"]]
+
+    def test_borrado_en_cascada_de_empleado_encola_archivos(self, app, client, auth_headers, empleado_fixture, file_server):
+        """Test: Al eliminar un empleado se encolan los archivos de sus hojas de vida"""
+        _crear_hoja(app, empleado_fixture, "http://files.local/files/cv.pdf")
+
+        response = client.delete(f"/api/empleados/{empleado_fixture}", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert _en_cola(app) == ["http://files.local/files/cv.pdf"]
+
+    def test_rollback_no_encola(self, app, client, auth_headers, empleado_fixture, file_server):
+        """Test: Si la eliminación se revierte el archivo no se borra"""
+        hoja = _crear_hoja(app, empleado_fixture, "http://files.local/files/a.pdf")
+
+        with app.app_context():
+            db.session.delete(db.session.get(Hoja_Vida, hoja["id_hoja_vida"]))
+            db.session.flush()
+            db.session.rollback()
+
+        assert _en_cola(app) == []
+
+    def test_enlace_externo_con_nombre_almacenado_no_se_borra(self, app, client, auth_headers, empleado_fixture, file_server):
+        """Test: Un enlace externo que termina en el nombre de otro archivo no se encola ni se borra"""
+        _crear_hoja(app, empleado_fixture, "http://files.local/files/ajeno.pdf")
+        externo = _crear_hoja(app, empleado_fixture, "http://evil.example/files/ajeno.pdf")
+        reemplazado = _crear_hoja(app, empleado_fixture, "http://evil.example/files/ajeno.pdf")
+
+        client.delete(f"/api/hojas-vida/{externo['id_hoja_vida']}", headers=auth_headers)
+        client.put(f"/api/hojas-vida/{reemplazado['id_hoja_vida']}", headers=auth_headers,
+                   json={"ruta_archivo_url": "https://docs.example.com/otro.pdf"})
+
+        assert _en_cola(app) == []
+        assert file_cleanup.drain_deletions(app) == (0, 0)
+        assert file_server["lotes"] == []
+
+    def test_fallos_quedan_para_reintentar(self, app, client, auth_headers, empleado_fixture, file_server):
+        """Test: Si el servidor no responde o falla un archivo, la fila queda con su intento"""
+        hoja = _crear_hoja(app, empleado_fixture, "http://files.local/files/a.pdf")
+        client.delete(f"/api/hojas-vida/{hoja['id_hoja_vida']}", headers=auth_headers)
+
+        file_server["caido"] = True
+        assert file_cleanup.drain_deletions(app) == (0, 1)
+
+        file_server["caido"] = False
+        file_server["errores"] = {"http://files.local/files/a.pdf": "Permission denied"}
+        assert file_cleanup.drain_deletions(app) == (0, 1)
+        with app.app_context():
+            fila = ArchivoPorBorrar.query.one()
+            assert fila.intentos == 2
+            assert fila.ultimo_error == "Permission denied"
+
+        file_server["errores"] = {}
+        assert file_cleanup.drain_deletions(app) == (1, 0)
+
+    def test_barrido_encola_solo_huerfanos_antiguos(self, app, client, auth_headers, empleado_fixture, file_server):
+        """Test: Se encolan los archivos sin hoja de vida, respetando el período de gracia"""
+        _crear_hoja(app, empleado_fixture, "http://files.local/files/usado.pdf")
+        viejo = time.time() - 7200
+        file_server["almacenados"] = [
+            {"name": "usado.pdf", "created": viejo},
+            {"name": "huerfano.pdf", "created": viejo},
+            {"name": "recien-subido.pdf", "created": time.time()},
+        ]
+
+        assert file_cleanup.sweep_orphans(app, grace_seconds=3600) == ["huerfano.pdf"]
+        assert _en_cola(app) == ["http://files.local/files/huerfano.pdf"]
+        # Lo ya encolado no se vuelve a encolar
+        assert file_cleanup.sweep_orphans(app, grace_seconds=3600) == []
+
+    def test_un_solo_drenado_por_commit_aunque_se_inicialice_varias_veces(
+            self, app, client, auth_headers, empleado_fixture, file_server, monkeypatch):
+        """Test: Inicializar la cola en varias apps no acumula listeners sobre db.session"""
+        from flask import Flask
+
+        programados = []
+        monkeypatch.setattr(file_cleanup, "schedule_drain", programados.append)
+        otra = Flask("otra")
+        file_cleanup.init_file_cleanup(otra)
+        file_cleanup.init_file_cleanup(app)
+        file_cleanup.init_file_cleanup(app)
+        hoja = _crear_hoja(app, empleado_fixture, "http://files.local/files/a.pdf")
+
+        response = client.delete(f"/api/hojas-vida/{hoja['id_hoja_vida']}", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert programados == [app]
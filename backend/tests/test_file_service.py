@@ -0,0 +1,147 @@
+"""
+Tests del cliente del servidor de archivos
+Verifica la reutilización de la sesión y el circuit breaker
+"""
+import pytest
+import requests
+
+from utils import file_service
+from utils.file_service import CircuitBreaker, CircuitOpenError, FileServiceClient
+
+
+class _FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self.text = str(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+@pytest.mark.unit
+class TestCircuitBreaker:
+    """Tests unitarios del circuit breaker"""
+
+    def test_abre_tras_fallos_consecutivos(self):
+        """Test: Tras N fallos seguidos las llamadas fallan de inmediato"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_semiabierto_permite_una_prueba(self):
+        """Test: Pasado el reset se permite una sola llamada de prueba"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+
+@pytest.mark.unit
+class TestFileServiceClient:
+    """Tests del cliente con sesión persistente"""
+
+    def test_upload_devuelve_url(self, monkeypatch):
+        """Test: upload usa la sesión del cliente y devuelve la URL"""
+        client = FileServiceClient("http://files.local/upload")
+        llamadas = []
+
+        def fake_request(method, url, **kwargs):
+            llamadas.append((method, url, kwargs["timeout"]))
+            return _FakeResponse(201, {"url": "http://files.local/files/a.pdf"})
+
+        monkeypatch.setattr(client.session, "request", fake_request)
+
+        assert client.upload("a.pdf", b"datos", "application/pdf") == "http://files.local/files/a.pdf"
+        assert llamadas == [("POST", "http://files.local/upload", (3, 10))]
+
+    def test_circuito_abierto_no_llama_al_servidor(self, monkeypatch):
+        """Test: Con el servidor caído se deja de intentar hasta el reset"""
+        client = FileServiceClient("http://files.local/upload",
+                                   breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        llamadas = []
+
+        def fake_request(method, url, **kwargs):
+            llamadas.append(url)
+            raise requests.ConnectionError("caído")
+
+        monkeypatch.setattr(client.session, "request", fake_request)
+
+        for _ in range(5):
+            assert client.upload("a.pdf", b"datos") is None
+        assert len(llamadas) == 2
+
+    def test_error_inesperado_libera_la_prueba_semiabierta(self, monkeypatch):
+        """Test: Si la llamada de prueba falla con un error que no es de red, el circuito no queda bloqueado"""
+        client = FileServiceClient("http://files.local/upload",
+                                   breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+        client.breaker.record_failure()
+        respuestas = [OSError("error leyendo el archivo"), _FakeResponse(201, {"url": "http://files.local/files/a.pdf"})]
+
+        def fake_request(method, url, **kwargs):
+            respuesta = respuestas.pop(0)
+            if isinstance(respuesta, Exception):
+                raise respuesta
+            return respuesta
+
+        monkeypatch.setattr(client.session, "request", fake_request)
+
+        with pytest.raises(OSError):
+            client.upload("a.pdf", b"datos")
+        assert client.upload("a.pdf", b"datos") == "http://files.local/files/a.pdf"
+        assert client.breaker.state == "closed"
+
+    def test_delete_usa_la_ruta_del_servidor(self, monkeypatch):
+        """Test: delete y el borrado en lote llaman a /files del servidor de archivos"""
+        client = FileServiceClient("http://files.local/upload")
+        llamadas = []
+
+        def fake_request(method, url, **kwargs):
+            llamadas.append((method, url, kwargs.get("json")))
+            return _FakeResponse(200, {"eliminados": ["a.pdf"], "no_encontrados": [], "errores": {}})
+
+        monkeypatch.setattr(client.session, "request", fake_request)
+
+        assert client.delete("http://files.local/files/a.pdf") is True
+        assert client.delete_many(["a.pdf"])["eliminados"] == ["a.pdf"]
+        assert llamadas == [
+            ("DELETE", "http://files.local/files/a.pdf", None),
+            ("DELETE", "http://files.local/files", {"names": ["a.pdf"]}),
+        ]
+
+    def test_un_cliente_por_proceso(self, app):
+        """Test: get_client reutiliza el mismo cliente (y su pool) entre llamadas"""
+        app.config["FILE_SERVER_URL"] = "http://files.local/upload"
+        with app.app_context():
+            assert file_service.get_client() is file_service.get_client()
+
+            app.config["FILE_SERVER_URL"] = "http://otro.local/upload"
+            assert file_service.get_client().upload_url == "http://otro.local/upload"
+
+    def test_borrado_en_lote_ignora_urls_ajenas(self, app, monkeypatch):
+        """Test: Solo se envían al servidor los nombres de URLs bajo <base>/files/"""
+        app.config["FILE_SERVER_URL"] = "http://files.local/upload"
+        enviados = []
+
+        with app.app_context():
+            client = file_service.get_client()
+            monkeypatch.setattr(client, "delete_many", lambda names: enviados.extend(names) or {"errores": {}})
+
+            estados = file_service.delete_files_from_vm([
+                "http://files.local/files/propio.pdf",
+                "http://evil.example/files/ajeno.pdf",
+            ])
+
+            assert enviados == ["propio.pdf"]
+            assert estados == {"http://files.local/files/propio.pdf": None, "http://evil.example/files/ajeno.pdf": None}
+            assert file_service.delete_file_from_vm("http://evil.example/files/ajeno.pdf") is False
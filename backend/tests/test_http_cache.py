@@ -0,0 +1,107 @@
+"""
+Tests de GET condicionales (ETag / Last-Modified)
+Verifica que las listas y detalles respondan 304 cuando el cliente ya tiene la versión vigente
+"""
+import pytest
+from datetime import date, timedelta
+
+
+def _crear_permiso(client, auth_headers, empleado_id, estado="pendiente"):
+    response = client.post("/api/permisos/", json={
+        "id_empleado": empleado_id,
+        "tipo": "permiso",
+        "descripcion": "Cita médica",
+        "fecha_inicio": str(date.today()),
+        "fecha_fin": str(date.today() + timedelta(days=1)),
+        "estado": estado
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json["id"]
+
+
+@pytest.mark.integration
+class TestConditionalGet:
+    """Tests para ETag / If-None-Match en listas y detalles"""
+
+    def test_lista_incluye_etag_y_cache_control(self, client, auth_headers, empleado_fixture):
+        """Test: La lista devuelve ETag débil y no-cache, sin Last-Modified"""
+        _crear_permiso(client, auth_headers, empleado_fixture)
+
+        response = client.get("/api/permisos/", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('W/"')
+        assert "Last-Modified" not in response.headers
+        assert "no-cache" in response.headers["Cache-Control"]
+
+    def test_lista_con_if_modified_since_tras_borrar(self, client, auth_headers, empleado_fixture):
+        """Test: Tras borrar un registro, If-Modified-Since no devuelve un 304 obsoleto"""
+        _crear_permiso(client, auth_headers, empleado_fixture)
+        permiso_id = _crear_permiso(client, auth_headers, empleado_fixture)
+        desde = client.get(f"/api/permisos/{permiso_id}", headers=auth_headers).headers["Last-Modified"]
+
+        client.delete(f"/api/permisos/{permiso_id}", headers=auth_headers)
+        response = client.get("/api/permisos/", headers={**auth_headers, "If-Modified-Since": desde})
+
+        assert response.status_code == 200
+        assert len(response.json) == 1
+
+    def test_lista_responde_304_si_no_hay_cambios(self, client, auth_headers, empleado_fixture):
+        """Test: If-None-Match con el ETag vigente devuelve 304 sin cuerpo"""
+        _crear_permiso(client, auth_headers, empleado_fixture)
+        etag = client.get("/api/permisos/", headers=auth_headers).headers["ETag"]
+
+        response = client.get("/api/permisos/", headers={**auth_headers, "If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == etag
+
+    def test_lista_cambia_etag_al_crear(self, client, auth_headers, empleado_fixture):
+        """Test: Un nuevo registro invalida el ETag de la colección"""
+        _crear_permiso(client, auth_headers, empleado_fixture)
+        etag = client.get("/api/permisos/", headers=auth_headers).headers["ETag"]
+
+        _crear_permiso(client, auth_headers, empleado_fixture)
+        response = client.get("/api/permisos/", headers={**auth_headers, "If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert len(response.json) == 2
+        assert response.headers["ETag"] != etag
+
+    def test_filtros_tienen_etag_distinto(self, client, auth_headers, empleado_fixture):
+        """Test: Cada filtro de la colección tiene su propio validador"""
+        _crear_permiso(client, auth_headers, empleado_fixture, estado="aprobado")
+
+        todos = client.get("/api/permisos/", headers=auth_headers)
+        aprobados = client.get("/api/permisos/?estado=aprobado", headers=auth_headers)
+
+        assert todos.headers["ETag"] != aprobados.headers["ETag"]
+
+    def test_detalle_responde_304_hasta_que_se_actualiza(self, client, auth_headers, empleado_fixture):
+        """Test: El ETag del detalle depende de fecha_actualizacion"""
+        permiso_id = _crear_permiso(client, auth_headers, empleado_fixture)
+        etag = client.get(f"/api/permisos/{permiso_id}", headers=auth_headers).headers["ETag"]
+
+        no_modificado = client.get(f"/api/permisos/{permiso_id}", headers={**auth_headers, "If-None-Match": etag})
+        assert no_modificado.status_code == 304
+
+        client.put(f"/api/permisos/{permiso_id}", json={"estado": "aprobado"}, headers=auth_headers)
+        modificado = client.get(f"/api/permisos/{permiso_id}", headers={**auth_headers, "If-None-Match": etag})
+
+        assert modificado.status_code == 200
+        assert modificado.json["estado"] == "aprobado"
+
+    def test_horarios_responde_304(self, client, auth_headers, empleado_fixture):
+        """Test: Las listas serializadas con to_dict también soportan 304"""
+        client.post("/api/horarios/", json={
+            "id_empleado": empleado_fixture,
+            "dia_laborables": "lunes a viernes",
+            "hora_entrada": "08:00",
+            "hora_salida": "17:00"
+        }, headers=auth_headers)
+        etag = client.get("/api/horarios/", headers=auth_headers).headers["ETag"]
+
+        response = client.get("/api/horarios/", headers={**auth_headers, "If-None-Match": etag})
+
+        assert response.status_code == 304
@@ -0,0 +1,530 @@
+"""
+Tests unitarios para utils/mirror_db.py
+Triggers del schema mirror: por sentencia (tablas de transición) y por fila
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from utils.mirror_db import _pg_mirror_trigger_sql, setup_mirror_schema_and_triggers
+
+
+def _sql(nivel, pk_cols=("id",)):
+    return _pg_mirror_trigger_sql(
+        schema_name="mirror", table_name="asistencias",
+        cols=["id", "fecha", "horas_extra"], pk_cols=list(pk_cols), trigger_level=nivel,
+    )
+
+
+@pytest.mark.unit
+class TestTriggersPostgres:
+    """Tests del DDL de los triggers del schema mirror"""
+
+    def test_por_sentencia_usa_tablas_de_transicion(self):
+        """Test: Un trigger por evento, FOR EACH STATEMENT, con upsert y delete por conjunto"""
+        funcion, *triggers = _sql("statement")
+
+        assert len(triggers) == 3
+        assert all("FOR EACH STATEMENT" in t for t in triggers)
+        assert "REFERENCING NEW TABLE AS new_rows" in triggers[0]
+        assert "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows" in triggers[1]
+        assert "REFERENCING OLD TABLE AS old_rows" in triggers[2]
+        assert 'SELECT n."id", n."fecha", n."horas_extra" FROM new_rows n' in funcion
+        assert 'ON CONFLICT ("id") DO UPDATE' in funcion
+        assert "USING old_rows v" in funcion
+
+    def test_por_fila_conserva_el_trigger_anterior(self):
+        """Test: El modo row sigue siendo un único trigger FOR EACH ROW"""
+        funcion, trigger = _sql("row")
+
+        assert "FOR EACH ROW" in trigger
+        assert 'VALUES (NEW."id", NEW."fecha", NEW."horas_extra")' in funcion
+
+    def test_nivel_invalido(self):
+        """Test: Un trigger_level desconocido se rechaza"""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn, pytest.raises(ValueError):
+            setup_mirror_schema_and_triggers(conn, mirror_path=":memory:", trigger_level="tabla")
+
+
+    def test_modo_cola_solo_encola_claves(self):
+        """Test: En modo cola los triggers escriben (tabla, pk, op) y no tocan la tabla mirror"""
+        funcion, *triggers = _sql("queue")
+
+        assert len(triggers) == 3 and all("FOR EACH STATEMENT" in t for t in triggers)
+        assert 'INSERT INTO "mirror"."_change_queue" (table_name, pk, op)' in funcion
+        assert "jsonb_build_object('id', n.\"id\")" in funcion
+        assert 'INTO "mirror"."asistencias"' not in funcion
+        assert "trg_mirror_asistencias_qfn" in triggers[0]
+
+
+@pytest.mark.unit
+class TestColaMirror:
+    """Tests del aplicador de la cola (utils/mirror_jobs.py)"""
+
+    def test_drena_por_lotes_hasta_vaciar(self, app, monkeypatch):
+        """Test: Aplica lotes mientras vengan llenos y se detiene con el primero incompleto"""
+        from utils import mirror_jobs
+
+        lotes = [3, 3, 1, 0]
+        monkeypatch.setattr(mirror_jobs, "apply_mirror_queue", lambda conn, **kw: lotes.pop(0))
+        app.config["MIRROR_QUEUE_BATCH_SIZE"] = 3
+
+        assert mirror_jobs.drain_mirror_queue(app) == 7
+        assert lotes == [0]
+
+    def test_setup_del_schema_fuera_del_arranque(self, app, monkeypatch):
+        """Test: El setup y la copia pendiente corren en un hilo, no en create_app"""
+        import threading
+        from utils import mirror_jobs
+
+        hilos = []
+        monkeypatch.setattr(
+            mirror_jobs, "auto_setup_postgres_schema_mirror",
+            lambda engine, schema, level: hilos.append(threading.current_thread().name),
+        )
+        monkeypatch.setattr(mirror_jobs, "pending_mirror_copies", lambda conn, **kw: [{"table_name": "cargos"}])
+        monkeypatch.setattr(mirror_jobs, "run_copy_job", lambda app, progress=None: hilos.append("copia") or {})
+        app.config["MIRROR_COPY_MODE"] = "background"
+
+        mirror_jobs.start_schema_setup_job(app)
+        for hilo in threading.enumerate():
+            if hilo.name == "mirror-setup":
+                hilo.join(timeout=5)
+
+        assert hilos == ["mirror-setup", "copia"]
+
+    def test_profundidad_sin_cola(self):
+        """Test: Sin tabla de cola (SQLite) la profundidad es None"""
+        from utils.mirror_db import mirror_queue_depth
+
+        engine = create_engine("sqlite://")
+        with engine.connect() as conn:
+            assert mirror_queue_depth(conn) is None
+
+
+@pytest.mark.unit
+class TestCopiaPorLotes:
+    """Tests de la copia inicial por rangos de PK"""
+
+    def test_copia_por_lotes_y_activa_al_terminar(self, monkeypatch):
+        """Test: Un lote por transacción, progreso por lote y swap solo tras el último"""
+        from contextlib import nullcontext
+
+        from utils import mirror_db
+
+        eventos = []
+        lotes = iter([5000, 5000, 120])
+
+        class _Engine:
+            def connect(self):
+                return nullcontext("conn")
+
+            def begin(self):
+                eventos.append("begin")
+                return nullcontext("conn")
+
+        def chunk(conn, **kw):
+            copiadas = next(lotes)
+            eventos.append(("chunk", kw["table_name"], kw["chunk_size"]))
+            return {"table": kw["table_name"], "copied": copiadas, "rows_copied": 0,
+                    "rows_estimate": None, "done": copiadas < kw["chunk_size"]}
+
+        monkeypatch.setattr(mirror_db, "pending_mirror_copies", lambda conn, **kw: [{"table_name": "log_transaccional"}])
+        monkeypatch.setattr(mirror_db, "_pg_table_columns", lambda conn, t: ["id", "accion"])
+        monkeypatch.setattr(mirror_db, "_pg_pk_columns", lambda conn, t: ["id"])
+        monkeypatch.setattr(mirror_db, "copy_mirror_chunk", chunk)
+        monkeypatch.setattr(mirror_db, "swap_mirror_copy", lambda conn, **kw: eventos.append(("swap", kw["table_name"])))
+        progreso = []
+
+        mirror_db.run_mirror_copies(_Engine(), chunk_size=5000, progress=progreso.append)
+
+        assert [e for e in eventos if e != "begin"] == [
+            ("chunk", "log_transaccional", 5000),
+            ("chunk", "log_transaccional", 5000),
+            ("chunk", "log_transaccional", 5000),
+            ("swap", "log_transaccional"),
+        ]
+        assert eventos.count("begin") == 4
+        assert [p["copied"] for p in progreso] == [5000, 5000, 120]
+
+
+@pytest.mark.unit
+class TestReconciliacion:
+    """Tests de la reconciliación por checksums de rangos (mirror SQLite)"""
+
+    @pytest.fixture
+    def conexion(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+        with engine.connect() as conn:
+            conn.exec_driver_sql(f"ATTACH DATABASE '{tmp_path / 'mirror.db'}' AS mirror")
+            conn.exec_driver_sql("CREATE TABLE asistencias (id_asistencia INTEGER PRIMARY KEY, horas REAL, nota TEXT)")
+            conn.exec_driver_sql(
+                "WITH RECURSIVE g(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM g WHERE i < 5000) "
+                "INSERT INTO asistencias SELECT i, i % 8, 'ok' FROM g"
+            )
+            conn.exec_driver_sql("CREATE TABLE mirror.asistencias AS SELECT * FROM asistencias")
+            conn.commit()
+            yield conn
+        engine.dispose()
+
+    def _reconciliar(self, conn, **kwargs):
+        from utils.mirror_db import reconcile_table
+
+        return reconcile_table(
+            conn, conn, table_name="asistencias", source_schema=None, target_schema="mirror",
+            chunk_size=1000, leaf_size=50, **kwargs
+        )
+
+    def test_mirror_igual_no_baja_a_filas(self, conexion):
+        """Test: Sin diferencias basta el primer nivel de agregados"""
+        informe = self._reconciliar(conexion)
+
+        assert informe.skipped is None
+        assert informe.ranges_compared == 5
+        assert informe.ranges_different == 0
+
+    def test_repara_solo_los_rangos_distintos(self, conexion):
+        """Test: Fila modificada, borrada y sobrante se reparan tocando solo sus rangos"""
+        conexion.exec_driver_sql("UPDATE mirror.asistencias SET nota = 'x' WHERE id_asistencia = 1234")
+        conexion.exec_driver_sql("DELETE FROM mirror.asistencias WHERE id_asistencia = 4321")
+        conexion.exec_driver_sql("INSERT INTO mirror.asistencias VALUES (9000, 1, 'huérfana')")
+        conexion.commit()
+
+        informe = self._reconciliar(conexion)
+
+        assert informe.ranges_different == 3
+        assert (informe.rows_upserted, informe.rows_deleted) == (2, 1)
+        diferencias = conexion.exec_driver_sql(
+            "SELECT COUNT(*) FROM (SELECT * FROM asistencias EXCEPT SELECT * FROM mirror.asistencias "
+            "UNION ALL SELECT * FROM mirror.asistencias EXCEPT SELECT * FROM asistencias)"
+        ).scalar()
+        assert diferencias == 0
+        assert self._reconciliar(conexion).ranges_different == 0
+
+    def test_solo_verificar_no_modifica(self, conexion):
+        """Test: Con repair=False informa los rangos distintos sin escribir"""
+        conexion.exec_driver_sql("DELETE FROM mirror.asistencias WHERE id_asistencia = 10")
+        conexion.commit()
+
+        informe = self._reconciliar(conexion, repair=False)
+
+        assert informe.ranges_different == 1
+        assert conexion.exec_driver_sql("SELECT COUNT(*) FROM mirror.asistencias").scalar() == 4999
+
+
+    def test_reparacion_postgres_hace_upsert_con_lock(self):
+        """Test: En Postgres el origen se lee FOR SHARE después del mirror y las filas van con ON CONFLICT"""
+        from utils.mirror_db import _repair_range
+
+        sentencias = []
+
+        class _Conn:
+            def __init__(self, filas):
+                self.filas = filas
+
+            def execute(self, stmt, params=None):
+                sentencias.append(str(stmt))
+                return self.filas if str(stmt).startswith("SELECT") else None
+
+            def commit(self):
+                sentencias.append("COMMIT")
+
+            def rollback(self):
+                sentencias.append("ROLLBACK")
+
+        origen = _Conn([(1, "a"), (2, "b")])
+        mirror = _Conn([(2, "viejo"), (3, "sobrante")])
+
+        resultado = _repair_range(
+            origen, mirror, dialect="postgresql", source_ref='"public"."t"', target_ref='"mirror"."t"',
+            pk="id", cols=["id", "nota"], lo=1, hi=10,
+        )
+
+        assert resultado == (2, 1)
+        assert sentencias[0].startswith('SELECT "id", "nota" FROM "mirror"."t"')
+        assert sentencias[1].endswith("FOR SHARE")
+        assert 'DELETE FROM "mirror"."t"' in sentencias[2]
+        assert 'ON CONFLICT ("id") DO UPDATE SET "nota" = EXCLUDED."nota"' in sentencias[3]
+        assert sentencias[4:] == ["COMMIT", "ROLLBACK"]
+
+
+@pytest.mark.unit
+class TestDriftEsquema:
+    """Tests de la sincronización de columnas del schema mirror"""
+
+    def test_altera_solo_lo_distinto_y_regenera_esos_triggers(self, monkeypatch):
+        """Test: ADD (con backfill), DROP y cambio de tipo; triggers solo de la tabla afectada"""
+        from utils import mirror_db
+        from utils.mirror_db import ColumnDrift, sync_mirror_drift
+
+        class _Conn:
+            ejecutados = []
+
+            def execute(self, *args):
+                class _R:
+                    def scalar(self):
+                        return 1
+                return _R()
+
+            def exec_driver_sql(self, sql):
+                self.ejecutados.append(sql)
+
+        regenerados = []
+        monkeypatch.setattr(mirror_db, "detect_mirror_drift", lambda conn, **kw: ([
+            ColumnDrift("nominas", "bono", "numeric(10,2)", None),
+            ColumnDrift("nominas", "obsoleta", None, "text"),
+            ColumnDrift("nominas", "mes", "character varying(20)", "character varying(7)"),
+        ], []))
+        monkeypatch.setattr(mirror_db, "pending_mirror_copies", lambda conn, **kw: [])
+        monkeypatch.setattr(mirror_db, "_pg_pk_columns", lambda conn, t: ["id_nomina"])
+        monkeypatch.setattr(mirror_db, "_pg_table_columns", lambda conn, t: ["id_nomina", "mes", "bono"])
+        monkeypatch.setattr(
+            mirror_db, "_pg_install_mirror_triggers", lambda conn, **kw: regenerados.append((kw["table_name"], kw["cols"]))
+        )
+
+        resultado = sync_mirror_drift(_Conn())
+
+        assert resultado.statements == [
+            'ALTER TABLE "mirror"."nominas" ADD COLUMN "bono" numeric(10,2);',
+            'UPDATE "mirror"."nominas" m SET "bono" = s."bono" FROM public."nominas" s '
+            'WHERE m."id_nomina" = s."id_nomina" AND s."bono" IS NOT NULL;',
+            'ALTER TABLE "mirror"."nominas" DROP COLUMN "obsoleta";',
+            'ALTER TABLE "mirror"."nominas" ALTER COLUMN "mes" TYPE character varying(20) '
+            'USING "mes"::character varying(20);',
+        ]
+        assert regenerados == [("nominas", ["id_nomina", "mes", "bono"])]
+
+
+@pytest.mark.unit
+class TestMirrorSqlite:
+    """Tests del mirror SQLite: tabla con PK, vista de escritura y triggers TEMP"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        from utils.mirror_db import configure_sqlite_mirror
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+        mirror_path = str(tmp_path / "mirror.db")
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE TABLE empleados (id INTEGER PRIMARY KEY, nombre TEXT NOT NULL, sueldo REAL)")
+            conn.exec_driver_sql("INSERT INTO empleados VALUES (1, 'Ana', 100), (2, 'Luis', 200)")
+            setup_mirror_schema_and_triggers(conn, mirror_path=mirror_path)
+        configure_sqlite_mirror(engine, mirror_path)
+        yield engine
+        engine.dispose()
+
+    def _mirror(self, conn):
+        return conn.exec_driver_sql("SELECT * FROM mirror.empleados ORDER BY id").fetchall()
+
+    def test_copia_con_pk_y_wal(self, engine):
+        """Test: La tabla mirror tiene PK, copia los datos y ambos archivos quedan en WAL"""
+        with engine.connect() as conn:
+            pk = [r[1] for r in conn.exec_driver_sql("PRAGMA mirror.table_info(empleados)") if r[5]]
+            assert pk == ["id"]
+            assert self._mirror(conn) == [(1, "Ana", 100.0), (2, "Luis", 200.0)]
+            assert conn.exec_driver_sql("PRAGMA mirror.journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+
+    def test_replica_insert_update_delete_en_conexiones_nuevas(self, engine):
+        """Test: Cada conexión del pool replica altas, cambios (incluida la PK) y bajas"""
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO empleados VALUES (3, 'Eva', 300)")
+            conn.exec_driver_sql("UPDATE empleados SET sueldo = 150 WHERE id = 1")
+            conn.exec_driver_sql("UPDATE empleados SET id = 20 WHERE id = 2")
+            conn.exec_driver_sql("DELETE FROM empleados WHERE id = 3")
+
+        with engine.connect() as conn:
+            assert self._mirror(conn) == [(1, "Ana", 150.0), (20, "Luis", 200.0)]
+
+    def test_migra_mirror_sin_pk(self, tmp_path):
+        """Test: Un mirror antiguo (CREATE TABLE AS, sin PK) se reconstruye conservando filas"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ATTACH DATABASE '{tmp_path / 'mirror.db'}' AS mirror")
+            conn.exec_driver_sql("CREATE TABLE empleados (id INTEGER PRIMARY KEY, nombre TEXT)")
+            conn.exec_driver_sql("CREATE TABLE mirror.empleados AS SELECT * FROM empleados")
+            conn.exec_driver_sql("INSERT INTO mirror.empleados VALUES (7, 'antigua')")
+
+            resultado = setup_mirror_schema_and_triggers(conn, copy_data=False, mirror_path=str(tmp_path / "mirror.db"))
+
+            assert resultado.tables_created == ["empleados"]
+            assert resultado.triggers_created == 3
+            assert [r[5] for r in conn.exec_driver_sql("PRAGMA mirror.table_info(empleados)")] == [1, 0]
+            assert self._mirror(conn) == [(7, "antigua")]
+        engine.dispose()
+
+
+@pytest.mark.unit
+class TestNavegadorMirror:
+    """Tests del navegador de tablas del mirror: metadatos en caché y paginación por clave"""
+
+    @pytest.fixture
+    def conexion(self, tmp_path):
+        from utils.mirror_db import invalidate_mirror_metadata
+
+        invalidate_mirror_metadata()
+        engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+        with engine.connect() as conn:
+            conn.exec_driver_sql(f"ATTACH DATABASE '{tmp_path / 'mirror.db'}' AS mirror")
+            conn.exec_driver_sql(
+                "CREATE TABLE mirror.turnos (id_empleado INTEGER, dia INTEGER, estado TEXT, nota TEXT, "
+                "PRIMARY KEY (id_empleado, dia))"
+            )
+            conn.exec_driver_sql(
+                "WITH RECURSIVE g(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM g WHERE i < 1199) "
+                "INSERT INTO mirror.turnos SELECT i / 7, i % 7, CASE WHEN i % 3 = 0 THEN 'libre' ELSE 'activo' END, 'x' FROM g"
+            )
+            conn.commit()
+            yield conn
+        engine.dispose()
+
+    def test_recorre_toda_la_tabla_por_clave_compuesta(self, conexion):
+        """Test: Encadenando next_after_pk se leen todas las filas, en orden y sin repetir"""
+        from utils.mirror_db import fetch_mirror_table_preview
+
+        vistas, after = [], None
+        while True:
+            pagina = fetch_mirror_table_preview(
+                conexion, table_name="turnos", limit=500, order="asc", after_pk=after, columns=["estado"]
+            )
+            vistas += pagina["rows"]
+            after = pagina["next_after_pk"]
+            if not pagina["has_more"]:
+                break
+
+        assert len(vistas) == 1200
+        assert pagina["pk"] == ["id_empleado", "dia"]
+        assert pagina["columns"] == ["estado"] and set(vistas[0]) == {"estado"}
+
+    def test_filtros_y_orden_descendente(self, conexion):
+        """Test: Los filtros son igualdades por columna y el orden por defecto es descendente"""
+        from utils.mirror_db import fetch_mirror_table_preview
+
+        pagina = fetch_mirror_table_preview(conexion, table_name="turnos", limit=3, filters={"estado": "libre"})
+
+        assert [(r["id_empleado"], r["dia"]) for r in pagina["rows"]] == [(171, 0), (170, 4), (170, 1)]
+        assert pagina["next_after_pk"] == [170, 1]
+        with pytest.raises(ValueError):
+            fetch_mirror_table_preview(conexion, table_name="turnos", filters={"inexistente": 1})
+
+    def test_metadatos_en_cache_hasta_invalidar(self, conexion, monkeypatch):
+        """Test: El catálogo se consulta una vez por tabla hasta que el setup invalida la caché"""
+        from utils import mirror_db
+
+        consultas = []
+        original = mirror_db._sqlite_table_info
+        monkeypatch.setattr(
+            mirror_db, "_sqlite_table_info", lambda conn, s, t: consultas.append(t) or original(conn, s, t)
+        )
+
+        for _ in range(3):
+            mirror_db.fetch_mirror_table_preview(conexion, table_name="turnos", limit=1)
+        assert consultas == ["turnos"]
+
+        mirror_db.invalidate_mirror_metadata()
+        mirror_db.fetch_mirror_table_preview(conexion, table_name="turnos", limit=1)
+        assert consultas == ["turnos", "turnos"]
+
+    def test_catalogo_postgres_posicion_de_clave_desde_uno(self):
+        """Test: indkey empieza en 0: la posición sale de WITH ORDINALITY y la 1.ª columna de la PK cuenta"""
+        from types import SimpleNamespace
+        from utils import mirror_db
+
+        mirror_db.invalidate_mirror_metadata()
+        consultas = []
+
+        class ConexionPostgres:
+            dialect = SimpleNamespace(name="postgresql")
+            engine = SimpleNamespace(url="postgresql://primary/db")
+
+            def execute(self, stmt, params):
+                consultas.append((str(stmt), params))
+                return [("id_asistencia", 1), ("id_empleado", 0), ("fecha", 0)]
+
+        meta = mirror_db.mirror_table_metadata(ConexionPostgres(), table_name="asistencias")
+
+        sql, params = consultas[0]
+        assert "WITH ORDINALITY" in sql and "array_position" not in sql
+        assert params == {"schema": "mirror", "table": "asistencias"}
+        assert meta.pk_cols == ["id_asistencia"]
+        mirror_db.invalidate_mirror_metadata()
+
+
+@pytest.mark.unit
+class TestDiffMirror:
+    """Tests del diff fila a fila entre primary y mirror (merge join en orden de PK)"""
+
+    @pytest.fixture
+    def conexion(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+        with engine.connect() as conn:
+            conn.exec_driver_sql(f"ATTACH DATABASE '{tmp_path / 'mirror.db'}' AS mirror")
+            for esquema in ("main", "mirror"):
+                conn.exec_driver_sql(f"CREATE TABLE {esquema}.cargos (codigo TEXT PRIMARY KEY, nombre TEXT, sueldo REAL)")
+                conn.exec_driver_sql(
+                    f"WITH RECURSIVE g(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM g WHERE i < 3000) "
+                    f"INSERT INTO {esquema}.cargos SELECT printf('C%05d', i), 'cargo ' || i, i FROM g"
+                )
+            conn.exec_driver_sql("DELETE FROM mirror.cargos WHERE codigo IN ('C00010', 'C02999')")
+            conn.exec_driver_sql("UPDATE mirror.cargos SET sueldo = 0 WHERE codigo = 'C01500'")
+            conn.exec_driver_sql("INSERT INTO mirror.cargos VALUES ('C00010b', 'sobrante', 1), ('Z', 'fin', 2)")
+            conn.commit()
+            yield conn
+        engine.dispose()
+
+    def _diff(self, conn, **kwargs):
+        from utils.mirror_db import mirror_table_diff
+
+        return list(mirror_table_diff(
+            conn, conn, table_name="cargos", source_schema=None, target_schema="mirror", batch_size=100, **kwargs
+        ))
+
+    def test_solo_emite_las_filas_distintas(self, conexion):
+        """Test: Faltantes, sobrantes y cambiadas en orden de PK, con resumen al final"""
+        eventos = self._diff(conexion)
+
+        assert [(e["op"], e["pk"]) for e in eventos[:-1]] == [
+            ("missing", ["C00010"]),
+            ("extra", ["C00010b"]),
+            ("changed", ["C01500"]),
+            ("missing", ["C02999"]),
+            ("extra", ["Z"]),
+        ]
+        assert eventos[2]["primary"] == {"sueldo": 1500.0} and eventos[2]["mirror"] == {"sueldo": 0.0}
+        assert eventos[-1]["op"] == "summary"
+        assert (eventos[-1]["compared"], eventos[-1]["missing"], eventos[-1]["extra"], eventos[-1]["changed"]) == (2998, 2, 2, 1)
+
+    def test_rango_de_pk(self, conexion):
+        """Test: from_pk/to_pk acotan ambos lados (inclusive)"""
+        eventos = self._diff(conexion, from_pk=["C01000"], to_pk=["C02000"])
+
+        assert [e["op"] for e in eventos] == ["changed", "summary"]
+        assert eventos[-1]["compared"] == 1001
+
+    def test_tabla_inexistente(self, conexion):
+        """Test: El error de forma sale antes del primer evento"""
+        from utils.mirror_db import mirror_table_diff
+
+        with pytest.raises(ValueError):
+            mirror_table_diff(conexion, conexion, table_name="nada", source_schema=None, target_schema="mirror")
+
+    def test_endpoint_ndjson(self, app, client, auth_headers, tmp_path):
+        """Test: GET /api/mirror/diff/<tabla> transmite una línea JSON por diferencia"""
+        import json
+
+        from extensions import db
+
+        app.config["MIRROR_DB_PATH"] = str(tmp_path / "mirror.db")
+        with app.app_context(), db.engine.begin() as conn:
+            conn.exec_driver_sql(f"ATTACH DATABASE '{tmp_path / 'mirror.db'}' AS mirror")
+            conn.exec_driver_sql("CREATE TABLE mirror.usuarios AS SELECT * FROM usuarios")
+            conn.exec_driver_sql("UPDATE mirror.usuarios SET rol = 'Empleado'")
+
+        respuesta = client.get("/api/mirror/diff/usuarios", headers=auth_headers)
+
+        assert respuesta.status_code == 200
+        assert respuesta.mimetype == "application/x-ndjson"
+        lineas = [json.loads(l) for l in respuesta.get_data(as_text=True).splitlines()]
+        assert lineas[0]["op"] == "changed" and lineas[0]["mirror"] == {"rol": "Empleado"}
+        assert lineas[-1]["changed"] == 1
+        assert client.get("/api/mirror/diff/usuarios?from_pk=[1,2]", headers=auth_headers).status_code == 400
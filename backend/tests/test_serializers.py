@@ -0,0 +1,127 @@
+"""
+Tests de los serializadores precompilados
+Verifica que las respuestas conserven el formato anterior (claves, fechas y usernames)
+"""
+import pytest
+from datetime import date
+
+from models.asistencia import asistencia_serializer
+from models.horario import Horario, horario_serializer
+from utils.serializers import money
+
+
+@pytest.mark.unit
+class TestSerializer:
+    """Tests unitarios del Serializer"""
+
+    def test_only_rechaza_claves_desconocidas(self):
+        """Test: only() con un campo inexistente lanza KeyError"""
+        with pytest.raises(KeyError):
+            asistencia_serializer.only("id_asistencia", "no_existe")
+
+    def test_only_conserva_orden_declarado(self):
+        """Test: only() mantiene el orden de los campos del serializador base"""
+        sub = asistencia_serializer.only("fecha", "id_asistencia")
+        assert sub.keys == ("id_asistencia", "fecha")
+
+    def test_money_redondea_a_dos_decimales(self):
+        """Test: money() redondea igual que el antiguo _to_money_2"""
+        assert money("1200.456") == 1200.46
+        with pytest.raises(ValueError):
+            money("abc")
+
+
+@pytest.mark.integration
+class TestSerializerRoutes:
+    """Tests de las rutas que usan serializadores"""
+
+    def test_lista_asistencias_incluye_usernames(self, client, auth_headers, empleado_fixture):
+        """Test: Los usernames de auditoría se resuelven con el JOIN"""
+        client.post("/api/asistencias/", json={
+            "id_empleado": empleado_fixture,
+            "fecha": str(date.today()),
+            "hora_entrada": "08:00:00",
+            "hora_salida": "17:00:00",
+            "horas_extra": 0,
+            "creado_por": 1
+        }, headers=auth_headers)
+
+        response = client.get("/api/asistencias/", headers=auth_headers)
+
+        assert response.status_code == 200
+        item = response.json[0]
+        assert item["creado_por_username"] == "test_admin"
+        assert item["modificado_por_username"] is None
+        assert item["hora_entrada"] == "08:00:00"
+        assert item["fecha"] == str(date.today())
+
+    def test_to_dict_coincide_con_consulta_proyectada(self, app, client, auth_headers, empleado_fixture):
+        """Test: dump() de una instancia y la proyección SQL dan el mismo dict"""
+        client.post("/api/horarios/", json={
+            "id_empleado": empleado_fixture,
+            "dia_laborables": "lunes a viernes",
+            "hora_entrada": "08:00",
+            "hora_salida": "17:00"
+        }, headers=auth_headers)
+
+        with app.app_context():
+            horario = Horario.query.first()
+            assert horario.to_dict() == horario_serializer.all(Horario.query)[0]
+
+
+@pytest.mark.integration
+class TestFieldsParam:
+    """Tests del parámetro ?fields= (proyección de columnas)"""
+
+    def test_lista_solo_devuelve_campos_pedidos(self, client, auth_headers, empleado_fixture):
+        """Test: ?fields= limita las claves de cada elemento"""
+        response = client.get("/api/empleados/?fields=id,nombres,apellidos", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert set(response.json[0].keys()) == {"id", "nombres", "apellidos"}
+
+    def test_detalle_solo_devuelve_campos_pedidos(self, client, auth_headers, empleado_fixture):
+        """Test: ?fields= también aplica al detalle"""
+        response = client.get(f"/api/empleados/{empleado_fixture}?fields=id,cedula", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json == {"id": empleado_fixture, "cedula": "0987654321"}
+
+    def test_campo_no_permitido_devuelve_400(self, client, auth_headers, empleado_fixture):
+        """Test: Un campo fuera de la lista permitida responde 400 con los campos válidos"""
+        response = client.get("/api/empleados/?fields=id,password", headers=auth_headers)
+
+        assert response.status_code == 400
+        assert "password" in response.json["error"]
+        assert "nombres" in response.json["campos_permitidos"]
+
+    def test_fields_vacio_devuelve_todo(self, client, auth_headers, empleado_fixture):
+        """Test: ?fields= vacío equivale a no enviar el parámetro"""
+        completo = client.get("/api/empleados/", headers=auth_headers).json
+        vacio = client.get("/api/empleados/?fields=", headers=auth_headers).json
+
+        assert completo == vacio
+
+    def test_etag_distinto_por_proyeccion(self, client, auth_headers, empleado_fixture):
+        """Test: Cada proyección tiene su propio ETag"""
+        client.post("/api/horarios/", json={
+            "id_empleado": empleado_fixture,
+            "dia_laborables": "lunes a viernes",
+            "hora_entrada": "08:00",
+            "hora_salida": "17:00"
+        }, headers=auth_headers)
+
+        completo = client.get("/api/horarios/", headers=auth_headers)
+        parcial = client.get("/api/horarios/?fields=id_horario", headers=auth_headers)
+
+        assert parcial.json == [{"id_horario": completo.json[0]["id_horario"]}]
+        assert completo.headers["ETag"] != parcial.headers["ETag"]
+
+    def test_subserializador_se_reutiliza(self):
+        """Test: La misma combinación de campos (en cualquier orden) se construye una vez"""
+        from models.empleado import empleado_serializer
+
+        a = empleado_serializer.select("id,nombres")
+        b = empleado_serializer.select("nombres, id")
+
+        assert a is b
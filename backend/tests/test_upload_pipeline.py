@@ -0,0 +1,178 @@
+"""
+Tests de la cola de subidas de hojas de vida
+Verifica que el archivo se guarde en la cola local y se suba con reintentos fuera del request
+"""
+import io
+import os
+import pytest
+
+import utils.file_service as file_service
+from utils import file_cleanup, upload_pipeline
+
+
+@pytest.fixture
+def spool(app, tmp_path):
+    app.config["UPLOAD_INLINE"] = True
+    app.config["UPLOAD_SPOOL_DIR"] = str(tmp_path)
+    app.config["UPLOAD_MAX_RETRIES"] = 2
+    app.config["UPLOAD_RETRY_BACKOFF"] = 0
+    return tmp_path
+
+
+@pytest.fixture
+def file_server(app, monkeypatch):
+    """Simula el servidor de archivos; `respuestas` controla cada intento."""
+    app.config["FILE_SERVER_URL"] = "http://files.local/upload"
+    estado = {"subidas": [], "borrados": [], "respuestas": []}
+
+    def fake_upload(path, filename, content_type=None):
+        with open(path, "rb") as f:
+            estado["subidas"].append((filename, f.read()))
+        if estado["respuestas"]:
+            return estado["respuestas"].pop(0)
+        return f"http://files.local/files/{len(estado['subidas'])}-{filename}"
+
+    def fake_delete_many(urls):
+        estado["borrados"].extend(urls)
+        return {url: None for url in urls}
+
+    monkeypatch.setattr(file_service, "upload_path_to_vm", fake_upload)
+    monkeypatch.setattr(file_service, "delete_files_from_vm", fake_delete_many)
+    return estado
+
+
+def _crear_con_archivo(client, auth_headers, empleado_id, contenido=b"%PDF-1.4 prueba"):
+    return client.post("/api/hojas-vida/", data={
+        "id_empleado": str(empleado_id),
+        "tipo": "Certificado",
+        "nombre_documento": "Titulo",
+        "archivo": (io.BytesIO(contenido), "titulo.pdf", "application/pdf")
+    }, headers=auth_headers, content_type="multipart/form-data")
+
+
+@pytest.mark.integration
+class TestUploadPipeline:
+    """Tests de la subida asíncrona de archivos"""
+
+    def test_crear_sube_archivo_desde_la_cola(self, client, auth_headers, empleado_fixture, spool, file_server):
+        """Test: El archivo pasa por la cola y el registro queda 'subido' con su URL"""
+        response = _crear_con_archivo(client, auth_headers, empleado_fixture)
+
+        assert response.status_code == 201
+        hoja_id = response.json["hoja_vida"]["id_hoja_vida"]
+        assert file_server["subidas"] == [("titulo.pdf", b"%PDF-1.4 prueba")]
+
+        estado = client.get(f"/api/hojas-vida/{hoja_id}/archivo", headers=auth_headers)
+        assert estado.json["estado_archivo"] == "subido"
+        assert estado.json["ruta_archivo_url"] == "http://files.local/files/1-titulo.pdf"
+        assert estado.json["thumbnail_url"] == "http://files.local/thumbnails/1-titulo.pdf"
+        assert os.listdir(spool) == []
+
+    def test_reintentos_agotados_marcan_error(self, client, auth_headers, empleado_fixture, spool, file_server):
+        """Test: Si todos los intentos fallan el registro queda en 'error' y el trabajo en .failed"""
+        file_server["respuestas"] = [None, None]
+
+        response = _crear_con_archivo(client, auth_headers, empleado_fixture)
+        hoja_id = response.json["hoja_vida"]["id_hoja_vida"]
+
+        assert len(file_server["subidas"]) == 2
+        assert response.json["hoja_vida"]["estado_archivo"] == "error"
+        assert response.json["hoja_vida"]["ruta_archivo_url"] is None
+        assert any(name.endswith(".failed") for name in os.listdir(spool))
+
+        reintento = client.post(f"/api/hojas-vida/{hoja_id}/archivo/reintentar", headers=auth_headers)
+
+        assert reintento.status_code == 202
+        estado = client.get(f"/api/hojas-vida/{hoja_id}/archivo", headers=auth_headers)
+        assert estado.json["estado_archivo"] == "subido"
+
+    def test_error_inesperado_reencola_sin_volver_a_subir(self, client, auth_headers, empleado_fixture, spool,
+                                                          file_server, monkeypatch):
+        """Test: Si falla guardar la URL, el trabajo se reenvía (sin otra subida) y termina 'subido'"""
+        original = upload_pipeline._set_estado
+        fallos = [RuntimeError("base de datos caída")]
+
+        def set_estado(id_hoja_vida, estado, url=None):
+            if estado == upload_pipeline.ESTADO_SUBIDO and fallos:
+                raise fallos.pop()
+            return original(id_hoja_vida, estado, url)
+
+        monkeypatch.setattr(upload_pipeline, "_set_estado", set_estado)
+
+        response = _crear_con_archivo(client, auth_headers, empleado_fixture)
+
+        assert response.json["hoja_vida"]["estado_archivo"] == "subido"
+        assert len(file_server["subidas"]) == 1
+        assert os.listdir(spool) == []
+
+    def test_error_inesperado_persistente_queda_fallido(self, client, auth_headers, empleado_fixture, spool,
+                                                        file_server, monkeypatch):
+        """Test: Agotados los reintentos por errores inesperados queda .failed y en 'error'"""
+        original = upload_pipeline._set_estado
+
+        def set_estado(id_hoja_vida, estado, url=None):
+            if estado == upload_pipeline.ESTADO_SUBIDO:
+                raise RuntimeError("base de datos caída")
+            return original(id_hoja_vida, estado, url)
+
+        monkeypatch.setattr(upload_pipeline, "_set_estado", set_estado)
+
+        response = _crear_con_archivo(client, auth_headers, empleado_fixture)
+
+        assert response.json["hoja_vida"]["estado_archivo"] == "error"
+        assert any(name.endswith(".failed") for name in os.listdir(spool))
+
+    def test_reemplazo_borra_archivo_anterior_despues_de_subir(self, app, client, auth_headers, empleado_fixture, spool, file_server):
+        """Test: Al reemplazar el archivo, el anterior se borra después de subir el nuevo"""
+        hoja = _crear_con_archivo(client, auth_headers, empleado_fixture).json["hoja_vida"]
+
+        response = client.put(f"/api/hojas-vida/{hoja['id_hoja_vida']}", data={
+            "archivo": (io.BytesIO(b"nuevo"), "nuevo.pdf", "application/pdf")
+        }, headers=auth_headers, content_type="multipart/form-data")
+
+        assert response.status_code == 200
+        assert response.json["hoja_vida"]["ruta_archivo_url"] == "http://files.local/files/2-nuevo.pdf"
+        assert file_server["borrados"] == []
+        assert file_cleanup.drain_deletions(app) == (1, 0)
+        assert file_server["borrados"] == [hoja["ruta_archivo_url"]]
+
+    def test_resume_pending_reclama_trabajos_encolados(self, app, client, auth_headers, empleado_fixture, spool, file_server):
+        """Test: Los trabajos que quedaron en disco se reanudan al arrancar"""
+        hoja_id = client.post("/api/hojas-vida/", json={
+            "id_empleado": empleado_fixture,
+            "tipo": "Curso"
+        }, headers=auth_headers).json["hoja_vida"]["id_hoja_vida"]
+
+        # Simula un trabajo escrito por un proceso que se cayó antes de subirlo
+        with open(spool / "abc.bin", "wb") as f:
+            f.write(b"contenido")
+        upload_pipeline._write_json_atomic(str(spool / "abc.json"), {
+            "job_id": "abc", "id_hoja_vida": hoja_id, "filename": "curso.pdf",
+            "content_type": "application/pdf", "anterior_url": None, "intentos": 0
+        })
+
+        assert upload_pipeline.resume_pending(app) == 1
+        assert file_server["subidas"] == [("curso.pdf", b"contenido")]
+        estado = client.get(f"/api/hojas-vida/{hoja_id}/archivo", headers=auth_headers)
+        assert estado.json["estado_archivo"] == "subido"
+
+    def test_listado_expone_thumbnail_url(self, client, auth_headers, empleado_fixture, spool, file_server):
+        """Test: El listado puede pedir solo la miniatura en lugar del archivo original"""
+        _crear_con_archivo(client, auth_headers, empleado_fixture)
+        client.post("/api/hojas-vida/", json={"id_empleado": empleado_fixture, "tipo": "Curso"}, headers=auth_headers)
+
+        response = client.get("/api/hojas-vida/?fields=id_hoja_vida,thumbnail_url", headers=auth_headers)
+
+        assert response.status_code == 200
+        miniaturas = sorted(r["thumbnail_url"] or "" for r in response.json)
+        assert miniaturas == ["", "http://files.local/thumbnails/1-titulo.pdf"]
+
+    def test_thumbnail_url_solo_para_formatos_del_servidor(self, app, file_server):
+        """Test: Sin miniatura para .doc/.docx ni para enlaces externos que contengan /files/"""
+        from models.hoja_vida import thumbnail_url
+
+        with app.app_context():
+            assert thumbnail_url("http://files.local/files/a-foto.JPG") == "http://files.local/thumbnails/a-foto.JPG"
+            assert thumbnail_url("http://files.local/files/a-cv.docx") is None
+            assert thumbnail_url("http://files.local/files/a-cv.doc") is None
+            assert thumbnail_url("https://docs.example.com/files/a-titulo.pdf") is None
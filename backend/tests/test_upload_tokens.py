@@ -0,0 +1,160 @@
+"""
+Tests de los tokens de subida directa al servidor de archivos
+"""
+import pytest
+
+from models.archivo_por_borrar import ArchivoPorBorrar
+from utils.upload_tokens import (
+    InvalidUploadToken, issue_upload_token, upload_name_prefix, verify_upload_token, verify_uploaded_url,
+)
+
+
+@pytest.mark.unit
+class TestUploadTokens:
+    """Tests unitarios de firma y verificación"""
+
+    def test_token_valido(self):
+        """Test: Un token recién emitido se verifica con el mismo secreto"""
+        token, payload = issue_upload_token("secreto", ttl=60, max_size=1024, subject=7)
+
+        verificado = verify_upload_token("secreto", token)
+
+        assert verificado == payload
+        assert verificado["max"] == 1024
+        assert verificado["sub"] == 7
+
+    def test_token_con_otro_secreto_falla(self):
+        """Test: La firma depende del secreto compartido"""
+        token, _ = issue_upload_token("secreto")
+
+        with pytest.raises(InvalidUploadToken):
+            verify_upload_token("otro", token)
+
+    def test_token_modificado_falla(self):
+        """Test: Alterar el payload invalida la firma"""
+        token, _ = issue_upload_token("secreto", max_size=10)
+        otro, _ = issue_upload_token("secreto", max_size=10 ** 9)
+        falso = otro.split(".")[0] + "." + token.split(".")[1]
+
+        with pytest.raises(InvalidUploadToken):
+            verify_upload_token("secreto", falso)
+
+    def test_token_expirado_falla(self):
+        """Test: Pasado el TTL el token ya no sirve"""
+        token, payload = issue_upload_token("secreto", ttl=60)
+
+        with pytest.raises(InvalidUploadToken):
+            verify_upload_token("secreto", token, now=payload["exp"] + 1)
+
+
+    def test_url_subida_ligada_al_token(self):
+        """Test: La URL debe ser del file server, del usuario y con el prefijo del jti del token"""
+        token, payload = issue_upload_token("secreto", ttl=60, subject=7)
+        url = f"http://files.local/files/{upload_name_prefix(payload['jti'])}0000-0000000000ab-titulo.pdf"
+
+        assert verify_uploaded_url("secreto", url, token, "http://files.local", subject=7).endswith("-titulo.pdf")
+        for otra_url in (
+            "http://files.local/files/4f0c2a1e-0000-4000-8000-000000000000-ajeno.pdf",
+            "http://evil.local/files/" + url.rsplit("/", 1)[1],
+        ):
+            with pytest.raises(InvalidUploadToken):
+                verify_uploaded_url("secreto", otra_url, token, "http://files.local", subject=7)
+        with pytest.raises(InvalidUploadToken):
+            verify_uploaded_url("secreto", url, token, "http://files.local", subject=8)
+        with pytest.raises(InvalidUploadToken):
+            verify_uploaded_url("secreto", url, token, "http://files.local", max_age=10, now=payload["exp"] + 11)
+
+
+@pytest.mark.integration
+class TestUploadTokenRoutes:
+    """Tests del endpoint de emisión de tokens"""
+
+    def test_sin_secreto_devuelve_503(self, app, client, auth_headers):
+        """Test: Sin FILE_UPLOAD_SECRET la subida directa no está disponible"""
+        app.config["FILE_UPLOAD_SECRET"] = None
+
+        response = client.post("/api/hojas-vida/upload-token", headers=auth_headers)
+
+        assert response.status_code == 503
+
+    def test_emite_token_verificable(self, app, client, auth_headers):
+        """Test: El token emitido lo puede verificar el servidor de archivos"""
+        app.config["FILE_UPLOAD_SECRET"] = "secreto"
+        app.config["FILE_SERVER_PUBLIC_URL"] = "http://files.local/upload"
+
+        response = client.post("/api/hojas-vida/upload-token", headers=auth_headers)
+
+        assert response.status_code == 201
+        assert response.json["upload_url"] == "http://files.local/upload"
+        assert verify_upload_token("secreto", response.json["token"])["sub"] == 1
+
+    def _subida_directa(self, app, client, auth_headers):
+        """Token emitido por el backend y la URL que le daría el file server."""
+        app.config["FILE_UPLOAD_SECRET"] = "secreto"
+        app.config["FILE_SERVER_PUBLIC_URL"] = "http://files.local/upload"
+        token = client.post("/api/hojas-vida/upload-token", headers=auth_headers).json["token"]
+        jti = verify_upload_token("secreto", token)["jti"]
+        return token, f"http://files.local/files/{upload_name_prefix(jti)}8000-00000000abcd-nuevo.pdf"
+
+    def test_put_con_url_directa_reemplaza_archivo(self, app, client, auth_headers, empleado_fixture):
+        """Test: Tras la subida directa el backend solo registra la URL y encola borrar la anterior"""
+        hoja = client.post("/api/hojas-vida/", json={
+            "id_empleado": empleado_fixture,
+            "tipo": "Curso",
+            "ruta_archivo_url": "http://files.local/files/viejo.pdf"
+        }, headers=auth_headers).json["hoja_vida"]
+        token, url = self._subida_directa(app, client, auth_headers)
+
+        response = client.put(f"/api/hojas-vida/{hoja['id_hoja_vida']}", json={
+            "ruta_archivo_url": url, "upload_token": token
+        }, headers=auth_headers)
+
+        assert response.json["hoja_vida"]["ruta_archivo_url"] == url
+        assert response.json["hoja_vida"]["estado_archivo"] == "subido"
+        with app.app_context():
+            assert [f.url for f in ArchivoPorBorrar.query.all()] == ["http://files.local/files/viejo.pdf"]
+
+    def test_put_con_url_ajena_se_rechaza(self, app, client, auth_headers, empleado_fixture):
+        """Test: Sin token o con el token de otra subida la URL no se acepta ni se borra nada"""
+        hoja = client.post("/api/hojas-vida/", json={
+            "id_empleado": empleado_fixture,
+            "tipo": "Curso",
+            "ruta_archivo_url": "http://files.local/files/propio.pdf"
+        }, headers=auth_headers).json["hoja_vida"]
+        token, url = self._subida_directa(app, client, auth_headers)
+
+        for cuerpo in (
+            {"ruta_archivo_url": url},
+            {"ruta_archivo_url": "http://files.local/files/4f0c2a1e-0000-4000-8000-000000000000-otro.pdf",
+             "upload_token": token},
+        ):
+            response = client.put(f"/api/hojas-vida/{hoja['id_hoja_vida']}", json=cuerpo, headers=auth_headers)
+            assert response.status_code == 400
+
+        with app.app_context():
+            assert ArchivoPorBorrar.query.count() == 0
+        creada = client.post("/api/hojas-vida/", json={
+            "id_empleado": empleado_fixture, "tipo": "Curso",
+            "ruta_archivo_url": "http://files.local/files/propio.pdf"
+        }, headers=auth_headers)
+        assert creada.status_code == 400
+
+    def test_put_con_enlace_externo(self, app, client, auth_headers, empleado_fixture):
+        """Test: Un enlace externo se acepta igual que al crear, queda marcado y no se borra"""
+        creada = client.post("/api/hojas-vida/", json={
+            "id_empleado": empleado_fixture, "tipo": "Curso",
+            "ruta_archivo_url": "https://docs.example.com/titulo.pdf"
+        }, headers=auth_headers)
+        token, url = self._subida_directa(app, client, auth_headers)
+        externa = "http://evil.local/files/" + url.rsplit("/", 1)[1]
+
+        response = client.put(f"/api/hojas-vida/{creada.json['hoja_vida']['id_hoja_vida']}",
+                              json={"ruta_archivo_url": externa}, headers=auth_headers)
+
+        assert creada.status_code == 201
+        assert creada.json["hoja_vida"]["estado_archivo"] == "externo"
+        assert response.status_code == 200
+        assert response.json["hoja_vida"]["ruta_archivo_url"] == externa
+        assert response.json["hoja_vida"]["estado_archivo"] == "externo"
+        with app.app_context():
+            assert ArchivoPorBorrar.query.count() == 0
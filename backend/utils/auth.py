@@ -2,6 +2,7 @@ import jwt
 from datetime import datetime, timedelta, timezone
 from functools import wraps
 from flask import request, jsonify, current_app
+from werkzeug.exceptions import HTTPException
 from extensions import db
 from models.usuario import Usuario
 from models.cargo import Cargo
@@ -171,6 +172,9 @@ def module_permission_required(module_id: str):
                     return jsonify({'error': 'Acceso denegado. Sin permiso para este módulo'}), 403
 
                 return f(current_user, *args, **kwargs)
+            except HTTPException:
+                # abort() de la ruta (p. ej. 400 por ?fields= inválido)
+                raise
             except Exception:
                 return jsonify({'error': 'Error al validar permisos'}), 500
 
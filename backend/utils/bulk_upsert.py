@@ -0,0 +1,206 @@
+"""
+Carga masiva de datos de referencia: `PUT /api/<recurso>/bulk`.
+
+Dar de alta una sucursal eran cientos de POST, cada uno con su commit y el
+commit de su log. Un lote ahora es:
+
+1. Validación de todo el lote antes de escribir (formato, claves repetidas,
+   FKs). Cualquier error devuelve 400 con la lista `errores` por índice y
+   no se escribe nada.
+2. Una consulta `IN` por FK (p. ej. los id_cargo del lote) y otra por la
+   clave natural para saber qué filas ya existen (y guardar sus datos
+   anteriores para la auditoría).
+3. `INSERT ... ON CONFLICT (clave) DO UPDATE` con los campos enviados; las
+   filas van en sentencias multi-VALUES (insertmanyvalues de SQLAlchemy).
+4. Un solo INSERT por lotes en log_transaccional y un único commit.
+
+Cada recurso describe su lote con un `BulkSpec` (ver las rutas de cargos,
+empleados y horarios).
+
+Configuración (app.config):
+    BULK_UPSERT_MAX_ITEMS   registros por petición (1000)
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
+from typing import Any, Callable
+
+from flask import current_app, jsonify, request
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db
+from models.log_transaccional import LogTransaccional
+
+
+class BulkValidationError(ValueError):
+    """Errores de validación del lote, uno por registro: {"indice", "error"}."""
+
+    def __init__(self, errores):
+        super().__init__(f"{len(errores)} registro(s) inválido(s)")
+        self.errores = errores
+
+
+@dataclass
+class BulkSpec:
+    model: Any
+    tabla: str  # nombre en log_transaccional
+    key: str  # clave natural del ON CONFLICT (columna con índice único)
+    parse: Callable[[dict], dict]  # registro del JSON -> columnas; ValueError/KeyError si es inválido
+    fks: dict = field(default_factory=dict)  # columna -> columna referenciada
+    audit_fields: tuple = ()
+    insert_defaults: dict = field(default_factory=dict)  # solo para filas nuevas
+    # Clave autogenerada (PK): si viene debe existir; si no viene, es un alta
+    key_must_exist: bool = False
+
+
+def _insert_for_dialect(table):
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    raise ValueError(f"Carga masiva no soportada para {dialect}")
+
+
+def _audit_dict(spec, values):
+    return {f: values.get(f) for f in spec.audit_fields}
+
+
+def _validate(spec, items, max_items):
+    if not isinstance(items, list) or not items:
+        raise BulkValidationError([{"indice": None, "error": "Se espera una lista de registros no vacía"}])
+    if len(items) > max_items:
+        raise BulkValidationError([{"indice": None, "error": f"Máximo {max_items} registros por lote"}])
+
+    errores = []
+    filas = []
+    for i, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("cada registro debe ser un objeto")
+            filas.append((i, spec.parse(item)))
+        except KeyError as e:
+            errores.append({"indice": i, "error": f"Campo requerido faltante: {e.args[0]}"})
+        except ValueError as e:
+            errores.append({"indice": i, "error": str(e)})
+
+    vistos = {}
+    for i, fila in filas:
+        clave = fila.get(spec.key)
+        if clave is None:
+            continue
+        if clave in vistos:
+            errores.append({"indice": i, "error": f"{spec.key} repetido en el lote (índice {vistos[clave]})"})
+        vistos.setdefault(clave, i)
+
+    # Una consulta IN por FK para todo el lote
+    for columna, referencia in spec.fks.items():
+        valores = {fila[columna] for _, fila in filas if fila.get(columna) is not None}
+        if not valores:
+            continue
+        existentes = set(db.session.scalars(select(referencia).where(referencia.in_(valores))))
+        for i, fila in filas:
+            if fila.get(columna) is not None and fila[columna] not in existentes:
+                errores.append({"indice": i, "error": f"{columna} {fila[columna]} no existe"})
+
+    # Filas ya existentes por clave natural (datos anteriores para el log)
+    key_col = getattr(spec.model, spec.key)
+    anteriores = {}
+    if vistos:
+        for obj in db.session.scalars(select(spec.model).where(key_col.in_(list(vistos)))):
+            anteriores[getattr(obj, spec.key)] = _audit_dict(
+                spec, {f: getattr(obj, f) for f in spec.audit_fields}
+            )
+    if spec.key_must_exist:
+        for i, fila in filas:
+            if fila.get(spec.key) is not None and fila[spec.key] not in anteriores:
+                errores.append({"indice": i, "error": f"{spec.key} {fila[spec.key]} no existe"})
+
+    if errores:
+        raise BulkValidationError(sorted(errores, key=lambda e: e["indice"]))
+    return filas, anteriores
+
+
+def bulk_upsert(spec, items, current_user, max_items=1000):
+    """Valida y aplica el lote en la transacción actual (sin commit).
+
+    Devuelve [{"indice", "id", "operacion"}] en el orden recibido.
+    """
+    filas, anteriores = _validate(spec, items, max_items)
+    table = spec.model.__table__
+    pk_col = next(iter(table.primary_key.columns))
+    ahora = datetime.now(timezone.utc)
+
+    # executemany exige las mismas columnas en cada fila: un grupo por forma
+    grupos = {}
+    for i, fila in filas:
+        nueva = fila.get(spec.key) is None or fila[spec.key] not in anteriores
+        valores = {**spec.insert_defaults, **fila} if nueva else dict(fila)
+        valores['creado_por'] = current_user.id
+        grupos.setdefault(tuple(sorted(valores)), []).append((i, valores, nueva))
+
+    resultados = []
+    logs = []
+    for columnas, grupo in grupos.items():
+        params = [valores for _, valores, _ in grupo]
+        if spec.key in columnas:
+            stmt = _insert_for_dialect(table)
+            actualizar = {c: stmt.excluded[c] for c in columnas if c not in (spec.key, 'creado_por')}
+            actualizar.update(modificado_por=current_user.id, fecha_actualizacion=ahora)
+            stmt = stmt.on_conflict_do_update(index_elements=[spec.key], set_=actualizar).returning(
+                pk_col, table.c[spec.key]
+            )
+            por_clave = {clave: id_registro for id_registro, clave in db.session.execute(stmt, params)}
+            ids = [por_clave[valores[spec.key]] for valores in params]
+        else:
+            # Altas sin clave (PK autogenerada): INSERT simple, ids en el orden enviado
+            stmt = insert(table).returning(pk_col, sort_by_parameter_order=True)
+            ids = db.session.execute(stmt, params).scalars().all()
+
+        for (i, valores, nueva), id_registro in zip(grupo, ids):
+            operacion = 'INSERT' if nueva else 'UPDATE'
+            resultados.append({"indice": i, "id": id_registro, "operacion": operacion})
+            datos_nuevos = _audit_dict(spec, {**(anteriores.get(valores.get(spec.key)) or {}), **valores})
+            datos_nuevos[pk_col.name] = id_registro
+            logs.append({
+                'tabla_afectada': spec.tabla,
+                'operacion': operacion,
+                'id_registro': id_registro,
+                'usuario': current_user.username,
+                'fecha_hora': ahora,
+                'datos_anteriores': None if nueva else json.dumps(anteriores[valores[spec.key]], default=str),
+                'datos_nuevos': json.dumps(datos_nuevos, default=str),
+            })
+
+    # Auditoría del lote en un solo INSERT
+    db.session.execute(insert(LogTransaccional.__table__), logs)
+    return sorted(resultados, key=lambda r: r["indice"])
+
+
+def bulk_upsert_response(spec, current_user):
+    """Cuerpo común de `PUT /bulk`: lista JSON (o {"items": [...]}) -> una transacción."""
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    try:
+        resultados = bulk_upsert(
+            spec, items, current_user, max_items=current_app.config.get('BULK_UPSERT_MAX_ITEMS', 1000)
+        )
+        db.session.commit()
+    except BulkValidationError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), "errores": e.errores}), 400
+    except Exception as e:
+        db.session.rollback()
+        error_msg = str(e).lower()
+        if 'unique constraint' in error_msg or 'foreign key constraint' in error_msg:
+            return jsonify({"error": "El lote choca con datos existentes. Verifica los registros"}), 400
+        return jsonify({"error": f"Error en la carga masiva de {spec.tabla}: {str(e)}"}), 500
+
+    insertados = sum(1 for r in resultados if r["operacion"] == 'INSERT')
+    return jsonify({
+        "mensaje": f"Carga masiva de {spec.tabla} aplicada",
+        "insertados": insertados,
+        "actualizados": len(resultados) - insertados,
+        "resultados": resultados,
+    }), 200
@@ -0,0 +1,147 @@
+"""
+Compresión de respuestas (br / gzip) negociada con Accept-Encoding.
+
+Se aplica en un after_request sobre respuestas 200 de tipos de texto que
+superan COMPRESS_MIN_SIZE. Los cuerpos ya comprimidos se guardan en una
+caché LRU pequeña (clave: algoritmo + hash del cuerpo), de modo que las
+listas que el frontend pide una y otra vez sin cambios no se recomprimen.
+
+Configuración (app.config):
+    COMPRESS_MIN_SIZE     bytes mínimos para comprimir (1024)
+    COMPRESS_LEVEL        nivel gzip 1-9 (6)
+    COMPRESS_BR_LEVEL     calidad brotli 0-11 (5)
+    COMPRESS_CACHE_SIZE   entradas de la caché; 0 la desactiva (64)
+    COMPRESS_MIMETYPES    tipos comprimibles
+"""
+from collections import OrderedDict
+import gzip
+import hashlib
+import threading
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+
+DEFAULT_MIMETYPES = (
+    "application/json",
+    "text/html",
+    "text/plain",
+    "text/csv",
+    "text/css",
+    "application/javascript",
+)
+
+# Cuerpos más grandes que esto se comprimen pero no se guardan en caché
+_MAX_CACHEABLE_BYTES = 4 * 1024 * 1024
+
+
+class CompressedCache:
+    """LRU thread-safe de cuerpos comprimidos."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _compress(algorithm, body, config):
+    if algorithm == "br":
+        return brotli.compress(body, quality=config["COMPRESS_BR_LEVEL"])
+    # mtime=0: misma entrada -> mismos bytes (cacheable y reproducible)
+    return gzip.compress(body, compresslevel=config["COMPRESS_LEVEL"], mtime=0)
+
+
+def _choose_algorithm():
+    offered = ("br", "gzip") if brotli is not None else ("gzip",)
+    # best_match respeta los q-values del cliente (q=0 excluye el algoritmo);
+    # a igual calidad gana el primero ofrecido (br).
+    return request.accept_encodings.best_match(offered)
+
+
+def init_compression(app):
+    app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+    app.config.setdefault("COMPRESS_LEVEL", 6)
+    app.config.setdefault("COMPRESS_BR_LEVEL", 5)
+    app.config.setdefault("COMPRESS_CACHE_SIZE", 64)
+    app.config.setdefault("COMPRESS_MIMETYPES", DEFAULT_MIMETYPES)
+
+    cache = CompressedCache(app.config["COMPRESS_CACHE_SIZE"])
+    app.extensions["compression_cache"] = cache
+
+    @app.after_request
+    def compress_response(response):
+        config = app.config
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in config["COMPRESS_MIMETYPES"]
+        ):
+            return response
+
+        body = response.get_data()
+        if len(body) < config["COMPRESS_MIN_SIZE"]:
+            return response
+
+        # La representación depende de Accept-Encoding aunque este cliente
+        # no acepte compresión: los caches intermedios deben saberlo.
+        response.vary.add("Accept-Encoding")
+
+        algorithm = _choose_algorithm()
+        if algorithm is None:
+            return response
+
+        key = (algorithm, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = _compress(algorithm, body, config)
+            if len(body) <= _MAX_CACHEABLE_BYTES:
+                cache.put(key, compressed)
+
+        if len(compressed) >= len(body):
+            return response
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = algorithm
+        # Un ETag fuerte identifica bytes exactos; con otra codificación
+        # solo puede seguir siendo débil.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return cache
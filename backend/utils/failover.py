@@ -0,0 +1,386 @@
+"""
+Coordinador de failover compartido entre los workers de gunicorn.
+
+Antes cada worker hacía `SELECT 1` en cada request, detectaba la caída por
+su cuenta y cambiaba de engine de forma independiente (split-brain y
+reconexiones en manada). Ahora el estado vive en un archivo JSON compartido
+(FAILOVER_STATE_FILE) protegido con `flock`:
+
+    primary ──(fallo)──> degraded ──(N fallos seguidos)──> mirror
+       ^                    │(se recupera)                   │(M éxitos seguidos)
+       └────────────────────┘                                v
+       └──────────────(confirmado)─────────────────── failing_back
+                                                    (vuelve a fallar -> mirror)
+
+- Un solo worker sondea por vez: el que obtiene el lock no bloqueante
+  `<estado>.probe`; el resto solo lee el estado.
+- Histéresis: hacen falta `failure_threshold` fallos seguidos para pasar al
+  mirror y `recovery_threshold` éxitos seguidos (más una confirmación en
+  failing_back) para volver al primary. Se cuenta como mucho un fallo por
+  `probe_interval`: la ráfaga de conexiones fallidas de todos los workers e
+  hilos durante un corte breve suma un solo fallo.
+- El mirror se sondea fuera del lock del estado, antes de aplicar la
+  transición; los workers nunca esperan un sondeo para leer o escribir.
+- Backoff: con el primary caído el intervalo entre sondeos se duplica hasta
+  `max_backoff`.
+- Cada cambio de base incrementa `generation`; los workers comparan su
+  generación en cada request y cambian todos al mismo destino.
+"""
+from contextlib import contextmanager
+import fcntl
+import json
+import logging
+import os
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'primary'
+DEGRADED = 'degraded'
+MIRROR = 'mirror'
+FAILING_BACK = 'failing_back'
+
+# Base que atiende las peticiones en cada estado
+TARGETS = {
+    PRIMARY: 'primary',
+    DEGRADED: 'primary',
+    MIRROR: 'mirror',
+    FAILING_BACK: 'mirror',
+}
+
+
+def probe_database(url, timeout=2):
+    """True si la base responde a SELECT 1 (conexión propia, sin pool)."""
+    connect_args = {'connect_timeout': timeout} if url.startswith('postgres') else {}
+    engine = create_engine(url, poolclass=NullPool, connect_args=connect_args)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        return True
+    except Exception as e:
+        logger.warning(f"Sondeo fallido ({url.split('@')[-1][:60]}): {str(e)[:120]}")
+        return False
+    finally:
+        engine.dispose()
+
+
+def initial_state(now, probe_interval):
+    return {
+        'state': PRIMARY,
+        'generation': 0,
+        'failures': 0,
+        'successes': 0,
+        'backoff': probe_interval,
+        'next_probe_at': 0,
+        'last_failure_at': 0,
+        'updated_at': now,
+    }
+
+
+def next_state(current, primary_ok, mirror_ok, now, probe_interval=5,
+               failure_threshold=3, recovery_threshold=5, max_backoff=60):
+    """Transición pura del estado según el sondeo del primary.
+
+    `mirror_ok` es un callable: el mirror solo se sondea cuando hace falta.
+    """
+    state = dict(current)
+    name = state['state']
+
+    if name in (PRIMARY, DEGRADED):
+        if primary_ok:
+            state.update(state=PRIMARY, failures=0, backoff=probe_interval)
+        else:
+            state['failures'] += 1
+            state['last_failure_at'] = now
+            state['state'] = DEGRADED
+            if state['failures'] >= failure_threshold:
+                if mirror_ok():
+                    state.update(state=MIRROR, successes=0, generation=state['generation'] + 1)
+                else:
+                    # Sin mirror disponible: seguir en primary, sondeando con backoff
+                    state['backoff'] = min(state['backoff'] * 2, max_backoff)
+    elif name == MIRROR:
+        if primary_ok:
+            state['successes'] += 1
+            state['backoff'] = probe_interval
+            if state['successes'] >= recovery_threshold:
+                state['state'] = FAILING_BACK
+        else:
+            state['successes'] = 0
+            state['backoff'] = min(state['backoff'] * 2, max_backoff)
+    elif name == FAILING_BACK:
+        if primary_ok:
+            state.update(state=PRIMARY, failures=0, successes=0,
+                         backoff=probe_interval, generation=state['generation'] + 1)
+        else:
+            state.update(state=MIRROR, successes=0, backoff=min(state['backoff'] * 2, max_backoff))
+
+    # primary y failing_back sondean al ritmo normal; degraded y mirror esperan
+    # el backoff, que solo crece mientras el primary sigue caído.
+    wait = probe_interval if state['state'] in (PRIMARY, FAILING_BACK) else state['backoff']
+    state['next_probe_at'] = now + wait
+    state['updated_at'] = now
+    return state
+
+
+class FailoverCoordinator:
+    def __init__(self, state_path, primary_url, mirror_url=None, probe=probe_database,
+                 probe_interval=5, failure_threshold=3, recovery_threshold=5,
+                 max_backoff=60, on_failover=None, clock=time.time):
+        self.state_path = state_path
+        self.lock_path = state_path + '.lock'
+        self.probe_lock_path = state_path + '.probe'
+        self.primary_url = primary_url
+        self.mirror_url = mirror_url
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.failure_threshold = failure_threshold
+        self.recovery_threshold = recovery_threshold
+        self.max_backoff = max_backoff
+        self.on_failover = on_failover
+        self.clock = clock
+        self._cache_key = None
+        self._cache = None
+
+    # -- estado compartido -------------------------------------------------
+
+    @contextmanager
+    def _flock(self, path, blocking=True):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _read(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            if state.get('state') in TARGETS:
+                return state
+        except (OSError, ValueError):
+            pass
+        return initial_state(self.clock(), self.probe_interval)
+
+    def _write(self, state):
+        # Reemplazo atómico: los lectores nunca ven un JSON a medias
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def state(self):
+        """Estado actual. Se relee solo si el archivo cambió (un stat por request)."""
+        try:
+            st = os.stat(self.state_path)
+            key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return initial_state(self.clock(), self.probe_interval)
+        if key != self._cache_key:
+            self._cache = self._read()
+            self._cache_key = key
+        return self._cache
+
+    def target(self, state=None):
+        """'primary' o 'mirror': la base que deben usar los workers."""
+        if not self.mirror_url:
+            return 'primary'
+        return TARGETS[(state or self.state())['state']]
+
+    def url_for(self, target):
+        return self.mirror_url if target == 'mirror' else self.primary_url
+
+    def _update(self, mutate):
+        with self._flock(self.lock_path):
+            state = mutate(self._read())
+            if state is not None:
+                self._write(state)
+            return state
+
+    # -- sondeo ----------------------------------------------------------
+
+    def probe_once(self):
+        """Sondea si toca y nadie más lo está haciendo. Devuelve el estado nuevo o None."""
+        with self._flock(self.probe_lock_path, blocking=False) as acquired:
+            if not acquired:
+                return None
+            current = self._read()
+            if self.clock() < current.get('next_probe_at', 0):
+                return None
+
+            # Los sondeos se hacen fuera del lock del estado: los lectores no esperan
+            primary_ok = self.probe(self.primary_url)
+            mirror_ok = self._probe_mirror_if_needed(self._read(), primary_ok)
+            new = self._update(lambda state: self._advance(state, primary_ok, mirror_ok))
+            self._announce(current, new)
+            return new
+
+    def _counts_failure(self, state):
+        return (state['state'] in (PRIMARY, DEGRADED)
+                and self.clock() - state.get('last_failure_at', 0) >= self.probe_interval)
+
+    def record_failure(self):
+        """Un worker no pudo conectar al primary: cuenta como un sondeo fallido.
+
+        Los fallos de todos los workers se suman en el estado compartido, pero
+        como mucho uno por `probe_interval` (el primero que llega); el resto de
+        la ráfaga no cambia el estado. Devuelve el estado resultante.
+        """
+        current = {}
+        snapshot = self._read()
+        mirror_ok = self._probe_mirror_if_needed(snapshot, False) if self._counts_failure(snapshot) else None
+
+        def mutate(state):
+            current.update(state)
+            if not self._counts_failure(state):
+                return None
+            return self._advance(state, False, mirror_ok)
+
+        new = self._update(mutate)
+        if new is None:
+            return self.state()
+        self._announce(current, new)
+        return new
+
+    def _next(self, state, primary_ok, mirror_ok):
+        return next_state(
+            state, primary_ok, mirror_ok, self.clock(),
+            probe_interval=self.probe_interval,
+            failure_threshold=self.failure_threshold,
+            recovery_threshold=self.recovery_threshold,
+            max_backoff=self.max_backoff,
+        )
+
+    def _probe_mirror_if_needed(self, state, primary_ok):
+        """Sondea el mirror (sin tener el lock del estado) si la transición lo consultaría.
+
+        None si no hizo falta sondearlo.
+        """
+        asked = []
+        self._next(state, primary_ok, lambda: asked.append(True) or False)
+        if not asked:
+            return None
+        return bool(self.mirror_url) and self.probe(self.mirror_url)
+
+    def _advance(self, state, primary_ok, mirror_ok):
+        # Si otro worker cambió el estado y ahora hace falta un mirror que no se
+        # sondeó, cuenta como no disponible: el próximo sondeo lo reintenta.
+        return self._next(state, primary_ok, lambda: bool(mirror_ok))
+
+    def _announce(self, before, after):
+        if after['state'] == before['state']:
+            return
+        logger.warning(f"Failover: {before['state']} -> {after['state']} (generación {after['generation']})")
+        if after['state'] == MIRROR and before['state'] == DEGRADED and self.on_failover:
+            # Solo el worker que provocó el cambio prepara el mirror (una vez por failover)
+            try:
+                self.on_failover()
+            except Exception as e:
+                logger.error(f"Error preparando el mirror: {e}")
+
+    def report_failure(self):
+        """Un worker vio un error de conexión: adelantar el próximo sondeo."""
+        def mutate(state):
+            if state['state'] != PRIMARY or state.get('next_probe_at', 0) <= self.clock():
+                return None
+            state['next_probe_at'] = 0
+            return state
+        self._update(mutate)
+
+
+# ---------------------------------------------------------------------------
+# Promoción del mirror (un solo viaje de ida y vuelta)
+# ---------------------------------------------------------------------------
+
+# Función temporal de la sesión (pg_temp): desaparece al cerrar la conexión.
+# Deshabilita y elimina la suscripción y ajusta TODAS las secuencias de
+# columnas serial/identity (descubiertas en pg_depend, sin lista fija),
+# dentro de una sola transacción. Devuelve una fila por paso con su duración.
+# Sin parámetros de driver: los % de format() no deben interpolarse.
+_PROMOTE_MIRROR_SQL = """
+CREATE OR REPLACE FUNCTION pg_temp.chrispar_promover_mirror(sub_name text, esquemas text[])
+RETURNS TABLE(paso text, detalle text, ms numeric)
+LANGUAGE plpgsql AS $fn$
+DECLARE
+    t0 timestamptz;
+    r record;
+    valor bigint;
+BEGIN
+    t0 := clock_timestamp();
+    paso := 'suscripcion';
+    IF EXISTS (SELECT 1 FROM pg_subscription WHERE subname = sub_name) THEN
+        EXECUTE format('ALTER SUBSCRIPTION %I DISABLE', sub_name);
+        -- Sin slot asociado, DROP SUBSCRIPTION puede ir dentro de la transacción
+        EXECUTE format('ALTER SUBSCRIPTION %I SET (slot_name = NONE)', sub_name);
+        EXECUTE format('DROP SUBSCRIPTION %I', sub_name);
+        detalle := 'deshabilitada y eliminada';
+    ELSE
+        detalle := 'no existe';
+    END IF;
+    ms := round((extract(epoch FROM clock_timestamp() - t0) * 1000)::numeric, 2);
+    RETURN NEXT;
+
+    FOR r IN
+        SELECT s.oid::regclass::text AS secuencia, n.nspname AS esquema,
+               t.relname AS tabla, a.attname AS columna
+        FROM pg_class s
+        JOIN pg_depend d ON d.objid = s.oid
+            AND d.classid = 'pg_class'::regclass
+            AND d.refclassid = 'pg_class'::regclass
+            AND d.deptype IN ('a', 'i')          -- serial ('a') e identity ('i')
+        JOIN pg_class t ON t.oid = d.refobjid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = d.refobjsubid
+        WHERE s.relkind = 'S' AND n.nspname = ANY(esquemas)
+        ORDER BY n.nspname, t.relname
+    LOOP
+        t0 := clock_timestamp();
+        -- El próximo valor es MAX + 1 (1 si la tabla está vacía)
+        EXECUTE format(
+            'SELECT setval(%L, COALESCE((SELECT MAX(%I) FROM %I.%I), 0) + 1, false)',
+            r.secuencia, r.columna, r.esquema, r.tabla
+        ) INTO valor;
+        paso := 'secuencia';
+        detalle := format('%s.%s -> %s', r.tabla, r.columna, valor);
+        ms := round((extract(epoch FROM clock_timestamp() - t0) * 1000)::numeric, 2);
+        RETURN NEXT;
+    END LOOP;
+END
+$fn$;
+SELECT paso, detalle, ms FROM pg_temp.chrispar_promover_mirror({sub}, ARRAY[{esquemas}]::text[]);
+"""
+
+
+def _sql_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def promote_mirror(mirror_url, subscription='chrispar_sub', schemas=('public',)):
+    """Deja el mirror listo para escrituras en una transacción y un round trip.
+
+    Devuelve [(paso, detalle, ms)] medidos en el servidor, más un paso
+    'total' con el tiempo visto desde el cliente (incluye la conexión).
+    """
+    sql = _PROMOTE_MIRROR_SQL.replace('{sub}', _sql_literal(subscription)).replace(
+        '{esquemas}', ', '.join(_sql_literal(s) for s in schemas))
+    engine = create_engine(mirror_url, poolclass=NullPool)
+    start = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            # Creación + llamada en un solo execute (multi-statement)
+            pasos = [tuple(row) for row in conn.exec_driver_sql(sql)]
+    finally:
+        engine.dispose()
+    pasos.append(('total', f"{len(pasos)} paso(s)", round((time.perf_counter() - start) * 1000, 2)))
+    return pasos
@@ -0,0 +1,246 @@
+"""
+Cola de borrado de archivos del servidor de archivos.
+
+Antes, el archivo se borraba dentro del request (y los borrados en cascada
+de un Empleado no borraban nada). Ahora:
+
+1. Un hook `before_flush` anota en `archivos_por_borrar` la URL de cada
+   Hoja_Vida eliminada (también las que caen en cascada al borrar un
+   Empleado) y la URL anterior cuando se reemplaza `ruta_archivo_url`.
+   La fila entra en la misma transacción: si se revierte, no se borra nada.
+2. Tras el commit se drena la cola en segundo plano con un solo
+   `DELETE /files` por lote. Los fallos quedan en la tabla y se
+   reintentan en el siguiente drenado.
+3. `flask archivos barrer-huerfanos` (para cron) compara lo almacenado con
+   las filas de hoja_vida y encola lo que nadie referencia.
+
+Configuración (app.config):
+    FILE_DELETE_BATCH_SIZE      URLs por llamada a DELETE /files (100)
+    FILE_DELETE_MAX_RETRIES     intentos antes de dejar la fila para revisión (10)
+    FILE_ORPHAN_GRACE_SECONDS   antigüedad mínima para considerar huérfano un
+                                archivo (3600: subidas directas aún sin registro)
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+
+import click
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.archivo_por_borrar import ArchivoPorBorrar
+from models.hoja_vida import Hoja_Vida
+
+_PENDING_KEY = 'archivos_por_borrar'
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _config(app, key, default):
+    return app.config.get(key, default)
+
+
+# ---------------------------------------------------------------------------
+# Encolado (misma transacción que el cambio)
+# ---------------------------------------------------------------------------
+
+def queue_file_deletion(url, session=None):
+    """Encola una URL en la sesión actual; se confirma con el próximo commit."""
+    if not url:
+        return
+    session = session or db.session
+    session.add(ArchivoPorBorrar(url))
+    session.info[_PENDING_KEY] = True
+
+
+# active_history: al reemplazar la URL se carga el valor anterior aunque el
+# objeto esté expirado, para que before_flush lo vea en el historial.
+@event.listens_for(Hoja_Vida.ruta_archivo_url, 'set', active_history=True)
+def _keep_previous_url(target, value, oldvalue, initiator):
+    return value
+
+
+def _es_nuestro(url):
+    # Solo se encolan archivos del servidor de archivos: un enlace externo
+    # que termine en el nombre de otro archivo no debe borrarlo.
+    from utils.file_service import is_file_server_url
+    return has_app_context() and is_file_server_url(url)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_file_urls(session, flush_context, instances):
+    for obj in session.deleted:
+        if isinstance(obj, Hoja_Vida) and _es_nuestro(obj.ruta_archivo_url):
+            queue_file_deletion(obj.ruta_archivo_url, session)
+    for obj in session.dirty:
+        if not isinstance(obj, Hoja_Vida):
+            continue
+        history = inspect(obj).attrs.ruta_archivo_url.history
+        for url in history.deleted:
+            if _es_nuestro(url) and url not in history.added:
+                queue_file_deletion(url, session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+# Un único listener para todo el proceso: registrarlo en init_file_cleanup
+# sumaba uno por cada app creada sobre el mismo db.session. La app se toma
+# del contexto y solo se drena si inicializó la cola.
+@event.listens_for(Session, 'after_commit')
+def _drain_after_commit(session):
+    if not session.info.pop(_PENDING_KEY, None) or not has_app_context():
+        return
+    app = current_app._get_current_object()
+    if 'file_cleanup' in app.extensions:
+        schedule_drain(app)
+
+
+# ---------------------------------------------------------------------------
+# Drenado
+# ---------------------------------------------------------------------------
+
+def drain_deletions(app, limit=None):
+    """Borra en lotes lo encolado. Devuelve (borrados, pendientes)."""
+    from utils.file_service import delete_files_from_vm
+
+    batch_size = _config(app, 'FILE_DELETE_BATCH_SIZE', 100)
+    max_retries = _config(app, 'FILE_DELETE_MAX_RETRIES', 10)
+    borrados = 0
+    with app.app_context():
+        try:
+            last_id = 0
+            while limit is None or borrados < limit:
+                lote = (
+                    ArchivoPorBorrar.query
+                    .filter(ArchivoPorBorrar.id > last_id, ArchivoPorBorrar.intentos < max_retries)
+                    .order_by(ArchivoPorBorrar.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not lote:
+                    break
+                last_id = lote[-1].id
+
+                estados = delete_files_from_vm(list(dict.fromkeys(f.url for f in lote)))
+                for fila in lote:
+                    error = 'El servidor de archivos no respondió' if estados is None else estados.get(fila.url)
+                    if error is None:
+                        db.session.delete(fila)
+                        borrados += 1
+                    else:
+                        fila.intentos += 1
+                        fila.ultimo_error = str(error)[:255]
+                db.session.commit()
+                if estados is None:
+                    # Servidor caído (o circuito abierto): no insistir con el resto
+                    break
+
+            pendientes = ArchivoPorBorrar.query.count()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error drenando la cola de borrado: {e}")
+            raise
+        finally:
+            db.session.remove()
+    return borrados, pendientes
+
+
+def _drain_quietly(app):
+    try:
+        drain_deletions(app)
+    except Exception:
+        pass
+
+
+def schedule_drain(app):
+    """Drena en el pool del proceso (uno por worker de gunicorn)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # Un solo hilo: dos drenados a la vez solo repetirían borrados
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='file-cleanup')
+            _executor_pid = os.getpid()
+    _executor.submit(_drain_quietly, app)
+
+
+# ---------------------------------------------------------------------------
+# Barrido de huérfanos
+# ---------------------------------------------------------------------------
+
+def sweep_orphans(app, grace_seconds=None, dry_run=False):
+    """Encola los archivos almacenados que ninguna hoja de vida referencia.
+
+    Devuelve la lista de nombres huérfanos, o None si no se pudo listar.
+    """
+    from utils.file_service import file_name_from_url, files_base, list_files_in_vm
+
+    if grace_seconds is None:
+        grace_seconds = _config(app, 'FILE_ORPHAN_GRACE_SECONDS', 3600)
+    with app.app_context():
+        files = list_files_in_vm()
+        if files is None:
+            return None
+        base_url = files_base(app)
+
+        referenciados = {
+            file_name_from_url(url)
+            for (url,) in db.session.query(Hoja_Vida.ruta_archivo_url).filter(Hoja_Vida.ruta_archivo_url.isnot(None))
+        }
+        en_cola = {file_name_from_url(url) for (url,) in db.session.query(ArchivoPorBorrar.url)}
+
+        # El período de gracia protege las subidas en curso o directas desde
+        # el navegador: ya están en el servidor pero su URL aún no se guardó.
+        limite = time.time() - grace_seconds
+        huerfanos = [
+            f['name'] for f in files
+            if f['name'] not in referenciados and f['name'] not in en_cola and f.get('created', 0) < limite
+        ]
+        if huerfanos and not dry_run:
+            for name in huerfanos:
+                queue_file_deletion(f"{base_url}/files/{name}")
+            db.session.commit()
+        db.session.remove()
+    return huerfanos
+
+
+# ---------------------------------------------------------------------------
+# Inicialización
+# ---------------------------------------------------------------------------
+
+def init_file_cleanup(app):
+    """Drena tras cada commit que encoló borrados y registra `flask archivos ...`."""
+    if 'file_cleanup' in app.extensions:
+        return
+    app.extensions['file_cleanup'] = True
+
+    @app.cli.group('archivos')
+    def archivos_cli():
+        """Mantenimiento del servidor de archivos."""
+
+    @archivos_cli.command('drenar')
+    def drenar_command():
+        """Borra ahora todo lo encolado."""
+        borrados, pendientes = drain_deletions(app)
+        click.echo(f"{borrados} archivo(s) borrados, {pendientes} pendiente(s).")
+
+    @archivos_cli.command('barrer-huerfanos')
+    @click.option('--dry-run', is_flag=True, help='Solo listar, sin encolar.')
+    @click.option('--gracia', type=int, default=None, help='Segundos de antigüedad mínima.')
+    def barrer_command(dry_run, gracia):
+        """Encola (y borra) los archivos sin hoja de vida que los referencie."""
+        huerfanos = sweep_orphans(app, grace_seconds=gracia, dry_run=dry_run)
+        if huerfanos is None:
+            click.echo("No se pudo listar el servidor de archivos.")
+            return
+        click.echo(f"{len(huerfanos)} archivo(s) huérfanos.")
+        if huerfanos and not dry_run:
+            borrados, pendientes = drain_deletions(app)
+            click.echo(f"{borrados} archivo(s) borrados, {pendientes} pendiente(s).")
@@ -1,38 +1,316 @@
+"""
+Cliente del servidor de archivos (file_server_docker).
+
+Cada proceso mantiene un único FileServiceClient con una `requests.Session`
+(keep-alive + pool de conexiones), política de reintentos de urllib3 y un
+circuit breaker: si el servidor de archivos está caído, tras varios fallos
+seguidos las llamadas fallan de inmediato durante un tiempo en lugar de
+esperar el timeout en cada subida.
+
+Configuración (app.config):
+    FILE_SERVER_URL                 URL del endpoint /upload
+    FILE_SERVER_POOL_SIZE           conexiones por pool (10)
+    FILE_SERVER_RETRIES             reintentos de urllib3 (3)
+    FILE_SERVER_BACKOFF             backoff_factor de urllib3 (0.3)
+    FILE_SERVER_CONNECT_TIMEOUT     segundos (3)
+    FILE_SERVER_READ_TIMEOUT        segundos (10)
+    FILE_SERVER_BREAKER_THRESHOLD   fallos seguidos para abrir el circuito (5)
+    FILE_SERVER_BREAKER_RESET       segundos con el circuito abierto (30)
+    FILE_UPLOAD_SECRET              si está definido, cada subida lleva un token
+                                    firmado (utils/upload_tokens.py)
+"""
+import logging
+import os
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import current_app
 
-def upload_file_to_vm(file):
-    try:
-        url = current_app.config.get('FILE_SERVER_URL')
-        # Debug print: Veremos qué URL está intentando usar
-        print(f"--- INTENTANDO CONECTAR A: {url} ---") 
-        
-        if not url:
-            print("Error: FILE_SERVER_URL no configurado")
-            return None
+from utils.upload_tokens import issue_upload_token
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: no se intenta la llamada."""
+
+
+class CircuitBreaker:
+    """closed -> (N fallos) -> open -> (reset_timeout) -> half_open -> closed/open."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._half_open_probe = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def before_call(self):
+        with self._lock:
+            state = self._state()
+            if state == 'open':
+                raise CircuitOpenError('Servidor de archivos no disponible (circuito abierto)')
+            if state == 'half_open':
+                # Solo una llamada de prueba a la vez mientras está semiabierto
+                if self._half_open_probe:
+                    raise CircuitOpenError('Servidor de archivos en prueba (circuito semiabierto)')
+                self._half_open_probe = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._half_open_probe = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._half_open_probe or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._half_open_probe = False
 
-        # Rebobinar el archivo por si acaso fue leído antes
-        file.stream.seek(0)
-        
-        files = {'file': (file.filename, file.stream, file.content_type)}
-        
-        # Aumenté el timeout a 10s por si la VM es lenta
-        response = requests.post(url, files=files, timeout=10)
-        
-        # Debug print: Veremos qué respondió la VM
-        print(f"--- RESPUESTA VM: {response.status_code} - {response.text} ---")
-
-        if response.status_code in [200, 201]:
+
+class FileServiceClient:
+    def __init__(self, upload_url, pool_size=10, retries=3, backoff=0.3,
+                 connect_timeout=3, read_timeout=10, breaker=None, upload_secret=None):
+        self.upload_url = upload_url
+        self.upload_secret = upload_secret
+        self.base_url = upload_url.rsplit('/upload', 1)[0]
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            # POST no es idempotente: solo se reintenta si no llegó a enviarse
+            # (errores de conexión); las lecturas/estados solo en GET/HEAD/DELETE.
+            allowed_methods=frozenset({'GET', 'HEAD', 'DELETE'}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _request(self, method, url, **kwargs):
+        self.breaker.before_call()
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            logger.warning("file-server %s %s falló en %.0f ms: %s",
+                           method, url, (time.perf_counter() - start) * 1000, e)
+            raise
+        except BaseException:
+            # Cualquier otro error (p. ej. OSError al leer el archivo a enviar)
+            # también cierra la llamada: si no, la de prueba del circuito
+            # semiabierto quedaría tomada hasta reiniciar el proceso.
+            self.breaker.record_failure()
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        logger.info("file-server %s %s -> %s en %.0f ms", method, url, response.status_code, elapsed_ms)
+        return response
+
+    def upload(self, filename, stream, content_type=None):
+        """Sube un archivo y devuelve su URL pública (None si falla)."""
+        headers = {}
+        if self.upload_secret:
+            headers['X-Upload-Token'] = issue_upload_token(self.upload_secret, ttl=60)[0]
+        try:
+            response = self._request('POST', self.upload_url, headers=headers,
+                                     files={'file': (filename, stream, content_type)})
+        except (CircuitOpenError, requests.RequestException) as e:
+            logger.error("Error subiendo %s al servidor de archivos: %s", filename, e)
+            return None
+        if response.status_code in (200, 201):
             return response.json().get('url')
-        
+        logger.error("Servidor de archivos rechazó %s: %s - %s", filename, response.status_code, response.text[:200])
         return None
 
-    except requests.exceptions.ConnectionError:
-        print("!!! ERROR CRÍTICO: No se puede conectar a la VM (127.0.0.1:8080). Revisa VirtualBox.")
+    def _maintenance_headers(self):
+        if not self.upload_secret:
+            return {}
+        return {'X-Upload-Token': issue_upload_token(self.upload_secret, ttl=60, scope='mantenimiento')[0]}
+
+    def delete(self, file_url):
+        """Borra un archivo a partir de su URL. 404 cuenta como éxito."""
+        filename = file_url.split('/')[-1]
+        try:
+            response = self._request('DELETE', f"{self.base_url}/files/{filename}",
+                                     headers=self._maintenance_headers())
+        except (CircuitOpenError, requests.RequestException) as e:
+            logger.error("Error borrando %s del servidor de archivos: %s", filename, e)
+            return False
+        if response.status_code == 200:
+            return True
+        if response.status_code == 404:
+            # Ya no está: lo consideramos éxito
+            return True
+        logger.error("Error borrando archivo VM %s: %s", filename, response.status_code)
+        return False
+
+    def delete_many(self, filenames):
+        """Borrado en lote (DELETE /files). Devuelve el resultado del servidor o None."""
+        try:
+            response = self._request('DELETE', f"{self.base_url}/files",
+                                     headers=self._maintenance_headers(), json={'names': list(filenames)})
+        except (CircuitOpenError, requests.RequestException) as e:
+            logger.error("Error en borrado en lote (%d archivos): %s", len(filenames), e)
+            return None
+        if response.status_code != 200:
+            logger.error("Servidor de archivos rechazó el borrado en lote: %s - %s",
+                         response.status_code, response.text[:200])
+            return None
+        return response.json()
+
+    def list_files(self):
+        """[{name, created}] de todo lo almacenado, o None si falla."""
+        try:
+            response = self._request('GET', f"{self.base_url}/files", headers=self._maintenance_headers())
+        except (CircuitOpenError, requests.RequestException) as e:
+            logger.error("Error listando archivos: %s", e)
+            return None
+        if response.status_code != 200:
+            logger.error("Servidor de archivos rechazó el listado: %s", response.status_code)
+            return None
+        return response.json().get('files', [])
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+
+def get_client(app=None):
+    """Cliente del proceso actual (None si FILE_SERVER_URL no está configurado).
+
+    Se recrea tras un fork (gunicorn) o si cambia la URL configurada.
+    """
+    global _client, _client_key
+    app = app or current_app
+    url = app.config.get('FILE_SERVER_URL')
+    if not url:
+        return None
+    key = (os.getpid(), url, app.config.get('FILE_UPLOAD_SECRET'))
+    with _client_lock:
+        if _client is None or _client_key != key:
+            config = app.config
+            _client = FileServiceClient(
+                url,
+                pool_size=config.get('FILE_SERVER_POOL_SIZE', 10),
+                retries=config.get('FILE_SERVER_RETRIES', 3),
+                backoff=config.get('FILE_SERVER_BACKOFF', 0.3),
+                connect_timeout=config.get('FILE_SERVER_CONNECT_TIMEOUT', 3),
+                read_timeout=config.get('FILE_SERVER_READ_TIMEOUT', 10),
+                breaker=CircuitBreaker(
+                    failure_threshold=config.get('FILE_SERVER_BREAKER_THRESHOLD', 5),
+                    reset_timeout=config.get('FILE_SERVER_BREAKER_RESET', 30),
+                ),
+                upload_secret=config.get('FILE_UPLOAD_SECRET'),
+            )
+            _client_key = key
+        return _client
+
+
+def upload_file_to_vm(file):
+    client = get_client()
+    if client is None:
+        print("Error: FILE_SERVER_URL no configurado")
         return None
-    except Exception as e:
-        print(f"!!! ERROR GENERAL EN UPLOAD: {e}")
+    # Rebobinar el archivo por si acaso fue leído antes
+    file.stream.seek(0)
+    return client.upload(file.filename, file.stream, file.content_type)
+
+def upload_path_to_vm(path, filename, content_type=None):
+    """Sube un archivo ya guardado en disco (cola de subidas de hojas de vida)."""
+    client = get_client()
+    if client is None:
+        print("Error: FILE_SERVER_URL no configurado")
         return None
+    with open(path, 'rb') as stream:
+        return client.upload(filename, stream, content_type)
+
+def files_base(app=None):
+    """Raíz pública del servidor de archivos (FILE_SERVER_*_URL apunta a .../upload)."""
+    config = (app or current_app).config
+    url = config.get('FILE_SERVER_PUBLIC_URL') or config.get('FILE_SERVER_URL')
+    return url.rsplit('/upload', 1)[0].rstrip('/') if url else None
+
+def is_file_server_url(file_url, app=None):
+    """True si la URL es de un archivo de nuestro servidor (<base>/files/<nombre>).
+
+    Los enlaces externos nunca se borran ni tienen miniatura, aunque su último
+    segmento coincida con el nombre de un archivo almacenado.
+    """
+    base = files_base(app)
+    return bool(file_url and base and file_url.startswith(base + '/files/'))
+
+def file_name_from_url(file_url):
+    """Nombre con el que el servidor de archivos guarda la URL (último segmento)."""
+    return file_url.rstrip('/').split('/')[-1] if file_url else None
+
+def delete_files_from_vm(file_urls):
+    """Borra varias URLs en una sola llamada. Devuelve {url: None | error} o None si falla.
+
+    Las URLs ajenas al servidor de archivos no se envían y cuentan como
+    borradas: no hay nada nuestro que borrar.
+    """
+    client = get_client()
+    if client is None:
+        print("Error: FILE_SERVER_URL no configurado para borrar")
+        return None
+    estados = {url: None for url in file_urls}
+    by_name = {}
+    for url in file_urls:
+        if is_file_server_url(url):
+            by_name[file_name_from_url(url)] = url
+        else:
+            logger.warning("Se omite el borrado de %s: no es del servidor de archivos", url)
+    if not by_name:
+        return estados
+    resultado = client.delete_many(by_name)
+    if resultado is None:
+        return None
+    for name, error in (resultado.get('errores') or {}).items():
+        if name in by_name:
+            estados[by_name[name]] = error
+    return estados
+
+def list_files_in_vm():
+    client = get_client()
+    if client is None:
+        print("Error: FILE_SERVER_URL no configurado")
+        return None
+    return client.list_files()
 
 def delete_file_from_vm(file_url):
     """
@@ -41,36 +319,11 @@ def delete_file_from_vm(file_url):
     """
     if not file_url:
         return False
-        
-    try:
-        # 1. Extraer el nombre del archivo de la URL
-        filename = file_url.split('/')[-1]
-        
-        # 2. Construir la URL base de la VM para borrar
-        upload_url = current_app.config.get('FILE_SERVER_URL')
-        if not upload_url:
-            print("Error: FILE_SERVER_URL no configurado para borrar")
-            return False
-
-        base_url = upload_url.replace('/upload', '')
-        delete_endpoint = f"{base_url}/api/delete/{filename}"
-        
-        # 3. Enviar petición DELETE
-        response = requests.delete(delete_endpoint, timeout=5)
-        
-        if response.status_code == 200:
-            print(f"Archivo eliminado de VM: {filename}")
-            return True
-        elif response.status_code == 404:
-            print("Archivo no existía en VM (ya borrado o ruta mal formada)")
-            return True # Lo consideramos éxito porque ya no está
-            
-        print(f"Error borrando archivo VM: {response.status_code}")
+    if not is_file_server_url(file_url):
+        logger.warning("Se omite el borrado de %s: no es del servidor de archivos", file_url)
         return False
-        
-    except requests.exceptions.ConnectionError:
-        print("!!! ERROR CRÍTICO AL BORRAR: No hay conexión con la VM.")
+    client = get_client()
+    if client is None:
+        print("Error: FILE_SERVER_URL no configurado para borrar")
         return False
-    except Exception as e:
-        print(f"Excepción al borrar archivo de VM: {e}")
-        return False
\ No newline at end of file
+    return client.delete(file_url)
@@ -0,0 +1,98 @@
+"""
+Validadores HTTP (ETag / Last-Modified) para GET condicionales.
+
+Las listas y detalles que el frontend consulta periódicamente calculan su
+versión con una sola consulta agregada (max id, max fecha_actualizacion,
+count) y, si el cliente ya la tiene (If-None-Match), se responde 304 sin
+cargar ni serializar ningún registro.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import hashlib
+
+from flask import abort, make_response, request
+from sqlalchemy import func
+
+from extensions import db
+
+
+def _as_utc(value):
+    """Las columnas DateTime se guardan sin zona horaria (UTC implícito)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _make_etag(*parts):
+    # La URL completa (path + query string) forma parte de la huella para que
+    # cada filtro tenga su propio validador aunque los agregados coincidan.
+    h = hashlib.blake2b(digest_size=16)
+    h.update(request.full_path.encode("utf-8"))
+    for part in parts:
+        h.update(b"\x1f")
+        h.update(str(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class CacheValidators:
+    etag: str
+    last_modified: datetime | None = None
+
+    def is_fresh(self):
+        """True si el cliente ya tiene esta versión del recurso."""
+        # If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110).
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(self.etag)
+        if self.last_modified is not None and request.if_modified_since is not None:
+            return self.last_modified.replace(microsecond=0) <= request.if_modified_since
+        return False
+
+    def not_modified(self):
+        """Respuesta 304 vacía con los mismos validadores."""
+        return self.apply(make_response("", 304))
+
+    def apply(self, response):
+        """Agrega ETag, Last-Modified y Cache-Control a una respuesta."""
+        # ETag débil: la representación JSON es equivalente aunque cambie la
+        # codificación (p. ej. gzip), que es justo lo que garantiza W/.
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified is not None:
+            response.last_modified = self.last_modified
+        # no-cache: el navegador guarda la respuesta pero revalida siempre.
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+
+def collection_validators(query, pk_column, ts_column):
+    """Validadores (solo ETag) para una colección filtrada.
+
+    `query` es la misma consulta (con filtros) que usa la ruta para listar;
+    aquí solo se ejecuta su versión agregada.
+    """
+    max_pk, max_ts, total = (
+        query.order_by(None)
+        .with_entities(func.max(pk_column), func.max(ts_column), func.count())
+        .one()
+    )
+    max_ts = _as_utc(max_ts)
+    etag = _make_etag(max_pk, max_ts.isoformat() if max_ts else "", total)
+    # Sin Last-Modified: max(fecha_actualizacion) no cambia al borrar una fila
+    # (ni cuando cambian datos unidos, como el username en asistencias), y un
+    # If-Modified-Since solo daría un 304 obsoleto. El ETag cuenta las filas.
+    return CacheValidators(etag=etag)
+
+
+def row_validators_or_404(pk_column, ts_column, id):
+    """Validadores de un registro a partir de su fecha_actualizacion.
+
+    Lanza 404 si el registro no existe (igual que `get_or_404`).
+    """
+    row = db.session.query(pk_column, ts_column).filter(pk_column == id).first()
+    if row is None:
+        abort(404)
+    ts = _as_utc(row[1])
+    etag = _make_etag(row[0], ts.isoformat() if ts else "")
+    return CacheValidators(etag=etag, last_modified=ts)
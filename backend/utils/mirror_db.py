@@ -1,18 +1,35 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import date, datetime, time
 from decimal import Decimal
+import hashlib
+import json
 import re
-from typing import Any
+import time as time_module
+import weakref
+from typing import Any, Callable
 from uuid import UUID
 
-from sqlalchemy import inspect, text
+from sqlalchemy import bindparam, event, inspect, text
 from sqlalchemy.engine import Connection
+from sqlalchemy.sql import sqltypes
 
 
 _IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
+# Postgres schema mirror: "statement" (transition tables), "row" (FOR EACH ROW)
+# or "queue" (triggers only enqueue keys; apply_mirror_queue copies the rows later)
+TRIGGER_LEVELS = ("statement", "row", "queue")
+
+# Unlogged change queue for "queue" level, inside the mirror schema
+MIRROR_QUEUE_TABLE = "_change_queue"
+
+# Chunked initial copy: one progress row per table being copied into
+# `_copy_<table>`; the staging table replaces the mirror table when done.
+MIRROR_COPY_PROGRESS_TABLE = "_copy_progress"
+MIRROR_COPY_PREFIX = "_copy_"
+
 
 def _to_jsonable(value: Any) -> Any:
 	if value is None:
@@ -32,10 +49,6 @@ def _to_jsonable(value: Any) -> Any:
 	return str(value)
 
 
-def _row_mapping_to_jsonable(row_mapping: Any) -> dict[str, Any]:
-	return {k: _to_jsonable(v) for k, v in dict(row_mapping).items()}
-
-
 def _validate_ident(name: str, *, what: str) -> str:
 	if not name or not _IDENTIFIER_RE.match(name):
 		raise ValueError(f"Identificador inválido para {what}: {name!r}")
@@ -60,6 +73,7 @@ class MirrorSetupResult:
 	tables_created: list[str]
 	triggers_created: int
 	skipped_tables: list[str]
+	copies_pending: list[str] = field(default_factory=list)
 
 
 def attach_mirror_if_needed(conn: Connection, mirror_path: str | None, *, schema_name: str = "mirror") -> bool:
@@ -86,8 +100,39 @@ def attach_mirror_if_needed(conn: Connection, mirror_path: str | None, *, schema
 	return True
 
 
-def list_mirror_tables(conn: Connection, *, schema_name: str = "mirror") -> list[str]:
+# Per-process cache of the mirror browser metadata (table list, columns, PK).
+# Setup, schema sync and copy swaps invalidate it; the TTL bounds staleness in
+# the other workers, which don't see those invalidations.
+MIRROR_METADATA_TTL = 300.0
+
+_mirror_metadata_cache: dict[tuple, tuple[float, Any]] = {}
+
+
+@dataclass(frozen=True)
+class MirrorTableMeta:
+	columns: list[str]
+	pk_cols: list[str]
+
+
+def invalidate_mirror_metadata() -> None:
+	_mirror_metadata_cache.clear()
+
+
+def _cached_metadata(conn: Connection, key: tuple, load: Callable[[], Any]) -> Any:
+	full_key = (str(conn.engine.url), *key)
+	hit = _mirror_metadata_cache.get(full_key)
+	now = time_module.monotonic()
+	if hit is not None and hit[0] > now:
+		return hit[1]
+	value = load()
+	_mirror_metadata_cache[full_key] = (now + MIRROR_METADATA_TTL, value)
+	return value
+
+
+def list_mirror_tables(conn: Connection, *, schema_name: str = "mirror", cache: bool = False) -> list[str]:
 	schema_name = _validate_ident(schema_name, what="schema")
+	if cache:
+		return list(_cached_metadata(conn, ("tables", schema_name), lambda: list_mirror_tables(conn, schema_name=schema_name)))
 	if conn.dialect.name == "sqlite":
 		q = f"SELECT name FROM {_q_sqlite_ident(schema_name)}.sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name;"
 		return [r[0] for r in conn.exec_driver_sql(q).fetchall()]
@@ -99,6 +144,7 @@ def list_mirror_tables(conn: Connection, *, schema_name: str = "mirror") -> list
 		FROM information_schema.tables
 		WHERE table_schema = %s
 		  AND table_type = 'BASE TABLE'
+		  AND table_name NOT LIKE '\\_%%'
 		ORDER BY table_name;
 		""",
 		(schema_name,),
@@ -106,13 +152,65 @@ def list_mirror_tables(conn: Connection, *, schema_name: str = "mirror") -> list
 	return [r[0] for r in rows]
 
 
+# Columns in order and the key used for paging: the primary key or, for
+# mirror tables created with LIKE + unique index, the first plain unique index.
+# indkey is an int2vector subscripted from 0: the key position comes from
+# WITH ORDINALITY (1-based) rather than array_position on the cast array.
+_PG_TABLE_META_SQL = """
+SELECT a.attname, COALESCE((
+	SELECT o.pos FROM unnest(k.indkey::int2[]) WITH ORDINALITY AS o(attnum, pos)
+	WHERE o.attnum = a.attnum
+), 0) AS pk_pos
+FROM pg_attribute a
+JOIN pg_class c ON c.oid = a.attrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN LATERAL (
+	SELECT i.indkey FROM pg_index i
+	WHERE i.indrelid = c.oid AND (i.indisprimary OR i.indisunique)
+	  AND i.indpred IS NULL AND i.indexprs IS NULL
+	ORDER BY i.indisprimary DESC, i.indnatts
+	LIMIT 1
+) k ON true
+WHERE n.nspname = :schema AND c.relname = :table AND a.attnum > 0 AND NOT a.attisdropped
+ORDER BY a.attnum
+"""
+
+
+def mirror_table_metadata(conn: Connection, *, table_name: str, schema_name: str = "mirror") -> MirrorTableMeta:
+	"""Columns and paging key of a mirror table, cached per process (one catalog query on a miss)."""
+	schema_name = _validate_ident(schema_name, what="schema")
+	table_name = _validate_ident(table_name, what="table")
+
+	def load() -> MirrorTableMeta:
+		if conn.dialect.name == "sqlite":
+			rows = [(r[1], int(r[5] or 0)) for r in _sqlite_table_info(conn, schema_name, table_name)]
+		else:
+			rows = [tuple(r) for r in conn.execute(text(_PG_TABLE_META_SQL), {"schema": schema_name, "table": table_name})]
+		if not rows:
+			raise ValueError(f"Tabla no encontrada en el mirror: {table_name}")
+		pk_cols = [name for name, pos in sorted((r for r in rows if r[1] > 0), key=lambda r: r[1])]
+		return MirrorTableMeta(columns=[r[0] for r in rows], pk_cols=[c for c in pk_cols if _IDENTIFIER_RE.match(c)])
+
+	return _cached_metadata(conn, ("table", schema_name, table_name), load)
+
+
 def fetch_mirror_table_preview(
 	conn: Connection,
 	*,
 	table_name: str,
 	limit: int = 50,
 	schema_name: str = "mirror",
+	columns: list[str] | None = None,
+	after_pk: list[Any] | None = None,
+	filters: dict[str, Any] | None = None,
+	order: str = "desc",
 ) -> dict[str, Any]:
+	"""One page of a mirror table, ordered by its key.
+
+	Keyset paging: pass the returned `next_after_pk` as `after_pk` to get the
+	next page, so every page costs the same however deep it is. `columns`
+	projects the output and `filters` are column = value equalities.
+	"""
 	schema_name = _validate_ident(schema_name, what="schema")
 	table_name = _validate_ident(table_name, what="table")
 	try:
@@ -121,41 +219,52 @@ def fetch_mirror_table_preview(
 		raise ValueError("limit inválido") from e
 	if limit_int < 0 or limit_int > 500:
 		raise ValueError("limit fuera de rango (0..500)")
-
-	if conn.dialect.name == "sqlite":
-		order_by = ""
-		try:
-			pk_cols = _sqlite_pk_columns(conn, table_name)
-			if pk_cols:
-				order_by = f" ORDER BY {_q_sqlite_ident(pk_cols[0])} DESC"
-		except Exception:
-			order_by = ""
-
-		sql = f"SELECT * FROM {_q_sqlite_ident(schema_name)}.{_q_sqlite_ident(table_name)}{order_by} LIMIT ?;"
-		result = conn.exec_driver_sql(sql, (limit_int,))
-		columns = list(result.keys())
-		rows = [_row_mapping_to_jsonable(r._mapping) for r in result.fetchall()]
-		return {"table": table_name, "columns": columns, "rows": rows}
-
-	# Postgres
-	order_by = ""
-	try:
-		insp = inspect(conn)
-		pk = insp.get_pk_constraint(table_name, schema=schema_name) or {}
-		pk_cols = pk.get("constrained_columns") or []
-		pk_cols = [c for c in pk_cols if _IDENTIFIER_RE.match(c)]
-		if pk_cols:
-			order_by = f" ORDER BY {_q_pg_ident(pk_cols[0])} DESC"
-	except Exception:
-		order_by = ""
-
-	sql = text(
-		f"SELECT * FROM {_q_pg_ident(schema_name)}.{_q_pg_ident(table_name)}{order_by} LIMIT :limit;"
-	)
-	result = conn.execute(sql, {"limit": limit_int})
-	columns = list(result.keys())
-	rows = [_row_mapping_to_jsonable(r._mapping) for r in result.fetchall()]
-	return {"table": table_name, "columns": columns, "rows": rows}
+	if order not in ("asc", "desc"):
+		raise ValueError("order debe ser 'asc' o 'desc'")
+
+	meta = mirror_table_metadata(conn, table_name=table_name, schema_name=schema_name)
+	unknown = [c for c in [*(columns or []), *(filters or {})] if c not in meta.columns]
+	if unknown:
+		raise ValueError(f"Columnas desconocidas: {', '.join(unknown)}")
+	out_cols = [c for c in meta.columns if c in columns] if columns else list(meta.columns)
+	pk_cols = meta.pk_cols
+	if after_pk is not None and (not pk_cols or len(after_pk) != len(pk_cols)):
+		raise ValueError(f"after_pk debe tener {len(pk_cols)} valor(es)")
+
+	q = _q_sqlite_ident if conn.dialect.name == "sqlite" else _q_pg_ident
+	select_cols = out_cols + [c for c in pk_cols if c not in out_cols]
+	params: dict[str, Any] = {"limit": limit_int + 1}
+	where: list[str] = []
+	for i, (col, value) in enumerate((filters or {}).items()):
+		where.append(f"{q(col)} = :f{i}")
+		params[f"f{i}"] = value
+	if after_pk is not None:
+		keys = ", ".join(q(c) for c in pk_cols)
+		marks = ", ".join(f":k{i}" for i in range(len(pk_cols)))
+		where.append(f"({keys}) {'<' if order == 'desc' else '>'} ({marks})")
+		params.update({f"k{i}": v for i, v in enumerate(after_pk)})
+	sql = f"SELECT {', '.join(q(c) for c in select_cols)} FROM {q(schema_name)}.{q(table_name)}"
+	if where:
+		sql += " WHERE " + " AND ".join(where)
+	if pk_cols:
+		sql += " ORDER BY " + ", ".join(f"{q(c)} {order.upper()}" for c in pk_cols)
+	sql += " LIMIT :limit"
+
+	fetched = conn.execute(text(sql), params).fetchall()
+	has_more = len(fetched) > limit_int
+	page = fetched[:limit_int]
+	next_after_pk = None
+	if has_more and pk_cols and page:
+		last = page[-1]._mapping
+		next_after_pk = [_to_jsonable(last[c]) for c in pk_cols]
+	return {
+		"table": table_name,
+		"columns": out_cols,
+		"pk": pk_cols,
+		"rows": [{c: _to_jsonable(r._mapping[c]) for c in out_cols} for r in page],
+		"has_more": has_more,
+		"next_after_pk": next_after_pk,
+	}
 
 
 def _sqlite_main_tables(conn: Connection) -> list[str]:
@@ -193,74 +302,196 @@ def _sqlite_table_exists(conn: Connection, *, schema_name: str, table_name: str)
 	return conn.exec_driver_sql(q, (table_name,)).fetchone() is not None
 
 
-def _sqlite_create_mirror_table(conn: Connection, *, schema_name: str, table_name: str) -> None:
-	schema_name = _validate_ident(schema_name, what="schema")
-	table_name = _validate_ident(table_name, what="table")
-	# Create with column names/types inferred; constraints not copied.
-	conn.exec_driver_sql(
-		f"CREATE TABLE IF NOT EXISTS {_q_sqlite_ident(schema_name)}.{_q_sqlite_ident(table_name)} AS SELECT * FROM {_q_sqlite_ident(table_name)} WHERE 0;"
-	)
+# SQLite forbids qualified table names in trigger bodies, so a trigger on a
+# main table cannot write `mirror.t`. Instead each mirror table gets a write
+# view `_w_<t>` in the mirror file whose INSTEAD OF triggers (living in the
+# mirror schema, where `t` resolves to mirror.t) upsert/delete the row, and
+# the main tables get TEMP triggers (where unqualified `_w_<t>` resolves to
+# the mirror view) installed on every connection by configure_sqlite_mirror.
+SQLITE_WRITE_VIEW_PREFIX = "_w_"
+SQLITE_SYNCHRONOUS = ("OFF", "NORMAL", "FULL", "EXTRA")
 
+_sqlite_configured_engines: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def _sqlite_table_info(conn: Any, schema_name: str, table_name: str) -> list[tuple]:
+	"""PRAGMA table_info on an SQLAlchemy or a raw sqlite3 connection."""
+	sql = f"PRAGMA {_q_sqlite_ident(schema_name)}.table_info({_q_sqlite_ident(table_name)});"
+	if isinstance(conn, Connection):
+		return conn.exec_driver_sql(sql).fetchall()
+	return conn.execute(sql).fetchall()
 
-def _sqlite_drop_mirror_triggers(conn: Connection, *, table_name: str) -> None:
-	_validate_ident(table_name, what="table")
-	for suffix in ("ai", "au", "ad"):
-		conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {_q_sqlite_ident('trg_mirror_' + table_name + '_' + suffix)};")
 
+def _sqlite_create_mirror_table(conn: Connection, *, schema_name: str, table_name: str) -> bool:
+	"""Create the mirror table with the source columns and a real PRIMARY KEY.
 
-def _sqlite_create_mirror_triggers(conn: Connection, *, schema_name: str, table_name: str) -> int:
+	A mirror table from older versions (CREATE TABLE AS, no PK) is rebuilt
+	keeping its rows. Returns True if the table was (re)created.
+	"""
 	schema_name = _validate_ident(schema_name, what="schema")
 	table_name = _validate_ident(table_name, what="table")
+	source = _sqlite_table_info(conn, "main", table_name)
+	existing = _sqlite_table_info(conn, schema_name, table_name)
+	if existing and any(int(r[5] or 0) > 0 for r in existing):
+		return False
 
-	cols = _sqlite_table_columns(conn, table_name)
-	pk_cols = _sqlite_pk_columns(conn, table_name)
-	if not cols or not pk_cols:
-		return 0
+	mirror_table = f"{_q_sqlite_ident(schema_name)}.{_q_sqlite_ident(table_name)}"
+	legacy = _validate_ident(f"_legacy_{table_name}", what="table")
+	if existing:
+		conn.exec_driver_sql(f"ALTER TABLE {mirror_table} RENAME TO {_q_sqlite_ident(legacy)};")
+
+	# Column types only: no NOT NULL/defaults/FKs, the mirror just holds copies.
+	columns = [f"{_q_sqlite_ident(r[1])} {r[2]}".rstrip() for r in source]
+	pk_cols = [r[1] for r in sorted((r for r in source if int(r[5] or 0) > 0), key=lambda r: r[5])]
+	if pk_cols:
+		columns.append(f"PRIMARY KEY ({', '.join(_q_sqlite_ident(c) for c in pk_cols)})")
+	conn.exec_driver_sql(f"CREATE TABLE {mirror_table} ({', '.join(columns)});")
+
+	if existing:
+		common = ", ".join(_q_sqlite_ident(r[1]) for r in source if r[1] in {e[1] for e in existing})
+		conn.exec_driver_sql(
+			f"INSERT OR REPLACE INTO {mirror_table} ({common}) SELECT {common} FROM {_q_sqlite_ident(schema_name)}.{_q_sqlite_ident(legacy)};"
+		)
+		conn.exec_driver_sql(f"DROP TABLE {_q_sqlite_ident(schema_name)}.{_q_sqlite_ident(legacy)};")
+	return True
 
-	cols_list = ", ".join(_q_sqlite_ident(c) for c in cols)
-	new_values = ", ".join(f"NEW.{_q_sqlite_ident(c)}" for c in cols)
-	pk_where_new = " AND ".join(f"{_q_sqlite_ident(c)} = NEW.{_q_sqlite_ident(c)}" for c in pk_cols)
-	pk_where_old = " AND ".join(f"{_q_sqlite_ident(c)} = OLD.{_q_sqlite_ident(c)}" for c in pk_cols)
 
-	# Insert trigger: upsert via delete+insert (works without unique constraints)
-	trg_ai = _q_sqlite_ident(f"trg_mirror_{table_name}_ai")
-	trg_au = _q_sqlite_ident(f"trg_mirror_{table_name}_au")
-	trg_ad = _q_sqlite_ident(f"trg_mirror_{table_name}_ad")
+def _sqlite_drop_mirror_triggers(conn: Connection, *, table_name: str) -> None:
+	# Persistent triggers of older versions (they could never write the mirror)
+	_validate_ident(table_name, what="table")
+	for suffix in ("ai", "au", "ad"):
+		conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS main.{_q_sqlite_ident('trg_mirror_' + table_name + '_' + suffix)};")
 
-	mirror_table = f"{_q_sqlite_ident(schema_name)}.{_q_sqlite_ident(table_name)}"
-	main_table = _q_sqlite_ident(table_name)
 
+def _sqlite_create_write_view(
+	conn: Connection, *, schema_name: str, table_name: str, cols: list[str], pk_cols: list[str]
+) -> None:
+	"""`_w_<t>` view in the mirror file; INSERT upserts into the table, DELETE deletes."""
+	schema_name = _validate_ident(schema_name, what="schema")
+	table_name = _validate_ident(table_name, what="table")
+	view = _validate_ident(f"{SQLITE_WRITE_VIEW_PREFIX}{table_name}", what="view")
+	q = _q_sqlite_ident
+	cols_list = ", ".join(q(c) for c in cols)
+	non_pk = [c for c in cols if c not in pk_cols]
+	on_conflict = (
+		"DO UPDATE SET " + ", ".join(f"{q(c)} = excluded.{q(c)}" for c in non_pk) if non_pk else "DO NOTHING"
+	)
+	conn.exec_driver_sql(f"DROP VIEW IF EXISTS {q(schema_name)}.{q(view)};")
+	conn.exec_driver_sql(f"CREATE VIEW {q(schema_name)}.{q(view)} AS SELECT {cols_list} FROM {q(table_name)};")
 	conn.exec_driver_sql(
 		f"""
-		CREATE TRIGGER {trg_ai}
-		AFTER INSERT ON {main_table}
+		CREATE TRIGGER {q(schema_name)}.{q(view + '_ins')}
+		INSTEAD OF INSERT ON {q(view)}
 		BEGIN
-			DELETE FROM {mirror_table} WHERE {pk_where_new};
-			INSERT INTO {mirror_table} ({cols_list}) VALUES ({new_values});
+			INSERT INTO {q(table_name)} ({cols_list}) VALUES ({", ".join(f"NEW.{q(c)}" for c in cols)})
+			ON CONFLICT ({", ".join(q(c) for c in pk_cols)}) {on_conflict};
 		END;
 		"""
 	)
 	conn.exec_driver_sql(
 		f"""
-		CREATE TRIGGER {trg_au}
-		AFTER UPDATE ON {main_table}
+		CREATE TRIGGER {q(schema_name)}.{q(view + '_del')}
+		INSTEAD OF DELETE ON {q(view)}
 		BEGIN
-			DELETE FROM {mirror_table} WHERE {pk_where_old};
-			INSERT INTO {mirror_table} ({cols_list}) VALUES ({new_values});
+			DELETE FROM {q(table_name)} WHERE {" AND ".join(f"{q(c)} = OLD.{q(c)}" for c in pk_cols)};
 		END;
 		"""
 	)
-	conn.exec_driver_sql(
+
+
+def _sqlite_temp_trigger_sql(table_name: str, cols: list[str], pk_cols: list[str]) -> list[str]:
+	q = _q_sqlite_ident
+	view = q(f"{SQLITE_WRITE_VIEW_PREFIX}{table_name}")
+	main_table = f"main.{q(table_name)}"
+	cols_list = ", ".join(q(c) for c in cols)
+	new_values = ", ".join(f"NEW.{q(c)}" for c in cols)
+	pk_where_old = " AND ".join(f"{q(c)} = OLD.{q(c)}" for c in pk_cols)
+	pk_changed = " OR ".join(f"OLD.{q(c)} IS NOT NEW.{q(c)}" for c in pk_cols)
+	names = {suffix: q(f"trg_mirror_{table_name}_{suffix}") for suffix in ("ai", "au", "ad")}
+	return [
+		*(f"DROP TRIGGER IF EXISTS temp.{name};" for name in names.values()),
 		f"""
-		CREATE TRIGGER {trg_ad}
-		AFTER DELETE ON {main_table}
+		CREATE TEMP TRIGGER {names['ai']} AFTER INSERT ON {main_table}
 		BEGIN
-			DELETE FROM {mirror_table} WHERE {pk_where_old};
+			INSERT INTO {view} ({cols_list}) VALUES ({new_values});
 		END;
-		"""
-	)
+		""",
+		f"""
+		CREATE TEMP TRIGGER {names['au']} AFTER UPDATE ON {main_table}
+		BEGIN
+			DELETE FROM {view} WHERE {pk_where_old} AND ({pk_changed});
+			INSERT INTO {view} ({cols_list}) VALUES ({new_values});
+		END;
+		""",
+		f"""
+		CREATE TEMP TRIGGER {names['ad']} AFTER DELETE ON {main_table}
+		BEGIN
+			DELETE FROM {view} WHERE {pk_where_old};
+		END;
+		""",
+	]
 
-	return 3
+
+def install_sqlite_mirror_triggers(dbapi_conn: Any, *, schema_name: str = "mirror") -> int:
+	"""Create this connection's TEMP triggers for every table with a write view.
+
+	Uses the columns present in both the main table and the view, so a
+	column added by a migration never makes business writes fail.
+	"""
+	schema_name = _validate_ident(schema_name, what="schema")
+	views = [
+		r[0]
+		for r in dbapi_conn.execute(
+			f"SELECT name FROM {_q_sqlite_ident(schema_name)}.sqlite_master WHERE type = 'view' AND name LIKE ? ESCAPE '\\';",
+			(SQLITE_WRITE_VIEW_PREFIX.replace("_", "\\_") + "%",),
+		).fetchall()
+	]
+	created = 0
+	for view in views:
+		table_name = view[len(SQLITE_WRITE_VIEW_PREFIX):]
+		if not _IDENTIFIER_RE.match(table_name):
+			continue
+		source = _sqlite_table_info(dbapi_conn, "main", table_name)
+		view_cols = {r[1] for r in _sqlite_table_info(dbapi_conn, schema_name, view)}
+		cols = [r[1] for r in source if r[1] in view_cols]
+		pk_cols = [r[1] for r in sorted((r for r in source if int(r[5] or 0) > 0), key=lambda r: r[5])]
+		if not cols or not pk_cols or not set(pk_cols) <= view_cols:
+			continue
+		for stmt in _sqlite_temp_trigger_sql(table_name, cols, pk_cols):
+			dbapi_conn.execute(stmt)
+		created += 3
+	return created
+
+
+def configure_sqlite_mirror(
+	engine, mirror_path: str, *, schema_name: str = "mirror", synchronous: str = "NORMAL"
+) -> None:
+	"""Prepare every new connection of `engine` for the SQLite mirror.
+
+	WAL on both files (readers don't block the writer, one fsync per
+	checkpoint instead of per commit) with `synchronous` (NORMAL is safe in
+	WAL mode), ATTACH of the mirror and the TEMP triggers. Idempotent.
+	"""
+	schema_name = _validate_ident(schema_name, what="schema")
+	synchronous = synchronous.upper()
+	if synchronous not in SQLITE_SYNCHRONOUS:
+		raise ValueError(f"synchronous inválido: {synchronous!r}")
+	if engine in _sqlite_configured_engines:
+		return
+	_sqlite_configured_engines.add(engine)
+
+	@event.listens_for(engine, "connect")
+	def _prepare_sqlite_mirror(dbapi_conn, connection_record):
+		schema = _q_sqlite_ident(schema_name)
+		dbapi_conn.execute("PRAGMA journal_mode=WAL;")
+		dbapi_conn.execute(f"PRAGMA synchronous={synchronous};")
+		dbapi_conn.execute(f"ATTACH DATABASE ? AS {schema};", (mirror_path,))
+		dbapi_conn.execute(f"PRAGMA {schema}.journal_mode=WAL;")
+		dbapi_conn.execute(f"PRAGMA {schema}.synchronous={synchronous};")
+		install_sqlite_mirror_triggers(dbapi_conn, schema_name=schema_name)
+
+	# Pooled connections opened before the hook would lack the triggers
+	engine.dispose()
 
 
 def _pg_public_tables(conn: Connection) -> list[str]:
@@ -283,14 +514,585 @@ def _pg_pk_columns(conn: Connection, table_name: str) -> list[str]:
 	return [c for c in cols if _IDENTIFIER_RE.match(c)]
 
 
+def _pg_drop_mirror_triggers(conn: Connection, *, table_name: str) -> None:
+	"""Drop the mirror triggers of either level (switching levels leaves no duplicates)."""
+	table_name = _validate_ident(table_name, what="table")
+	for suffix in ("", "_ins", "_upd", "_del"):
+		trg_name = _q_pg_ident(f"trg_mirror_{table_name}{suffix}")
+		conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trg_name} ON public.{_q_pg_ident(table_name)};")
+
+
+def _pg_mirror_trigger_sql(
+	*,
+	schema_name: str,
+	table_name: str,
+	cols: list[str],
+	pk_cols: list[str],
+	trigger_level: str = "statement",
+	target_table: str | None = None,
+) -> list[str]:
+	"""DDL for the trigger function and trigger(s) that keep `schema_name.table_name` in sync.
+
+	`target_table` redirects the writes to another table of the mirror schema
+	(the staging table of a chunked copy).
+	"""
+	mirror_table = f"{_q_pg_ident(schema_name)}.{_q_pg_ident(target_table or table_name)}"
+	main_table = f"public.{_q_pg_ident(table_name)}"
+	non_pk_cols = [c for c in cols if c not in pk_cols]
+	insert_cols = ", ".join(_q_pg_ident(c) for c in cols)
+	pk_cols_sql = ", ".join(_q_pg_ident(c) for c in pk_cols)
+
+	set_clause = ", ".join(f"{_q_pg_ident(c)} = EXCLUDED.{_q_pg_ident(c)}" for c in non_pk_cols)
+	if not set_clause:
+		set_clause = ", ".join(f"{_q_pg_ident(c)} = {_q_pg_ident(c)}" for c in pk_cols)
+
+	fn_name = _q_pg_ident(_validate_ident(f"trg_mirror_{table_name}_fn", what="function"))
+	trg_name = _validate_ident(f"trg_mirror_{table_name}", what="trigger")
+
+	if trigger_level == "row":
+		insert_vals = ", ".join(f"NEW.{_q_pg_ident(c)}" for c in cols)
+		where_old = " AND ".join(f"{_q_pg_ident(c)} = OLD.{_q_pg_ident(c)}" for c in pk_cols)
+		return [
+			f"""
+			CREATE OR REPLACE FUNCTION public.{fn_name}()
+			RETURNS trigger
+			LANGUAGE plpgsql
+			AS $$
+			BEGIN
+				IF (TG_OP = 'DELETE') THEN
+					DELETE FROM {mirror_table} WHERE {where_old};
+					RETURN OLD;
+				ELSIF (TG_OP = 'UPDATE') THEN
+					INSERT INTO {mirror_table} ({insert_cols})
+					VALUES ({insert_vals})
+					ON CONFLICT ({pk_cols_sql}) DO UPDATE SET {set_clause};
+					RETURN NEW;
+				ELSIF (TG_OP = 'INSERT') THEN
+					INSERT INTO {mirror_table} ({insert_cols})
+					VALUES ({insert_vals})
+					ON CONFLICT ({pk_cols_sql}) DO UPDATE SET {set_clause};
+					RETURN NEW;
+				END IF;
+				RETURN NULL;
+			END;
+			$$;
+			""",
+			f"CREATE TRIGGER {_q_pg_ident(trg_name)} AFTER INSERT OR UPDATE OR DELETE ON {main_table} FOR EACH ROW EXECUTE FUNCTION public.{fn_name}();",
+		]
+
+	if trigger_level == "queue":
+		# Only the keys go to the queue; the business transaction never
+		# touches the mirror table. UNION dedups keys within a statement and,
+		# on UPDATE, also enqueues the old key when the PK changed.
+		queue_table = f"{_q_pg_ident(schema_name)}.{_q_pg_ident(MIRROR_QUEUE_TABLE)}"
+		qfn_name = _q_pg_ident(_validate_ident(f"trg_mirror_{table_name}_qfn", what="function"))
+
+		def pk_json(alias: str) -> str:
+			return "jsonb_build_object(" + ", ".join(f"'{c}', {alias}.{_q_pg_ident(c)}" for c in pk_cols) + ")"
+
+		return [
+			f"""
+			CREATE OR REPLACE FUNCTION public.{qfn_name}()
+			RETURNS trigger
+			LANGUAGE plpgsql
+			AS $$
+			BEGIN
+				IF (TG_OP = 'INSERT') THEN
+					INSERT INTO {queue_table} (table_name, pk, op)
+					SELECT '{table_name}', {pk_json("n")}, 'I' FROM new_rows n;
+				ELSIF (TG_OP = 'UPDATE') THEN
+					INSERT INTO {queue_table} (table_name, pk, op)
+					SELECT '{table_name}', k, 'U' FROM (
+						SELECT {pk_json("n")} AS k FROM new_rows n
+						UNION
+						SELECT {pk_json("v")} FROM old_rows v
+					) keys;
+				ELSE
+					INSERT INTO {queue_table} (table_name, pk, op)
+					SELECT '{table_name}', {pk_json("v")}, 'D' FROM old_rows v;
+				END IF;
+				RETURN NULL;
+			END;
+			$$;
+			""",
+			f"CREATE TRIGGER {_q_pg_ident(trg_name + '_ins')} AFTER INSERT ON {main_table} "
+			f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION public.{qfn_name}();",
+			f"CREATE TRIGGER {_q_pg_ident(trg_name + '_upd')} AFTER UPDATE ON {main_table} "
+			f"REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION public.{qfn_name}();",
+			f"CREATE TRIGGER {_q_pg_ident(trg_name + '_del')} AFTER DELETE ON {main_table} "
+			f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION public.{qfn_name}();",
+		]
+
+	# Statement level: the function sees the whole statement in the transition
+	# tables `new_rows` / `old_rows` and applies it with one upsert / one delete.
+	# Each branch only references the tables its event provides.
+	select_cols = ", ".join(f"n.{_q_pg_ident(c)}" for c in cols)
+	match_old = " AND ".join(f"m.{_q_pg_ident(c)} = v.{_q_pg_ident(c)}" for c in pk_cols)
+	same_pk = " AND ".join(f"n.{_q_pg_ident(c)} = v.{_q_pg_ident(c)}" for c in pk_cols)
+	return [
+		f"""
+		CREATE OR REPLACE FUNCTION public.{fn_name}()
+		RETURNS trigger
+		LANGUAGE plpgsql
+		AS $$
+		BEGIN
+			IF (TG_OP = 'DELETE') THEN
+				DELETE FROM {mirror_table} m USING old_rows v WHERE {match_old};
+			ELSE
+				IF (TG_OP = 'UPDATE') THEN
+					-- Rows whose PK changed: the old key no longer exists upstream
+					DELETE FROM {mirror_table} m USING old_rows v
+					WHERE {match_old}
+					  AND NOT EXISTS (SELECT 1 FROM new_rows n WHERE {same_pk});
+				END IF;
+				INSERT INTO {mirror_table} ({insert_cols})
+				SELECT {select_cols} FROM new_rows n
+				ON CONFLICT ({pk_cols_sql}) DO UPDATE SET {set_clause};
+			END IF;
+			RETURN NULL;
+		END;
+		$$;
+		""",
+		f"CREATE TRIGGER {_q_pg_ident(trg_name + '_ins')} AFTER INSERT ON {main_table} "
+		f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION public.{fn_name}();",
+		f"CREATE TRIGGER {_q_pg_ident(trg_name + '_upd')} AFTER UPDATE ON {main_table} "
+		f"REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION public.{fn_name}();",
+		f"CREATE TRIGGER {_q_pg_ident(trg_name + '_del')} AFTER DELETE ON {main_table} "
+		f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION public.{fn_name}();",
+	]
+
+
+def _pg_create_mirror_queue(conn: Connection, *, schema_name: str) -> None:
+	# UNLOGGED: no WAL for the queue (it is lost on crash; a full setup with
+	# copy_data rebuilds the mirror in that case).
+	conn.exec_driver_sql(
+		f"""
+		CREATE UNLOGGED TABLE IF NOT EXISTS {_q_pg_ident(schema_name)}.{_q_pg_ident(MIRROR_QUEUE_TABLE)} (
+			id bigserial PRIMARY KEY,
+			table_name text NOT NULL,
+			pk jsonb NOT NULL,
+			op char(1) NOT NULL,
+			queued_at timestamptz NOT NULL DEFAULT now()
+		);
+		"""
+	)
+
+
+def mirror_queue_depth(conn: Connection, *, schema_name: str = "mirror") -> dict[str, Any] | None:
+	"""Pending changes and age of the oldest one, or None if there is no queue."""
+	schema_name = _validate_ident(schema_name, what="schema")
+	if conn.dialect.name == "sqlite" or conn.execute(
+		text("SELECT to_regclass(:name)"), {"name": f"{schema_name}.{MIRROR_QUEUE_TABLE}"}
+	).scalar() is None:
+		return None
+	depth, lag = conn.execute(
+		text(
+			f"SELECT COUNT(*), EXTRACT(EPOCH FROM now() - MIN(queued_at)) "
+			f"FROM {_q_pg_ident(schema_name)}.{_q_pg_ident(MIRROR_QUEUE_TABLE)}"
+		)
+	).one()
+	return {"depth": int(depth), "lag_seconds": float(lag) if lag is not None else 0.0}
+
+
+def apply_mirror_queue(conn: Connection, *, schema_name: str = "mirror", batch_size: int = 1000) -> int:
+	"""Apply up to `batch_size` queued changes to the mirror tables.
+
+	Each key is re-copied from its source row (or deleted from the mirror if
+	the source row is gone), so the order of the queued ops does not matter.
+	Runs in the caller's transaction; returns how many queue rows it consumed.
+	An advisory lock keeps a single applier at a time (0 if another holds it).
+	"""
+	schema_name = _validate_ident(schema_name, what="schema")
+	queue_table = f"{_q_pg_ident(schema_name)}.{_q_pg_ident(MIRROR_QUEUE_TABLE)}"
+	if not conn.execute(
+		text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), {"key": f"mirror_queue:{schema_name}"}
+	).scalar():
+		return 0
+
+	consumed = conn.execute(
+		text(
+			f"DELETE FROM {queue_table} WHERE id IN "
+			f"(SELECT id FROM {queue_table} ORDER BY id LIMIT :n) RETURNING table_name, pk"
+		),
+		{"n": int(batch_size)},
+	).all()
+
+	keys_by_table: dict[str, dict[str, Any]] = {}
+	for table_name, pk in consumed:
+		pk = pk if isinstance(pk, dict) else json.loads(pk)
+		keys_by_table.setdefault(table_name, {})[json.dumps(pk, sort_keys=True)] = pk
+
+	insp = inspect(conn)
+	for table_name, keys in keys_by_table.items():
+		if not _IDENTIFIER_RE.match(table_name) or not insp.has_table(table_name, schema="public"):
+			continue
+		cols = [c["name"] for c in insp.get_columns(table_name, schema="public") if _IDENTIFIER_RE.match(c["name"])]
+		pk_cols = (insp.get_pk_constraint(table_name, schema="public") or {}).get("constrained_columns") or []
+		if not cols or not pk_cols:
+			continue
+
+		main_table = f"public.{_q_pg_ident(table_name)}"
+		mirror_table = f"{_q_pg_ident(schema_name)}.{_q_pg_ident(table_name)}"
+		# Typed key set: jsonb -> record of the source table
+		key_set = f"jsonb_populate_recordset(NULL::{main_table}, CAST(:keys AS jsonb)) k"
+		params = {"keys": json.dumps(list(keys.values()))}
+		conn.execute(
+			text(
+				f"DELETE FROM {mirror_table} m USING {key_set} WHERE "
+				+ " AND ".join(f"m.{_q_pg_ident(c)} = k.{_q_pg_ident(c)}" for c in pk_cols)
+			),
+			params,
+		)
+		conn.execute(
+			text(
+				f"INSERT INTO {mirror_table} ({', '.join(_q_pg_ident(c) for c in cols)}) "
+				f"SELECT {', '.join('s.' + _q_pg_ident(c) for c in cols)} FROM {main_table} s JOIN {key_set} ON "
+				+ " AND ".join(f"s.{_q_pg_ident(c)} = k.{_q_pg_ident(c)}" for c in pk_cols)
+			),
+			params,
+		)
+	return len(consumed)
+
+
+def _pg_install_mirror_triggers(
+	conn: Connection,
+	*,
+	schema_name: str,
+	table_name: str,
+	cols: list[str],
+	pk_cols: list[str],
+	trigger_level: str,
+	target_table: str | None = None,
+) -> int:
+	_pg_drop_mirror_triggers(conn, table_name=table_name)
+	for stmt in _pg_mirror_trigger_sql(
+		schema_name=schema_name,
+		table_name=table_name,
+		cols=cols,
+		pk_cols=pk_cols,
+		trigger_level=trigger_level,
+		target_table=target_table,
+	):
+		conn.exec_driver_sql(stmt)
+	return 1 if trigger_level == "row" else 3
+
+
+def _pg_copy_progress_table(schema_name: str) -> str:
+	return f"{_q_pg_ident(schema_name)}.{_q_pg_ident(MIRROR_COPY_PROGRESS_TABLE)}"
+
+
+def pending_mirror_copies(conn: Connection, *, schema_name: str = "mirror") -> list[dict[str, Any]]:
+	"""Chunked copies not yet swapped in: table, rows copied and row estimate."""
+	schema_name = _validate_ident(schema_name, what="schema")
+	if conn.dialect.name == "sqlite" or conn.execute(
+		text("SELECT to_regclass(:name)"), {"name": f"{schema_name}.{MIRROR_COPY_PROGRESS_TABLE}"}
+	).scalar() is None:
+		return []
+	rows = conn.execute(
+		text(
+			f"SELECT table_name, rows_copied, rows_estimate, started_at "
+			f"FROM {_pg_copy_progress_table(schema_name)} ORDER BY table_name"
+		)
+	)
+	return [dict(r._mapping) for r in rows]
+
+
+def _pg_prepare_chunked_copy(
+	conn: Connection,
+	*,
+	schema_name: str,
+	table_name: str,
+	cols: list[str],
+	pk_cols: list[str],
+	trigger_level: str,
+) -> None:
+	"""Create the staging table and progress row, and point the triggers at it.
+
+	Idempotent: an unfinished copy keeps its staging table and position.
+	While the copy runs the triggers keep the staging table current, so the
+	rows written meanwhile are not lost at the swap. Queue level uses the
+	statement triggers until the swap (the staging table must be written
+	synchronously).
+	"""
+	staging = _validate_ident(f"{MIRROR_COPY_PREFIX}{table_name}", what="table")
+	conn.exec_driver_sql(
+		f"""
+		CREATE TABLE IF NOT EXISTS {_pg_copy_progress_table(schema_name)} (
+			table_name text PRIMARY KEY,
+			last_pk jsonb,
+			rows_copied bigint NOT NULL DEFAULT 0,
+			rows_estimate bigint,
+			started_at timestamptz NOT NULL DEFAULT now(),
+			updated_at timestamptz NOT NULL DEFAULT now()
+		);
+		"""
+	)
+	conn.exec_driver_sql(
+		f"CREATE TABLE IF NOT EXISTS {_q_pg_ident(schema_name)}.{_q_pg_ident(staging)} (LIKE public.{_q_pg_ident(table_name)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED);"
+	)
+	idx_name = _validate_ident(f"ux_mirror_{staging}_pk", what="index")
+	conn.exec_driver_sql(
+		f"CREATE UNIQUE INDEX IF NOT EXISTS {_q_pg_ident(idx_name)} ON {_q_pg_ident(schema_name)}.{_q_pg_ident(staging)} ({', '.join(_q_pg_ident(c) for c in pk_cols)});"
+	)
+	conn.execute(
+		text(
+			f"INSERT INTO {_pg_copy_progress_table(schema_name)} (table_name, rows_estimate) "
+			f"SELECT :table, GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = CAST(:qualified AS regclass) "
+			f"ON CONFLICT (table_name) DO NOTHING"
+		),
+		{"table": table_name, "qualified": f"public.{table_name}"},
+	)
+	_pg_install_mirror_triggers(
+		conn,
+		schema_name=schema_name,
+		table_name=table_name,
+		cols=cols,
+		pk_cols=pk_cols,
+		trigger_level="statement" if trigger_level == "queue" else trigger_level,
+		target_table=staging,
+	)
+
+
+def copy_mirror_chunk(
+	conn: Connection,
+	*,
+	schema_name: str,
+	table_name: str,
+	cols: list[str],
+	pk_cols: list[str],
+	chunk_size: int = 5000,
+) -> dict[str, Any] | None:
+	"""Copy the next primary-key range of a pending copy into its staging table.
+
+	Runs in the caller's transaction together with the progress update, so a
+	crash resumes exactly after the last committed chunk. Returns the progress
+	(`done` when the range was the last one) or None if there is no pending
+	copy for the table.
+	"""
+	schema_name = _validate_ident(schema_name, what="schema")
+	table_name = _validate_ident(table_name, what="table")
+	progress = conn.execute(
+		text(
+			f"SELECT last_pk, rows_copied, rows_estimate FROM {_pg_copy_progress_table(schema_name)} "
+			f"WHERE table_name = :table FOR UPDATE"
+		),
+		{"table": table_name},
+	).first()
+	if progress is None:
+		return None
+	last_pk, rows_copied, rows_estimate = progress
+
+	main_table = f"public.{_q_pg_ident(table_name)}"
+	staging = f"{_q_pg_ident(schema_name)}.{_q_pg_ident(MIRROR_COPY_PREFIX + table_name)}"
+	cols_sql = ", ".join(_q_pg_ident(c) for c in cols)
+	pk_sql = ", ".join(_q_pg_ident(c) for c in pk_cols)
+	pk_json = "jsonb_build_object(" + ", ".join(f"'{c}', {_q_pg_ident(c)}" for c in pk_cols) + ")"
+	params: dict[str, Any] = {"n": int(chunk_size)}
+	where = ""
+	if last_pk is not None:
+		# Keyset on the (possibly composite) PK, typed through the source row type
+		where = (
+			f"WHERE ({pk_sql}) > (SELECT {', '.join('k.' + _q_pg_ident(c) for c in pk_cols)} "
+			f"FROM jsonb_populate_record(NULL::{main_table}, CAST(:last AS jsonb)) k)"
+		)
+		params["last"] = json.dumps(last_pk) if not isinstance(last_pk, str) else last_pk
+
+	# FOR SHARE: an UPDATE/DELETE racing with the chunk waits for it, so its
+	# trigger sees the copied row in staging. ON CONFLICT DO NOTHING keeps a
+	# newer version the triggers already wrote.
+	copied, new_last = conn.execute(
+		text(
+			f"""
+			WITH chunk AS (
+				SELECT {cols_sql} FROM {main_table} {where}
+				ORDER BY {pk_sql} LIMIT :n FOR SHARE
+			), ins AS (
+				INSERT INTO {staging} ({cols_sql}) SELECT {cols_sql} FROM chunk
+				ON CONFLICT ({pk_sql}) DO NOTHING
+			)
+			SELECT COUNT(*), (SELECT {pk_json} FROM chunk ORDER BY {pk_sql} DESC LIMIT 1) FROM chunk
+			"""
+		),
+		params,
+	).one()
+
+	rows_copied += copied
+	if copied:
+		conn.execute(
+			text(
+				f"UPDATE {_pg_copy_progress_table(schema_name)} "
+				f"SET last_pk = CAST(:last AS jsonb), rows_copied = :rows, updated_at = now() WHERE table_name = :table"
+			),
+			{"last": json.dumps(new_last) if not isinstance(new_last, str) else new_last, "rows": rows_copied, "table": table_name},
+		)
+	return {
+		"table": table_name,
+		"copied": int(copied),
+		"rows_copied": int(rows_copied),
+		"rows_estimate": rows_estimate,
+		"done": copied < chunk_size,
+	}
+
+
+def swap_mirror_copy(
+	conn: Connection,
+	*,
+	schema_name: str,
+	table_name: str,
+	cols: list[str],
+	pk_cols: list[str],
+	trigger_level: str,
+) -> bool:
+	"""Atomically replace the mirror table with its finished staging copy.
+
+	Writes to the source table wait for the (short) swap transaction; reads
+	of the mirror see either the old table or the complete new one.
+	"""
+	schema_name = _validate_ident(schema_name, what="schema")
+	table_name = _validate_ident(table_name, what="table")
+	if conn.execute(
+		text(f"SELECT 1 FROM {_pg_copy_progress_table(schema_name)} WHERE table_name = :table FOR UPDATE"),
+		{"table": table_name},
+	).first() is None:
+		return False
+
+	staging = _validate_ident(f"{MIRROR_COPY_PREFIX}{table_name}", what="table")
+	conn.exec_driver_sql(f"LOCK TABLE public.{_q_pg_ident(table_name)} IN SHARE ROW EXCLUSIVE MODE;")
+	conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_q_pg_ident(schema_name)}.{_q_pg_ident(table_name)};")
+	conn.exec_driver_sql(f"ALTER TABLE {_q_pg_ident(schema_name)}.{_q_pg_ident(staging)} RENAME TO {_q_pg_ident(table_name)};")
+	conn.exec_driver_sql(
+		f"ALTER INDEX {_q_pg_ident(schema_name)}.{_q_pg_ident(f'ux_mirror_{staging}_pk')} RENAME TO {_q_pg_ident(f'ux_mirror_{table_name}_pk')};"
+	)
+	if trigger_level == "queue":
+		_pg_create_mirror_queue(conn, schema_name=schema_name)
+	_pg_install_mirror_triggers(
+		conn, schema_name=schema_name, table_name=table_name, cols=cols, pk_cols=pk_cols, trigger_level=trigger_level
+	)
+	conn.execute(
+		text(f"DELETE FROM {_pg_copy_progress_table(schema_name)} WHERE table_name = :table"), {"table": table_name}
+	)
+	invalidate_mirror_metadata()
+	return True
+
+
+def run_mirror_copies(
+	engine,
+	*,
+	schema_name: str = "mirror",
+	trigger_level: str = "statement",
+	chunk_size: int = 5000,
+	progress: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, int]:
+	"""Run every pending chunked copy to completion and swap it in.
+
+	One transaction per chunk; safe to run from several processes at once (the
+	progress row is locked per chunk) and to resume after an interruption.
+	Returns the rows copied per table.
+	"""
+	with engine.connect() as conn:
+		pending = [p["table_name"] for p in pending_mirror_copies(conn, schema_name=schema_name)]
+		shapes = {t: (_pg_table_columns(conn, t), _pg_pk_columns(conn, t)) for t in pending}
+
+	copied: dict[str, int] = {}
+	for table in pending:
+		cols, pk_cols = shapes[table]
+		while True:
+			with engine.begin() as conn:
+				status = copy_mirror_chunk(
+					conn, schema_name=schema_name, table_name=table, cols=cols, pk_cols=pk_cols, chunk_size=chunk_size
+				)
+			if status is None:
+				# Another process finished this table
+				break
+			copied[table] = status["rows_copied"]
+			if progress:
+				progress(status)
+			if status["done"]:
+				with engine.begin() as conn:
+					swap_mirror_copy(
+						conn, schema_name=schema_name, table_name=table, cols=cols, pk_cols=pk_cols, trigger_level=trigger_level
+					)
+				break
+	return copied
+
+
+def _pg_setup_mirror_table(
+	conn: Connection,
+	*,
+	schema_name: str,
+	table_name: str,
+	copy_data: bool,
+	trigger_level: str,
+) -> str | None:
+	"""Create one mirror table and its triggers.
+
+	Returns "synced" (triggers write the mirror table), "copy_pending" (a
+	chunked copy was prepared), "no_pk" (snapshot only, no triggers) or
+	None if the table has no usable columns.
+	"""
+	cols = _pg_table_columns(conn, table_name)
+	pk_cols = _pg_pk_columns(conn, table_name)
+	if not cols:
+		return None
+
+	# Create mirror table without constraints to avoid FK issues.
+	conn.exec_driver_sql(
+		f"CREATE TABLE IF NOT EXISTS {_q_pg_ident(schema_name)}.{_q_pg_ident(table_name)} (LIKE public.{_q_pg_ident(table_name)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED);"
+	)
+
+	if not pk_cols:
+		if copy_data:
+			# No key to chunk on (nor triggers): one-shot snapshot.
+			conn.exec_driver_sql(f"TRUNCATE TABLE {_q_pg_ident(schema_name)}.{_q_pg_ident(table_name)};")
+			conn.exec_driver_sql(
+				f"INSERT INTO {_q_pg_ident(schema_name)}.{_q_pg_ident(table_name)} SELECT * FROM public.{_q_pg_ident(table_name)};"
+			)
+		return "no_pk"
+
+	# Ensure a unique index on PK columns so we can ON CONFLICT.
+	idx_name = _validate_ident(f"ux_mirror_{table_name}_pk", what="index")
+	pk_cols_sql = ", ".join(_q_pg_ident(c) for c in pk_cols)
+	conn.exec_driver_sql(
+		f"CREATE UNIQUE INDEX IF NOT EXISTS {_q_pg_ident(idx_name)} ON {_q_pg_ident(schema_name)}.{_q_pg_ident(table_name)} ({pk_cols_sql});"
+	)
+
+	if copy_data:
+		_pg_prepare_chunked_copy(
+			conn, schema_name=schema_name, table_name=table_name, cols=cols, pk_cols=pk_cols, trigger_level=trigger_level
+		)
+		return "copy_pending"
+
+	_pg_install_mirror_triggers(
+		conn, schema_name=schema_name, table_name=table_name, cols=cols, pk_cols=pk_cols, trigger_level=trigger_level
+	)
+	return "synced"
+
+
 def setup_mirror_schema_and_triggers(
 	conn: Connection,
 	*,
 	mirror_path: str | None = None,
 	schema_name: str = "mirror",
 	copy_data: bool = True,
+	trigger_level: str = "statement",
 ) -> MirrorSetupResult:
+	"""Create the mirror tables, copy data and install the sync triggers.
+
+	On Postgres, `trigger_level="statement"` (default) installs one trigger per
+	event with transition tables, so each statement reaches the mirror as a
+	single set-based upsert/delete; `"row"` keeps the FOR EACH ROW triggers;
+	`"queue"` only enqueues the changed keys (see apply_mirror_queue).
+	SQLite ignores it: the mirror tables get a PRIMARY KEY and a write view
+	whose upsert triggers are fed by per-connection TEMP triggers (see
+	configure_sqlite_mirror for the connections opened afterwards).
+
+	On Postgres, `copy_data` does not copy inline: it prepares a chunked
+	copy per table (listed in `copies_pending`) that `run_mirror_copies`
+	performs afterwards, outside this transaction.
+	"""
 	schema_name = _validate_ident(schema_name, what="mirror schema")
+	if trigger_level not in TRIGGER_LEVELS:
+		raise ValueError(f"trigger_level inválido: {trigger_level!r}")
 	tables_created: list[str] = []
 	skipped_tables: list[str] = []
 	triggers_created = 0
@@ -307,25 +1109,30 @@ def setup_mirror_schema_and_triggers(
 				skipped_tables.append(table)
 				continue
 
-			if not _sqlite_table_exists(conn, schema_name=schema_name, table_name=table):
-				_sqlite_create_mirror_table(conn, schema_name=schema_name, table_name=table)
+			if _sqlite_create_mirror_table(conn, schema_name=schema_name, table_name=table):
 				tables_created.append(table)
 
+			cols = _sqlite_table_columns(conn, table)
+			cols_list = ", ".join(_q_sqlite_ident(c) for c in cols)
 			if copy_data:
 				conn.exec_driver_sql(
 					f"DELETE FROM {_q_sqlite_ident(schema_name)}.{_q_sqlite_ident(table)};"
 				)
 				conn.exec_driver_sql(
-					f"INSERT INTO {_q_sqlite_ident(schema_name)}.{_q_sqlite_ident(table)} SELECT * FROM {_q_sqlite_ident(table)};"
+					f"INSERT INTO {_q_sqlite_ident(schema_name)}.{_q_sqlite_ident(table)} ({cols_list}) SELECT {cols_list} FROM {_q_sqlite_ident(table)};"
 				)
 
 			_sqlite_drop_mirror_triggers(conn, table_name=table)
-			created = _sqlite_create_mirror_triggers(conn, schema_name=schema_name, table_name=table)
-			if created == 0:
+			pk_cols = _sqlite_pk_columns(conn, table)
+			if not pk_cols:
 				skipped_tables.append(table)
-			else:
-				triggers_created += created
+				continue
+			_sqlite_create_write_view(conn, schema_name=schema_name, table_name=table, cols=cols, pk_cols=pk_cols)
 
+		# TEMP triggers for this connection; configure_sqlite_mirror adds them to new ones
+		triggers_created = install_sqlite_mirror_triggers(conn.connection.driver_connection, schema_name=schema_name)
+
+		invalidate_mirror_metadata()
 		return MirrorSetupResult(
 			mirror_schema=schema_name,
 			mirror_path=mirror_path,
@@ -337,107 +1144,50 @@ def setup_mirror_schema_and_triggers(
 	# Postgres schema mirror (same DB, separate schema)
 	if dialect.startswith("postgres"):
 		conn.exec_driver_sql(f"CREATE SCHEMA IF NOT EXISTS {_q_pg_ident(schema_name)};")
+		if trigger_level == "queue":
+			_pg_create_mirror_queue(conn, schema_name=schema_name)
+		# Unfinished copies keep feeding their staging table until the swap
+		pending = {p["table_name"] for p in pending_mirror_copies(conn, schema_name=schema_name)}
+		copies_pending: list[str] = []
 
 		for table in _pg_public_tables(conn):
 			if table == "alembic_version":
 				# not useful to mirror
 				continue
-
-			cols = _pg_table_columns(conn, table)
-			pk_cols = _pg_pk_columns(conn, table)
-			if not cols:
-				skipped_tables.append(table)
-				continue
-
-			# Create mirror table without constraints to avoid FK issues.
-			conn.exec_driver_sql(
-				f"CREATE TABLE IF NOT EXISTS {_q_pg_ident(schema_name)}.{_q_pg_ident(table)} (LIKE public.{_q_pg_ident(table)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED);"
+			outcome = _pg_setup_mirror_table(
+				conn,
+				schema_name=schema_name,
+				table_name=table,
+				copy_data=copy_data or table in pending,
+				trigger_level=trigger_level,
 			)
-
-			# Ensure a unique index on PK columns so we can ON CONFLICT.
-			if pk_cols:
-				idx_name = _validate_ident(f"ux_mirror_{table}_pk", what="index")
-				pk_cols_sql = ", ".join(_q_pg_ident(c) for c in pk_cols)
-				conn.exec_driver_sql(
-					f"CREATE UNIQUE INDEX IF NOT EXISTS {_q_pg_ident(idx_name)} ON {_q_pg_ident(schema_name)}.{_q_pg_ident(table)} ({pk_cols_sql});"
-				)
-			else:
+			if outcome is None:
 				skipped_tables.append(table)
-
-			if copy_data:
-				# Best effort: replace mirror with fresh copy.
-				conn.exec_driver_sql(f"TRUNCATE TABLE {_q_pg_ident(schema_name)}.{_q_pg_ident(table)};")
-				conn.exec_driver_sql(
-					f"INSERT INTO {_q_pg_ident(schema_name)}.{_q_pg_ident(table)} SELECT * FROM public.{_q_pg_ident(table)};"
-				)
-
+				continue
 			tables_created.append(table)
-
-			# Triggers only if PK exists.
-			if not pk_cols:
+			if outcome == "no_pk":
+				skipped_tables.append(table)
 				continue
+			triggers_created += 1 if trigger_level == "row" else 3
+			if outcome == "copy_pending":
+				copies_pending.append(table)
 
-			non_pk_cols = [c for c in cols if c not in pk_cols]
-			insert_cols = ", ".join(_q_pg_ident(c) for c in cols)
-			insert_vals = ", ".join(f"NEW.{_q_pg_ident(c)}" for c in cols)
-			pk_cols_sql = ", ".join(_q_pg_ident(c) for c in pk_cols)
-
-			set_clause = ", ".join(f"{_q_pg_ident(c)} = EXCLUDED.{_q_pg_ident(c)}" for c in non_pk_cols)
-			if not set_clause:
-				set_clause = ", ".join(f"{_q_pg_ident(c)} = {_q_pg_ident(c)}" for c in pk_cols)
-
-			where_old = " AND ".join(f"{_q_pg_ident(c)} = OLD.{_q_pg_ident(c)}" for c in pk_cols)
-
-			fn_name = _validate_ident(f"trg_mirror_{table}_fn", what="function")
-			trg_name = _validate_ident(f"trg_mirror_{table}", what="trigger")
-
-			conn.exec_driver_sql(
-				f"""
-				CREATE OR REPLACE FUNCTION public.{_q_pg_ident(fn_name)}()
-				RETURNS trigger
-				LANGUAGE plpgsql
-				AS $$
-				BEGIN
-					IF (TG_OP = 'DELETE') THEN
-						DELETE FROM {_q_pg_ident(schema_name)}.{_q_pg_ident(table)} WHERE {where_old};
-						RETURN OLD;
-					ELSIF (TG_OP = 'UPDATE') THEN
-						INSERT INTO {_q_pg_ident(schema_name)}.{_q_pg_ident(table)} ({insert_cols})
-						VALUES ({insert_vals})
-						ON CONFLICT ({pk_cols_sql}) DO UPDATE SET {set_clause};
-						RETURN NEW;
-					ELSIF (TG_OP = 'INSERT') THEN
-						INSERT INTO {_q_pg_ident(schema_name)}.{_q_pg_ident(table)} ({insert_cols})
-						VALUES ({insert_vals})
-						ON CONFLICT ({pk_cols_sql}) DO UPDATE SET {set_clause};
-						RETURN NEW;
-					END IF;
-					RETURN NULL;
-				END;
-				$$;
-				"""
-			)
-
-			conn.exec_driver_sql(
-				f"DROP TRIGGER IF EXISTS {_q_pg_ident(trg_name)} ON public.{_q_pg_ident(table)};"
-			)
-			conn.exec_driver_sql(
-				f"CREATE TRIGGER {_q_pg_ident(trg_name)} AFTER INSERT OR UPDATE OR DELETE ON public.{_q_pg_ident(table)} FOR EACH ROW EXECUTE FUNCTION public.{_q_pg_ident(fn_name)}();"
-			)
-			triggers_created += 1
-
+		invalidate_mirror_metadata()
 		return MirrorSetupResult(
 			mirror_schema=schema_name,
 			mirror_path=None,
 			tables_created=tables_created,
 			triggers_created=triggers_created,
 			skipped_tables=skipped_tables,
+			copies_pending=copies_pending,
 		)
 
 	raise ValueError(f"Dialecto no soportado para Mirror DB: {dialect}")
 
 
-def auto_setup_postgres_schema_mirror(engine, schema_name: str = "mirror") -> dict | None:
+def auto_setup_postgres_schema_mirror(
+	engine, schema_name: str = "mirror", trigger_level: str = "statement"
+) -> dict | None:
 	"""Auto-configure Postgres schema mirror on startup if not already set up.
 	
 	Returns dict with setup info or None if already configured.
@@ -452,32 +1202,586 @@ def auto_setup_postgres_schema_mirror(engine, schema_name: str = "mirror") -> di
 			{"schema": schema_name}
 		).scalar()
 		
-		# Check if triggers exist
-		trigger_count = conn.execute(
-			text("""
-			SELECT COUNT(*)
-			FROM pg_trigger t
-			JOIN pg_class c ON c.oid = t.tgrelid
-			JOIN pg_namespace n ON n.oid = c.relnamespace
-			WHERE t.tgname LIKE 'trg_mirror_%'
-			  AND n.nspname = 'public';
-			""")
-		).scalar() or 0
+		# Installed mirror triggers by level (tgtype bit 0 set = FOR EACH ROW)
+		counts = dict(
+			conn.execute(
+				text("""
+				SELECT CASE
+				           WHEN p.proname LIKE '%\\_qfn' THEN 'queue'
+				           WHEN t.tgtype & 1 = 1 THEN 'row'
+				           ELSE 'statement'
+				       END AS level,
+				       COUNT(*)
+				FROM pg_trigger t
+				JOIN pg_class c ON c.oid = t.tgrelid
+				JOIN pg_namespace n ON n.oid = c.relnamespace
+				JOIN pg_proc p ON p.oid = t.tgfoid
+				WHERE t.tgname LIKE 'trg_mirror_%'
+				  AND n.nspname = 'public'
+				GROUP BY 1;
+				""")
+			).all()
+		)
+		wanted = counts.pop(trigger_level, 0)
+		other = sum(counts.values())
 		
-		# If already configured, skip
-		if schema_exists and trigger_count > 0:
+		# If already configured at the requested level, skip
+		if schema_exists and wanted > 0 and other == 0:
 			return None
 		
-		# Setup required
+		# Setup required. Only switching trigger level: mirror data is already
+		# in sync, unless changes may still be waiting in the queue.
 		result = setup_mirror_schema_and_triggers(
 			conn,
 			mirror_path=None,
 			schema_name=schema_name,
-			copy_data=True
+			copy_data=not (schema_exists and other > 0) or "queue" in counts,
+			trigger_level=trigger_level,
 		)
 		
 		return {
 			"tables_created": result.tables_created,
 			"triggers_created": result.triggers_created,
-			"skipped_tables": result.skipped_tables
+			"skipped_tables": result.skipped_tables,
+			"copies_pending": result.copies_pending,
 		}
+
+
+# ---------------------------------------------------------------------------
+# Schema drift (migrations that add, drop or retype columns)
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ColumnDrift:
+	table: str
+	column: str
+	source_type: str | None  # None: dropped upstream
+	mirror_type: str | None  # None: missing in the mirror
+
+
+@dataclass
+class DriftSyncResult:
+	drift: list[ColumnDrift] = field(default_factory=list)
+	new_tables: list[str] = field(default_factory=list)
+	statements: list[str] = field(default_factory=list)
+	triggers_regenerated: list[str] = field(default_factory=list)
+	copies_pending: list[str] = field(default_factory=list)
+
+
+# One catalog query for every table: columns of public vs the mirror schema
+# (FULL JOIN by table/column), plus public tables missing from the mirror.
+# format_type keeps typmods (varchar(120), numeric(10,2)) for ALTER TABLE.
+_DRIFT_SQL = """
+WITH cols AS (
+	SELECT n.nspname AS schema_name, c.relname AS table_name, a.attname AS column_name,
+	       format_type(a.atttypid, a.atttypmod) AS data_type, a.attnum
+	FROM pg_attribute a
+	JOIN pg_class c ON c.oid = a.attrelid
+	JOIN pg_namespace n ON n.oid = c.relnamespace
+	WHERE n.nspname IN ('public', :mirror)
+	  AND c.relkind IN ('r', 'p')
+	  AND a.attnum > 0
+	  AND NOT a.attisdropped
+	  AND c.relname NOT LIKE '\\_%'
+	  AND c.relname <> 'alembic_version'
+),
+src AS (SELECT * FROM cols WHERE schema_name = 'public'),
+dst AS (SELECT * FROM cols WHERE schema_name = :mirror),
+mirrored AS (SELECT DISTINCT table_name FROM dst)
+SELECT COALESCE(s.table_name, d.table_name) AS table_name,
+       COALESCE(s.column_name, d.column_name) AS column_name,
+       s.data_type AS source_type,
+       d.data_type AS mirror_type,
+       COALESCE(s.table_name, d.table_name) IN (SELECT table_name FROM mirrored) AS in_mirror
+FROM src s
+FULL JOIN dst d ON d.table_name = s.table_name AND d.column_name = s.column_name
+WHERE s.data_type IS DISTINCT FROM d.data_type
+  AND COALESCE(s.table_name, d.table_name) IN (SELECT table_name FROM src)
+ORDER BY 1, COALESCE(s.attnum, d.attnum)
+"""
+
+
+def detect_mirror_drift(conn: Connection, *, schema_name: str = "mirror") -> tuple[list[ColumnDrift], list[str]]:
+	"""Column differences between public and the mirror schema, and new tables.
+
+	A single catalog query; tables dropped upstream are left alone.
+	"""
+	schema_name = _validate_ident(schema_name, what="schema")
+	drift: list[ColumnDrift] = []
+	new_tables: list[str] = []
+	for table, column, source_type, mirror_type, in_mirror in conn.execute(text(_DRIFT_SQL), {"mirror": schema_name}):
+		if not in_mirror:
+			if table not in new_tables:
+				new_tables.append(table)
+			continue
+		drift.append(ColumnDrift(table, column, source_type, mirror_type))
+	return drift, new_tables
+
+
+def sync_mirror_drift(
+	conn: Connection,
+	*,
+	schema_name: str = "mirror",
+	trigger_level: str = "statement",
+	dry_run: bool = False,
+) -> DriftSyncResult:
+	"""Bring the mirror schema in line with public without re-copying data.
+
+	- New column: ADD COLUMN (nullable) and backfill it from the source rows.
+	- Dropped column: DROP COLUMN (the trigger functions no longer write it).
+	- Type change: ALTER COLUMN ... TYPE ... USING.
+	- New table: created with its triggers and a chunked copy of that table only.
+
+	Only the trigger functions of the affected tables are regenerated. The
+	staging table of an unfinished chunked copy gets the same ALTERs.
+	"""
+	schema_name = _validate_ident(schema_name, what="schema")
+	result = DriftSyncResult()
+	if conn.execute(
+		text("SELECT 1 FROM pg_namespace WHERE nspname = :schema"), {"schema": schema_name}
+	).scalar() is None:
+		return result
+	result.drift, result.new_tables = detect_mirror_drift(conn, schema_name=schema_name)
+	if dry_run:
+		return result
+
+	pending = {p["table_name"] for p in pending_mirror_copies(conn, schema_name=schema_name)}
+	affected: dict[str, list[ColumnDrift]] = {}
+	for d in result.drift:
+		affected.setdefault(d.table, []).append(d)
+
+	def run(stmt: str) -> None:
+		result.statements.append(stmt)
+		conn.exec_driver_sql(stmt)
+
+	for table, changes in affected.items():
+		table = _validate_ident(table, what="table")
+		targets = [table] + ([f"{MIRROR_COPY_PREFIX}{table}"] if table in pending else [])
+		pk_cols = _pg_pk_columns(conn, table)
+		for target in targets:
+			target_ref = f"{_q_pg_ident(schema_name)}.{_q_pg_ident(target)}"
+			for d in changes:
+				col = _q_pg_ident(d.column)
+				if d.mirror_type is None:
+					run(f"ALTER TABLE {target_ref} ADD COLUMN {col} {d.source_type};")
+					if pk_cols:
+						match = " AND ".join(f"m.{_q_pg_ident(c)} = s.{_q_pg_ident(c)}" for c in pk_cols)
+						run(
+							f"UPDATE {target_ref} m SET {col} = s.{col} FROM public.{_q_pg_ident(table)} s "
+							f"WHERE {match} AND s.{col} IS NOT NULL;"
+						)
+				elif d.source_type is None:
+					run(f"ALTER TABLE {target_ref} DROP COLUMN {col};")
+				else:
+					run(f"ALTER TABLE {target_ref} ALTER COLUMN {col} TYPE {d.source_type} USING {col}::{d.source_type};")
+
+		cols = _pg_table_columns(conn, table)
+		if not pk_cols:
+			continue
+		_pg_install_mirror_triggers(
+			conn,
+			schema_name=schema_name,
+			table_name=table,
+			cols=cols,
+			pk_cols=pk_cols,
+			trigger_level="statement" if table in pending and trigger_level == "queue" else trigger_level,
+			target_table=f"{MIRROR_COPY_PREFIX}{table}" if table in pending else None,
+		)
+		result.triggers_regenerated.append(table)
+
+	if result.new_tables and trigger_level == "queue":
+		_pg_create_mirror_queue(conn, schema_name=schema_name)
+	for table in result.new_tables:
+		outcome = _pg_setup_mirror_table(
+			conn, schema_name=schema_name, table_name=table, copy_data=True, trigger_level=trigger_level
+		)
+		if outcome == "copy_pending":
+			result.copies_pending.append(table)
+	invalidate_mirror_metadata()
+	return result
+
+
+# ---------------------------------------------------------------------------
+# Reconciliation (diff & repair by PK range checksums)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ReconcileReport:
+	table: str
+	ranges_compared: int = 0
+	ranges_different: int = 0
+	rows_upserted: int = 0
+	rows_deleted: int = 0
+	skipped: str | None = None
+
+
+def _sqlite_row_hash(*values: Any) -> int:
+	# 28 bits: SUM() over millions of rows stays far from int64 overflow
+	return int(hashlib.md5(repr(values).encode()).hexdigest()[:7], 16)
+
+
+def _register_sqlite_row_hash(conn: Connection) -> None:
+	conn.connection.driver_connection.create_function(
+		"mirror_row_hash", -1, _sqlite_row_hash, deterministic=True
+	)
+
+
+def _row_hash_sql(dialect: str, cols: list[str]) -> str:
+	if dialect == "sqlite":
+		return f"mirror_row_hash({', '.join(_q_sqlite_ident(c) for c in cols)})"
+	# 60 bits of the md5 of the row's text form; SUM(bigint) is numeric in Postgres
+	row = ", ".join(_q_pg_ident(c) for c in cols)
+	return f"('x' || substr(md5(ROW({row})::text), 1, 15))::bit(60)::bigint"
+
+
+def _table_ref(dialect: str, schema_name: str | None, table_name: str) -> str:
+	q = _q_sqlite_ident if dialect == "sqlite" else _q_pg_ident
+	return f"{q(schema_name)}.{q(table_name)}" if schema_name else q(table_name)
+
+
+def _reconcile_shape(
+	conn: Connection, dialect: str, schema_name: str | None, table_name: str
+) -> tuple[list[str], list[str], bool] | None:
+	"""(columns, pk columns, integer pk) of one side, or None if the table is missing."""
+	if dialect == "sqlite":
+		prefix = f"{_q_sqlite_ident(schema_name)}." if schema_name else ""
+		rows = conn.exec_driver_sql(f"PRAGMA {prefix}table_info({_q_sqlite_ident(table_name)});").fetchall()
+		if not rows:
+			return None
+		pk = [r[1] for r in sorted((r for r in rows if int(r[5] or 0) > 0), key=lambda r: r[5])]
+		pk_type = next((r[2] for r in rows if pk and r[1] == pk[0]), "")
+		return [r[1] for r in rows], pk, "INT" in (pk_type or "").upper()
+	insp = inspect(conn)
+	schema_name = schema_name or "public"
+	if not insp.has_table(table_name, schema=schema_name):
+		return None
+	columns = insp.get_columns(table_name, schema=schema_name)
+	pk = (insp.get_pk_constraint(table_name, schema=schema_name) or {}).get("constrained_columns") or []
+	pk_type = next((c["type"] for c in columns if pk and c["name"] == pk[0]), None)
+	return [c["name"] for c in columns], pk, isinstance(pk_type, sqltypes.Integer)
+
+
+def _range_checksums(
+	conn: Connection, *, ref: str, dialect: str, pk: str, cols: list[str], lo: int, hi: int, size: int
+) -> dict[int, tuple[int, str]]:
+	"""{bucket: (rows, hash sum)} for pk in [lo, hi], bucket = (pk - lo) // size. One query."""
+	q = _q_sqlite_ident if dialect == "sqlite" else _q_pg_ident
+	rows = conn.execute(
+		text(
+			f"SELECT ({q(pk)} - :lo) / :size AS bucket, COUNT(*), SUM({_row_hash_sql(dialect, cols)}) "
+			f"FROM {ref} WHERE {q(pk)} BETWEEN :lo AND :hi GROUP BY 1"
+		),
+		{"lo": lo, "hi": hi, "size": size},
+	)
+	return {int(b): (int(n), str(h)) for b, n, h in rows}
+
+
+def _repair_range(
+	source: Connection,
+	target: Connection,
+	*,
+	dialect: str,
+	source_ref: str,
+	target_ref: str,
+	pk: str,
+	cols: list[str],
+	lo: int,
+	hi: int,
+) -> tuple[int, int]:
+	"""Make target rows in [lo, hi] equal to the source ones. Returns (upserted, deleted).
+
+	Safe with live writers: the target is read before the source, the source
+	rows are locked FOR SHARE (Postgres) until the repair commits, and rows
+	are upserted (ON CONFLICT), so a trigger that already wrote a key doesn't
+	abort it.
+	"""
+	q = _q_sqlite_ident if dialect == "sqlite" else _q_pg_ident
+	cols_sql = ", ".join(q(c) for c in cols)
+	select = f"SELECT {cols_sql} FROM {{ref}} WHERE {q(pk)} BETWEEN :lo AND :hi"
+	bounds = {"lo": lo, "hi": hi}
+	pk_index = cols.index(pk)
+	target_rows = {r[pk_index]: tuple(r) for r in target.execute(text(select.format(ref=target_ref)), bounds)}
+	lock = "" if dialect == "sqlite" else " FOR SHARE"
+	source_rows = {r[pk_index]: tuple(r) for r in source.execute(text(select.format(ref=source_ref) + lock), bounds)}
+
+	extra = [k for k in target_rows if k not in source_rows]
+	missing = [row for k, row in source_rows.items() if target_rows.get(k) != row]
+	# SQLite has a single writer (and mirror tables may lack a PK to conflict
+	# on): replacing is delete + insert inside this write transaction.
+	removed = list(extra)
+	if dialect == "sqlite":
+		removed += [row[pk_index] for row in missing if row[pk_index] in target_rows]
+	if removed:
+		target.execute(
+			text(f"DELETE FROM {target_ref} WHERE {q(pk)} IN :pks").bindparams(bindparam("pks", expanding=True)),
+			{"pks": removed},
+		)
+	if missing:
+		values = ", ".join(f":c{i}" for i in range(len(cols)))
+		if dialect == "sqlite":
+			sql = f"INSERT INTO {target_ref} ({cols_sql}) VALUES ({values})"
+		else:
+			updates = ", ".join(f"{q(c)} = EXCLUDED.{q(c)}" for c in cols if c != pk)
+			action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+			sql = f"INSERT INTO {target_ref} ({cols_sql}) VALUES ({values}) ON CONFLICT ({q(pk)}) {action}"
+		target.execute(text(sql), [{f"c{i}": v for i, v in enumerate(row)} for row in missing])
+	target.commit()
+	if source is not target:
+		# Ends the read transaction and releases the FOR SHARE locks
+		source.rollback()
+	return len(missing), len(extra)
+
+
+def reconcile_table(
+	source: Connection,
+	target: Connection,
+	*,
+	table_name: str,
+	source_schema: str | None,
+	target_schema: str | None,
+	chunk_size: int = 100_000,
+	leaf_size: int = 1_000,
+	fanout: int = 16,
+	repair: bool = True,
+) -> ReconcileReport:
+	"""Compare one table range by range and repair only the ranges that differ.
+
+	Each level is one GROUP BY query per side over the ranges still in doubt:
+	the whole table first in buckets of `chunk_size` PKs, then each differing
+	bucket split `fanout` ways, down to `leaf_size`, where rows are compared
+	and copied from the source. Requires a single integer primary key.
+	"""
+	table_name = _validate_ident(table_name, what="table")
+	dialect = source.dialect.name
+	report = ReconcileReport(table=table_name)
+	source_ref = _table_ref(dialect, source_schema, table_name)
+	target_ref = _table_ref(dialect, target_schema, table_name)
+
+	source_shape = _reconcile_shape(source, dialect, source_schema, table_name)
+	target_shape = _reconcile_shape(target, dialect, target_schema, table_name)
+	if source_shape is None or target_shape is None:
+		report.skipped = "tabla inexistente en " + ("origen" if source_shape is None else "mirror")
+		return report
+	cols, pk_cols, integer_pk = source_shape
+	if len(pk_cols) != 1 or not integer_pk:
+		report.skipped = "requiere una PK entera de una sola columna"
+		return report
+	missing_cols = [c for c in cols if c not in target_shape[0]]
+	if missing_cols:
+		report.skipped = f"columnas faltantes en el mirror: {', '.join(missing_cols)}"
+		return report
+	pk = pk_cols[0]
+	if dialect == "sqlite":
+		_register_sqlite_row_hash(source)
+		if target is not source:
+			_register_sqlite_row_hash(target)
+
+	q = _q_sqlite_ident if dialect == "sqlite" else _q_pg_ident
+	bounds = [
+		conn.execute(text(f"SELECT MIN({q(pk)}), MAX({q(pk)}) FROM {ref}")).one()
+		for conn, ref in ((source, source_ref), (target, target_ref))
+	]
+	lows = [b[0] for b in bounds if b[0] is not None]
+	if not lows:
+		return report
+	lo, hi = min(lows), max(b[1] for b in bounds if b[1] is not None)
+
+	# Ranges still in doubt: (lo, hi, bucket size to split them with)
+	pending = [(lo, hi, max(chunk_size, leaf_size))]
+	while pending:
+		next_level = []
+		for range_lo, range_hi, size in pending:
+			if range_hi - range_lo + 1 <= leaf_size:
+				report.ranges_different += 1
+				if repair:
+					upserted, deleted = _repair_range(
+						source, target, dialect=dialect, source_ref=source_ref, target_ref=target_ref,
+						pk=pk, cols=cols, lo=range_lo, hi=range_hi,
+					)
+					report.rows_upserted += upserted
+					report.rows_deleted += deleted
+				continue
+			args = {"dialect": dialect, "pk": pk, "cols": cols, "lo": range_lo, "hi": range_hi, "size": size}
+			source_sums = _range_checksums(source, ref=source_ref, **args)
+			target_sums = _range_checksums(target, ref=target_ref, **args)
+			for bucket in source_sums.keys() | target_sums.keys():
+				report.ranges_compared += 1
+				if source_sums.get(bucket) == target_sums.get(bucket):
+					continue
+				bucket_lo = range_lo + bucket * size
+				bucket_hi = min(bucket_lo + size - 1, range_hi)
+				next_level.append((bucket_lo, bucket_hi, max(size // fanout, leaf_size)))
+		pending = next_level
+	return report
+
+
+def reconcile_mirror(
+	source: Connection,
+	target: Connection,
+	*,
+	source_schema: str | None,
+	target_schema: str | None,
+	tables: list[str] | None = None,
+	progress: Callable[[ReconcileReport], None] | None = None,
+	**options: Any,
+) -> list[ReconcileReport]:
+	"""Reconcile every mirrored table (or `tables`); see reconcile_table for `options`.
+
+	Sides: schema mirror (same connection, `public` vs the mirror schema),
+	external mirror (two Postgres connections, `public` on both) or SQLite
+	(same connection, main vs the attached mirror). Rows written while it
+	runs: repaired ranges are upserted from source rows held FOR SHARE until
+	the repair commits (Postgres), so a concurrent trigger or replication
+	write neither aborts the repair nor gets overwritten by an older value.
+	"""
+	dialect = source.dialect.name
+	if tables is None:
+		tables = _sqlite_main_tables(source) if dialect == "sqlite" else _pg_public_tables(source)
+	reports = []
+	for table in tables:
+		if table == "alembic_version" or table.startswith("_") or not _IDENTIFIER_RE.match(table):
+			continue
+		report = reconcile_table(
+			source, target, table_name=table, source_schema=source_schema, target_schema=target_schema, **options
+		)
+		reports.append(report)
+		if progress:
+			progress(report)
+	return reports
+
+
+# ---------------------------------------------------------------------------
+# Row diff (primary vs mirror, streamed merge join in PK order)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class DiffSummary:
+	table: str
+	compared: int = 0
+	missing: int = 0
+	extra: int = 0
+	changed: int = 0
+	columns_missing: list[str] = field(default_factory=list)
+
+
+def _diff_order_by(conn: Connection, dialect: str, schema_name: str | None, table_name: str, pk_cols: list[str]) -> str:
+	"""ORDER BY in byte order, which is how Python compares the keys while merging."""
+	if dialect == "sqlite":
+		# BINARY collation already compares UTF-8 bytes
+		return ", ".join(_q_sqlite_ident(c) for c in pk_cols)
+	types = {c["name"]: c["type"] for c in inspect(conn).get_columns(table_name, schema=schema_name or "public")}
+	return ", ".join(
+		f'{_q_pg_ident(c)} COLLATE "C"' if isinstance(types.get(c), sqltypes.String) else _q_pg_ident(c)
+		for c in pk_cols
+	)
+
+
+def _diff_stream(
+	conn: Connection,
+	*,
+	ref: str,
+	dialect: str,
+	cols: list[str],
+	order_by: str,
+	pk_cols: list[str],
+	from_pk: list[Any] | None,
+	to_pk: list[Any] | None,
+	batch_size: int,
+):
+	q = _q_sqlite_ident if dialect == "sqlite" else _q_pg_ident
+	keys = ", ".join(q(c) for c in pk_cols)
+	where: list[str] = []
+	params: dict[str, Any] = {}
+	for op, name, bound in ((">=", "lo", from_pk), ("<=", "hi", to_pk)):
+		if bound is not None:
+			where.append(f"({keys}) {op} ({', '.join(f':{name}{i}' for i in range(len(bound)))})")
+			params.update({f"{name}{i}": v for i, v in enumerate(bound)})
+	sql = f"SELECT {', '.join(q(c) for c in cols)} FROM {ref}"
+	if where:
+		sql += " WHERE " + " AND ".join(where)
+	sql += f" ORDER BY {order_by}"
+	# Server-side cursor on Postgres (named cursor), lazy cursor on SQLite
+	result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(text(sql), params)
+	pk_idx = [cols.index(c) for c in pk_cols]
+	for row in result:
+		yield tuple(row[i] for i in pk_idx), tuple(row)
+
+
+def mirror_table_diff(
+	source: Connection,
+	target: Connection,
+	*,
+	table_name: str,
+	source_schema: str | None,
+	target_schema: str | None,
+	from_pk: list[Any] | None = None,
+	to_pk: list[Any] | None = None,
+	batch_size: int = 1000,
+):
+	"""Rows that differ between source and mirror in [from_pk, to_pk].
+
+	Both sides are streamed in PK order and merge-joined, so memory stays
+	constant whatever the range. Returns an iterator of events:
+	`{"op": "missing" | "extra" | "changed", "pk": [...], ...}` and a final
+	`{"op": "summary", ...}`. The table shape is checked before returning,
+	so a ValueError comes out before the first event.
+	"""
+	table_name = _validate_ident(table_name, what="table")
+	dialect = source.dialect.name
+	source_shape = _reconcile_shape(source, dialect, source_schema, table_name)
+	target_shape = _reconcile_shape(target, dialect, target_schema, table_name)
+	if source_shape is None or target_shape is None:
+		raise ValueError(f"Tabla no encontrada en {'el origen' if source_shape is None else 'el mirror'}: {table_name}")
+	source_cols, pk_cols, _ = source_shape
+	if not pk_cols:
+		raise ValueError(f"La tabla {table_name} no tiene PK")
+	for bound in (from_pk, to_pk):
+		if bound is not None and len(bound) != len(pk_cols):
+			raise ValueError(f"from_pk/to_pk deben tener {len(pk_cols)} valor(es)")
+	missing_pk = [c for c in pk_cols if c not in target_shape[0]]
+	if missing_pk:
+		raise ValueError(f"El mirror no tiene la PK completa: {', '.join(missing_pk)}")
+
+	cols = [c for c in source_cols if c in target_shape[0]]
+	summary = DiffSummary(table=table_name, columns_missing=[c for c in source_cols if c not in cols])
+	args = {"dialect": dialect, "cols": cols, "pk_cols": pk_cols, "from_pk": from_pk, "to_pk": to_pk, "batch_size": batch_size}
+	source_rows = _diff_stream(
+		source, ref=_table_ref(dialect, source_schema, table_name),
+		order_by=_diff_order_by(source, dialect, source_schema, table_name, pk_cols), **args,
+	)
+	target_rows = _diff_stream(
+		target, ref=_table_ref(dialect, target_schema, table_name),
+		order_by=_diff_order_by(target, dialect, target_schema, table_name, pk_cols), **args,
+	)
+
+	def as_dict(values: tuple, names: list[str]) -> dict[str, Any]:
+		return {c: _to_jsonable(v) for c, v in zip(names, values)}
+
+	def merge():
+		s = next(source_rows, None)
+		t = next(target_rows, None)
+		while s is not None or t is not None:
+			if t is None or (s is not None and s[0] < t[0]):
+				summary.missing += 1
+				yield {"op": "missing", "pk": [_to_jsonable(v) for v in s[0]], "primary": as_dict(s[1], cols)}
+				s = next(source_rows, None)
+			elif s is None or t[0] < s[0]:
+				summary.extra += 1
+				yield {"op": "extra", "pk": [_to_jsonable(v) for v in t[0]], "mirror": as_dict(t[1], cols)}
+				t = next(target_rows, None)
+			else:
+				summary.compared += 1
+				changed = [c for c, a, b in zip(cols, s[1], t[1]) if a != b]
+				if changed:
+					summary.changed += 1
+					yield {
+						"op": "changed",
+						"pk": [_to_jsonable(v) for v in s[0]],
+						"primary": {c: _to_jsonable(s[1][cols.index(c)]) for c in changed},
+						"mirror": {c: _to_jsonable(t[1][cols.index(c)]) for c in changed},
+					}
+				s = next(source_rows, None)
+				t = next(target_rows, None)
+		yield {"op": "summary", **asdict(summary)}
+
+	return merge()
@@ -0,0 +1,286 @@
+"""
+Trabajos en segundo plano del schema mirror: cola de cambios y copia inicial.
+
+Cola (MIRROR_TRIGGER_LEVEL=queue): en ese modo los triggers solo anotan (tabla, pk, op) en la tabla UNLOGGED
+`<MIRROR_SCHEMA>._change_queue`; la escritura de negocio ya no copia la fila
+al mirror dentro de su transacción. Este módulo drena la cola por lotes con
+`utils.mirror_db.apply_mirror_queue`:
+
+- en la app: un hilo por worker cada MIRROR_QUEUE_INTERVAL segundos (el
+  advisory lock deja aplicar a uno solo a la vez), o
+- fuera de la app: `flask mirror aplicar-cola [--continuo]` con
+  MIRROR_QUEUE_APPLIER=cli (p. ej. un contenedor worker).
+
+Setup y copia inicial: en PostgreSQL el schema, los triggers y las copias
+pendientes se preparan en un hilo al arrancar (create_app no abre
+conexiones, así un primary caído no bloquea el arranque). El setup solo
+prepara una copia por rangos de PK en una tabla de staging
+(utils.mirror_db.run_mirror_copies); se ejecuta por lotes en ese mismo hilo
+(MIRROR_COPY_MODE=background) o con `flask mirror copiar`. Es reanudable y
+la tabla se reemplaza al terminar.
+
+Esquema: tras cada migración (migrations/env.py) y con `flask mirror
+sincronizar-esquema` se aplican al mirror las columnas agregadas, borradas o
+con otro tipo, regenerando solo los triggers de esas tablas.
+
+Reconciliación: `flask mirror reconciliar [--solo-verificar]` compara el
+mirror con el origen por checksums de rangos de PK y repara solo los rangos
+distintos (utils.mirror_db.reconcile_mirror).
+
+Configuración (app.config):
+    MIRROR_COPY_MODE         'background' (hilo al arrancar) o 'cli' (solo el comando)
+    MIRROR_COPY_CHUNK_SIZE   filas por lote de la copia (5000)
+    MIRROR_QUEUE_APPLIER     'app' (hilo en cada worker) o 'cli' (solo el comando)
+    MIRROR_QUEUE_INTERVAL    segundos entre drenados: el retraso máximo buscado (2)
+    MIRROR_QUEUE_BATCH_SIZE  cambios aplicados por transacción (1000)
+"""
+import logging
+import os
+import threading
+import time
+
+import click
+
+from extensions import db
+from utils.mirror_db import (
+    apply_mirror_queue, attach_mirror_if_needed, auto_setup_postgres_schema_mirror, pending_mirror_copies,
+    reconcile_mirror, run_mirror_copies, sync_mirror_drift,
+)
+
+logger = logging.getLogger(__name__)
+
+_applier_pid = None
+_applier_lock = threading.Lock()
+
+
+def queue_enabled(app):
+    """Modo cola: schema mirror en Postgres (sin mirror externo) con nivel 'queue'."""
+    return (
+        app.config.get('MIRROR_TRIGGER_LEVEL') == 'queue'
+        and not app.config.get('MIRROR_DATABASE_URL')
+        and db.engine.dialect.name.startswith('postgres')
+    )
+
+
+def drain_mirror_queue(app, max_batches=None):
+    """Aplica lotes hasta vaciar la cola (o max_batches). Devuelve los cambios aplicados."""
+    batch_size = app.config.get('MIRROR_QUEUE_BATCH_SIZE', 1000)
+    schema_name = app.config.get('MIRROR_SCHEMA', 'mirror')
+    aplicados = 0
+    lotes = 0
+    with app.app_context():
+        while max_batches is None or lotes < max_batches:
+            # Una transacción por lote: el lote se aplica entero o vuelve a la cola
+            with db.engine.begin() as conn:
+                n = apply_mirror_queue(conn, schema_name=schema_name, batch_size=batch_size)
+            aplicados += n
+            lotes += 1
+            if n < batch_size:
+                break
+    return aplicados
+
+
+def _applier_loop(app):
+    interval = app.config.get('MIRROR_QUEUE_INTERVAL', 2)
+    while True:
+        time.sleep(interval)
+        try:
+            drain_mirror_queue(app)
+        except Exception as e:
+            logger.error(f"Error aplicando la cola del mirror: {e}")
+
+
+def ensure_applier(app):
+    """Arranca el hilo aplicador de este proceso (uno por worker de gunicorn)."""
+    global _applier_pid
+    with _applier_lock:
+        if _applier_pid == os.getpid():
+            return
+        _applier_pid = os.getpid()
+    threading.Thread(target=_applier_loop, args=(app,), name='mirror-queue', daemon=True).start()
+
+
+def run_copy_job(app, progress=None):
+    """Completa las copias pendientes. Devuelve {tabla: filas copiadas}."""
+    with app.app_context():
+        return run_mirror_copies(
+            db.engine,
+            schema_name=app.config.get('MIRROR_SCHEMA', 'mirror'),
+            trigger_level=app.config.get('MIRROR_TRIGGER_LEVEL', 'statement'),
+            chunk_size=app.config.get('MIRROR_COPY_CHUNK_SIZE', 5000),
+            progress=progress,
+        )
+
+
+def _log_progress(status):
+    total = status['rows_estimate']
+    avance = f" de ~{total}" if total else ''
+    logger.info(f"[Mirror] Copia de {status['table']}: {status['rows_copied']}{avance} filas")
+
+
+def run_reconcile(app, tables=None, repair=True, progress=None, **options):
+    """Compara (y repara) el mirror configurado: schema, externo o SQLite."""
+    schema_name = app.config.get('MIRROR_SCHEMA', 'mirror')
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        mirror_url = app.config.get('MIRROR_DATABASE_URL')
+        with db.engine.connect() as source:
+            if dialect.startswith('postgres') and mirror_url:
+                from sqlalchemy import create_engine
+                from sqlalchemy.pool import NullPool
+
+                mirror_engine = create_engine(mirror_url, poolclass=NullPool)
+                try:
+                    with mirror_engine.connect() as target:
+                        return reconcile_mirror(
+                            source, target, source_schema=None, target_schema=None,
+                            tables=tables, repair=repair, progress=progress, **options
+                        )
+                finally:
+                    mirror_engine.dispose()
+            if dialect == 'sqlite' and not attach_mirror_if_needed(
+                source, app.config.get('MIRROR_DB_PATH'), schema_name=schema_name
+            ):
+                raise click.ClickException('MIRROR_DB_PATH no está configurado (SQLite)')
+            return reconcile_mirror(
+                source, source, source_schema=None, target_schema=schema_name,
+                tables=tables, repair=repair, progress=progress, **options
+            )
+
+
+def _copy_pending(app):
+    try:
+        copiadas = run_copy_job(app, progress=_log_progress)
+        logger.info(f"[Mirror] Copia inicial completa: {copiadas}")
+    except Exception as e:
+        logger.error(f"[Mirror] Error en la copia inicial (se reanuda en el próximo arranque): {e}")
+
+
+def start_copy_job(app):
+    """Lanza la copia en un hilo; no bloquea el arranque."""
+    threading.Thread(target=_copy_pending, args=(app,), name='mirror-copy', daemon=True).start()
+
+
+def run_schema_setup(app):
+    """Schema mirror + triggers en PostgreSQL; devuelve las tablas con copia inicial pendiente."""
+    schema_name = app.config.get('MIRROR_SCHEMA', 'mirror')
+    with app.app_context():
+        auto_setup_postgres_schema_mirror(
+            db.engine, schema_name, app.config.get('MIRROR_TRIGGER_LEVEL', 'statement')
+        )
+        # También reanuda una copia interrumpida
+        with db.engine.connect() as conn:
+            return [p['table_name'] for p in pending_mirror_copies(conn, schema_name=schema_name)]
+
+
+def start_schema_setup_job(app):
+    """Setup del schema y, si toca, la copia pendiente, en un hilo: el arranque no conecta."""
+    def run():
+        try:
+            pendientes = run_schema_setup(app)
+        except Exception as e:
+            logger.error(f"[Mirror] Error en auto-setup (se reintenta en el próximo arranque): {e}")
+            return
+        logger.info(f"[Mirror] PostgreSQL schema '{app.config.get('MIRROR_SCHEMA', 'mirror')}' listo")
+        if pendientes:
+            logger.info(f"[Mirror] Copia inicial pendiente: {', '.join(pendientes)}")
+            if app.config.get('MIRROR_COPY_MODE', 'background') == 'background':
+                _copy_pending(app)
+
+    threading.Thread(target=run, name='mirror-setup', daemon=True).start()
+
+
+def init_mirror_jobs(app, schema_setup=False):
+    """Registra `flask mirror ...`, el hilo aplicador (modo cola) y el setup del schema mirror."""
+    if 'mirror_jobs' in app.extensions:
+        return
+    app.extensions['mirror_jobs'] = True
+
+    @app.cli.group('mirror')
+    def mirror_cli():
+        """Mantenimiento del schema mirror."""
+
+    @mirror_cli.command('aplicar-cola')
+    @click.option('--continuo', is_flag=True, help='Seguir aplicando cada MIRROR_QUEUE_INTERVAL segundos.')
+    def aplicar_cola_command(continuo):
+        """Aplica al mirror los cambios pendientes de la cola."""
+        if not continuo:
+            click.echo(f"{drain_mirror_queue(app)} cambio(s) aplicados.")
+            return
+        _applier_loop(app)
+
+    @mirror_cli.command('copiar')
+    def copiar_command():
+        """Completa (o reanuda) la copia inicial por lotes y la activa."""
+        def progress(status):
+            total = status['rows_estimate']
+            click.echo(f"{status['table']}: {status['rows_copied']}" + (f"/~{total}" if total else '') + " filas")
+
+        copiadas = run_copy_job(app, progress=progress)
+        click.echo(f"{len(copiadas)} tabla(s) copiadas." if copiadas else "No hay copias pendientes.")
+
+    @mirror_cli.command('reconciliar')
+    @click.option('--tabla', 'tablas', multiple=True, help='Solo estas tablas (repetible).')
+    @click.option('--solo-verificar', is_flag=True, help='Comparar sin reparar.')
+    @click.option('--chunk', type=int, default=100_000, show_default=True, help='PKs por rango en el primer nivel.')
+    @click.option('--hoja', type=int, default=1_000, show_default=True, help='Rango que ya se compara fila a fila.')
+    def reconciliar_command(tablas, solo_verificar, chunk, hoja):
+        """Compara el mirror por checksums de rangos de PK y repara solo lo distinto."""
+        def progress(r):
+            if r.skipped:
+                click.echo(f"{r.table}: omitida ({r.skipped})")
+                return
+            estado = 'OK' if not r.ranges_different else f"{r.ranges_different} rango(s) distintos"
+            reparado = '' if solo_verificar or not r.ranges_different else (
+                f", {r.rows_upserted} fila(s) copiadas, {r.rows_deleted} borradas"
+            )
+            click.echo(f"{r.table}: {estado} ({r.ranges_compared} rangos comparados){reparado}")
+
+        informes = run_reconcile(
+            app, tables=list(tablas) or None, repair=not solo_verificar,
+            progress=progress, chunk_size=chunk, leaf_size=hoja,
+        )
+        if solo_verificar and any(r.ranges_different for r in informes):
+            raise SystemExit(1)
+
+    @mirror_cli.command('sincronizar-esquema')
+    @click.option('--solo-verificar', is_flag=True, help='Listar las diferencias sin aplicarlas.')
+    def sincronizar_esquema_command(solo_verificar):
+        """Aplica al schema mirror las columnas/tablas cambiadas por migraciones."""
+        with app.app_context(), db.engine.begin() as conn:
+            if not conn.dialect.name.startswith('postgres'):
+                raise click.ClickException('Solo aplica al schema mirror de PostgreSQL')
+            result = sync_mirror_drift(
+                conn,
+                schema_name=app.config.get('MIRROR_SCHEMA', 'mirror'),
+                trigger_level=app.config.get('MIRROR_TRIGGER_LEVEL', 'statement'),
+                dry_run=solo_verificar,
+            )
+        for d in result.drift:
+            cambio = (
+                f"falta en el mirror ({d.source_type})" if d.mirror_type is None
+                else "ya no existe en el origen" if d.source_type is None
+                else f"{d.mirror_type} -> {d.source_type}"
+            )
+            click.echo(f"{d.table}.{d.column}: {cambio}")
+        for table in result.new_tables:
+            click.echo(f"{table}: tabla nueva")
+        if not result.drift and not result.new_tables:
+            click.echo("El schema mirror está al día.")
+        elif not solo_verificar:
+            click.echo(f"{len(result.statements)} ALTER(s), triggers regenerados: {len(result.triggers_regenerated)}.")
+            if result.copies_pending:
+                click.echo("Copia pendiente (flask mirror copiar): " + ', '.join(result.copies_pending))
+
+    if schema_setup:
+        start_schema_setup_job(app)
+
+    if app.config.get('MIRROR_TRIGGER_LEVEL') != 'queue' or app.config.get('MIRROR_QUEUE_APPLIER', 'app') != 'app':
+        return
+
+    # Se arranca en el primer request y no al crear la app: con --preload el
+    # hilo del proceso maestro no sobrevive al fork de los workers.
+    @app.before_request
+    def _start_mirror_applier():
+        if queue_enabled(app):
+            ensure_applier(app)
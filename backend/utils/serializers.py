@@ -0,0 +1,190 @@
+"""
+Serializadores declarativos y precompilados para las respuestas JSON.
+
+Cada modelo declara una sola vez sus campos (clave de salida, columna y
+formato). El serializador arma con eso una consulta que trae solo esas
+columnas (sin instanciar objetos ORM) y convierte cada fila en dict con
+un `zip` + los formateadores estrictamente necesarios.
+"""
+from decimal import Decimal
+import json
+
+from flask import abort, current_app, jsonify, make_response, request
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa el encoder de Flask
+    orjson = None
+
+# Tope de combinaciones de `?fields=` cacheadas por serializador
+_MAX_SUBSETS = 64
+
+
+# ---------------------------------------------------------------------------
+# Formateadores
+# ---------------------------------------------------------------------------
+
+def iso(value):
+    """date/time/datetime -> ISO 8601 (None si no hay valor)."""
+    return value.isoformat() if value else None
+
+
+def str_or_none(value):
+    """Equivalente a `str(v) if v else None` (horas en formato HH:MM:SS)."""
+    return str(value) if value else None
+
+
+def money(value):
+    """Redondea a 2 decimales como `_to_money_2` de cargos."""
+    try:
+        return float(Decimal(str(value)).quantize(Decimal('0.01')))
+    except Exception:
+        raise ValueError('sueldo_base inválido')
+
+
+def json_list(value):
+    """Columna Text con una lista JSON -> lista (vacía si no hay valor)."""
+    return json.loads(value) if value else []
+
+
+def zero_if_empty(value):
+    return value or 0.0
+
+
+# ---------------------------------------------------------------------------
+# Serializador
+# ---------------------------------------------------------------------------
+
+class Field:
+    """Campo de salida: clave JSON, columna de origen y formateador opcional.
+
+    `join` es un par (entidad, condición) para columnas de otra tabla que se
+    resuelven con un OUTER JOIN en la misma consulta.
+    """
+    __slots__ = ("key", "column", "fmt", "join")
+
+    def __init__(self, key, column, fmt=None, join=None):
+        self.key = key
+        self.column = column
+        self.fmt = fmt
+        self.join = join
+
+
+class InvalidFields(ValueError):
+    """`?fields=` pide campos que el serializador no expone."""
+
+
+class Serializer:
+    def __init__(self, *fields):
+        self.fields = tuple(fields)
+        self.keys = tuple(f.key for f in self.fields)
+        self._columns = None
+        self._subsets = {}
+        self._formatters = tuple((f.key, f.fmt) for f in self.fields if f.fmt is not None)
+        joins = []
+        for f in self.fields:
+            if f.join is not None and f.join not in joins:
+                joins.append(f.join)
+        self._joins = tuple(joins)
+
+    @property
+    def columns(self):
+        # Se etiqueta cada columna con su clave: así dos campos pueden leer la
+        # misma columna sin que SQLAlchemy las deduplique en el SELECT. Se hace
+        # en el primer uso porque etiquetar un atributo configura los mappers,
+        # y al importar los modelos todavía no están todas las relaciones.
+        if self._columns is None:
+            self._columns = tuple(f.column.label(f.key) for f in self.fields)
+        return self._columns
+
+    # -- composición ------------------------------------------------------
+
+    def only(self, *keys):
+        """Sub-serializador con un subconjunto de campos (y solo sus joins)."""
+        wanted = set(keys)
+        unknown = wanted.difference(self.keys)
+        if unknown:
+            raise KeyError(", ".join(sorted(unknown)))
+        return Serializer(*(f for f in self.fields if f.key in wanted))
+
+    def extend(self, *fields):
+        return Serializer(*self.fields, *fields)
+
+    def select(self, fields):
+        """Sub-serializador para un parámetro `fields=a,b,c`.
+
+        Los campos declarados son la lista permitida; sin parámetro se usan
+        todos. Cada combinación se construye una sola vez y se reutiliza.
+        """
+        keys = tuple(dict.fromkeys(k.strip() for k in (fields or "").split(",") if k.strip()))
+        if not keys:
+            return self
+        cache_key = frozenset(keys)
+        sub = self._subsets.get(cache_key)
+        if sub is None:
+            unknown = [k for k in keys if k not in self.keys]
+            if unknown:
+                raise InvalidFields(f"Campos no permitidos: {', '.join(unknown)}")
+            sub = self.only(*keys)
+            if len(self._subsets) < _MAX_SUBSETS:
+                self._subsets[cache_key] = sub
+        return sub
+
+    # -- consulta ---------------------------------------------------------
+
+    def apply(self, query):
+        """Proyecta una Query (con sus filtros) a solo las columnas declaradas."""
+        for target, onclause in self._joins:
+            query = query.outerjoin(target, onclause)
+        return query.with_entities(*self.columns)
+
+    def render(self, row):
+        data = dict(zip(self.keys, row))
+        for key, fmt in self._formatters:
+            data[key] = fmt(data[key])
+        return data
+
+    def render_all(self, rows):
+        render = self.render
+        return [render(row) for row in rows]
+
+    def all(self, query):
+        return self.render_all(self.apply(query))
+
+    def first_or_404(self, query):
+        row = self.apply(query).first()
+        if row is None:
+            abort(404)
+        return self.render(row)
+
+    def dump(self, obj):
+        """Serializa una instancia ya cargada (p. ej. tras crear/actualizar)."""
+        return self.render(tuple(getattr(obj, f.column.key) for f in self.fields))
+
+
+def requested_fields(serializer):
+    """Serializador a usar según `?fields=` del request actual.
+
+    Si se piden campos fuera de la lista permitida responde 400 (con la
+    lista de campos válidos) antes de tocar la base de datos.
+    """
+    try:
+        return serializer.select(request.args.get("fields"))
+    except InvalidFields as e:
+        abort(make_response(jsonify({
+            "error": str(e),
+            "campos_permitidos": list(serializer.keys),
+        }), 400))
+
+
+def json_response(data):
+    """Respuesta JSON usando orjson cuando está instalado.
+
+    Las claves se ordenan igual que `jsonify` para que la salida sea la misma.
+    """
+    if orjson is None:
+        return jsonify(data)
+    return current_app.response_class(
+        orjson.dumps(data, option=orjson.OPT_SORT_KEYS),
+        mimetype="application/json",
+    )
@@ -0,0 +1,326 @@
+"""
+Subida asíncrona de documentos de hojas de vida al servidor de archivos.
+
+En lugar de reenviar el multipart dentro del request (bloqueando un worker
+de gunicorn hasta 10 s si la VM está lenta), la ruta:
+
+    1. guarda el archivo en UPLOAD_SPOOL_DIR (`<job>.bin`),
+    2. hace commit del registro con estado_archivo = 'pendiente',
+    3. escribe la metadata del trabajo (`<job>.json`) y lo encola.
+
+Un pool de hilos por proceso sube el archivo con reintentos y actualiza
+`ruta_archivo_url` / `estado_archivo`. Cada trabajo se reclama renombrando
+`<job>.json` -> `<job>.working` (rename es atómico), así que varios procesos
+pueden reanudar la misma carpeta al arrancar sin subir dos veces el mismo
+archivo. Si se agotan los reintentos queda como `<job>.failed`. Un error
+inesperado (p. ej. la base de datos caída al guardar la URL) reencola el
+trabajo con backoff hasta UPLOAD_MAX_RETRIES veces; después también queda
+`.failed` con estado 'error' y el usuario puede reintentarlo.
+
+Configuración (app.config):
+    UPLOAD_SPOOL_DIR        carpeta local de la cola
+    UPLOAD_WORKERS          hilos por proceso (2)
+    UPLOAD_MAX_RETRIES      intentos por archivo (5)
+    UPLOAD_RETRY_BACKOFF    segundos base del backoff exponencial (2)
+    UPLOAD_INLINE           procesar dentro del request (tests / desarrollo)
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+import uuid
+
+from flask import current_app
+
+from extensions import db
+
+
+ESTADO_PENDIENTE = 'pendiente'
+ESTADO_SUBIDO = 'subido'
+ESTADO_ERROR = 'error'
+# Enlace a un documento fuera del servidor de archivos: no se borra ni tiene miniatura
+ESTADO_EXTERNO = 'externo'
+
+# Un `.working` más viejo que esto quedó huérfano (proceso caído)
+_STALE_CLAIM_SECONDS = 15 * 60
+_MAX_BACKOFF_SECONDS = 60
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _config(app, key, default):
+    return app.config.get(key, default)
+
+
+def spool_dir(app=None):
+    app = app or current_app
+    default = os.path.join(app.root_path, 'upload_spool')
+    path = _config(app, 'UPLOAD_SPOOL_DIR', default)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _paths(directory, job_id):
+    base = os.path.join(directory, job_id)
+    return {
+        'bin': base + '.bin',
+        'json': base + '.json',
+        'working': base + '.working',
+        'failed': base + '.failed',
+    }
+
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _get_executor(app):
+    """Pool perezoso por proceso (gunicorn hace fork después de importar)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=_config(app, 'UPLOAD_WORKERS', 2),
+                thread_name_prefix='upload',
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+# ---------------------------------------------------------------------------
+# API usada por las rutas
+# ---------------------------------------------------------------------------
+
+def spool_file(file):
+    """Guarda el archivo del request en disco y devuelve el id del trabajo.
+
+    Se llama antes del commit: si falla el disco no queda un registro
+    'pendiente' sin archivo.
+    """
+    job_id = uuid.uuid4().hex
+    paths = _paths(spool_dir(), job_id)
+    file.stream.seek(0)
+    file.save(paths['bin'])
+    return job_id
+
+
+def discard_spooled(job_id):
+    """Borra un archivo en cola cuyo registro no llegó a guardarse."""
+    try:
+        os.remove(_paths(spool_dir(), job_id)['bin'])
+    except OSError:
+        pass
+
+
+def enqueue_upload(job_id, id_hoja_vida, filename, content_type, anterior_url=None):
+    """Registra el trabajo (ya con el id del registro) y lo encola.
+
+    `anterior_url` es el archivo que reemplaza: se borra del servidor recién
+    cuando el nuevo quedó subido.
+    """
+    app = current_app._get_current_object()
+    paths = _paths(spool_dir(app), job_id)
+    _write_json_atomic(paths['json'], {
+        'job_id': job_id,
+        'id_hoja_vida': id_hoja_vida,
+        'filename': filename,
+        'content_type': content_type,
+        'anterior_url': anterior_url,
+        'intentos': 0,
+        'creado': time.time(),
+    })
+    _submit(app, job_id)
+
+
+def retry_failed(id_hoja_vida):
+    """Vuelve a encolar los trabajos fallidos de un registro. Devuelve cuántos."""
+    app = current_app._get_current_object()
+    directory = spool_dir(app)
+    count = 0
+    for name in os.listdir(directory):
+        if not name.endswith('.failed'):
+            continue
+        job_id = name[:-len('.failed')]
+        paths = _paths(directory, job_id)
+        meta = _read_json(paths['failed'])
+        if not meta or meta.get('id_hoja_vida') != id_hoja_vida:
+            continue
+        meta['intentos'] = 0
+        meta['fallos'] = 0
+        meta.pop('error', None)
+        _write_json_atomic(paths['failed'], meta)
+        try:
+            os.rename(paths['failed'], paths['json'])
+        except OSError:
+            continue  # otro proceso lo tomó primero
+        _set_estado(id_hoja_vida, ESTADO_PENDIENTE)
+        _submit(app, job_id)
+        count += 1
+    return count
+
+
+def resume_pending(app):
+    """Reencola trabajos pendientes y recupera reclamos huérfanos.
+
+    Se llama al arrancar la app; es seguro en varios procesos a la vez.
+    """
+    directory = spool_dir(app)
+    now = time.time()
+    resumed = 0
+    for name in os.listdir(directory):
+        job_id, ext = os.path.splitext(name)
+        paths = _paths(directory, job_id)
+        if ext == '.working':
+            try:
+                if now - os.path.getmtime(paths['working']) < _STALE_CLAIM_SECONDS:
+                    continue
+                os.rename(paths['working'], paths['json'])
+            except OSError:
+                continue
+        elif ext != '.json':
+            continue
+        _submit(app, job_id)
+        resumed += 1
+    return resumed
+
+
+def init_upload_pipeline(app):
+    app.config.setdefault('UPLOAD_SPOOL_DIR', os.path.join(app.root_path, 'upload_spool'))
+    app.config.setdefault('UPLOAD_WORKERS', 2)
+    app.config.setdefault('UPLOAD_MAX_RETRIES', 5)
+    app.config.setdefault('UPLOAD_RETRY_BACKOFF', 2)
+    app.config.setdefault('UPLOAD_INLINE', False)
+    try:
+        resumed = resume_pending(app)
+        if resumed:
+            app.logger.info(f"📤 {resumed} subida(s) pendiente(s) reanudada(s)")
+    except OSError as e:
+        app.logger.warning(f"⚠️ No se pudo reanudar la cola de subidas: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def _submit(app, job_id):
+    if _config(app, 'UPLOAD_INLINE', False):
+        _process(app, job_id)
+    else:
+        _get_executor(app).submit(_process, app, job_id)
+
+
+def _submit_later(app, job_id, delay):
+    if not delay or _config(app, 'UPLOAD_INLINE', False):
+        time.sleep(delay or 0)
+        _submit(app, job_id)
+        return
+    timer = threading.Timer(delay, _submit, args=(app, job_id))
+    timer.daemon = True
+    timer.start()
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _set_estado(id_hoja_vida, estado, url=None):
+    from models.hoja_vida import Hoja_Vida
+
+    values = {Hoja_Vida.estado_archivo: estado}
+    if url is not None:
+        values[Hoja_Vida.ruta_archivo_url] = url
+    updated = (
+        Hoja_Vida.query
+        .filter(Hoja_Vida.id_hoja_vida == id_hoja_vida)
+        .update(values, synchronize_session=False)
+    )
+    db.session.commit()
+    return updated
+
+
+def _process(app, job_id):
+    from utils.file_cleanup import queue_file_deletion
+    from utils.file_service import upload_path_to_vm
+
+    directory = spool_dir(app)
+    paths = _paths(directory, job_id)
+    # Reclamo atómico: si otro hilo/proceso ya lo tomó, rename falla
+    try:
+        os.rename(paths['json'], paths['working'])
+    except OSError:
+        return
+
+    meta = _read_json(paths['working'])
+    if meta is None:
+        return
+
+    max_retries = _config(app, 'UPLOAD_MAX_RETRIES', 5)
+    backoff = _config(app, 'UPLOAD_RETRY_BACKOFF', 2)
+
+    reintentar_en = None
+    with app.app_context():
+        try:
+            # Si ya se subió y falló lo siguiente, no se vuelve a subir
+            url = meta.get('url')
+            while not url and meta['intentos'] < max_retries:
+                meta['intentos'] += 1
+                _write_json_atomic(paths['working'], meta)
+                url = upload_path_to_vm(paths['bin'], meta['filename'], meta.get('content_type'))
+                if url:
+                    break
+                if meta['intentos'] < max_retries and backoff:
+                    time.sleep(min(backoff * 2 ** (meta['intentos'] - 1), _MAX_BACKOFF_SECONDS))
+
+            if not url:
+                meta['error'] = 'El servidor de archivos no respondió'
+                _write_json_atomic(paths['working'], meta)
+                os.rename(paths['working'], paths['failed'])
+                _set_estado(meta['id_hoja_vida'], ESTADO_ERROR)
+                return
+
+            meta['url'] = url
+            _write_json_atomic(paths['working'], meta)
+            if not _set_estado(meta['id_hoja_vida'], ESTADO_SUBIDO, url):
+                # El registro se eliminó mientras se subía: no dejar huérfanos
+                queue_file_deletion(url)
+            elif meta.get('anterior_url'):
+                queue_file_deletion(meta['anterior_url'])
+            db.session.commit()
+
+            for key in ('working', 'bin'):
+                try:
+                    os.remove(paths[key])
+                except OSError:
+                    pass
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error procesando subida {job_id}: {e}")
+            meta['fallos'] = meta.get('fallos', 0) + 1
+            meta['error'] = str(e)[:200]
+            try:
+                _write_json_atomic(paths['working'], meta)
+                if meta['fallos'] < max_retries:
+                    # De vuelta a la cola; se reenvía tras el backoff
+                    os.rename(paths['working'], paths['json'])
+                    reintentar_en = min((backoff or 0) * 2 ** (meta['fallos'] - 1), _MAX_BACKOFF_SECONDS)
+                else:
+                    os.rename(paths['working'], paths['failed'])
+                    _set_estado(meta['id_hoja_vida'], ESTADO_ERROR)
+            except Exception as e2:
+                db.session.rollback()
+                app.logger.error(f"No se pudo reencolar la subida {job_id}: {e2}")
+        finally:
+            db.session.remove()
+
+    if reintentar_en is not None:
+        _submit_later(app, job_id, reintentar_en)
@@ -0,0 +1,104 @@
+"""
+Tokens firmados (HMAC-SHA256) para subir archivos directo al servidor de archivos.
+
+El backend emite un token de vida corta y el navegador lo envía al
+file server en `X-Upload-Token`; el file server lo verifica con el mismo
+secreto compartido (FILE_UPLOAD_SECRET) sin consultar al backend. Así los
+bytes del documento no pasan por los workers de la API.
+
+Formato: base64url(payload JSON) + "." + base64url(firma). La verificación
+equivalente vive en file_server_docker/app.py (servicio separado).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+
+class InvalidUploadToken(ValueError):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(secret, payload_b64):
+    return hmac.new(secret.encode('utf-8'), payload_b64.encode('ascii'), hashlib.sha256).digest()
+
+
+def issue_upload_token(secret, ttl=300, max_size=None, scope='hoja_vida', subject=None):
+    """Devuelve (token, payload). `max_size` en bytes (None = sin límite propio)."""
+    payload = {
+        'scope': scope,
+        'exp': int(time.time()) + int(ttl),
+        'jti': uuid.uuid4().hex,
+    }
+    if max_size:
+        payload['max'] = int(max_size)
+    if subject is not None:
+        payload['sub'] = subject
+    payload_b64 = _b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    return f"{payload_b64}.{_b64encode(_sign(secret, payload_b64))}", payload
+
+
+def verify_upload_token(secret, token, scope='hoja_vida', now=None):
+    """Valida firma, expiración y scope. Devuelve el payload."""
+    try:
+        payload_b64, signature_b64 = token.split('.', 1)
+        signature = _b64decode(signature_b64)
+    except (AttributeError, ValueError):
+        raise InvalidUploadToken('Token mal formado')
+    if not hmac.compare_digest(signature, _sign(secret, payload_b64)):
+        raise InvalidUploadToken('Firma inválida')
+    try:
+        payload = json.loads(_b64decode(payload_b64))
+    except ValueError:
+        raise InvalidUploadToken('Token mal formado')
+    if payload.get('exp', 0) < (now if now is not None else time.time()):
+        raise InvalidUploadToken('Token expirado')
+    if payload.get('scope') != scope:
+        raise InvalidUploadToken('Token para otro uso')
+    return payload
+
+
+def upload_name_prefix(jti):
+    """Prefijo `<uuid>` que el file server da a los archivos subidos con el token `jti`.
+
+    Los 16 primeros hex del uuid del nombre son los del jti (ver _unique_name
+    en file_server_docker/app.py); el resto es aleatorio.
+    """
+    h = (jti or '')[:16].lower()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-"
+
+
+def verify_uploaded_url(secret, url, token, files_base, subject=None, max_age=86400, now=None):
+    """Valida que `url` sea un archivo subido al file server con `token`.
+
+    - La URL debe estar bajo `<files_base>/files/` (sin subcarpetas).
+    - El token debe tener firma y scope válidos y ser del usuario `subject`;
+      se acepta hasta `max_age` segundos después de expirar (la subida pudo
+      terminar después del TTL del token).
+    - El nombre del archivo debe empezar con el prefijo del jti del token.
+
+    Devuelve el nombre del archivo; InvalidUploadToken si no cumple.
+    """
+    prefix = files_base.rstrip('/') + '/files/'
+    if not isinstance(url, str) or not url.startswith(prefix):
+        raise InvalidUploadToken('La URL no pertenece al servidor de archivos')
+    name = url[len(prefix):]
+    if not name or '/' in name or '?' in name or '#' in name:
+        raise InvalidUploadToken('URL de archivo inválida')
+    now = time.time() if now is None else now
+    payload = verify_upload_token(secret, token, now=now - max_age)
+    if subject is not None and payload.get('sub') != subject:
+        raise InvalidUploadToken('El token de subida es de otro usuario')
+    if not name.startswith(upload_name_prefix(payload.get('jti'))):
+        raise InvalidUploadToken('El archivo no corresponde al token de subida')
+    return name
@@ -1,11 +1,22 @@
+import base64
+import fcntl
+import hashlib
+import hmac
+import json
+import mimetypes
 import os
+import re
+import time
 import uuid
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, g, request, jsonify, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
+import thumbnails
+from blob_store import BlobStore
+
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["Upload-Offset", "Upload-Length"])
 
 # Usamos una ruta relativa. En el contenedor esto será /app/storage
 UPLOAD_FOLDER = 'storage' 
@@ -14,18 +25,124 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'docx', 'doc'}
 # Como Docker expondrá el puerto 5000 en tu Windows, la URL debe coincidir.
 BASE_URL = 'http://localhost:5000'
 
+# Secreto compartido con el backend para los tokens de subida.
+# Si no está definido, /upload sigue abierto como antes (solo desarrollo).
+UPLOAD_SECRET = os.getenv('FILE_UPLOAD_SECRET')
+
+# Entrega de archivos detrás de un proxy (opcional):
+#   FILE_USE_X_SENDFILE=1              Apache/lighttpd (header X-Sendfile)
+#   FILE_ACCEL_REDIRECT_PREFIX=/_blob/ nginx: location interna que apunta a storage/
+USE_X_SENDFILE = os.getenv('FILE_USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+ACCEL_REDIRECT_PREFIX = os.getenv('FILE_ACCEL_REDIRECT_PREFIX')
+# Los nombres <uuid>-<archivo> nunca cambian de contenido: caché de un año
+IMMUTABLE_NAME = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}-')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MAX_BULK_DELETE = 500
+
+# Subidas por partes (reanudables): los .part viven fuera de la carpeta servida
+PARTIAL_FOLDER = os.path.join(UPLOAD_FOLDER, '.partial')
+CHUNK_BUFFER_SIZE = 64 * 1024       # lectura/escritura acotada por iteración
+PARTIAL_MAX_AGE = 24 * 60 * 60      # subidas abandonadas se borran tras 24 h
+
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# send_file deja el cuerpo vacío y pone X-Sendfile; el proxy atiende también Range
+app.config['USE_X_SENDFILE'] = USE_X_SENDFILE
 
 # Crear la carpeta si no existe (Buena práctica para evitar errores al inicio)
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
+os.makedirs(PARTIAL_FOLDER, exist_ok=True)
+
+# Blobs deduplicados por SHA-256 + índice de nombres (ver blob_store.py)
+store = BlobStore(UPLOAD_FOLDER)
+# Archivos internos de storage/ que nunca se sirven ni se migran
+LEGACY_SKIP = {'index.db', 'index.db-wal', 'index.db-shm', '.gitkeep'}
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def verify_upload_token(token, scope='hoja_vida', leeway=0):
+    """Valida un token emitido por el backend (backend/utils/upload_tokens.py).
+
+    Devuelve el payload o None si la firma, la expiración (más `leeway`
+    segundos) o el scope no son válidos.
+    """
+    try:
+        payload_b64, signature_b64 = token.split('.', 1)
+        expected = hmac.new(UPLOAD_SECRET.encode('utf-8'), payload_b64.encode('ascii'), hashlib.sha256).digest()
+        if not hmac.compare_digest(_b64decode(signature_b64), expected):
+            return None
+        payload = json.loads(_b64decode(payload_b64))
+    except (AttributeError, ValueError):
+        return None
+    if payload.get('exp', 0) + leeway < time.time() or payload.get('scope') != scope:
+        return None
+    return payload
+
+def _upload_token():
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        return auth[len('Bearer '):]
+    return request.headers.get('X-Upload-Token') or request.args.get('token')
+
+def _authorize_upload(size):
+    """None si la subida está autorizada; si no, la respuesta de error.
+
+    El payload del token queda en `g.upload_token` (ver _unique_name).
+    """
+    return _authorize_token() or _size_error(size)
+
+def _authorize_token():
+    """Solo el token, sin mirar el tamaño (ver upload_by_hash)."""
+    g.upload_token = None
+    if not UPLOAD_SECRET:
+        return None
+    payload = verify_upload_token(_upload_token() or '')
+    if payload is None:
+        return jsonify({'error': 'Token de subida inválido o expirado'}), 401
+    g.upload_token = payload
+    return None
+
+def _size_error(size):
+    max_size = (g.get('upload_token') or {}).get('max')
+    if max_size:
+        if size is None:
+            return jsonify({'error': 'Content-Length requerido'}), 411
+        if size > max_size:
+            return jsonify({'error': 'Archivo demasiado grande'}), 413
+    return None
+
+def _unique_name(filename, jti=None):
+    """<uuid>-<archivo>. Con token, los 16 primeros hex del uuid son los del
+    jti: el backend comprueba así que la URL registrada salió de una subida
+    hecha con el token que él emitió (backend/utils/upload_tokens.py)."""
+    aleatorio = uuid.uuid4().hex
+    prefijo = jti[:16] if jti and re.fullmatch(r'[0-9a-f]{32}', jti) else aleatorio[:16]
+    return f"{uuid.UUID(hex=prefijo + aleatorio[16:])}-{filename}"
+
+def _token_jti():
+    return (g.get('upload_token') or {}).get('jti')
+
+def _authorize_maintenance():
+    """Listar y borrar es solo para el backend (token con scope 'mantenimiento')."""
+    if not UPLOAD_SECRET:
+        return None
+    if verify_upload_token(_upload_token() or '', scope='mantenimiento') is None:
+        return jsonify({'error': 'Token de mantenimiento inválido o expirado'}), 401
+    return None
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
+    # El token se valida antes de leer el cuerpo: una subida no autorizada
+    # no llega a ocupar disco ni memoria.
+    error = _authorize_upload(request.content_length)
+    if error:
+        return error
+
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'}), 400
 
@@ -36,34 +153,377 @@ def upload_file():
 
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}-{filename}"
+        unique_filename = _unique_name(filename, _token_jti())
         
-        # Se guarda en /app/storage/...
-        file.save(os.path.join(app.config['UPLOAD_FOLDER'], unique_filename))
+        # Se guarda como blob en /app/storage/blobs/.. (hash calculado al vuelo)
+        tmp_path, digest, size = store.write_stream(file.stream)
+        nuevo = store.commit(tmp_path, digest, size, unique_filename)
+        if nuevo:
+            thumbnails.schedule(store.blob_path(digest), filename)
 
         file_url = f"{BASE_URL}/files/{unique_filename}"
 
-        return jsonify({'url': file_url}), 201
+        return jsonify({'url': file_url, 'sha256': digest, 'deduplicado': not nuevo}), 201
 
     return jsonify({'error': 'File type not allowed'}), 400
 
+@app.route('/upload/by-hash', methods=['POST'])
+def upload_by_hash():
+    """Re-subida instantánea: si el contenido ya está almacenado, solo se crea
+    un nuevo nombre apuntando al mismo blob (el cliente envía solo el hash)."""
+    data = request.get_json(silent=True) or {}
+    digest = (data.get('sha256') or '').lower()
+    filename = secure_filename(data.get('filename') or '')
+    if len(digest) != 64 or not filename or not allowed_file(filename):
+        return jsonify({'error': 'sha256 y filename válidos son requeridos'}), 400
+
+    # El token se valida antes de consultar el almacén: si no, un 401/404
+    # distinto le diría a cualquiera si un hash está almacenado.
+    error = _authorize_token()
+    if error:
+        return error
+    size = store.size_of(digest)
+    if size is None:
+        return jsonify({'error': 'Contenido no almacenado; suba el archivo'}), 404
+    error = _size_error(size)
+    if error:
+        return error
+
+    unique_filename = _unique_name(filename, _token_jti())
+    if not store.link_existing(digest, unique_filename):
+        # El último nombre se borró entre la consulta y el enlace
+        return jsonify({'error': 'Contenido no almacenado; suba el archivo'}), 404
+    return jsonify({'url': f"{BASE_URL}/files/{unique_filename}", 'sha256': digest, 'deduplicado': True}), 201
+
+# ---------------------------------------------------------------------------
+# Subidas por partes (reanudables)
+#
+#   POST   /uploads                 {filename, size, sha256?} -> upload_id
+#   PATCH  /uploads/<id>            Upload-Offset: n + bytes crudos
+#   HEAD   /uploads/<id>            offset actual (para reanudar)
+#   POST   /uploads/<id>/complete   {sha256?} -> url
+#   DELETE /uploads/<id>            cancelar
+#
+# Los bytes se escriben directo al .part en bloques de CHUNK_BUFFER_SIZE;
+# nunca se carga el archivo completo en memoria.
+# ---------------------------------------------------------------------------
+
+def _partial_paths(upload_id):
+    # upload_id es hex generado por nosotros: cualquier otra cosa no existe
+    if not upload_id or not all(c in '0123456789abcdef' for c in upload_id):
+        return None, None
+    base = os.path.join(PARTIAL_FOLDER, upload_id)
+    return base + '.part', base + '.json'
+
+def _load_partial(upload_id):
+    part_path, meta_path = _partial_paths(upload_id)
+    if not part_path or not os.path.exists(meta_path):
+        return None, None, None
+    with open(meta_path) as f:
+        return part_path, meta_path, json.load(f)
+
+def _sweep_partials():
+    limite = time.time() - PARTIAL_MAX_AGE
+    for name in os.listdir(PARTIAL_FOLDER):
+        path = os.path.join(PARTIAL_FOLDER, name)
+        try:
+            if os.path.getmtime(path) < limite:
+                os.remove(path)
+        except OSError:
+            pass
+
+def _authorize_partial(meta):
+    """HEAD/PATCH/complete/DELETE de una subida por partes: solo con el token
+    que la creó (mismo jti). Puede haber expirado durante una subida larga; se
+    acepta mientras la subida parcial exista (PARTIAL_MAX_AGE)."""
+    if not UPLOAD_SECRET:
+        return None
+    payload = verify_upload_token(_upload_token() or '', leeway=PARTIAL_MAX_AGE)
+    if payload is None:
+        return jsonify({'error': 'Token de subida inválido o expirado'}), 401
+    if not meta.get('jti') or payload.get('jti') != meta['jti']:
+        return jsonify({'error': 'La subida pertenece a otro token'}), 403
+    return None
+
+def _offset_headers(offset, size):
+    return {'Upload-Offset': str(offset), 'Upload-Length': str(size), 'Cache-Control': 'no-store'}
+
+@app.route('/uploads', methods=['POST'])
+def iniciar_subida():
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size (bytes) es requerido'}), 400
+    if not filename or not allowed_file(filename):
+        return jsonify({'error': 'File type not allowed'}), 400
+    if size <= 0:
+        return jsonify({'error': 'size debe ser mayor a 0'}), 400
+
+    error = _authorize_upload(size)
+    if error:
+        return error
+
+    _sweep_partials()
+    upload_id = uuid.uuid4().hex
+    part_path, meta_path = _partial_paths(upload_id)
+    open(part_path, 'wb').close()
+    with open(meta_path, 'w') as f:
+        json.dump({
+            'filename': filename, 'size': size, 'sha256': (data.get('sha256') or '').lower() or None,
+            'jti': _token_jti(),
+        }, f)
+
+    return jsonify({'upload_id': upload_id, 'offset': 0, 'size': size}), 201, _offset_headers(0, size)
+
+@app.route('/uploads/<upload_id>', methods=['HEAD'])
+def estado_subida(upload_id):
+    part_path, _, meta = _load_partial(upload_id)
+    if meta is None:
+        return '', 404
+    error = _authorize_partial(meta)
+    if error:
+        return '', error[1]
+    return '', 200, _offset_headers(os.path.getsize(part_path), meta['size'])
+
+@app.route('/uploads/<upload_id>', methods=['PATCH'])
+def agregar_parte(upload_id):
+    part_path, _, meta = _load_partial(upload_id)
+    if meta is None:
+        return jsonify({'error': 'Subida no encontrada'}), 404
+    error = _authorize_partial(meta)
+    if error:
+        return error
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Header Upload-Offset requerido'}), 400
+
+    with open(part_path, 'ab') as f:
+        # Un solo PATCH a la vez por subida (varios workers de gunicorn)
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return jsonify({'error': 'Otra parte se está escribiendo'}), 409
+
+        current = os.path.getsize(part_path)
+        if offset != current:
+            # El cliente debe reanudar desde el offset real (p. ej. tras un corte)
+            return jsonify({'error': 'Offset no coincide', 'offset': current}), 409, _offset_headers(current, meta['size'])
+
+        restante = meta['size'] - current
+        if request.content_length is not None and request.content_length > restante:
+            return jsonify({'error': 'La parte excede el tamaño declarado'}), 413
+
+        stream = request.stream
+        written = 0
+        try:
+            while True:
+                chunk = stream.read(min(CHUNK_BUFFER_SIZE, restante - written + 1))
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > restante:
+                    f.truncate(current)
+                    return jsonify({'error': 'La parte excede el tamaño declarado'}), 413
+                f.write(chunk)
+        finally:
+            # Si la conexión se corta, lo escrito hasta aquí queda y el cliente
+            # reanuda con HEAD + PATCH desde el nuevo offset.
+            f.flush()
+            os.fsync(f.fileno())
+
+    new_offset = current + written
+    return '', 204, _offset_headers(new_offset, meta['size'])
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def completar_subida(upload_id):
+    part_path, meta_path, meta = _load_partial(upload_id)
+    if meta is None:
+        return jsonify({'error': 'Subida no encontrada'}), 404
+    error = _authorize_partial(meta)
+    if error:
+        return error
+
+    current = os.path.getsize(part_path)
+    if current != meta['size']:
+        return jsonify({'error': 'Subida incompleta', 'offset': current}), 409, _offset_headers(current, meta['size'])
+
+    data = request.get_json(silent=True) or {}
+    expected = (data.get('sha256') or meta.get('sha256') or '').lower()
+    digest = hashlib.sha256()
+    with open(part_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_BUFFER_SIZE), b''):
+            digest.update(chunk)
+    if expected and digest.hexdigest() != expected:
+        return jsonify({'error': 'Checksum no coincide', 'sha256': digest.hexdigest()}), 422
+
+    unique_filename = _unique_name(meta['filename'], meta.get('jti'))
+    nuevo = store.commit(part_path, digest.hexdigest(), current, unique_filename)
+    if nuevo:
+        thumbnails.schedule(store.blob_path(digest.hexdigest()), meta['filename'])
+    os.remove(meta_path)
+
+    return jsonify({
+        'url': f"{BASE_URL}/files/{unique_filename}",
+        'sha256': digest.hexdigest(),
+        'deduplicado': not nuevo
+    }), 201
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def cancelar_subida(upload_id):
+    part_path, meta_path, meta = _load_partial(upload_id)
+    if meta is None:
+        return jsonify({'error': 'Subida no encontrada'}), 404
+    error = _authorize_partial(meta)
+    if error:
+        return error
+    for path in (part_path, meta_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return '', 204
+
+def _serve_file(path, filename, etag=None):
+    """Entrega con ETag, peticiones condicionales (304) y Range (206).
+
+    Con ACCEL_REDIRECT_PREFIX o USE_X_SENDFILE los bytes los envía el proxy;
+    Flask solo pone las cabeceras.
+    """
+    if ACCEL_REDIRECT_PREFIX:
+        # nginx sirve el blob desde su location interna (longitud, Range, sendfile)
+        response = app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        relative = os.path.relpath(path, UPLOAD_FOLDER).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + relative
+        if etag:
+            response.set_etag(etag)
+        response.make_conditional(request)
+    else:
+        response = send_file(path, download_name=filename, conditional=True, etag=etag or True)
+
+    if IMMUTABLE_NAME.match(filename):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
 @app.route('/files/<filename>', methods=['GET', 'DELETE'])
 def manage_file(filename):
     filename = secure_filename(filename)
     file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if filename in LEGACY_SKIP:
+        return jsonify({'error': 'Archivo no encontrado'}), 404
 
     if request.method == 'GET':
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+        found = store.lookup(filename)
+        if found:
+            # ETag fuerte: el hash SHA-256 del contenido
+            return _serve_file(found[0], filename, etag=found[1])
+        # Archivos anteriores al almacenamiento por contenido
+        if not os.path.isfile(file_path):
+            return jsonify({'error': 'Archivo no encontrado'}), 404
+        return _serve_file(file_path, filename)
 
     if request.method == 'DELETE':
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                return jsonify({'message': 'Archivo eliminado correctamente'}), 200
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-        else:
+        error = _authorize_maintenance()
+        if error:
+            return error
+        # El blob solo se borra cuando era la última referencia
+        estado = _delete_name(filename)
+        if estado == 'eliminado':
+            return jsonify({'message': 'Archivo eliminado correctamente'}), 200
+        if estado == 'no_encontrado':
             return jsonify({'error': 'Archivo no encontrado'}), 404
+        return jsonify({'error': estado}), 500
+
+def _delete_name(filename):
+    """'eliminado', 'no_encontrado' o el mensaje de error."""
+    if filename in LEGACY_SKIP:
+        return 'no_encontrado'
+    if store.release(filename):
+        return 'eliminado'
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if not os.path.isfile(file_path):
+        return 'no_encontrado'
+    try:
+        os.remove(file_path)
+        return 'eliminado'
+    except OSError as e:
+        return str(e)
+
+@app.route('/files', methods=['GET'])
+def list_files():
+    """Todos los nombres almacenados con su fecha de creación (barrido de huérfanos)."""
+    error = _authorize_maintenance()
+    if error:
+        return error
+    files = [{'name': name, 'created': created} for name, created in store.names_with_created()]
+    for name in os.listdir(UPLOAD_FOLDER):
+        path = os.path.join(UPLOAD_FOLDER, name)
+        if name not in LEGACY_SKIP and os.path.isfile(path):
+            files.append({'name': name, 'created': os.path.getmtime(path)})
+    return jsonify({'files': files})
+
+@app.route('/files', methods=['DELETE'])
+def delete_files():
+    """Borrado en lote: JSON {"names": [...]}. Los ausentes cuentan como borrados."""
+    error = _authorize_maintenance()
+    if error:
+        return error
+    names = (request.get_json(silent=True) or {}).get('names')
+    if not isinstance(names, list) or not names:
+        return jsonify({'error': 'names (lista) es requerido'}), 400
+    if len(names) > MAX_BULK_DELETE:
+        return jsonify({'error': f'Máximo {MAX_BULK_DELETE} archivos por solicitud'}), 400
+
+    resultado = {'eliminados': [], 'no_encontrados': [], 'errores': {}}
+    for raw in names:
+        filename = secure_filename(str(raw))
+        estado = _delete_name(filename) if filename else 'no_encontrado'
+        if estado == 'eliminado':
+            resultado['eliminados'].append(raw)
+        elif estado == 'no_encontrado':
+            resultado['no_encontrados'].append(raw)
+        else:
+            resultado['errores'][raw] = estado
+    return jsonify(resultado), 200
+
+@app.route('/thumbnails/<filename>', methods=['GET'])
+def get_thumbnail(filename):
+    """Miniatura JPEG del archivo (imágenes y PDF escaneados)."""
+    filename = secure_filename(filename)
+    found = store.lookup(filename)
+    if not found:
+        return jsonify({'error': 'Archivo no encontrado'}), 404
+    blob_path, digest, _ = found
+    # Normalmente ya la generó el pool tras la subida; si no, se crea ahora
+    path = thumbnails.generate(blob_path, filename)
+    if not path:
+        # El resultado no cambia para este contenido (marca .thumb.none): cacheable
+        return jsonify({'error': 'Sin miniatura para este archivo'}), 404, {'Cache-Control': 'public, max-age=86400'}
+    return _serve_file(path, filename + '.jpg', etag=f"{digest}-thumb")
+
+@app.cli.command('migrar-storage')
+def migrar_storage():
+    """Mueve los archivos planos de storage/ al almacenamiento deduplicado."""
+    movidos = 0
+    for name in sorted(os.listdir(UPLOAD_FOLDER)):
+        path = os.path.join(UPLOAD_FOLDER, name)
+        if name in LEGACY_SKIP or not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            tmp_path, digest, size = store.write_stream(f)
+        store.commit(tmp_path, digest, size, name)
+        os.remove(path)
+        movidos += 1
+    print(f"{movidos} archivo(s) migrados. {store.stats()}")
 
 if __name__ == '__main__':
     # Gunicorn ignorará esto, pero sirve para pruebas locales sin Docker
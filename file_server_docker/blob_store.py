@@ -0,0 +1,199 @@
+"""
+Almacenamiento direccionado por contenido (deduplicado).
+
+Cada archivo se guarda una sola vez como blob, nombrado por su SHA-256 en
+un árbol repartido por prefijo (blobs/ab/cd/<hash>). Los nombres lógicos
+que ve el backend (`<uuid>-<nombre>`, parte de la URL) apuntan a un blob
+en un índice SQLite con conteo de referencias: borrar un nombre solo
+elimina el blob cuando era su última referencia.
+
+Las operaciones que tocan el índice y los blobs se hacen dentro de una
+transacción BEGIN IMMEDIATE, así que varios workers de gunicorn quedan
+serializados y no pueden borrar un blob que otro acaba de reutilizar.
+"""
+from contextlib import closing
+import hashlib
+import os
+import sqlite3
+import time
+import uuid
+
+HASH_CHUNK_SIZE = 64 * 1024
+# Archivos derivados guardados junto al blob (miniaturas y la marca de
+# "sin miniatura"); se borran con él
+DERIVED_SUFFIXES = ('.thumb.jpg', '.thumb.none')
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+        self.blob_root = os.path.join(root, 'blobs')
+        self.tmp_root = os.path.join(root, '.partial')
+        os.makedirs(self.blob_root, exist_ok=True)
+        os.makedirs(self.tmp_root, exist_ok=True)
+        self.index_path = os.path.join(root, 'index.db')
+        with closing(self._connect()) as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    refcount INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS files (
+                    name TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL REFERENCES blobs(hash),
+                    created REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_files_hash ON files(hash);
+                """
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_root, digest[:2], digest[2:4], digest)
+
+    # -- escritura -------------------------------------------------------
+
+    def write_stream(self, stream, max_size=None):
+        """Copia un stream a un temporal calculando el SHA-256 al vuelo.
+
+        Devuelve (ruta_temporal, sha256, tamaño). Lanza ValueError si se
+        supera `max_size`.
+        """
+        tmp_path = os.path.join(self.tmp_root, f"{uuid.uuid4().hex}.tmp")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as out:
+                for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise ValueError('Archivo demasiado grande')
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            _remove_quietly(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest(), size
+
+    def commit(self, tmp_path, digest, size, name):
+        """Registra `name` -> blob. Si el contenido ya existía, descarta el temporal.
+
+        Devuelve True si el blob es nuevo, False si se deduplicó.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT refcount FROM blobs WHERE hash = ?', (digest,)).fetchone()
+            path = self.blob_path(digest)
+            if row is None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Si quedó un blob sin fila (caída previa) se reemplaza igual
+                os.replace(tmp_path, path)
+                conn.execute('INSERT INTO blobs (hash, size, refcount) VALUES (?, ?, 1)', (digest, size))
+            else:
+                _remove_quietly(tmp_path)
+                conn.execute('UPDATE blobs SET refcount = refcount + 1 WHERE hash = ?', (digest,))
+            conn.execute('INSERT INTO files (name, hash, created) VALUES (?, ?, ?)', (name, digest, time.time()))
+            conn.execute('COMMIT')
+            return row is None
+        except BaseException:
+            conn.execute('ROLLBACK')
+            _remove_quietly(tmp_path)
+            raise
+        finally:
+            conn.close()
+
+    def link_existing(self, digest, name):
+        """Nueva referencia a un blob existente sin transferir bytes. False si no existe."""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            updated = conn.execute(
+                'UPDATE blobs SET refcount = refcount + 1 WHERE hash = ?', (digest,)
+            ).rowcount
+            if not updated:
+                conn.execute('ROLLBACK')
+                return False
+            conn.execute('INSERT INTO files (name, hash, created) VALUES (?, ?, ?)', (name, digest, time.time()))
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    # -- lectura / borrado ---------------------------------------------
+
+    def size_of(self, digest):
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT size FROM blobs WHERE hash = ?', (digest,)).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, name):
+        """(ruta_del_blob, sha256, tamaño) del nombre lógico, o None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT f.hash, b.size FROM files f JOIN blobs b ON b.hash = f.hash WHERE f.name = ?',
+                (name,),
+            ).fetchone()
+        if row is None:
+            return None
+        return self.blob_path(row[0]), row[0], row[1]
+
+    def release(self, name):
+        """Quita la referencia `name`. Devuelve False si no existía."""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT hash FROM files WHERE name = ?', (name,)).fetchone()
+            if row is None:
+                conn.execute('ROLLBACK')
+                return False
+            digest = row[0]
+            conn.execute('DELETE FROM files WHERE name = ?', (name,))
+            conn.execute('UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?', (digest,))
+            remaining = conn.execute('SELECT refcount FROM blobs WHERE hash = ?', (digest,)).fetchone()[0]
+            if remaining <= 0:
+                conn.execute('DELETE FROM blobs WHERE hash = ?', (digest,))
+                # Dentro de la transacción: nadie puede reutilizar el blob mientras tanto
+                _remove_quietly(self.blob_path(digest))
+                for suffix in DERIVED_SUFFIXES:
+                    _remove_quietly(self.blob_path(digest) + suffix)
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def names(self):
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute('SELECT name FROM files')]
+
+    def names_with_created(self):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT name, created FROM files').fetchall()
+
+    def stats(self):
+        with closing(self._connect()) as conn:
+            files, = conn.execute('SELECT COUNT(*) FROM files').fetchone()
+            blobs, stored = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+            logical, = conn.execute(
+                'SELECT COALESCE(SUM(b.size), 0) FROM files f JOIN blobs b ON b.hash = f.hash'
+            ).fetchone()
+        return {'archivos': files, 'blobs': blobs, 'bytes_almacenados': stored, 'bytes_logicos': logical}
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,63 @@
+"""
+Fixtures de los tests del servidor de archivos
+Cada test usa su propio storage/ temporal y un secreto de subida conocido
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SECRETO = 'secreto-de-prueba'
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def emitir_token(scope='hoja_vida', ttl=300, **extra):
+    """Mismo formato que backend/utils/upload_tokens.issue_upload_token."""
+    payload = {'scope': scope, 'exp': int(time.time()) + ttl, 'jti': uuid.uuid4().hex, **extra}
+    payload_b64 = _b64(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    firma = hmac.new(SECRETO.encode('utf-8'), payload_b64.encode('ascii'), hashlib.sha256).digest()
+    return f"{payload_b64}.{_b64(firma)}"
+
+
+@pytest.fixture
+def servidor(tmp_path, monkeypatch):
+    """Módulo app con storage/ en tmp_path y FILE_UPLOAD_SECRET definido."""
+    monkeypatch.chdir(tmp_path)
+    import app as servidor
+    from blob_store import BlobStore
+
+    storage = str(tmp_path / 'storage')
+    os.makedirs(os.path.join(storage, '.partial'), exist_ok=True)
+    monkeypatch.setattr(servidor, 'UPLOAD_FOLDER', storage)
+    monkeypatch.setattr(servidor, 'PARTIAL_FOLDER', os.path.join(storage, '.partial'))
+    monkeypatch.setattr(servidor, 'UPLOAD_SECRET', SECRETO)
+    monkeypatch.setattr(servidor, 'store', BlobStore(storage))
+    monkeypatch.setitem(servidor.app.config, 'UPLOAD_FOLDER', storage)
+    monkeypatch.setattr(servidor.thumbnails, 'schedule', lambda *args: None)
+    return servidor
+
+
+@pytest.fixture
+def client(servidor):
+    return servidor.app.test_client()
+
+
+@pytest.fixture
+def token():
+    return emitir_token()
+
+
+@pytest.fixture
+def mantenimiento():
+    return {'X-Upload-Token': emitir_token(scope='mantenimiento')}
@@ -0,0 +1,173 @@
+"""
+Tests del servidor de archivos
+Subidas por partes, almacenamiento deduplicado y entrega con Range / ETag
+"""
+import hashlib
+import io
+import os
+
+from conftest import emitir_token
+
+CONTENIDO = b'%PDF-1.4 ' + bytes(range(256)) * 8
+
+
+def _subir(client, token, contenido=CONTENIDO, nombre='titulo.pdf'):
+    response = client.post('/upload', data={'file': (io.BytesIO(contenido), nombre)},
+                           headers={'X-Upload-Token': token}, content_type='multipart/form-data')
+    assert response.status_code == 201
+    return response.json
+
+
+def _nombre(url):
+    return url.rsplit('/files/', 1)[1]
+
+
+def _iniciar(client, token, contenido=CONTENIDO, **extra):
+    response = client.post('/uploads', json={'filename': 'grande.pdf', 'size': len(contenido), **extra},
+                           headers={'X-Upload-Token': token})
+    assert response.status_code == 201
+    return response.json['upload_id']
+
+
+def _parte(client, token, upload_id, offset, datos):
+    return client.patch(f'/uploads/{upload_id}', data=datos,
+                        headers={'X-Upload-Token': token, 'Upload-Offset': str(offset)})
+
+
+class TestSubidaPorPartes:
+    """Tests de /uploads (subidas reanudables)"""
+
+    def test_offset_distinto_responde_409_con_el_real(self, client, token):
+        """Test: Un PATCH con otro offset no escribe y devuelve el offset para reanudar"""
+        upload_id = _iniciar(client, token)
+        assert _parte(client, token, upload_id, 0, CONTENIDO[:100]).status_code == 204
+
+        response = _parte(client, token, upload_id, 50, CONTENIDO[50:])
+
+        assert response.status_code == 409
+        assert response.headers['Upload-Offset'] == '100'
+        estado = client.head(f'/uploads/{upload_id}', headers={'X-Upload-Token': token})
+        assert estado.headers['Upload-Offset'] == '100'
+
+    def test_complete_con_checksum_incorrecto(self, client, token):
+        """Test: Si el SHA-256 no coincide la subida no se registra (422)"""
+        upload_id = _iniciar(client, token)
+        _parte(client, token, upload_id, 0, CONTENIDO)
+
+        response = client.post(f'/uploads/{upload_id}/complete', json={'sha256': '0' * 64},
+                               headers={'X-Upload-Token': token})
+
+        assert response.status_code == 422
+        assert response.json['sha256'] == hashlib.sha256(CONTENIDO).hexdigest()
+
+    def test_complete_devuelve_url_ligada_al_token(self, client, token):
+        """Test: Con el checksum correcto se obtiene la URL; el nombre lleva el prefijo del jti"""
+        from app import verify_upload_token
+
+        upload_id = _iniciar(client, token, sha256=hashlib.sha256(CONTENIDO).hexdigest())
+        _parte(client, token, upload_id, 0, CONTENIDO[:1000])
+        _parte(client, token, upload_id, 1000, CONTENIDO[1000:])
+
+        response = client.post(f'/uploads/{upload_id}/complete', headers={'X-Upload-Token': token})
+
+        assert response.status_code == 201
+        jti = verify_upload_token(token)['jti']
+        assert _nombre(response.json['url']).replace('-', '').startswith(jti[:16])
+        assert client.get(f"/files/{_nombre(response.json['url'])}").data == CONTENIDO
+
+    def test_solo_el_token_que_la_creo(self, client, token):
+        """Test: PATCH, HEAD, complete y DELETE exigen el token de la subida"""
+        upload_id = _iniciar(client, token)
+        otro = emitir_token()
+
+        assert _parte(client, otro, upload_id, 0, CONTENIDO).status_code == 403
+        assert client.patch(f'/uploads/{upload_id}', data=CONTENIDO,
+                            headers={'Upload-Offset': '0'}).status_code == 401
+        assert client.head(f'/uploads/{upload_id}', headers={'X-Upload-Token': otro}).status_code == 403
+        assert client.post(f'/uploads/{upload_id}/complete', headers={'X-Upload-Token': otro}).status_code == 403
+        assert client.delete(f'/uploads/{upload_id}', headers={'X-Upload-Token': otro}).status_code == 403
+        assert _parte(client, token, upload_id, 0, CONTENIDO).status_code == 204
+
+    def test_token_expirado_sigue_valiendo_para_su_subida(self, servidor, client, monkeypatch):
+        """Test: Una subida larga continúa con su token aunque haya expirado, pero no se inician nuevas"""
+        token = emitir_token(ttl=60)
+        upload_id = _iniciar(client, token)
+        ahora = servidor.time.time()
+        monkeypatch.setattr(servidor.time, 'time', lambda: ahora + 120)
+
+        assert _parte(client, token, upload_id, 0, CONTENIDO).status_code == 204
+        assert client.post('/uploads', json={'filename': 'x.pdf', 'size': 10},
+                           headers={'X-Upload-Token': token}).status_code == 401
+
+
+class TestAlmacenamientoDeduplicado:
+    """Tests del conteo de referencias de los blobs"""
+
+    def test_borrar_un_nombre_conserva_el_blob_compartido(self, servidor, client, token, mantenimiento):
+        """Test: Dos nombres con el mismo contenido comparten blob; se borra con la última referencia"""
+        primero = _subir(client, token)
+        segundo = _subir(client, token, nombre='copia.pdf')
+        blob = servidor.store.blob_path(primero['sha256'])
+
+        assert segundo['deduplicado'] is True
+        assert client.delete(f"/files/{_nombre(primero['url'])}", headers=mantenimiento).status_code == 200
+        assert os.path.exists(blob)
+        assert client.get(f"/files/{_nombre(segundo['url'])}").data == CONTENIDO
+
+        assert client.delete(f"/files/{_nombre(segundo['url'])}", headers=mantenimiento).status_code == 200
+        assert not os.path.exists(blob)
+        assert client.get(f"/files/{_nombre(segundo['url'])}").status_code == 404
+
+    def test_by_hash_no_revela_contenido_sin_token(self, client, token):
+        """Test: Sin token responde 401 exista o no el hash; con token, 404 solo si no existe"""
+        almacenado = _subir(client, token)['sha256']
+        desconocido = hashlib.sha256(b'otro contenido').hexdigest()
+
+        def por_hash(digest, headers=None):
+            return client.post('/upload/by-hash', json={'sha256': digest, 'filename': 'copia.pdf'},
+                               headers=headers or {})
+
+        assert por_hash(almacenado).status_code == 401
+        assert por_hash(desconocido).status_code == 401
+        assert por_hash(desconocido, {'X-Upload-Token': token}).status_code == 404
+        response = por_hash(almacenado, {'X-Upload-Token': token})
+        assert response.status_code == 201
+        assert response.json['deduplicado'] is True
+
+    def test_borrar_exige_token_de_mantenimiento(self, client, token):
+        """Test: El token de subida no sirve para borrar"""
+        subido = _subir(client, token)
+
+        response = client.delete(f"/files/{_nombre(subido['url'])}", headers={'X-Upload-Token': token})
+
+        assert response.status_code == 401
+
+
+class TestEntregaDeArchivos:
+    """Tests de GET /files con Range y ETag"""
+
+    def test_range_parcial_e_insatisfacible(self, client, token):
+        """Test: Un rango válido responde 206 con esos bytes; uno fuera del archivo, 416"""
+        url = _nombre(_subir(client, token)['url'])
+
+        parcial = client.get(f'/files/{url}', headers={'Range': 'bytes=0-8'})
+        fuera = client.get(f'/files/{url}', headers={'Range': f'bytes={len(CONTENIDO) + 10}-'})
+
+        assert parcial.status_code == 206
+        assert parcial.data == CONTENIDO[:9]
+        assert parcial.headers['Content-Range'] == f'bytes 0-8/{len(CONTENIDO)}'
+        assert fuera.status_code == 416
+
+    def test_if_none_match_con_el_hash(self, client, token):
+        """Test: El ETag es el SHA-256; con If-None-Match responde 304 sin cuerpo"""
+        subido = _subir(client, token)
+        url = _nombre(subido['url'])
+
+        completo = client.get(f'/files/{url}')
+        assert completo.headers['ETag'] == f'"{subido["sha256"]}"'
+        assert 'immutable' in completo.headers['Cache-Control']
+
+        response = client.get(f'/files/{url}', headers={'If-None-Match': completo.headers['ETag']})
+
+        assert response.status_code == 304
+        assert response.data == b''
@@ -0,0 +1,58 @@
+"""
+Tests de las miniaturas
+Solo el contenido que no se puede decodificar queda marcado como sin miniatura
+"""
+import io
+
+import thumbnails
+from PIL import Image
+
+
+def _blob(tmp_path, contenido):
+    path = tmp_path / 'ab' / 'blob'
+    path.parent.mkdir()
+    path.write_bytes(contenido)
+    return str(path)
+
+
+class TestMiniaturas:
+    """Tests de thumbnails.generate"""
+
+    def test_imagen_valida(self, tmp_path):
+        """Test: Se genera la miniatura JPEG junto al blob"""
+        imagen = io.BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(imagen, 'PNG')
+        blob = _blob(tmp_path, imagen.getvalue())
+
+        assert thumbnails.generate(blob, 'foto.png') == blob + thumbnails.THUMB_SUFFIX
+        with Image.open(blob + thumbnails.THUMB_SUFFIX) as miniatura:
+            assert max(miniatura.size) <= 320
+
+    def test_contenido_no_decodificable_queda_marcado(self, tmp_path):
+        """Test: Una imagen dañada o un PDF inválido no se vuelven a intentar"""
+        imagen = _blob(tmp_path, b'no es una imagen')
+        pdf = str(tmp_path / 'doc')
+        with open(pdf, 'wb') as f:
+            f.write(b'%PDF-1.4 roto')
+
+        assert thumbnails.generate(imagen, 'foto.png') is None
+        assert thumbnails.generate(pdf, 'doc.pdf') is None
+        assert thumbnails.failed(imagen)
+        assert thumbnails.failed(pdf)
+
+    def test_error_de_disco_se_reintenta(self, tmp_path, monkeypatch):
+        """Test: Un OSError (p. ej. disco lleno) no deja la marca y el siguiente intento genera la miniatura"""
+        imagen = io.BytesIO()
+        Image.new('RGB', (40, 40), 'blue').save(imagen, 'PNG')
+        blob = _blob(tmp_path, imagen.getvalue())
+        original = thumbnails._open_source
+
+        def disco_lleno(*args):
+            raise OSError(28, 'No space left on device')
+
+        monkeypatch.setattr(thumbnails, '_open_source', disco_lleno)
+        assert thumbnails.generate(blob, 'foto.png') is None
+        assert not thumbnails.failed(blob)
+
+        monkeypatch.setattr(thumbnails, '_open_source', original)
+        assert thumbnails.generate(blob, 'foto.png') == blob + thumbnails.THUMB_SUFFIX
@@ -0,0 +1,151 @@
+"""
+Miniaturas de los documentos subidos.
+
+Imágenes: se reducen con Pillow. PDF: con pypdf (Python puro) se toma la
+primera imagen incrustada de la primera página, que en los documentos
+escaneados es la página completa; los PDF solo de texto no tienen miniatura
+(no hay un renderizador de PDF en Python puro).
+
+La miniatura se guarda junto al blob (`<hash>.thumb.jpg`), así el contenido
+deduplicado comparte también su miniatura. Se generan en un pool de hilos
+tras cada subida y, si falta, al pedirla. Si no se puede generar (PDF solo
+de texto, imagen dañada) queda la marca `<hash>.thumb.none` y no se vuelve
+a intentar: el listado no reabre el archivo en cada request. Solo marcan
+los errores de decodificación; los de E/S (disco lleno, blob a medio
+escribir) se registran y se reintenta en el siguiente pedido.
+
+Pillow y pypdf son opcionales: sin ellos simplemente no hay miniaturas.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import io
+import os
+import threading
+import uuid
+
+try:
+    from PIL import Image, UnidentifiedImageError
+except ImportError:
+    Image = UnidentifiedImageError = None
+
+try:
+    from pypdf import PdfReader
+    from pypdf.errors import PyPdfError
+except ImportError:
+    PdfReader = PyPdfError = None
+
+# El contenido no se puede decodificar: reintentar no cambiaría nada
+_DECODE_ERRORS = tuple(e for e in (
+    UnidentifiedImageError,
+    getattr(Image, 'DecompressionBombError', None),
+    PyPdfError,
+) if e is not None)
+
+THUMB_SUFFIX = '.thumb.jpg'
+NO_THUMB_SUFFIX = '.thumb.none'
+THUMB_SIZE = (320, 320)
+THUMB_QUALITY = 80
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+WORKERS = int(os.getenv('THUMBNAIL_WORKERS', '2'))
+
+_executor = None
+_executor_pid = None
+_in_flight = set()
+_lock = threading.Lock()
+
+
+def thumb_path(blob_path):
+    return blob_path + THUMB_SUFFIX
+
+
+def _mark_failed(blob_path):
+    try:
+        open(blob_path + NO_THUMB_SUFFIX, 'a').close()
+    except OSError:
+        pass
+
+
+def failed(blob_path):
+    """True si ya se intentó y no hay miniatura posible para este contenido."""
+    return os.path.exists(blob_path + NO_THUMB_SUFFIX)
+
+
+def _extension(filename):
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+
+def supported(filename):
+    if Image is None:
+        return False
+    ext = _extension(filename)
+    return ext in IMAGE_EXTENSIONS or (ext == 'pdf' and PdfReader is not None)
+
+
+def _open_source(blob_path, filename):
+    if _extension(filename) != 'pdf':
+        return Image.open(blob_path)
+    reader = PdfReader(blob_path)
+    if not reader.pages:
+        return None
+    for image in reader.pages[0].images:
+        return Image.open(io.BytesIO(image.data))
+    return None
+
+
+def generate(blob_path, filename):
+    """Crea la miniatura si se puede. Devuelve su ruta o None."""
+    target = thumb_path(blob_path)
+    if os.path.exists(target):
+        return target
+    if not supported(filename) or failed(blob_path):
+        return None
+    # Escritura atómica: nunca se sirve una miniatura a medio escribir
+    tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+    try:
+        source = _open_source(blob_path, filename)
+        if source is None:
+            _mark_failed(blob_path)
+            return None
+        with source:
+            source.thumbnail(THUMB_SIZE)
+            source.convert('RGB').save(tmp, 'JPEG', quality=THUMB_QUALITY, optimize=True)
+        os.replace(tmp, target)
+        return target
+    except _DECODE_ERRORS as e:
+        print(f"No se pudo generar la miniatura de {filename}: {e}")
+        _discard(tmp)
+        _mark_failed(blob_path)
+        return None
+    except Exception as e:
+        print(f"Error generando la miniatura de {filename} (se reintentará): {e}")
+        _discard(tmp)
+        return None
+
+
+def _discard(tmp):
+    try:
+        os.remove(tmp)
+    except OSError:
+        pass
+
+
+def _run(blob_path, filename):
+    try:
+        generate(blob_path, filename)
+    finally:
+        with _lock:
+            _in_flight.discard(blob_path)
+
+
+def schedule(blob_path, filename):
+    """Encola la miniatura en el pool del proceso (uno por worker de gunicorn)."""
+    global _executor, _executor_pid
+    if not supported(filename) or os.path.exists(thumb_path(blob_path)) or failed(blob_path):
+        return
+    with _lock:
+        if blob_path in _in_flight:
+            return
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='thumbnails')
+            _executor_pid = os.getpid()
+        _in_flight.add(blob_path)
+    _executor.submit(_run, blob_path, filename)
@@ -29,7 +29,7 @@ function Asistencias() {
   const fetchEmpleados = async () => {
     try {
       const token = localStorage.getItem('token');
-      const res = await axios.get(`${API_URL}/api/empleados/`, { headers: { 'Authorization': `Bearer ${token}` } });
+      const res = await axios.get(`${API_URL}/api/empleados/?fields=id,nombres,apellidos`, { headers: { 'Authorization': `Bearer ${token}` } });
       const data = Array.isArray(res.data) ? res.data : (res.data ? [res.data] : []);
       setEmpleados(data);
     } catch (err) {
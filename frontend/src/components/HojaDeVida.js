@@ -86,7 +86,7 @@ function HojaDeVida() {
     };
     
     const CargarEmpleados = async (token, config) => {
-        const resEmpleados = await axios.get(`${API_URL}/api/empleados/`, config)
+        const resEmpleados = await axios.get(`${API_URL}/api/empleados/?fields=id,nombres,apellidos`, config)
         setEmpleados(resEmpleados.data);
     };
 
@@ -101,7 +101,7 @@ function HojaDeVida() {
             const config = { headers: { 'Authorization': `Bearer ${token}` } };
             const [resHojas, resEmpleados] = await Promise.all([
                 axios.get(`${API_URL}/api/hojas-vida/`, config),
-                axios.get(`${API_URL}/api/empleados/`, config)
+                axios.get(`${API_URL}/api/empleados/?fields=id,nombres,apellidos`, config)
             ]);
             setHojasVida(resHojas.data);
             setEmpleados(resEmpleados.data);
@@ -273,6 +273,24 @@ function HojaDeVida() {
         setIsEmployeeSearchFocused(false);
     };
 
+    const subirArchivoDirecto = async (archivo, token) => {
+        try {
+            const { data } = await axios.post(`${API_URL}/api/hojas-vida/upload-token`, {}, {
+                headers: { 'Authorization': `Bearer ${token}` }
+            });
+            const archivoData = new FormData();
+            archivoData.append('file', archivo);
+            const res = await axios.post(data.upload_url, archivoData, {
+                headers: { 'X-Upload-Token': data.token }
+            });
+            // El backend valida la URL contra el token con que se subió
+            return res.data && res.data.url ? { url: res.data.url, uploadToken: data.token } : null;
+        } catch (error) {
+            // 503: subida directa no configurada; se usa el backend como antes
+            return null;
+        }
+    };
+
     const guardarRegistro = async (e) => {
         e.preventDefault();
 
@@ -298,12 +316,20 @@ function HojaDeVida() {
         formData.append('fecha_inicio', registroActual.fecha_inicio || '');
         formData.append('fecha_finalizacion', registroActual.fecha_finalizacion || '');
 
-        // Adjuntar archivo si existe uno nuevo seleccionado
+        const token = localStorage.getItem('token');
+
+        // Adjuntar archivo si existe uno nuevo seleccionado: primero se intenta
+        // subir directo al servidor de archivos; si no está disponible, va al backend
         if (archivoSeleccionado) {
-            formData.append('archivo', archivoSeleccionado);
+            const subida = await subirArchivoDirecto(archivoSeleccionado, token);
+            if (subida) {
+                formData.append('ruta_archivo_url', subida.url);
+                formData.append('upload_token', subida.uploadToken);
+            } else {
+                formData.append('archivo', archivoSeleccionado);
+            }
         }
         
-        const token = localStorage.getItem('token');
         const url = modoEdicion
             ? `${API_URL}/api/hojas-vida/${registroActual.id_hoja_vida}`
             : `${API_URL}/api/hojas-vida/`;
@@ -457,7 +483,18 @@ function HojaDeVida() {
                                     <td>
                                         <div style={{ display: 'flex', flexDirection: 'column', gap: '4px' }}>
                                             <span>{registro.nombre_documento}</span>
-                                            
+
+                                            {registro.thumbnail_url && (
+                                                <img
+                                                    src={registro.thumbnail_url}
+                                                    alt=""
+                                                    loading="lazy"
+                                                    style={{ maxWidth: '80px', maxHeight: '80px', borderRadius: '4px', objectFit: 'cover' }}
+                                                    // Sin miniatura (PDF de solo texto, archivo antiguo): se oculta
+                                                    onError={(e) => { e.currentTarget.style.display = 'none'; }}
+                                                />
+                                            )}
+
                                             {registro.ruta_archivo_url && (
                                                 <a 
                                                     href={registro.ruta_archivo_url}
@@ -478,6 +515,12 @@ function HojaDeVida() {
                                                     <FaEye /> Ver archivo
                                                 </a>
                                             )}
+                                            {registro.estado_archivo === 'pendiente' && (
+                                                <span style={{ fontSize: '0.85em', color: '#7f8c8d' }}>Subiendo archivo...</span>
+                                            )}
+                                            {registro.estado_archivo === 'error' && (
+                                                <span style={{ fontSize: '0.85em', color: '#e74c3c' }}>Error al subir el archivo</span>
+                                            )}
                                         </div>
                                     </td>
                                     <td>{registro.tipo}</td>
@@ -93,7 +93,7 @@ function Horario() {
     const CargarEmpleados = async (token) => {
         try {
             const config = { headers: { 'Authorization': `Bearer ${token}` } };
-            const resEmpleados = await axios.get(`${API_URL}/api/empleados/`, config);
+            const resEmpleados = await axios.get(`${API_URL}/api/empleados/?fields=id,nombres,apellidos`, config);
             setEmpleados(resEmpleados.data);
         } catch (error) {
             console.error('Error cargando empleados:', error);
@@ -113,7 +113,7 @@ function Horario() {
 
             const [horariosRes, empleadosRes] = await Promise.all([
                 axios.get(`${API_URL}/api/horarios/`, { headers: { 'Authorization': `Bearer ${token}` } }),
-                axios.get(`${API_URL}/api/empleados/`, { headers: { 'Authorization': `Bearer ${token}` } })
+                axios.get(`${API_URL}/api/empleados/?fields=id,nombres,apellidos`, { headers: { 'Authorization': `Bearer ${token}` } })
             ]);
 
             setHorarios(horariosRes.data);
@@ -93,7 +93,7 @@ function Permisos() {
   const fetchEmpleados = async () => {
     try {
       const token = localStorage.getItem('token');
-      const res = await axios.get(`${API_URL}/api/empleados/`, {
+      const res = await axios.get(`${API_URL}/api/empleados/?fields=id,nombres,apellidos`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
       const data = Array.isArray(res.data) ? res.data : (res.data ? [res.data] : []);
@@ -93,7 +93,7 @@ function Rubros() {
   const fetchEmpleados = async () => {
     try {
       const token = localStorage.getItem('token');
-      const res = await axios.get(`${API_URL}/api/empleados/`, {
+      const res = await axios.get(`${API_URL}/api/empleados/?fields=id,nombres,apellidos`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
       setEmpleadosList(res.data || []);
@@ -89,7 +89,7 @@ function Usuarios() {
   const cargarEmpleados = async () => {
     try {
       const token = localStorage.getItem('token');
-      const response = await fetch(`${API_URL}/api/empleados/`, {
+      const response = await fetch(`${API_URL}/api/empleados/?fields=id,id_usuario`, {
         headers: {
           'Authorization': `Bearer ${token}`
         }